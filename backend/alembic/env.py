@@ -0,0 +1,60 @@
+import re
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.database import engine, Base
+from app.models import *  # Register all models on Base.metadata
+
+config = context.config
+
+# Skip logging setup when migrations run through run_migrations()
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Tables created outside the models, which autogenerate would otherwise
+# propose dropping: the search index (and SQLite's FTS5 shadow tables) and
+# the per-day page view tables / partitions
+UNMANAGED_TABLES = re.compile(r"^(product_search(_\w+)?|page_views_(\d{8}|default))$")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    table = object if type_ == "table" else getattr(object, "table", None)
+    if table is not None and reflected and UNMANAGED_TABLES.match(table.name):
+        return False
+    return True
+
+
+def run_migrations_offline():
+    """Emit SQL to stdout instead of running it (alembic upgrade --sql)."""
+    context.configure(
+        url=str(engine.url),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=engine.dialect.name == "sqlite",
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite cannot ALTER most things in place
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,696 @@
+"""Baseline schema
+
+The tables as they were when migrations were introduced, i.e. what
+``Base.metadata.create_all`` built at startup before then. Databases that
+were set up that way already have them; each table is only created when
+missing, so they are simply stamped at this revision. Later revisions add
+everything since, so this one must not change with the models.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.schema import has_table
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# Dependencies first; downgrade drops them in reverse
+TABLES = [
+    "categories", "email_logs", "flash_sales", "page_views", "points_settings", "product_bundles",
+    "product_variant_types", "users", "visitor_sessions", "vouchers", "addresses", "gift_cards",
+    "newsletter_subscribers", "products", "push_subscriptions", "cart_items", "flash_sale_items",
+    "orders", "product_accessories", "product_bundle_items", "product_images", "product_questions",
+    "product_relations", "product_specifications", "product_variants", "recently_viewed", "reviews",
+    "stock_notifications", "wishlist_items", "abandoned_cart_emails", "gift_card_transactions",
+    "order_items", "order_tracking", "payments", "points_transactions", "product_answers",
+    "product_variant_attributes", "referrals", "voucher_usages",
+]
+
+
+def upgrade():
+    if not has_table("categories"):
+        op.create_table(
+            "categories",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("slug", sa.String(length=100), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("image", sa.String(length=255), nullable=True),
+            sa.Column("parent_id", sa.Integer(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["parent_id"], ["categories.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_categories_id", "categories", ["id"], unique=False)
+        op.create_index("ix_categories_slug", "categories", ["slug"], unique=True)
+    if not has_table("email_logs"):
+        op.create_table(
+            "email_logs",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("recipient_email", sa.String(length=100), nullable=False),
+            sa.Column("email_type", sa.String(length=50), nullable=False),
+            sa.Column("subject", sa.String(length=255), nullable=False),
+            sa.Column("status", sa.String(length=20), nullable=True),
+            sa.Column("error_message", sa.Text(), nullable=True),
+            sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_email_logs_id", "email_logs", ["id"], unique=False)
+    if not has_table("flash_sales"):
+        op.create_table(
+            "flash_sales",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=200), nullable=False),
+            sa.Column("slug", sa.String(length=200), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("start_time", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("end_time", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("banner_image", sa.String(length=255), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_flash_sales_id", "flash_sales", ["id"], unique=False)
+        op.create_index("ix_flash_sales_slug", "flash_sales", ["slug"], unique=True)
+    if not has_table("page_views"):
+        op.create_table(
+            "page_views",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("visitor_hash", sa.String(length=64), nullable=False),
+            sa.Column("session_id", sa.String(length=64), nullable=False),
+            sa.Column("page_path", sa.String(length=500), nullable=False),
+            sa.Column("page_title", sa.String(length=255), nullable=True),
+            sa.Column("traffic_source", sa.String(length=50), nullable=True),
+            sa.Column("referrer_url", sa.String(length=500), nullable=True),
+            sa.Column("referrer_domain", sa.String(length=255), nullable=True),
+            sa.Column("utm_source", sa.String(length=100), nullable=True),
+            sa.Column("utm_medium", sa.String(length=100), nullable=True),
+            sa.Column("utm_campaign", sa.String(length=100), nullable=True),
+            sa.Column("country_code", sa.String(length=2), nullable=True),
+            sa.Column("country_name", sa.String(length=100), nullable=True),
+            sa.Column("city", sa.String(length=100), nullable=True),
+            sa.Column("device_type", sa.String(length=20), nullable=True),
+            sa.Column("browser", sa.String(length=50), nullable=True),
+            sa.Column("os", sa.String(length=50), nullable=True),
+            sa.Column("screen_width", sa.Integer(), nullable=True),
+            sa.Column("screen_height", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_page_views_created_at", "page_views", ["created_at"], unique=False)
+        op.create_index("ix_page_views_id", "page_views", ["id"], unique=False)
+        op.create_index("ix_page_views_session_id", "page_views", ["session_id"], unique=False)
+        op.create_index("ix_page_views_visitor_hash", "page_views", ["visitor_hash"], unique=False)
+    if not has_table("points_settings"):
+        op.create_table(
+            "points_settings",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("points_per_taka", sa.Float(), nullable=True),
+            sa.Column("taka_per_point", sa.Float(), nullable=True),
+            sa.Column("min_redeem_points", sa.Integer(), nullable=True),
+            sa.Column("max_redeem_percentage", sa.Float(), nullable=True),
+            sa.Column("points_expiry_days", sa.Integer(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_points_settings_id", "points_settings", ["id"], unique=False)
+    if not has_table("product_bundles"):
+        op.create_table(
+            "product_bundles",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=200), nullable=False),
+            sa.Column("slug", sa.String(length=200), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("bundle_price", sa.Float(), nullable=False),
+            sa.Column("savings_text", sa.String(length=100), nullable=True),
+            sa.Column("image", sa.String(length=255), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("start_date", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("end_date", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_bundles_id", "product_bundles", ["id"], unique=False)
+        op.create_index("ix_product_bundles_slug", "product_bundles", ["slug"], unique=True)
+    if not has_table("product_variant_types"):
+        op.create_table(
+            "product_variant_types",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=50), nullable=False),
+            sa.Column("display_type", sa.String(length=20), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_variant_types_id", "product_variant_types", ["id"], unique=False)
+    if not has_table("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("email", sa.String(length=100), nullable=False),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("password_hash", sa.String(length=255), nullable=False),
+            sa.Column("role", sa.String(length=20), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("reset_token", sa.String(length=100), nullable=True),
+            sa.Column("reset_token_expiry", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("google_id", sa.String(length=100), nullable=True),
+            sa.Column("facebook_id", sa.String(length=100), nullable=True),
+            sa.Column("picture", sa.String(length=255), nullable=True),
+            sa.Column("is_custom_picture", sa.Boolean(), nullable=True),
+            sa.Column("points_balance", sa.Integer(), nullable=True),
+            sa.Column("referral_code", sa.String(length=20), nullable=True),
+            sa.Column("referred_by", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["referred_by"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("facebook_id"),
+            sa.UniqueConstraint("google_id"),
+            sa.UniqueConstraint("referral_code"),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+        op.create_index("ix_users_id", "users", ["id"], unique=False)
+    if not has_table("visitor_sessions"):
+        op.create_table(
+            "visitor_sessions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("session_id", sa.String(length=64), nullable=False),
+            sa.Column("visitor_hash", sa.String(length=64), nullable=False),
+            sa.Column("page_count", sa.Integer(), nullable=True),
+            sa.Column("entry_page", sa.String(length=500), nullable=True),
+            sa.Column("exit_page", sa.String(length=500), nullable=True),
+            sa.Column("traffic_source", sa.String(length=50), nullable=True),
+            sa.Column("referrer_domain", sa.String(length=255), nullable=True),
+            sa.Column("country_code", sa.String(length=2), nullable=True),
+            sa.Column("city", sa.String(length=100), nullable=True),
+            sa.Column("device_type", sa.String(length=20), nullable=True),
+            sa.Column("browser", sa.String(length=50), nullable=True),
+            sa.Column("os", sa.String(length=50), nullable=True),
+            sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("last_activity", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("duration_seconds", sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_visitor_sessions_id", "visitor_sessions", ["id"], unique=False)
+        op.create_index("ix_visitor_sessions_session_id", "visitor_sessions", ["session_id"], unique=True)
+        op.create_index("ix_visitor_sessions_visitor_hash", "visitor_sessions", ["visitor_hash"], unique=False)
+    if not has_table("vouchers"):
+        op.create_table(
+            "vouchers",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("code", sa.String(length=50), nullable=False),
+            sa.Column("name", sa.String(length=200), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("discount_type", sa.String(length=20), nullable=False),
+            sa.Column("discount_value", sa.Float(), nullable=False),
+            sa.Column("min_order_amount", sa.Float(), nullable=True),
+            sa.Column("max_discount_amount", sa.Float(), nullable=True),
+            sa.Column("usage_limit", sa.Integer(), nullable=True),
+            sa.Column("usage_count", sa.Integer(), nullable=True),
+            sa.Column("per_user_limit", sa.Integer(), nullable=True),
+            sa.Column("start_date", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("end_date", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_vouchers_code", "vouchers", ["code"], unique=True)
+        op.create_index("ix_vouchers_id", "vouchers", ["id"], unique=False)
+    if not has_table("addresses"):
+        op.create_table(
+            "addresses",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("phone", sa.String(length=20), nullable=False),
+            sa.Column("address", sa.String(length=255), nullable=False),
+            sa.Column("area", sa.String(length=100), nullable=True),
+            sa.Column("city", sa.String(length=100), nullable=False),
+            sa.Column("is_default", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_addresses_id", "addresses", ["id"], unique=False)
+    if not has_table("gift_cards"):
+        op.create_table(
+            "gift_cards",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("code", sa.String(length=20), nullable=False),
+            sa.Column("initial_balance", sa.Float(), nullable=False),
+            sa.Column("current_balance", sa.Float(), nullable=False),
+            sa.Column("purchaser_id", sa.Integer(), nullable=True),
+            sa.Column("recipient_email", sa.String(length=100), nullable=True),
+            sa.Column("recipient_name", sa.String(length=100), nullable=True),
+            sa.Column("personal_message", sa.Text(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["purchaser_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_gift_cards_code", "gift_cards", ["code"], unique=True)
+        op.create_index("ix_gift_cards_id", "gift_cards", ["id"], unique=False)
+    if not has_table("newsletter_subscribers"):
+        op.create_table(
+            "newsletter_subscribers",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("email", sa.String(length=100), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=True),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("subscribed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("unsubscribed_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("source", sa.String(length=50), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_newsletter_subscribers_email", "newsletter_subscribers", ["email"], unique=True)
+        op.create_index("ix_newsletter_subscribers_id", "newsletter_subscribers", ["id"], unique=False)
+    if not has_table("products"):
+        op.create_table(
+            "products",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=255), nullable=False),
+            sa.Column("slug", sa.String(length=255), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("original_price", sa.Float(), nullable=True),
+            sa.Column("discount", sa.Integer(), nullable=True),
+            sa.Column("stock", sa.Integer(), nullable=True),
+            sa.Column("category_id", sa.Integer(), nullable=False),
+            sa.Column("brand", sa.String(length=100), nullable=True),
+            sa.Column("sku", sa.String(length=50), nullable=True),
+            sa.Column("is_featured", sa.Boolean(), nullable=True),
+            sa.Column("is_new", sa.Boolean(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("rating", sa.Float(), nullable=True),
+            sa.Column("review_count", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("primary_image_url", sa.String(length=255), nullable=True),
+            sa.Column("has_image", sa.Boolean(), nullable=False),
+            sa.ForeignKeyConstraint(["category_id"], ["categories.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("sku"),
+        )
+        op.create_index("ix_products_has_image", "products", ["has_image"], unique=False)
+        op.create_index("ix_products_id", "products", ["id"], unique=False)
+        op.create_index("ix_products_slug", "products", ["slug"], unique=True)
+    if not has_table("push_subscriptions"):
+        op.create_table(
+            "push_subscriptions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("endpoint", sa.Text(), nullable=False),
+            sa.Column("p256dh_key", sa.Text(), nullable=False),
+            sa.Column("auth_key", sa.Text(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_push_subscriptions_id", "push_subscriptions", ["id"], unique=False)
+    if not has_table("cart_items"):
+        op.create_table(
+            "cart_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_cart_items_id", "cart_items", ["id"], unique=False)
+    if not has_table("flash_sale_items"):
+        op.create_table(
+            "flash_sale_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("flash_sale_id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("flash_price", sa.Float(), nullable=False),
+            sa.Column("flash_stock", sa.Integer(), nullable=False),
+            sa.Column("sold_count", sa.Integer(), nullable=True),
+            sa.Column("sort_order", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["flash_sale_id"], ["flash_sales.id"], ),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_flash_sale_items_id", "flash_sale_items", ["id"], unique=False)
+    if not has_table("orders"):
+        op.create_table(
+            "orders",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_number", sa.String(length=50), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("courier_name", sa.String(length=50), nullable=True),
+            sa.Column("courier_tracking_id", sa.String(length=100), nullable=True),
+            sa.Column("status", sa.String(length=20), nullable=True),
+            sa.Column("payment_status", sa.String(length=20), nullable=True),
+            sa.Column("payment_method", sa.String(length=20), nullable=True),
+            sa.Column("subtotal", sa.Float(), nullable=False),
+            sa.Column("shipping_cost", sa.Float(), nullable=True),
+            sa.Column("total", sa.Float(), nullable=False),
+            sa.Column("voucher_id", sa.Integer(), nullable=True),
+            sa.Column("voucher_code", sa.String(length=50), nullable=True),
+            sa.Column("voucher_discount", sa.Float(), nullable=True),
+            sa.Column("gift_card_id", sa.Integer(), nullable=True),
+            sa.Column("gift_card_amount", sa.Float(), nullable=True),
+            sa.Column("points_redeemed", sa.Integer(), nullable=True),
+            sa.Column("points_discount", sa.Float(), nullable=True),
+            sa.Column("shipping_name", sa.String(length=100), nullable=False),
+            sa.Column("shipping_phone", sa.String(length=20), nullable=False),
+            sa.Column("shipping_email", sa.String(length=100), nullable=True),
+            sa.Column("shipping_address", sa.String(length=255), nullable=False),
+            sa.Column("shipping_area", sa.String(length=100), nullable=True),
+            sa.Column("shipping_city", sa.String(length=100), nullable=False),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(["gift_card_id"], ["gift_cards.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.ForeignKeyConstraint(["voucher_id"], ["vouchers.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_orders_id", "orders", ["id"], unique=False)
+        op.create_index("ix_orders_order_number", "orders", ["order_number"], unique=True)
+    if not has_table("product_accessories"):
+        op.create_table(
+            "product_accessories",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("accessory_id", sa.Integer(), nullable=False),
+            sa.Column("sort_order", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["accessory_id"], ["products.id"], ),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_accessories_id", "product_accessories", ["id"], unique=False)
+    if not has_table("product_bundle_items"):
+        op.create_table(
+            "product_bundle_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("bundle_id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["bundle_id"], ["product_bundles.id"], ),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_bundle_items_id", "product_bundle_items", ["id"], unique=False)
+    if not has_table("product_images"):
+        op.create_table(
+            "product_images",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("url", sa.String(length=255), nullable=False),
+            sa.Column("is_primary", sa.Boolean(), nullable=True),
+            sa.Column("sort_order", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_images_id", "product_images", ["id"], unique=False)
+    if not has_table("product_questions"):
+        op.create_table(
+            "product_questions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("question", sa.Text(), nullable=False),
+            sa.Column("is_approved", sa.Boolean(), nullable=True),
+            sa.Column("is_answered", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_questions_id", "product_questions", ["id"], unique=False)
+    if not has_table("product_relations"):
+        op.create_table(
+            "product_relations",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("related_product_id", sa.Integer(), nullable=False),
+            sa.Column("relation_type", sa.String(length=50), nullable=False),
+            sa.Column("score", sa.Float(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.ForeignKeyConstraint(["related_product_id"], ["products.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_relations_id", "product_relations", ["id"], unique=False)
+    if not has_table("product_specifications"):
+        op.create_table(
+            "product_specifications",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("spec_group", sa.String(length=100), nullable=False),
+            sa.Column("spec_name", sa.String(length=100), nullable=False),
+            sa.Column("spec_value", sa.String(length=255), nullable=False),
+            sa.Column("sort_order", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_specifications_id", "product_specifications", ["id"], unique=False)
+    if not has_table("product_variants"):
+        op.create_table(
+            "product_variants",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("sku", sa.String(length=50), nullable=False),
+            sa.Column("price", sa.Float(), nullable=True),
+            sa.Column("stock", sa.Integer(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("sku"),
+        )
+        op.create_index("ix_product_variants_id", "product_variants", ["id"], unique=False)
+    if not has_table("recently_viewed"):
+        op.create_table(
+            "recently_viewed",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("session_id", sa.String(length=100), nullable=True),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("viewed_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_recently_viewed_id", "recently_viewed", ["id"], unique=False)
+        op.create_index("ix_recently_viewed_session_id", "recently_viewed", ["session_id"], unique=False)
+    if not has_table("reviews"):
+        op.create_table(
+            "reviews",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("rating", sa.Integer(), nullable=False),
+            sa.Column("comment", sa.Text(), nullable=True),
+            sa.Column("is_verified", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_reviews_id", "reviews", ["id"], unique=False)
+    if not has_table("stock_notifications"):
+        op.create_table(
+            "stock_notifications",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("email", sa.String(length=100), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("is_notified", sa.Boolean(), nullable=True),
+            sa.Column("notified_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_stock_notifications_id", "stock_notifications", ["id"], unique=False)
+    if not has_table("wishlist_items"):
+        op.create_table(
+            "wishlist_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_wishlist_items_id", "wishlist_items", ["id"], unique=False)
+    if not has_table("abandoned_cart_emails"):
+        op.create_table(
+            "abandoned_cart_emails",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("cart_snapshot", sa.Text(), nullable=False),
+            sa.Column("cart_total", sa.Float(), nullable=False),
+            sa.Column("email_sequence", sa.Integer(), nullable=True),
+            sa.Column("sent_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("opened_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("clicked_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("converted", sa.Boolean(), nullable=True),
+            sa.Column("conversion_order_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["conversion_order_id"], ["orders.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_abandoned_cart_emails_id", "abandoned_cart_emails", ["id"], unique=False)
+    if not has_table("gift_card_transactions"):
+        op.create_table(
+            "gift_card_transactions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("gift_card_id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=True),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("transaction_type", sa.String(length=20), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["gift_card_id"], ["gift_cards.id"], ),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_gift_card_transactions_id", "gift_card_transactions", ["id"], unique=False)
+    if not has_table("order_items"):
+        op.create_table(
+            "order_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("price", sa.Float(), nullable=False),
+            sa.Column("total", sa.Float(), nullable=False),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_order_items_id", "order_items", ["id"], unique=False)
+    if not has_table("order_tracking"):
+        op.create_table(
+            "order_tracking",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=False),
+            sa.Column("status", sa.String(length=50), nullable=False),
+            sa.Column("description", sa.String(length=255), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_order_tracking_id", "order_tracking", ["id"], unique=False)
+    if not has_table("payments"):
+        op.create_table(
+            "payments",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=False),
+            sa.Column("payment_method", sa.String(length=20), nullable=False),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("transaction_id", sa.String(length=100), nullable=True),
+            sa.Column("status", sa.String(length=20), nullable=True),
+            sa.Column("payment_data", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_payments_id", "payments", ["id"], unique=False)
+    if not has_table("points_transactions"):
+        op.create_table(
+            "points_transactions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("points", sa.Integer(), nullable=False),
+            sa.Column("transaction_type", sa.String(length=50), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=True),
+            sa.Column("description", sa.String(length=255), nullable=True),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_points_transactions_id", "points_transactions", ["id"], unique=False)
+    if not has_table("product_answers"):
+        op.create_table(
+            "product_answers",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("question_id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("answer", sa.Text(), nullable=False),
+            sa.Column("is_admin_answer", sa.Boolean(), nullable=True),
+            sa.Column("is_approved", sa.Boolean(), nullable=True),
+            sa.Column("helpful_count", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["question_id"], ["product_questions.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_answers_id", "product_answers", ["id"], unique=False)
+    if not has_table("product_variant_attributes"):
+        op.create_table(
+            "product_variant_attributes",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("variant_id", sa.Integer(), nullable=False),
+            sa.Column("variant_type_id", sa.Integer(), nullable=False),
+            sa.Column("value", sa.String(length=100), nullable=False),
+            sa.ForeignKeyConstraint(["variant_id"], ["product_variants.id"], ),
+            sa.ForeignKeyConstraint(["variant_type_id"], ["product_variant_types.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_product_variant_attributes_id", "product_variant_attributes", ["id"], unique=False)
+    if not has_table("referrals"):
+        op.create_table(
+            "referrals",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("referrer_id", sa.Integer(), nullable=False),
+            sa.Column("referred_email", sa.String(length=100), nullable=False),
+            sa.Column("referred_user_id", sa.Integer(), nullable=True),
+            sa.Column("referral_code", sa.String(length=20), nullable=False),
+            sa.Column("status", sa.String(length=20), nullable=True),
+            sa.Column("referrer_reward_points", sa.Integer(), nullable=True),
+            sa.Column("referred_reward_points", sa.Integer(), nullable=True),
+            sa.Column("first_order_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+            sa.ForeignKeyConstraint(["first_order_id"], ["orders.id"], ),
+            sa.ForeignKeyConstraint(["referred_user_id"], ["users.id"], ),
+            sa.ForeignKeyConstraint(["referrer_id"], ["users.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_referrals_id", "referrals", ["id"], unique=False)
+        op.create_index("ix_referrals_referral_code", "referrals", ["referral_code"], unique=True)
+    if not has_table("voucher_usages"):
+        op.create_table(
+            "voucher_usages",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("voucher_id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=True),
+            sa.Column("used_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+            sa.ForeignKeyConstraint(["order_id"], ["orders.id"], ),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"], ),
+            sa.ForeignKeyConstraint(["voucher_id"], ["vouchers.id"], ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_voucher_usages_id", "voucher_usages", ["id"], unique=False)
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        if has_table(table):
+            op.drop_table(table)
@@ -0,0 +1,64 @@
+"""Columns previously added by one-off scripts
+
+Folds add_column.py, add_voucher_columns.py and backfill_product_images.py
+into the migration history. Each column is only added when missing.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.schema import add_column_if_missing, create_index_if_missing, drop_index_if_exists, has_column
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    add_column_if_missing("users", sa.Column("is_custom_picture", sa.Boolean(), server_default=sa.false()))
+
+    # The voucher FK is not added here: SQLite cannot add constraints in
+    # place and the baseline already declares it on fresh databases
+    add_column_if_missing("orders", sa.Column("voucher_id", sa.Integer()))
+    add_column_if_missing("orders", sa.Column("voucher_code", sa.String(50)))
+    add_column_if_missing("orders", sa.Column("voucher_discount", sa.Float(), server_default="0"))
+
+    backfill = not has_column("products", "primary_image_url")
+    add_column_if_missing("products", sa.Column("primary_image_url", sa.String(255)))
+    add_column_if_missing(
+        "products",
+        sa.Column("has_image", sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+    create_index_if_missing("ix_products_has_image", "products", ["has_image"])
+
+    if backfill:
+        # Primary image first, then the oldest image, matching Product.image
+        op.execute("""
+            UPDATE products
+            SET primary_image_url = (
+                SELECT pi.url FROM product_images pi
+                WHERE pi.product_id = products.id
+                ORDER BY pi.is_primary DESC, pi.id
+                LIMIT 1
+            ),
+            has_image = EXISTS (
+                SELECT 1 FROM product_images pi WHERE pi.product_id = products.id
+            )
+        """)
+
+
+def downgrade():
+    drop_index_if_exists("ix_products_has_image", "products")
+    with op.batch_alter_table("products") as batch:
+        batch.drop_column("has_image")
+        batch.drop_column("primary_image_url")
+    with op.batch_alter_table("orders") as batch:
+        batch.drop_column("voucher_discount")
+        batch.drop_column("voucher_code")
+        batch.drop_column("voucher_id")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("is_custom_picture")
@@ -0,0 +1,55 @@
+"""Indexes for the hot listing and lookup queries
+
+- Storefront listings filter on is_active plus is_featured / is_new and
+  sort by created_at.
+- Order history is per user, newest first; the admin order list and the
+  sales reports filter on status / payment_status and a created_at range.
+- Child tables were only indexed on their primary key, so every
+  ``product.images``, ``order.items``, cart, wishlist and review lookup
+  was a full table scan.
+
+``tests/test_query_plans.py`` checks the planner uses them.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from app.utils.schema import create_index_if_missing, drop_index_if_exists
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ("ix_products_active_featured_created", "products", ["is_active", "is_featured", "created_at"]),
+    ("ix_products_active_new_created", "products", ["is_active", "is_new", "created_at"]),
+    ("ix_products_category_id", "products", ["category_id"]),
+    ("ix_product_images_product_id", "product_images", ["product_id"]),
+    ("ix_orders_user_created", "orders", ["user_id", "created_at"]),
+    ("ix_orders_status_payment_created", "orders", ["status", "payment_status", "created_at"]),
+    ("ix_orders_payment_created", "orders", ["payment_status", "created_at"]),
+    ("ix_orders_created_at", "orders", ["created_at"]),
+    ("ix_order_items_order_id", "order_items", ["order_id"]),
+    ("ix_order_items_product_id", "order_items", ["product_id"]),
+    ("ix_order_tracking_order_id", "order_tracking", ["order_id"]),
+    ("ix_payments_order_id", "payments", ["order_id"]),
+    ("ix_reviews_product_id", "reviews", ["product_id"]),
+    ("ix_wishlist_items_user_id", "wishlist_items", ["user_id"]),
+    ("ix_cart_items_user_id", "cart_items", ["user_id"]),
+    ("ix_flash_sale_items_flash_sale_id", "flash_sale_items", ["flash_sale_id"]),
+    ("ix_voucher_usages_voucher_user", "voucher_usages", ["voucher_id", "user_id"]),
+    ("ix_recently_viewed_user_viewed", "recently_viewed", ["user_id", "viewed_at"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        create_index_if_missing(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        drop_index_if_exists(name, table)
@@ -0,0 +1,56 @@
+"""Daily sales rollup tables
+
+Per-day order, revenue and customer totals with per-category and
+per-payment-method breakdowns, read by the admin dashboard instead of
+aggregating ``orders`` on every load. They are filled from existing orders
+by ``migrate.py`` (``ensure_sales_rollups``) and maintained by
+``app.services.sales_rollup`` from then on.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.schema import has_table
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table("daily_sales_rollup"):
+        op.create_table(
+            "daily_sales_rollup",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("orders", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("paid_orders", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("units", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("new_customers", sa.Integer(), nullable=False, server_default="0"),
+        )
+    if not has_table("daily_category_sales"):
+        op.create_table(
+            "daily_category_sales",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("category_id", sa.Integer(), primary_key=True),
+            sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("units", sa.Integer(), nullable=False, server_default="0"),
+        )
+    if not has_table("daily_payment_sales"):
+        op.create_table(
+            "daily_payment_sales",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("payment_method", sa.String(20), primary_key=True),
+            sa.Column("revenue", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("orders", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+
+def downgrade():
+    for table in ("daily_payment_sales", "daily_category_sales", "daily_sales_rollup"):
+        if has_table(table):
+            op.drop_table(table)
@@ -0,0 +1,48 @@
+"""Export jobs table
+
+Background exports submitted through ``/admin/exports/jobs``, with their
+progress and the file they produced.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.schema import has_table
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if has_table("export_jobs"):
+        return
+    op.create_table(
+        "export_jobs",
+        sa.Column("id", sa.String(32), primary_key=True),
+        sa.Column("export", sa.String(30), nullable=False),
+        sa.Column("format", sa.String(10), nullable=False),
+        sa.Column("params", sa.Text(), nullable=False),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("rows_written", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_rows", sa.Integer(), nullable=True),
+        sa.Column("file_path", sa.String(500), nullable=True),
+        sa.Column("file_size", sa.Integer(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("requested_by", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_export_jobs_fingerprint_created", "export_jobs", ["fingerprint", "created_at"])
+
+
+def downgrade():
+    if has_table("export_jobs"):
+        op.drop_table("export_jobs")
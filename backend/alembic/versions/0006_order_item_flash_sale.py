@@ -0,0 +1,35 @@
+"""Flash sale reference on order items
+
+Records which flash sale item a line was bought under, so cancelling the
+order can return the units to the flash sale allocation.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.schema import add_column_if_missing, has_column, has_foreign_key
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    add_column_if_missing("order_items", sa.Column("flash_sale_item_id", sa.Integer()))
+    if not has_foreign_key("order_items", "flash_sale_item_id"):
+        # Batch mode, since SQLite can only add a constraint by rebuilding the table
+        with op.batch_alter_table("order_items") as batch:
+            batch.create_foreign_key(
+                "fk_order_items_flash_sale_item_id", "flash_sale_items",
+                ["flash_sale_item_id"], ["id"], ondelete="SET NULL"
+            )
+
+
+def downgrade():
+    if has_column("order_items", "flash_sale_item_id"):
+        with op.batch_alter_table("order_items") as batch:
+            batch.drop_column("flash_sale_item_id")
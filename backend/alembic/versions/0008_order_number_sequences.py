@@ -0,0 +1,33 @@
+"""Order number sequences table
+
+Per-day counters that order numbers (``ORD-YYYYMMDD-NNNNNNN``) are drawn
+from, replacing random suffixes.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.schema import has_table
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if has_table("order_number_sequences"):
+        return
+    op.create_table(
+        "order_number_sequences",
+        sa.Column("day", sa.String(8), primary_key=True),
+        sa.Column("last_value", sa.Integer(), nullable=False),
+    )
+
+
+def downgrade():
+    if has_table("order_number_sequences"):
+        op.drop_table("order_number_sequences")
@@ -0,0 +1,102 @@
+"""Visitor analytics rollups and daily page view partitions
+
+- ``visitor_daily_stats``, ``visitor_hourly_stats`` and
+  ``visitor_daily_breakdown`` hold per-day and per-hour totals that the
+  analytics endpoints read instead of counting raw page views. They are
+  filled from existing page views by ``migrate.py``
+  (``ensure_visitor_rollups``).
+- On PostgreSQL, ``page_views`` becomes a table partitioned by day on
+  ``created_at``, so expired days are dropped rather than deleted. Existing
+  rows move to the default partition; ``app.services.page_view_storage``
+  creates the daily partitions ahead of time. (SQLite has no partitioning;
+  new page views go to per-day tables created on demand.)
+
+Downgrade drops the rollup tables; a partitioned ``page_views`` keeps
+working as is.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.schema import has_table
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def _partition_page_views():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not has_table("page_views"):
+        return
+    relkind = bind.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = 'page_views'::regclass")).scalar()
+    if relkind == "p":
+        return
+
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('page_views', 'id')")).scalar()
+    op.execute("UPDATE page_views SET created_at = now() WHERE created_at IS NULL")
+    op.execute(
+        "CREATE TABLE page_views_partitioned (LIKE page_views INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    # A partitioned table's primary key must include the partition column
+    op.execute(
+        "ALTER TABLE page_views_partitioned "
+        "ADD CONSTRAINT page_views_partitioned_pkey PRIMARY KEY (id, created_at)"
+    )
+    op.execute("CREATE TABLE page_views_default PARTITION OF page_views_partitioned DEFAULT")
+    op.execute("INSERT INTO page_views_partitioned SELECT * FROM page_views")
+    if sequence:
+        # Keep the id sequence when the old table is dropped
+        op.execute(f"ALTER SEQUENCE {sequence} OWNED BY page_views_partitioned.id")
+    op.execute("DROP TABLE page_views")
+    op.execute("ALTER TABLE page_views_partitioned RENAME TO page_views")
+    op.execute("ALTER TABLE page_views RENAME CONSTRAINT page_views_partitioned_pkey TO page_views_pkey")
+    for column in ("visitor_hash", "session_id", "created_at"):
+        op.execute(f"CREATE INDEX ix_page_views_{column} ON page_views ({column})")
+
+
+def upgrade():
+    if not has_table("visitor_daily_stats"):
+        op.create_table(
+            "visitor_daily_stats",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("page_views", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("visitors", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("sessions", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("session_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("session_duration", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("session_pages", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("bounces", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        )
+    if not has_table("visitor_hourly_stats"):
+        op.create_table(
+            "visitor_hourly_stats",
+            sa.Column("hour", sa.DateTime(), primary_key=True),
+            sa.Column("page_views", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("visitors", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("sessions", sa.Integer(), nullable=False, server_default="0"),
+        )
+    if not has_table("visitor_daily_breakdown"):
+        op.create_table(
+            "visitor_daily_breakdown",
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("dimension", sa.String(20), primary_key=True),
+            sa.Column("value", sa.String(500), primary_key=True),
+            sa.Column("label", sa.String(255), nullable=True),
+            sa.Column("page_views", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("visitors", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+    _partition_page_views()
+
+
+def downgrade():
+    for table in ("visitor_daily_breakdown", "visitor_hourly_stats", "visitor_daily_stats"):
+        if has_table(table):
+            op.drop_table(table)
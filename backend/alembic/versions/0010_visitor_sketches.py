@@ -0,0 +1,38 @@
+"""Visitor and session HyperLogLog sketches
+
+``visitor_sketches`` holds mergeable distinct-count sketches of each hour's
+and day's visitors and sessions, per traffic source, device, browser,
+country and page for days. They are filled from the raw page views still
+kept by ``migrate.py`` (``ensure_visitor_rollups``).
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.schema import has_table
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not has_table("visitor_sketches"):
+        op.create_table(
+            "visitor_sketches",
+            sa.Column("period", sa.String(4), primary_key=True),
+            sa.Column("start", sa.DateTime(), primary_key=True),
+            sa.Column("dimension", sa.String(20), primary_key=True, server_default=""),
+            sa.Column("value", sa.String(500), primary_key=True, server_default=""),
+            sa.Column("visitors", sa.LargeBinary(), nullable=False),
+            sa.Column("sessions", sa.LargeBinary(), nullable=False),
+        )
+
+
+def downgrade():
+    if has_table("visitor_sketches"):
+        op.drop_table("visitor_sketches")
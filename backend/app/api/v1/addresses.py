@@ -11,7 +11,7 @@ router = APIRouter(prefix="/addresses", tags=["Addresses"])
 
 
 @router.get("", response_model=List[AddressResponse])
-async def get_addresses(
+def get_addresses(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
 ):
@@ -21,7 +21,7 @@ async def get_addresses(
 
 
 @router.post("", response_model=AddressResponse)
-async def create_address(
+def create_address(
     address_data: AddressCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
@@ -55,7 +55,7 @@ async def create_address(
 
 
 @router.put("/{address_id}", response_model=AddressResponse)
-async def update_address(
+def update_address(
     address_id: int,
     address_data: AddressCreate,
     db: Session = Depends(get_db),
@@ -90,7 +90,7 @@ async def update_address(
 
 
 @router.delete("/{address_id}")
-async def delete_address(
+def delete_address(
     address_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
@@ -122,7 +122,7 @@ async def delete_address(
 
 
 @router.put("/{address_id}/default")
-async def set_default_address(
+def set_default_address(
     address_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
@@ -1,57 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_
+from sqlalchemy import Float, func, desc, and_, case
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 import os
 import uuid
 import math
-import time
 
 from app.database import get_db
 from app.models.models import (
     User, Product, Order, OrderItem, Category,
-    ProductImage, UserRole, OrderStatus, PaymentStatus, Address, OrderTracking
+    ProductImage, UserRole, OrderStatus, PaymentStatus, Address, OrderTracking,
+    DailySalesRollup, DailyCategorySales, DailyPaymentSales
 )
 from app.utils.auth import get_current_user, get_current_admin
+from app.utils.pagination import paginate_keyset, cursor_for, cached_count
 from app.config import settings
+from app.services import predictions
+from app.services.cache import Cache, create_backend
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-# ============ Simple In-Memory Cache ============
-# Cache expensive dashboard queries for faster loading
-
-class SimpleCache:
-    def __init__(self):
-        self._cache: Dict[str, Any] = {}
-        self._timestamps: Dict[str, float] = {}
-
-    def get(self, key: str, max_age_seconds: int = 60) -> Optional[Any]:
-        """Get cached value if not expired"""
-        if key in self._cache:
-            if time.time() - self._timestamps[key] < max_age_seconds:
-                return self._cache[key]
-        return None
-
-    def set(self, key: str, value: Any):
-        """Set cache value"""
-        self._cache[key] = value
-        self._timestamps[key] = time.time()
-
-    def invalidate(self, pattern: str = None):
-        """Clear cache entries matching pattern or all if no pattern"""
-        if pattern is None:
-            self._cache.clear()
-            self._timestamps.clear()
-        else:
-            keys_to_delete = [k for k in self._cache if pattern in k]
-            for k in keys_to_delete:
-                del self._cache[k]
-                del self._timestamps[k]
+# ============ Dashboard Cache ============
+# Dashboard and analytics results are expensive to compute and
+# identical for every admin. Concurrent misses compute once; with a Redis or
+# file cache backend every worker shares the same entries.
+
+DASHBOARD_STATS_TTL = 60
+SALES_DATA_TTL = 120
+ANALYTICS_TTL = 300
 
-# Global cache instance
-cache = SimpleCache()
+admin_cache = Cache(
+    create_backend("admin", max_entries=settings.admin_cache_max_entries),
+    ttl=DASHBOARD_STATS_TTL,
+)
 
 # ============ Pydantic Schemas ============
 
@@ -89,6 +72,14 @@ class InventoryItem(BaseModel):
     status: str
     category: str
     price: float
+    days_of_cover: Optional[float] = None  # None when nothing sold recently
+
+class InventoryPage(BaseModel):
+    items: List[InventoryItem]
+    counts: Dict[str, int]  # Products per status, ignoring the status filter
+    total: int
+    next_cursor: Optional[str] = None
+    has_more: bool
 
 class PredictionData(BaseModel):
     id: int
@@ -159,43 +150,37 @@ class ProductUpdate(BaseModel):
 # ============ Dashboard Endpoints ============
 
 @router.get("/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(
+def get_dashboard_stats(
     db: Session = Depends(get_db),
     _: User = Depends(get_current_admin)
 ):
     """Get main dashboard statistics (cached for 60 seconds)"""
+    return admin_cache.get_or_compute(
+        "dashboard_stats", lambda: _compute_dashboard_stats(db), ttl=DASHBOARD_STATS_TTL
+    )
 
-    # Check cache first
-    cached = cache.get("dashboard_stats", max_age_seconds=60)
-    if cached:
-        return cached
-
-    # Current period (last 30 days)
-    now = datetime.utcnow()
-    thirty_days_ago = now - timedelta(days=30)
-    sixty_days_ago = now - timedelta(days=60)
-
-    # Total revenue (all time)
-    total_revenue = db.query(func.sum(Order.total)).filter(
-        Order.payment_status == PaymentStatus.COMPLETED
-    ).scalar() or 0
-
-    # Revenue this period
-    current_period_revenue = db.query(func.sum(Order.total)).filter(
-        and_(
-            Order.payment_status == PaymentStatus.COMPLETED,
-            Order.created_at >= thirty_days_ago
-        )
-    ).scalar() or 0
+def _compute_dashboard_stats(db: Session) -> DashboardStats:
+    # Revenue and orders come from the daily rollups: the last 30 days
+    # (today included) against the 30 days before them
+    today = datetime.utcnow().date()
+    period_start = today - timedelta(days=29)
+    previous_start = today - timedelta(days=59)
+
+    # All-time totals
+    total_revenue, total_orders = db.query(
+        func.sum(DailySalesRollup.revenue),
+        func.sum(DailySalesRollup.orders)
+    ).one()
+    total_revenue = total_revenue or 0
+    total_orders = total_orders or 0
+
+    recent_days = db.query(DailySalesRollup).filter(
+        DailySalesRollup.day >= previous_start
+    ).all()
 
-    # Revenue previous period
-    previous_period_revenue = db.query(func.sum(Order.total)).filter(
-        and_(
-            Order.payment_status == PaymentStatus.COMPLETED,
-            Order.created_at >= sixty_days_ago,
-            Order.created_at < thirty_days_ago
-        )
-    ).scalar() or 0
+    # Revenue this period vs previous period
+    current_period_revenue = sum(d.revenue for d in recent_days if d.day >= period_start)
+    previous_period_revenue = sum(d.revenue for d in recent_days if d.day < period_start)
 
     # Calculate revenue change percentage
     if previous_period_revenue > 0:
@@ -203,21 +188,9 @@ async def get_dashboard_stats(
     else:
         revenue_change = 100 if current_period_revenue > 0 else 0
 
-    # Total orders
-    total_orders = db.query(func.count(Order.id)).scalar() or 0
-
-    # Orders this period
-    current_period_orders = db.query(func.count(Order.id)).filter(
-        Order.created_at >= thirty_days_ago
-    ).scalar() or 0
-
-    # Orders previous period
-    previous_period_orders = db.query(func.count(Order.id)).filter(
-        and_(
-            Order.created_at >= sixty_days_ago,
-            Order.created_at < thirty_days_ago
-        )
-    ).scalar() or 0
+    # Orders this period vs previous period
+    current_period_orders = sum(d.orders for d in recent_days if d.day >= period_start)
+    previous_period_orders = sum(d.orders for d in recent_days if d.day < period_start)
 
     # Calculate orders change percentage
     if previous_period_orders > 0:
@@ -245,7 +218,7 @@ async def get_dashboard_stats(
         and_(Product.stock < 10, Product.is_active == True)
     ).scalar() or 0
 
-    result = DashboardStats(
+    return DashboardStats(
         total_revenue=round(total_revenue, 2),
         total_orders=total_orders,
         total_products=total_products,
@@ -256,55 +229,45 @@ async def get_dashboard_stats(
         orders_change=round(orders_change, 1)
     )
 
-    # Cache the result
-    cache.set("dashboard_stats", result)
-    return result
-
 @router.get("/dashboard/sales", response_model=List[SalesData])
-async def get_sales_data(
+def get_sales_data(
     period: str = "7d",  # 7d, 30d, 90d, 1y
     db: Session = Depends(get_db),
     _: User = Depends(get_current_admin)
 ):
     """Get sales data for charts (cached for 120 seconds)"""
+    return admin_cache.get_or_compute(
+        f"sales_data:{period}", lambda: _compute_sales_data(db, period), ttl=SALES_DATA_TTL
+    )
 
-    # Check cache first
-    cache_key = f"sales_data_{period}"
-    cached = cache.get(cache_key, max_age_seconds=120)
-    if cached:
-        return cached
-
+def _compute_sales_data(db: Session, period: str) -> List[SalesData]:
     now = datetime.utcnow()
 
     if period == "7d":
-        start_date = now - timedelta(days=7)
+        start_day = now.date() - timedelta(days=6)
         group_format = "%Y-%m-%d"
     elif period == "30d":
-        start_date = now - timedelta(days=30)
+        start_day = now.date() - timedelta(days=29)
         group_format = "%Y-%m-%d"
     elif period == "90d":
-        start_date = now - timedelta(days=90)
+        start_day = now.date() - timedelta(days=90)
         group_format = "%Y-%W"  # Week
     else:  # 1y
-        start_date = now - timedelta(days=365)
+        start_day = now.date() - timedelta(days=365)
         group_format = "%Y-%m"  # Month
-    
-    # Get orders in the period
-    orders = db.query(Order).filter(
-        and_(
-            Order.created_at >= start_date,
-            Order.payment_status == PaymentStatus.COMPLETED
-        )
-    ).all()
-    
-    # Group by date
+
+    # Group the period's daily rollups
+    rollups = db.query(DailySalesRollup).filter(DailySalesRollup.day >= start_day).all()
+
     sales_by_date = {}
-    for order in orders:
-        date_key = order.created_at.strftime(group_format)
+    for rollup in rollups:
+        if not rollup.paid_orders:
+            continue
+        date_key = rollup.day.strftime(group_format)
         if date_key not in sales_by_date:
             sales_by_date[date_key] = {"sales": 0, "orders": 0}
-        sales_by_date[date_key]["sales"] += order.total
-        sales_by_date[date_key]["orders"] += 1
+        sales_by_date[date_key]["sales"] += rollup.revenue
+        sales_by_date[date_key]["orders"] += rollup.paid_orders
     
     # Fill in missing dates for 7d and 30d
     result = []
@@ -328,12 +291,25 @@ async def get_sales_data(
                 orders=data["orders"]
             ))
 
-    # Cache the result
-    cache.set(cache_key, result)
     return result
 
+@router.get("/dashboard/cache")
+def get_dashboard_cache_stats(_: User = Depends(get_current_admin)):
+    """Dashboard and prediction cache hit/miss counters (counted per worker)"""
+    return {
+        "dashboard": admin_cache.stats(),
+        "predictions": predictions.prediction_cache.stats(),
+    }
+
+@router.delete("/dashboard/cache")
+def clear_dashboard_cache(_: User = Depends(get_current_admin)):
+    """Drop cached dashboard, analytics and prediction results"""
+    admin_cache.clear()
+    predictions.prediction_cache.clear()
+    return {"message": "Dashboard cache cleared"}
+
 @router.get("/dashboard/recent-orders", response_model=List[RecentOrder])
-async def get_recent_orders(
+def get_recent_orders(
     limit: int = 10,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
@@ -358,7 +334,7 @@ async def get_recent_orders(
 # ============ Product Performance ============
 
 @router.get("/products/top-selling", response_model=List[ProductPerformance])
-async def get_top_selling_products(
+def get_top_selling_products(
     limit: int = 10,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
@@ -400,7 +376,7 @@ async def get_top_selling_products(
     return result
 
 @router.get("/products/least-selling", response_model=List[ProductPerformance])
-async def get_least_selling_products(
+def get_least_selling_products(
     limit: int = 10,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
@@ -442,64 +418,122 @@ async def get_least_selling_products(
 
 # ============ Inventory Management ============
 
-@router.get("/inventory", response_model=List[InventoryItem])
-async def get_inventory(
-    filter: str = "all",  # all, low, out
+REORDER_POINT = 10  # Default reorder point
+CRITICAL_STOCK = 5
+COVER_WINDOW_DAYS = 30  # Sales window used for days of cover
+NO_RECENT_SALES_COVER = 1e9  # Sorts products that haven't sold recently last
+
+# Inventory filter -> stock statuses it includes
+INVENTORY_FILTERS = {
+    "all": ("healthy", "low", "critical", "out_of_stock"),
+    "ok": ("healthy",),
+    "low": ("low", "critical"),
+    "critical": ("critical",),
+    "out": ("out_of_stock",),
+}
+
+def _stock_status():
+    return case(
+        (Product.stock == 0, "out_of_stock"),
+        (Product.stock < CRITICAL_STOCK, "critical"),
+        (Product.stock < REORDER_POINT, "low"),
+        else_="healthy"
+    )
+
+@router.get("/inventory", response_model=InventoryPage)
+def get_inventory(
+    filter: str = "all",  # all, ok, low, critical, out
+    category_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Get inventory status"""
-    
-    query = db.query(Product).filter(Product.is_active == True)
-    
-    if filter == "low":
-        query = query.filter(and_(Product.stock > 0, Product.stock < 10))
-    elif filter == "out":
-        query = query.filter(Product.stock == 0)
-    
-    products = query.all()
-    
-    result = []
-    for product in products:
-        # Get total sold
-        total_sold = db.query(func.sum(OrderItem.quantity)).filter(
-            OrderItem.product_id == product.id
-        ).scalar() or 0
-        
-        # Get primary image
-        image = db.query(ProductImage).filter(
-            and_(ProductImage.product_id == product.id, ProductImage.is_primary == True)
-        ).first()
-        
-        # Get category
-        category = db.query(Category).filter(Category.id == product.category_id).first()
-        
-        # Determine status
-        if product.stock == 0:
-            status = "out_of_stock"
-        elif product.stock < 5:
-            status = "critical"
-        elif product.stock < 10:
-            status = "low"
-        else:
-            status = "healthy"
-        
-        result.append(InventoryItem(
-            id=product.id,
-            name=product.name,
-            image=image.url if image else None,
-            stock=product.stock,
-            sold=total_sold,
-            reorder_point=10,  # Default reorder point
-            status=status,
-            category=category.name if category else "Unknown",
-            price=product.price
-        ))
-    
-    return sorted(result, key=lambda x: x.stock)
+    """
+    Get inventory status, lowest days of cover first.
+
+    One aggregated query per page: units sold come from a grouped
+    order_items subquery and are joined with products and categories.
+    Pass ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    if filter not in INVENTORY_FILTERS:
+        raise HTTPException(status_code=400, detail="Invalid inventory filter")
+
+    status = _stock_status()
+    scope = [Product.is_active == True]
+    if category_id is not None:
+        scope.append(Product.category_id == category_id)
+
+    # Units sold per product: all time, and recently (excluding cancelled
+    # orders, whose stock was restored) for the sales rate
+    recent_since = datetime.utcnow() - timedelta(days=COVER_WINDOW_DAYS)
+    sold = db.query(
+        OrderItem.product_id.label("product_id"),
+        func.sum(OrderItem.quantity).label("sold"),
+        func.sum(case(
+            (and_(Order.created_at >= recent_since, Order.status != OrderStatus.CANCELLED.value),
+             OrderItem.quantity),
+            else_=0
+        )).label("recent")
+    ).join(Order, Order.id == OrderItem.order_id)\
+     .group_by(OrderItem.product_id).subquery("sold")
+
+    # Days the current stock lasts at the recent sales rate
+    days_of_cover = case(
+        (Product.stock <= 0, 0.0),
+        (sold.c.recent > 0, Product.stock * float(COVER_WINDOW_DAYS) / sold.c.recent),
+        else_=None
+    )
+
+    inventory = db.query(
+        Product.id,
+        Product.name,
+        Product.primary_image_url.label("image"),
+        Product.stock,
+        Product.price,
+        func.coalesce(Category.name, "Unknown").label("category"),
+        func.coalesce(sold.c.sold, 0).label("sold"),
+        status.label("status"),
+        days_of_cover.label("days_of_cover"),
+        func.coalesce(days_of_cover, NO_RECENT_SALES_COVER, type_=Float).label("cover_rank")
+    ).outerjoin(Category, Category.id == Product.category_id)\
+     .outerjoin(sold, sold.c.product_id == Product.id)\
+     .filter(*scope, status.in_(INVENTORY_FILTERS[filter]))\
+     .subquery("inventory")
+
+    sort_key = [(inventory.c.cover_rank, False), (inventory.c.id, False)]
+    rows, next_cursor = paginate_keyset(db.query(inventory), sort_key, limit, cursor)
+
+    # Status counts for the summary cards (category scope only)
+    counts = {name: 0 for name in INVENTORY_FILTERS["all"]}
+    counts.update(db.query(status, func.count(Product.id)).filter(*scope).group_by(status).all())
+
+    items = [
+        InventoryItem(
+            id=row.id,
+            name=row.name,
+            image=row.image,
+            stock=row.stock,
+            sold=row.sold,
+            reorder_point=REORDER_POINT,
+            status=row.status,
+            category=row.category,
+            price=row.price,
+            days_of_cover=round(row.days_of_cover, 1) if row.days_of_cover is not None else None
+        )
+        for row in rows
+    ]
+
+    return InventoryPage(
+        items=items,
+        counts=counts,
+        total=sum(counts[name] for name in INVENTORY_FILTERS[filter]),
+        next_cursor=next_cursor,
+        has_more=next_cursor is not None
+    )
 
 @router.put("/inventory/{product_id}/stock")
-async def update_stock(
+def update_stock(
     product_id: int,
     stock: int,
     db: Session = Depends(get_db),
@@ -518,142 +552,8 @@ async def update_stock(
 
 # ============ Predictions ============
 
-def get_seasonal_multiplier(target_date: datetime) -> float:
-    """
-    Get seasonal multiplier for Bangladesh market.
-    Accounts for Eid seasons, weekends (Friday-Saturday), and general patterns.
-    """
-    multiplier = 1.0
-
-    # Weekend boost (Friday-Saturday in Bangladesh)
-    if target_date.weekday() in [4, 5]:  # Friday=4, Saturday=5
-        multiplier *= 1.15
-
-    # Month-based seasonality for Bangladesh
-    month = target_date.month
-    seasonal_factors = {
-        1: 0.9,   # January - post-holiday slowdown
-        2: 0.95,  # February - normal
-        3: 1.1,   # March - Pohela Boishakh prep starts
-        4: 1.25,  # April - Pohela Boishakh (Bengali New Year)
-        5: 1.0,   # May - normal
-        6: 1.0,   # June - normal
-        7: 1.15,  # July - Eid-ul-Adha typical month (varies)
-        8: 1.0,   # August - normal
-        9: 1.0,   # September - normal
-        10: 1.2,  # October - Durga Puja
-        11: 1.1,  # November - pre-winter shopping
-        12: 1.15, # December - winter season, year-end sales
-    }
-    multiplier *= seasonal_factors.get(month, 1.0)
-
-    # Eid seasons (approximate - Eid dates vary each year)
-    # In production, integrate with a proper Islamic calendar API
-    # Eid-ul-Fitr window (roughly March-May depending on year)
-    # Eid-ul-Adha window (roughly June-August depending on year)
-    if month in [3, 4, 5, 6, 7, 8]:  # Eid-prone months
-        multiplier *= 1.1
-
-    return min(multiplier, 1.5)  # Cap at 1.5x to avoid over-prediction
-
-
-def get_weighted_daily_sales(db: Session, product_id: int, days: int = 30) -> tuple:
-    """
-    Calculate weighted moving average where recent sales matter more.
-    Returns (weighted_avg, trend, trend_pct, data_points)
-    """
-    now = datetime.utcnow()
-
-    # Get daily sales for the past N days
-    daily_sales = []
-    for i in range(days):
-        day_start = now - timedelta(days=i+1)
-        day_end = now - timedelta(days=i)
-
-        sales = db.query(func.sum(OrderItem.quantity)).join(Order).filter(
-            and_(
-                OrderItem.product_id == product_id,
-                Order.created_at >= day_start,
-                Order.created_at < day_end,
-                Order.payment_status == PaymentStatus.COMPLETED
-            )
-        ).scalar() or 0
-
-        daily_sales.append(sales)
-
-    # Count days with actual sales (data points)
-    data_points = sum(1 for s in daily_sales if s > 0)
-
-    if sum(daily_sales) == 0:
-        return 0, "stable", 0, 0
-
-    # Weighted moving average: recent days weighted more
-    # Week 1 (days 0-6): weight 4
-    # Week 2 (days 7-13): weight 3
-    # Week 3 (days 14-20): weight 2
-    # Week 4 (days 21-29): weight 1
-    weights = []
-    for i in range(days):
-        if i < 7:
-            weights.append(4)
-        elif i < 14:
-            weights.append(3)
-        elif i < 21:
-            weights.append(2)
-        else:
-            weights.append(1)
-
-    weighted_sum = sum(s * w for s, w in zip(daily_sales, weights))
-    total_weight = sum(weights)
-    weighted_avg = weighted_sum / total_weight
-
-    # Calculate trend by comparing recent week to older weeks
-    recent_week = sum(daily_sales[:7]) / 7 if daily_sales[:7] else 0
-    older_weeks = sum(daily_sales[7:]) / max(len(daily_sales[7:]), 1) if daily_sales[7:] else 0
-
-    if older_weeks > 0:
-        trend_pct = ((recent_week - older_weeks) / older_weeks) * 100
-    else:
-        trend_pct = 100 if recent_week > 0 else 0
-
-    # Determine trend direction
-    if trend_pct > 15:
-        trend = "rising"
-    elif trend_pct < -15:
-        trend = "declining"
-    else:
-        trend = "stable"
-
-    return weighted_avg, trend, round(trend_pct, 1), data_points
-
-
-def get_category_average_sales(db: Session, category_id: int, days: int = 30) -> float:
-    """
-    Get average daily sales for a category (fallback for new products).
-    """
-    start_date = datetime.utcnow() - timedelta(days=days)
-
-    # Get all products in category
-    products = db.query(Product.id).filter(Product.category_id == category_id).all()
-    product_ids = [p.id for p in products]
-
-    if not product_ids:
-        return 0
-
-    total_sales = db.query(func.sum(OrderItem.quantity)).join(Order).filter(
-        and_(
-            OrderItem.product_id.in_(product_ids),
-            Order.created_at >= start_date,
-            Order.payment_status == PaymentStatus.COMPLETED
-        )
-    ).scalar() or 0
-
-    # Average per product per day
-    return total_sales / (len(product_ids) * days)
-
-
 @router.get("/predictions", response_model=List[PredictionData])
-async def get_demand_predictions(
+def get_demand_predictions(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
@@ -666,119 +566,15 @@ async def get_demand_predictions(
     - Category-based fallback for new products
     - Trend analysis (rising/stable/declining)
     - Confidence scoring based on data availability
-    """
-
-    products = db.query(Product).filter(Product.is_active == True).all()
-
-    # Pre-calculate category averages for fallback
-    category_averages = {}
-    for product in products:
-        if product.category_id not in category_averages:
-            category_averages[product.category_id] = get_category_average_sales(
-                db, product.category_id
-            )
-
-    # Get seasonal multiplier for next 30 days (average)
-    seasonal_multipliers = []
-    for i in range(30):
-        future_date = datetime.utcnow() + timedelta(days=i)
-        seasonal_multipliers.append(get_seasonal_multiplier(future_date))
-    avg_seasonal_factor = sum(seasonal_multipliers) / len(seasonal_multipliers)
-
-    predictions = []
-    for product in products:
-        # Get weighted daily sales with trend analysis
-        weighted_avg, trend, trend_pct, data_points = get_weighted_daily_sales(
-            db, product.id, days=30
-        )
-
-        # Use category average as fallback for new products
-        if weighted_avg == 0 and product.category_id in category_averages:
-            weighted_avg = category_averages[product.category_id]
-            used_fallback = True
-        else:
-            used_fallback = False
 
-        # Apply trend adjustment
-        trend_multiplier = 1.0
-        if trend == "rising":
-            trend_multiplier = 1.0 + (min(abs(trend_pct), 50) / 100)  # Up to 1.5x
-        elif trend == "declining":
-            trend_multiplier = 1.0 - (min(abs(trend_pct), 30) / 100)  # Down to 0.7x
-
-        # Calculate predicted demand with all factors
-        base_demand = weighted_avg * 30
-        adjusted_demand = base_demand * trend_multiplier * avg_seasonal_factor
-
-        # Add safety buffer (20%) and round up
-        predicted_demand = math.ceil(adjusted_demand * 1.2)
-
-        # Calculate days until stockout using weighted average
-        if weighted_avg > 0:
-            days_until_stockout = math.floor(product.stock / weighted_avg)
-        else:
-            days_until_stockout = 999
-
-        # Recommended reorder with dynamic safety stock
-        # Higher safety stock for rising trends and seasonal peaks
-        safety_stock = 10
-        if trend == "rising":
-            safety_stock = 15
-        if avg_seasonal_factor > 1.1:
-            safety_stock = int(safety_stock * 1.2)
-
-        recommended_reorder = max(0, predicted_demand - product.stock + safety_stock)
-
-        # Determine urgency
-        if days_until_stockout <= 3:
-            urgency = "critical"
-        elif days_until_stockout <= 7:
-            urgency = "high"
-        elif days_until_stockout <= 14:
-            urgency = "medium"
-        else:
-            urgency = "low"
-
-        # Determine confidence level
-        if data_points >= 15:
-            confidence = "high"
-        elif data_points >= 7 or used_fallback:
-            confidence = "medium"
-        else:
-            confidence = "low"
-
-        # Get primary image
-        image = db.query(ProductImage).filter(
-            and_(ProductImage.product_id == product.id, ProductImage.is_primary == True)
-        ).first()
-
-        predictions.append(PredictionData(
-            id=product.id,
-            name=product.name,
-            image=image.url if image else None,
-            current_stock=product.stock,
-            predicted_demand=predicted_demand,
-            days_until_stockout=min(days_until_stockout, 999),
-            recommended_reorder=recommended_reorder,
-            urgency=urgency,
-            avg_daily_sales=round(weighted_avg, 2),
-            trend=trend,
-            trend_percentage=trend_pct,
-            seasonal_factor=round(avg_seasonal_factor, 2),
-            confidence=confidence,
-            data_points=data_points
-        ))
-
-    # Sort by urgency (critical first), then by days until stockout
-    urgency_order = {"critical": 0, "high": 1, "medium": 2, "low": 3}
-    predictions.sort(key=lambda x: (urgency_order.get(x.urgency, 4), x.days_until_stockout))
-
-    return predictions
+    Computed for all products at once and cached until the next order.
+    """
+    return predictions.get_demand_predictions(db)
 
 # ============ Product Management ============
 
 @router.get("/products")
-async def get_all_products(
+def get_all_products(
     page: int = 1,
     limit: int = 20,
     search: Optional[str] = None,
@@ -801,24 +597,17 @@ async def get_all_products(
     if has_image is not None:
         if has_image:
             # Products WITH images
-            query = query.filter(Product.images.any())
+            query = query.filter(Product.has_image == True)
         else:
             # Products WITHOUT images (not visible on website)
-            query = query.filter(~Product.images.any())
+            query = query.filter(Product.has_image == False)
     
     total = query.count()
     products = query.offset((page - 1) * limit).limit(limit).all()
     
     result = []
     for product in products:
-        image = db.query(ProductImage).filter(
-            and_(ProductImage.product_id == product.id, ProductImage.is_primary == True)
-        ).first()
-        
         category = db.query(Category).filter(Category.id == product.category_id).first()
-        
-        # Check if product has any images
-        has_image = db.query(ProductImage).filter(ProductImage.product_id == product.id).first() is not None
 
         result.append({
             "id": product.id,
@@ -835,8 +624,8 @@ async def get_all_products(
             "is_featured": product.is_featured,
             "is_new": product.is_new,
             "is_active": product.is_active,
-            "image": image.url if image else None,
-            "has_image": has_image,  # Indicates if product is visible on website
+            "image": product.primary_image_url,
+            "has_image": product.has_image,  # Indicates if product is visible on website
             "created_at": product.created_at
         })
     
@@ -848,7 +637,7 @@ async def get_all_products(
     }
 
 @router.post("/products")
-async def create_product(
+def create_product(
     product: ProductCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
@@ -890,7 +679,7 @@ async def create_product(
     return {"message": "Product created successfully", "product_id": new_product.id}
 
 @router.put("/products/{product_id}")
-async def update_product(
+def update_product(
     product_id: int,
     product: ProductUpdate,
     db: Session = Depends(get_db),
@@ -921,7 +710,7 @@ async def update_product(
     return {"message": "Product updated successfully"}
 
 @router.delete("/products/{product_id}")
-async def delete_product(
+def delete_product(
     product_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
@@ -983,7 +772,7 @@ async def upload_product_image(
 # ============ Categories ============
 
 @router.get("/categories")
-async def get_categories(
+def get_categories(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
@@ -1008,22 +797,31 @@ async def get_categories(
 # ============ Order Management ============
 
 @router.get("/orders")
-async def get_all_orders(
+def get_all_orders(
     page: int = 1,
     limit: int = 20,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Get all orders for admin"""
+    """Get all orders for admin (pass cursor for keyset pagination)"""
     
     query = db.query(Order)
     
     if status:
         query = query.filter(Order.status == status)
-    
-    total = query.count()
-    orders = query.order_by(desc(Order.created_at)).offset((page - 1) * limit).limit(limit).all()
+
+    sort_key = [(Order.created_at, True), (Order.id, True)]
+    if cursor:
+        orders, next_cursor = paginate_keyset(query, sort_key, limit, cursor)
+        total = query.count() if exact_total else cached_count(query, ("admin_orders", status))
+    else:
+        total = query.count()
+        orders = query.order_by(desc(Order.created_at), desc(Order.id)).offset((page - 1) * limit).limit(limit).all()
+        has_more = (page - 1) * limit + len(orders) < total
+        next_cursor = cursor_for(orders[-1], sort_key) if has_more else None
     
     result = []
     for order in orders:
@@ -1051,15 +849,26 @@ async def get_all_orders(
             "created_at": order.created_at
         })
     
+    if cursor:
+        return {
+            "orders": result,
+            "total": total,
+            "total_is_estimate": not exact_total,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+
     return {
         "orders": result,
         "total": total,
         "page": page,
-        "pages": math.ceil(total / limit)
+        "pages": math.ceil(total / limit),
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
     }
 
 @router.put("/orders/{order_id}/status")
-async def update_order_status(
+def update_order_status(
     order_id: int,
     status: str,
     db: Session = Depends(get_db),
@@ -1115,13 +924,17 @@ async def update_order_status(
 # ============ Revenue Analytics ============
 
 @router.get("/analytics/revenue")
-async def get_revenue_analytics(
+def get_revenue_analytics(
     period: str = "30d",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Get detailed revenue analytics"""
-    
+    """Get detailed revenue analytics (cached for 5 minutes)"""
+    return admin_cache.get_or_compute(
+        f"revenue_analytics:{period}", lambda: _compute_revenue_analytics(db, period), ttl=ANALYTICS_TTL
+    )
+
+def _compute_revenue_analytics(db: Session, period: str) -> dict:
     now = datetime.utcnow()
     
     periods = {
@@ -1132,33 +945,23 @@ async def get_revenue_analytics(
     }
     
     days = periods.get(period, 30)
-    start_date = now - timedelta(days=days)
+    start_day = (now - timedelta(days=days)).date()
     
     # Revenue by category
     category_revenue = db.query(
         Category.name,
-        func.sum(OrderItem.total).label('revenue')
-    ).join(Product, Category.id == Product.category_id)\
-     .join(OrderItem, Product.id == OrderItem.product_id)\
-     .join(Order, OrderItem.order_id == Order.id)\
-     .filter(
-         and_(
-             Order.created_at >= start_date,
-             Order.payment_status == PaymentStatus.COMPLETED
-         )
-     ).group_by(Category.name).all()
+        func.sum(DailyCategorySales.revenue).label('revenue')
+    ).join(DailyCategorySales, Category.id == DailyCategorySales.category_id)\
+     .filter(DailyCategorySales.day >= start_day)\
+     .group_by(Category.name).all()
     
     # Revenue by payment method
     payment_revenue_query = db.query(
-        Order.payment_method,
-        func.sum(Order.total).label('revenue'),
-        func.count(Order.id).label('count')
-    ).filter(
-        and_(
-            Order.created_at >= start_date,
-            Order.payment_status == PaymentStatus.COMPLETED
-        )
-    ).group_by(Order.payment_method).all()
+        DailyPaymentSales.payment_method,
+        func.sum(DailyPaymentSales.revenue).label('revenue'),
+        func.sum(DailyPaymentSales.orders).label('count')
+    ).filter(DailyPaymentSales.day >= start_day)\
+     .group_by(DailyPaymentSales.payment_method).all()
     
     # Ensure all major payment methods are represented
     payment_methods_map = {
@@ -1179,24 +982,16 @@ async def get_revenue_analytics(
             
     payment_revenue_list = list(payment_methods_map.values())
     
-    # Daily revenue trend
-    daily_revenue = []
-    for i in range(min(days, 30)):  # Max 30 data points
-        day = now - timedelta(days=days - i - 1)
-        next_day = day + timedelta(days=1)
-        
-        revenue = db.query(func.sum(Order.total)).filter(
-            and_(
-                Order.created_at >= day.replace(hour=0, minute=0, second=0),
-                Order.created_at < next_day.replace(hour=0, minute=0, second=0),
-                Order.payment_status == PaymentStatus.COMPLETED
-            )
-        ).scalar() or 0
-        
-        daily_revenue.append({
-            "date": day.strftime("%b %d"),
-            "revenue": round(revenue, 2)
-        })
+    # Daily revenue trend (max 30 data points)
+    trend_days = [(now - timedelta(days=days - i - 1)).date() for i in range(min(days, 30))]
+    revenue_by_day = dict(db.query(DailySalesRollup.day, DailySalesRollup.revenue).filter(
+        and_(DailySalesRollup.day >= trend_days[0], DailySalesRollup.day <= trend_days[-1])
+    ).all())
+
+    daily_revenue = [
+        {"date": day.strftime("%b %d"), "revenue": round(revenue_by_day.get(day, 0), 2)}
+        for day in trend_days
+    ]
     
     return {
         "by_category": [{"name": c[0], "revenue": round(c[1] or 0, 2)} for c in category_revenue],
@@ -1207,22 +1002,30 @@ async def get_revenue_analytics(
 # ============ Customer Analytics ============
 
 @router.get("/analytics/customers")
-async def get_customer_analytics(
+def get_customer_analytics(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Get customer analytics"""
-    
+    """Get customer analytics (cached for 5 minutes)"""
+    return admin_cache.get_or_compute(
+        "customer_analytics", lambda: _compute_customer_analytics(db), ttl=ANALYTICS_TTL
+    )
+
+def _compute_customer_analytics(db: Session) -> dict:
     now = datetime.utcnow()
     thirty_days_ago = now - timedelta(days=30)
     
-    # New customers this month
-    new_customers = db.query(func.count(User.id)).filter(
+    # New customers per day over the growth window (12 x 30 days)
+    growth_start = now.replace(day=1) - timedelta(days=30 * 11)
+    new_by_day = db.query(DailySalesRollup.day, DailySalesRollup.new_customers).filter(
         and_(
-            User.role == UserRole.USER,
-            User.created_at >= thirty_days_ago
+            DailySalesRollup.day >= min(growth_start, thirty_days_ago).date(),
+            DailySalesRollup.new_customers > 0
         )
-    ).scalar() or 0
+    ).all()
+
+    # New customers this month
+    new_customers = sum(count for day, count in new_by_day if day >= thirty_days_ago.date())
     
     # Top customers by order value
     top_customers = db.query(
@@ -1243,13 +1046,10 @@ async def get_customer_analytics(
         month_start = now.replace(day=1) - timedelta(days=30 * i)
         month_end = month_start + timedelta(days=30)
         
-        count = db.query(func.count(User.id)).filter(
-            and_(
-                User.role == UserRole.USER,
-                User.created_at >= month_start,
-                User.created_at < month_end
-            )
-        ).scalar() or 0
+        count = sum(
+            n for day, n in new_by_day
+            if month_start.date() <= day < month_end.date()
+        )
         
         growth.append({
             "month": month_start.strftime("%b %Y"),
@@ -1274,17 +1074,19 @@ async def get_customer_analytics(
 # ============ Customer Management ============
 
 @router.get("/customers")
-async def get_all_customers(
+def get_all_customers(
     page: int = 1,
     limit: int = 20,
     search: Optional[str] = None,
     status: Optional[str] = None,  # active, inactive
     sort_by: Optional[str] = "created_at",  # created_at, total_spent, total_orders
     sort_order: Optional[str] = "desc",
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Get all customers with their order statistics"""
+    """Get all customers with their order statistics (pass cursor for keyset pagination)"""
 
     # Base query for users with role USER
     query = db.query(User).filter(User.role == UserRole.USER)
@@ -1304,22 +1106,27 @@ async def get_all_customers(
     elif status == "inactive":
         query = query.filter(User.is_active == False)
 
-    # Get total count before pagination
-    total = query.count()
+    # Pages are always cut by signup date; total_spent / total_orders
+    # sorting is applied within the page below
+    descending = sort_order == "desc"
+    sort_key = [(User.created_at, descending), (User.id, descending)]
 
-    # Apply sorting
-    if sort_by == "created_at":
-        order_col = User.created_at
+    if cursor:
+        customers, next_cursor = paginate_keyset(query, sort_key, limit, cursor)
+        total = query.count() if exact_total else cached_count(query, ("admin_customers", search, status))
     else:
-        order_col = User.created_at  # Default, actual sorting by stats done below
+        # Get total count before pagination
+        total = query.count()
 
-    if sort_order == "desc":
-        query = query.order_by(desc(order_col))
-    else:
-        query = query.order_by(order_col)
+        if descending:
+            query = query.order_by(desc(User.created_at), desc(User.id))
+        else:
+            query = query.order_by(User.created_at, User.id)
 
-    # Apply pagination
-    customers = query.offset((page - 1) * limit).limit(limit).all()
+        # Apply pagination
+        customers = query.offset((page - 1) * limit).limit(limit).all()
+        has_more = (page - 1) * limit + len(customers) < total
+        next_cursor = cursor_for(customers[-1], sort_key) if has_more else None
 
     # Get order statistics for each customer
     result = []
@@ -1363,15 +1170,26 @@ async def get_all_customers(
             reverse=(sort_order == "desc")
         )
 
+    if cursor:
+        return {
+            "customers": result,
+            "total": total,
+            "total_is_estimate": not exact_total,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+
     return {
         "customers": result,
         "total": total,
         "page": page,
-        "pages": math.ceil(total / limit)
+        "pages": math.ceil(total / limit),
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
     }
 
 @router.get("/customers/{customer_id}")
-async def get_customer_detail(
+def get_customer_detail(
     customer_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
@@ -1442,7 +1260,7 @@ async def get_customer_detail(
     }
 
 @router.get("/customers/{customer_id}/orders")
-async def get_customer_orders(
+def get_customer_orders(
     customer_id: int,
     page: int = 1,
     limit: int = 10,
@@ -1513,7 +1331,7 @@ async def get_customer_orders(
 
 
 @router.put("/customers/{customer_id}/status")
-async def update_customer_status(
+def update_customer_status(
     customer_id: int,
     is_active: bool,
     db: Session = Depends(get_db),
@@ -1540,15 +1358,17 @@ async def update_customer_status(
 # ============ Admin User Management ============
 
 @router.get("/users")
-async def get_all_users(
+def get_all_users(
     page: int = 1,
     limit: int = 20,
     search: Optional[str] = None,
     role: Optional[str] = None,
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Get all users (for admin management)"""
+    """Get all users (for admin management; pass cursor for keyset pagination)"""
 
     query = db.query(User)
 
@@ -1562,32 +1382,52 @@ async def get_all_users(
     if role:
         query = query.filter(User.role == role)
 
-    total = query.count()
-    users = query.order_by(desc(User.created_at)).offset((page - 1) * limit).limit(limit).all()
+    sort_key = [(User.created_at, True), (User.id, True)]
+    if cursor:
+        users, next_cursor = paginate_keyset(query, sort_key, limit, cursor)
+        total = query.count() if exact_total else cached_count(query, ("admin_users", search, role))
+    else:
+        total = query.count()
+        users = query.order_by(desc(User.created_at), desc(User.id)).offset((page - 1) * limit).limit(limit).all()
+        has_more = (page - 1) * limit + len(users) < total
+        next_cursor = cursor_for(users[-1], sort_key) if has_more else None
+
+    result = [
+        {
+            "id": user.id,
+            "name": user.name,
+            "email": user.email,
+            "phone": user.phone,
+            "picture": user.picture,
+            "role": user.role,
+            "is_active": user.is_active,
+            "is_superadmin": user.email == settings.superadmin_email,
+            "created_at": user.created_at
+        }
+        for user in users
+    ]
+
+    if cursor:
+        return {
+            "users": result,
+            "total": total,
+            "total_is_estimate": not exact_total,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
 
     return {
-        "users": [
-            {
-                "id": user.id,
-                "name": user.name,
-                "email": user.email,
-                "phone": user.phone,
-                "picture": user.picture,
-                "role": user.role,
-                "is_active": user.is_active,
-                "is_superadmin": user.email == settings.superadmin_email,
-                "created_at": user.created_at
-            }
-            for user in users
-        ],
+        "users": result,
         "total": total,
         "page": page,
-        "pages": math.ceil(total / limit)
+        "pages": math.ceil(total / limit),
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None
     }
 
 
 @router.delete("/users/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
@@ -1614,7 +1454,7 @@ async def delete_user(
 
 
 @router.put("/users/{user_id}/role")
-async def update_user_role(
+def update_user_role(
     user_id: int,
     role: str,
     db: Session = Depends(get_db),
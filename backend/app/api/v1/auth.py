@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
-from app.database import get_db
+from app.database import get_async_db
 from app.models import User, UserRole
 from app.schemas import UserCreate, UserResponse, Token, TokenWithUser, UserUpdate, ForgotPassword, ResetPassword, SocialLoginRequest
 from app.utils import (
     verify_password, 
     get_password_hash, 
     create_access_token,
-    get_current_user_required
+    get_current_user_required_async
 )
 from app.config import settings
 import uuid
@@ -20,9 +22,9 @@ import shutil
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.post("/register", response_model=TokenWithUser)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if email already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -34,13 +36,14 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         name=user_data.name,
         email=user_data.email,
         phone=user_data.phone,
-        password_hash=get_password_hash(user_data.password),
+        # bcrypt is deliberately slow; hash off the event loop
+        password_hash=await run_in_threadpool(get_password_hash, user_data.password),
         role=UserRole.USER.value
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Create access token
     access_token = create_access_token(
@@ -52,12 +55,12 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=TokenWithUser)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Find user by email
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await db.scalar(select(User).where(User.email == form_data.username))
     
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -79,52 +82,52 @@ async def login(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_profile(
-    current_user: User = Depends(get_current_user_required)
+    current_user: User = Depends(get_current_user_required_async)
 ):
     return current_user
 
 @router.put("/me", response_model=UserResponse)
 async def update_profile(
     user_data: UserUpdate,
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if user_data.name:
         current_user.name = user_data.name
     if user_data.phone:
         current_user.phone = user_data.phone
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     
     return current_user
 
 @router.post("/change-password")
 async def change_password(
     password_data: dict,
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     current_password = password_data.get("current_password")
     new_password = password_data.get("new_password")
     
-    if not verify_password(current_password, current_user.password_hash):
+    if not await run_in_threadpool(verify_password, current_password, current_user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
-    current_user.password_hash = get_password_hash(new_password)
-    db.commit()
+    current_user.password_hash = await run_in_threadpool(get_password_hash, new_password)
+    await db.commit()
     
     return {"message": "Password changed successfully"}
 
 @router.post("/forgot-password")
 async def forgot_password(
     data: ForgotPassword,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.email == data.email).first()
+    user = await db.scalar(select(User).where(User.email == data.email))
     if not user:
         # Don't reveal if user exists
         return {"message": "If this email is registered, you will receive password reset instructions."}
@@ -133,7 +136,7 @@ async def forgot_password(
     token = str(uuid.uuid4())
     user.reset_token = token
     user.reset_token_expiry = datetime.utcnow() + timedelta(hours=1)
-    db.commit()
+    await db.commit()
     
     # In a real app, send email here
     # For now, just print to console for development
@@ -144,9 +147,9 @@ async def forgot_password(
 @router.post("/reset-password")
 async def reset_password(
     data: ResetPassword,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.reset_token == data.token).first()
+    user = await db.scalar(select(User).where(User.reset_token == data.token))
     
     if not user:
         raise HTTPException(
@@ -161,17 +164,17 @@ async def reset_password(
         )
     
     # Reset password
-    user.password_hash = get_password_hash(data.new_password)
+    user.password_hash = await run_in_threadpool(get_password_hash, data.new_password)
     user.reset_token = None
     user.reset_token_expiry = None
-    db.commit()
+    await db.commit()
     
     return {"message": "Password has been reset successfully"}
 
 @router.post("/social-login", response_model=TokenWithUser)
 async def social_login(
     data: SocialLoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     email = None
     name = None
@@ -226,7 +229,7 @@ async def social_login(
          raise HTTPException(status_code=400, detail="Email not found in social profile")
 
     # Check if user exists
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     
     if user:
         # Update missing or changed social info
@@ -239,8 +242,8 @@ async def social_login(
         if data.provider == "facebook" and not user.facebook_id:
             user.facebook_id = provider_id
             
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
     else:
         # Register new user
         # We need a dummy password since it's required by our model but user logs in via social
@@ -250,7 +253,7 @@ async def social_login(
         user = User(
             email=email,
             name=name,
-            password_hash=get_password_hash(dummy_pw),
+            password_hash=await run_in_threadpool(get_password_hash, dummy_pw),
             role=UserRole.USER.value,
             picture=picture,
             is_active=True
@@ -261,8 +264,8 @@ async def social_login(
             user.facebook_id = provider_id
             
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         
     access_token = create_access_token(
         data={"sub": str(user.id), "role": str(user.role)}
@@ -273,8 +276,8 @@ async def social_login(
 @router.post("/upload-avatar", response_model=UserResponse)
 async def upload_avatar(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Validate file type
     if not file.content_type.startswith('image/'):
@@ -290,8 +293,11 @@ async def upload_avatar(
     file_path = f"{upload_dir}/{filename}"
     
     # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    def save_upload():
+        with open(file_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+
+    await run_in_threadpool(save_upload)
         
     # Update user profile
     # URL should be relative path that frontend can access via static mount
@@ -301,7 +307,7 @@ async def upload_avatar(
     current_user.picture = image_url
     current_user.is_custom_picture = True
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     
     return current_user
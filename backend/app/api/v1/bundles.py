@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime
 from typing import List, Optional
 import os
@@ -13,6 +13,7 @@ from app.schemas import (
     ProductBundleItemCreate
 )
 from app.utils import get_current_admin
+from app.services.product_cards import get_product_cards
 
 router = APIRouter(prefix="/bundles", tags=["Product Bundles"])
 
@@ -22,28 +23,21 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 def calculate_bundle_details(bundle: ProductBundle, db: Session) -> dict:
     """Calculate bundle details including original total and items"""
+    cards = get_product_cards(db, [item.product_id for item in bundle.items], active_only=True)
+
     items = []
     original_total = 0
 
     for item in bundle.items:
-        product = item.product
-        if product and product.is_active:
-            primary_image = next((img for img in product.images if img.is_primary), None)
-            original_total += product.price * item.quantity
+        card = cards.get(item.product_id)
+        if card:
+            original_total += card["price"] * item.quantity
 
             items.append({
                 "id": item.id,
                 "product_id": item.product_id,
                 "quantity": item.quantity,
-                "product": {
-                    "id": product.id,
-                    "name": product.name,
-                    "slug": product.slug,
-                    "price": product.price,
-                    "original_price": product.original_price,
-                    "discount": product.discount,
-                    "image": primary_image.url if primary_image else (product.images[0].url if product.images else None)
-                }
+                "product": card
             })
 
     return {
@@ -65,7 +59,7 @@ def calculate_bundle_details(bundle: ProductBundle, db: Session) -> dict:
 
 
 @router.get("")
-async def get_bundles(
+def get_bundles(
     page: int = 1,
     limit: int = 20,
     db: Session = Depends(get_db)
@@ -84,7 +78,8 @@ async def get_bundles(
     )
 
     total = query.count()
-    bundles = query.order_by(ProductBundle.created_at.desc()) \
+    bundles = query.options(selectinload(ProductBundle.items)) \
+        .order_by(ProductBundle.created_at.desc()) \
         .offset((page - 1) * limit).limit(limit).all()
 
     return {
@@ -96,7 +91,7 @@ async def get_bundles(
 
 
 @router.get("/{slug}")
-async def get_bundle(
+def get_bundle(
     slug: str,
     db: Session = Depends(get_db)
 ):
@@ -117,7 +112,7 @@ async def get_bundle(
 
 # Admin endpoints
 @router.post("/admin")
-async def create_bundle(
+def create_bundle(
     data: ProductBundleCreate,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -174,7 +169,7 @@ async def create_bundle(
 
 
 @router.put("/admin/{bundle_id}")
-async def update_bundle(
+def update_bundle(
     bundle_id: int,
     data: ProductBundleUpdate,
     db: Session = Depends(get_db),
@@ -247,7 +242,7 @@ async def upload_bundle_image(
 
 
 @router.post("/admin/{bundle_id}/items")
-async def add_bundle_item(
+def add_bundle_item(
     bundle_id: int,
     data: ProductBundleItemCreate,
     db: Session = Depends(get_db),
@@ -289,7 +284,7 @@ async def add_bundle_item(
 
 
 @router.delete("/admin/{bundle_id}/items/{item_id}")
-async def remove_bundle_item(
+def remove_bundle_item(
     bundle_id: int,
     item_id: int,
     db: Session = Depends(get_db),
@@ -314,7 +309,7 @@ async def remove_bundle_item(
 
 
 @router.delete("/admin/{bundle_id}")
-async def delete_bundle(
+def delete_bundle(
     bundle_id: int,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -1,58 +1,46 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
+from app.database import get_async_db
 from app.models import CartItem, Product, User
 from app.schemas import CartItemCreate, CartItemUpdate, CartItemResponse, CartResponse
-from app.utils import get_current_user_required
+from app.utils import get_current_user_required_async
+from app.services.product_cards import build_product_cards_async, get_product_cards_async
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
-def get_product_list_response(product):
+async def get_product_list_response(db: AsyncSession, product: Product) -> dict:
     """Convert product to ProductListResponse-compatible dict"""
-    return {
-        "id": product.id,
-        "name": product.name,
-        "slug": product.slug,
-        "price": product.price,
-        "original_price": product.original_price,
-        "discount": product.discount,
-        "stock": product.stock,
-        "category_id": product.category_id,
-        "brand": product.brand,
-        "is_featured": product.is_featured,
-        "is_new": product.is_new,
-        "rating": product.rating,
-        "review_count": product.review_count,
-        "image": product.image,
-        "category": product.category.name if product.category else None
-    }
+    return (await build_product_cards_async(db, [product]))[0]
 
 @router.get("", response_model=CartResponse)
 async def get_cart(
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's cart"""
-    cart_items = db.query(CartItem).filter(
-        CartItem.user_id == current_user.id
-    ).all()
+    cart_items = (await db.scalars(
+        select(CartItem).where(CartItem.user_id == current_user.id)
+    )).all()
+
+    cards = await get_product_cards_async(db, [item.product_id for item in cart_items], active_only=True)
 
     items = []
     subtotal = 0
 
     for item in cart_items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product and product.is_active:
+        card = cards.get(item.product_id)
+        if card:
             item_data = {
                 "id": item.id,
                 "product_id": item.product_id,
                 "quantity": item.quantity,
                 "created_at": item.created_at,
-                "product": get_product_list_response(product)
+                "product": card
             }
             items.append(item_data)
-            subtotal += product.price * item.quantity
+            subtotal += card["price"] * item.quantity
 
     return {
         "items": items,
@@ -63,15 +51,15 @@ async def get_cart(
 @router.post("", response_model=CartItemResponse)
 async def add_to_cart(
     item_data: CartItemCreate,
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add item to cart"""
     # Check if product exists and is active
-    product = db.query(Product).filter(
+    product = await db.scalar(select(Product).where(
         Product.id == item_data.product_id,
         Product.is_active == True
-    ).first()
+    ))
 
     if not product:
         raise HTTPException(
@@ -87,10 +75,10 @@ async def add_to_cart(
         )
 
     # Check if item already in cart
-    existing_item = db.query(CartItem).filter(
+    existing_item = await db.scalar(select(CartItem).where(
         CartItem.user_id == current_user.id,
         CartItem.product_id == item_data.product_id
-    ).first()
+    ))
 
     if existing_item:
         # Update quantity
@@ -101,8 +89,8 @@ async def add_to_cart(
                 detail=f"Cannot add more. Only {product.stock} available."
             )
         existing_item.quantity = new_quantity
-        db.commit()
-        db.refresh(existing_item)
+        await db.commit()
+        await db.refresh(existing_item)
         cart_item = existing_item
     else:
         # Create new cart item
@@ -112,29 +100,29 @@ async def add_to_cart(
             quantity=item_data.quantity
         )
         db.add(cart_item)
-        db.commit()
-        db.refresh(cart_item)
+        await db.commit()
+        await db.refresh(cart_item)
 
     return {
         "id": cart_item.id,
         "product_id": cart_item.product_id,
         "quantity": cart_item.quantity,
         "created_at": cart_item.created_at,
-        "product": get_product_list_response(product)
+        "product": await get_product_list_response(db, product)
     }
 
 @router.put("/{item_id}", response_model=CartItemResponse)
 async def update_cart_item(
     item_id: int,
     item_data: CartItemUpdate,
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update cart item quantity"""
-    cart_item = db.query(CartItem).filter(
+    cart_item = await db.scalar(select(CartItem).where(
         CartItem.id == item_id,
         CartItem.user_id == current_user.id
-    ).first()
+    ))
 
     if not cart_item:
         raise HTTPException(
@@ -142,7 +130,7 @@ async def update_cart_item(
             detail="Cart item not found"
         )
 
-    product = db.query(Product).filter(Product.id == cart_item.product_id).first()
+    product = await db.get(Product, cart_item.product_id)
 
     if item_data.quantity > product.stock:
         raise HTTPException(
@@ -151,28 +139,28 @@ async def update_cart_item(
         )
 
     cart_item.quantity = item_data.quantity
-    db.commit()
-    db.refresh(cart_item)
+    await db.commit()
+    await db.refresh(cart_item)
 
     return {
         "id": cart_item.id,
         "product_id": cart_item.product_id,
         "quantity": cart_item.quantity,
         "created_at": cart_item.created_at,
-        "product": get_product_list_response(product)
+        "product": await get_product_list_response(db, product)
     }
 
 @router.delete("/{item_id}")
 async def remove_from_cart(
     item_id: int,
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove item from cart"""
-    cart_item = db.query(CartItem).filter(
+    cart_item = await db.scalar(select(CartItem).where(
         CartItem.id == item_id,
         CartItem.user_id == current_user.id
-    ).first()
+    ))
 
     if not cart_item:
         raise HTTPException(
@@ -180,18 +168,18 @@ async def remove_from_cart(
             detail="Cart item not found"
         )
 
-    db.delete(cart_item)
-    db.commit()
+    await db.delete(cart_item)
+    await db.commit()
 
     return {"message": "Item removed from cart"}
 
 @router.delete("")
 async def clear_cart(
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Clear all items from cart"""
-    db.query(CartItem).filter(CartItem.user_id == current_user.id).delete()
-    db.commit()
+    await db.execute(delete(CartItem).where(CartItem.user_id == current_user.id))
+    await db.commit()
 
     return {"message": "Cart cleared"}
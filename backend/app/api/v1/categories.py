@@ -1,23 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from typing import List
-from app.database import get_db
-from app.models import Category, Product, ProductImage
+from app.database import get_async_db
+from app.models import Category, Product
 from app.schemas import CategoryResponse, CategoryCreate
-from app.utils import get_current_admin
+from app.utils import get_current_admin_async
+from app.services.response_cache import response_cache, CATEGORY_LISTINGS, PRODUCT_LISTINGS
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 
 @router.get("/homepage")
 async def get_homepage_categories(
+    request: Request,
     limit: int = 12,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get parent categories optimized for homepage display - with aggregated product counts from subcategories"""
+    cached = await response_cache.lookup_async(request)
+    if cached:
+        return cached
+
     # Get all active categories
-    all_categories = db.query(Category).filter(Category.is_active == True).all()
+    all_categories = (await db.scalars(
+        select(Category).where(Category.is_active == True)
+    )).all()
 
     # Build parent-child mapping
     parent_categories = [cat for cat in all_categories if cat.parent_id is None]
@@ -29,12 +37,11 @@ async def get_homepage_categories(
             children_map[cat.parent_id].append(cat.id)
 
     # Get product counts for each category (only active products WITH images)
-    product_counts = db.query(
-        Product.category_id,
-        func.count(func.distinct(Product.id)).label('count')
-    ).join(ProductImage, Product.id == ProductImage.product_id).filter(
-        Product.is_active == True
-    ).group_by(Product.category_id).all()
+    product_counts = (await db.execute(
+        select(Product.category_id, func.count(Product.id).label('count'))
+        .where(Product.is_active == True, Product.has_image == True)
+        .group_by(Product.category_id)
+    )).all()
 
     direct_count_map = {pc.category_id: pc.count for pc in product_counts}
 
@@ -61,28 +68,30 @@ async def get_homepage_categories(
 
     # Sort by product count (descending) and limit
     result.sort(key=lambda x: x['product_count'], reverse=True)
-    return result[:limit]
+    # Counts depend on every product, so any listing change invalidates
+    return await response_cache.store_async(
+        request, result[:limit], tags=[CATEGORY_LISTINGS, PRODUCT_LISTINGS]
+    )
 
 
 @router.get("", response_model=List[CategoryResponse])
 async def get_categories(
     include_inactive: bool = False,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Category)
+    query = select(Category)
 
     if not include_inactive:
-        query = query.filter(Category.is_active == True)
+        query = query.where(Category.is_active == True)
 
-    categories = query.all()
+    categories = (await db.scalars(query)).all()
 
     # Get product counts for each category (only products with images)
-    product_counts = db.query(
-        Product.category_id,
-        func.count(func.distinct(Product.id)).label('count')
-    ).join(ProductImage, Product.id == ProductImage.product_id).filter(
-        Product.is_active == True
-    ).group_by(Product.category_id).all()
+    product_counts = (await db.execute(
+        select(Product.category_id, func.count(Product.id).label('count'))
+        .where(Product.is_active == True, Product.has_image == True)
+        .group_by(Product.category_id)
+    )).all()
 
     # Create a mapping of category_id to product count
     count_map = {pc.category_id: pc.count for pc in product_counts}
@@ -105,11 +114,11 @@ async def get_categories(
     return result
 
 @router.get("/{slug}", response_model=CategoryResponse)
-async def get_category(slug: str, db: Session = Depends(get_db)):
-    category = db.query(Category).filter(
+async def get_category(slug: str, db: AsyncSession = Depends(get_async_db)):
+    category = await db.scalar(select(Category).where(
         Category.slug == slug,
         Category.is_active == True
-    ).first()
+    ))
     
     if not category:
         raise HTTPException(
@@ -122,11 +131,11 @@ async def get_category(slug: str, db: Session = Depends(get_db)):
 @router.post("", response_model=CategoryResponse)
 async def create_category(
     category_data: CategoryCreate,
-    db: Session = Depends(get_db),
-    admin = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_async)
 ):
     # Check if slug already exists
-    existing = db.query(Category).filter(Category.slug == category_data.slug).first()
+    existing = await db.scalar(select(Category).where(Category.slug == category_data.slug))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -135,8 +144,8 @@ async def create_category(
     
     category = Category(**category_data.dict())
     db.add(category)
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
     
     return category
 
@@ -144,10 +153,10 @@ async def create_category(
 async def update_category(
     category_id: int,
     category_data: CategoryCreate,
-    db: Session = Depends(get_db),
-    admin = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_async)
 ):
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     
     if not category:
         raise HTTPException(
@@ -158,18 +167,18 @@ async def update_category(
     for field, value in category_data.dict().items():
         setattr(category, field, value)
     
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    await db.refresh(category)
     
     return category
 
 @router.delete("/{category_id}")
 async def delete_category(
     category_id: int,
-    db: Session = Depends(get_db),
-    admin = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_async)
 ):
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = await db.get(Category, category_id)
     
     if not category:
         raise HTTPException(
@@ -178,6 +187,6 @@ async def delete_category(
         )
     
     category.is_active = False
-    db.commit()
+    await db.commit()
     
     return {"message": "Category deleted successfully"}
@@ -19,7 +19,7 @@ class ContactFormResponse(BaseModel):
 
 
 @router.post("", response_model=ContactFormResponse)
-async def submit_contact_form(
+def submit_contact_form(
     form_data: ContactFormRequest,
     background_tasks: BackgroundTasks
 ):
@@ -8,6 +8,7 @@ from app.database import get_db
 from app.models import Order, User, OrderStatus, OrderTracking, PaymentStatus
 from app.schemas import OrderResponse, CourierAssign
 from app.utils import get_current_admin
+from app.services import idempotency
 from app.services.courier import get_courier_service
 
 router = APIRouter(prefix="/delivery", tags=["Delivery"])
@@ -18,9 +19,20 @@ async def assign_courier(
     order_number: str,
     courier_data: CourierAssign,
     current_user: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER)
 ):
     """Assign an order to a 3rd party courier like Pathao or Steadfast."""
+    # A retried assignment must not book a second consignment
+    return await idempotency.run_async(
+        idempotency_key, "delivery.assign", current_user.id,
+        {"order_number": order_number, "courier": courier_data},
+        lambda: _assign_courier(order_number, courier_data, db),
+        response_model=OrderResponse
+    )
+
+
+async def _assign_courier(order_number: str, courier_data: CourierAssign, db: Session):
     order = db.query(Order).filter(Order.order_number == order_number).first()
 
     if not order:
@@ -1,8 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
 from typing import List
-from datetime import datetime, timezone
 import os
 import uuid
 from app.database import get_db
@@ -16,6 +15,8 @@ from app.schemas import (
     FlashSaleItemResponse,
 )
 from app.utils import get_current_admin
+from app.services import flash_snapshot
+from app.services.flash_snapshot import get_flash_sale_with_items
 
 # Configure upload directory
 UPLOAD_DIR = "uploads/flash-sales"
@@ -24,77 +25,24 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 router = APIRouter(prefix="/flash-sales", tags=["Flash Sales"])
 
 
-def get_flash_sale_with_items(db: Session, flash_sale: FlashSale) -> dict:
-    """Convert flash sale to response with product details"""
-    items = []
-    for item in flash_sale.items:
-        product = item.product
-        # Only include products that have images
-        if product and product.images:
-            items.append({
-                "id": item.id,
-                "product_id": item.product_id,
-                "flash_price": item.flash_price,
-                "flash_stock": item.flash_stock,
-                "sold_count": item.sold_count,
-                "sort_order": item.sort_order,
-                "product": {
-                    "id": product.id,
-                    "name": product.name,
-                    "slug": product.slug,
-                    "price": product.price,
-                    "original_price": product.original_price,
-                    "discount": product.discount,
-                    "stock": product.stock,
-                    "category_id": product.category_id,
-                    "brand": product.brand,
-                    "is_featured": product.is_featured,
-                    "is_new": product.is_new,
-                    "rating": product.rating,
-                    "review_count": product.review_count,
-                    "image": product.image,
-                    "category": product.category_name,
-                }
-            })
-
-    return {
-        "id": flash_sale.id,
-        "name": flash_sale.name,
-        "slug": flash_sale.slug,
-        "description": flash_sale.description,
-        "start_time": flash_sale.start_time,
-        "end_time": flash_sale.end_time,
-        "banner_image": flash_sale.banner_image,
-        "is_active": flash_sale.is_active,
-        "created_at": flash_sale.created_at,
-        "items": items
-    }
+def _refresh_current_sale(db: Session):
+    """Rebuild the current sale snapshot after an admin change."""
+    try:
+        flash_snapshot.refresh(db)
+    except Exception as e:
+        # The next request to /current rebuilds it
+        print(f"[FlashSale] Snapshot refresh failed: {e}")
 
 
 @router.get("/current", response_model=FlashSaleResponse)
-async def get_current_flash_sale(db: Session = Depends(get_db)):
+def get_current_flash_sale(request: Request, db: Session = Depends(get_db)):
     """Get the currently active flash sale"""
-    now = datetime.now(timezone.utc)
-
-    flash_sale = db.query(FlashSale).options(
-        joinedload(FlashSale.items).joinedload(FlashSaleItem.product)
-    ).filter(
-        FlashSale.is_active == True,
-        FlashSale.start_time <= now,
-        FlashSale.end_time > now
-    ).first()
-
-    if not flash_sale:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No active flash sale at this time"
-        )
-
-    return get_flash_sale_with_items(db, flash_sale)
+    # Precomputed body with live sold/remaining counts
+    return flash_snapshot.serve_current(request, db)
 
 
 @router.get("", response_model=List[FlashSaleListResponse])
-async def get_flash_sales(
+def get_flash_sales(
     include_inactive: bool = False,
     db: Session = Depends(get_db)
 ):
@@ -123,7 +71,7 @@ async def get_flash_sales(
 
 
 @router.get("/by-id/{flash_sale_id}", response_model=FlashSaleResponse)
-async def get_flash_sale_by_id(flash_sale_id: int, db: Session = Depends(get_db)):
+def get_flash_sale_by_id(flash_sale_id: int, db: Session = Depends(get_db)):
     """Get flash sale by ID (for admin use - includes inactive)"""
     flash_sale = db.query(FlashSale).options(
         joinedload(FlashSale.items).joinedload(FlashSaleItem.product)
@@ -141,7 +89,7 @@ async def get_flash_sale_by_id(flash_sale_id: int, db: Session = Depends(get_db)
 
 
 @router.get("/{slug}", response_model=FlashSaleResponse)
-async def get_flash_sale(slug: str, db: Session = Depends(get_db)):
+def get_flash_sale(slug: str, db: Session = Depends(get_db)):
     """Get flash sale by slug"""
     flash_sale = db.query(FlashSale).options(
         joinedload(FlashSale.items).joinedload(FlashSaleItem.product)
@@ -164,7 +112,7 @@ async def get_flash_sale(slug: str, db: Session = Depends(get_db)):
 # ============================================
 
 @router.post("", response_model=FlashSaleResponse)
-async def create_flash_sale(
+def create_flash_sale(
     flash_sale_data: FlashSaleCreate,
     db: Session = Depends(get_db),
     admin=Depends(get_current_admin)
@@ -224,6 +172,7 @@ async def create_flash_sale(
         db.add(item)
 
     db.commit()
+    _refresh_current_sale(db)
     db.refresh(flash_sale)
 
     # Reload with relationships
@@ -235,7 +184,7 @@ async def create_flash_sale(
 
 
 @router.put("/{flash_sale_id}", response_model=FlashSaleResponse)
-async def update_flash_sale(
+def update_flash_sale(
     flash_sale_id: int,
     flash_sale_data: FlashSaleUpdate,
     db: Session = Depends(get_db),
@@ -265,6 +214,7 @@ async def update_flash_sale(
         )
 
     db.commit()
+    _refresh_current_sale(db)
     db.refresh(flash_sale)
 
     # Reload with relationships
@@ -276,7 +226,7 @@ async def update_flash_sale(
 
 
 @router.delete("/{flash_sale_id}")
-async def delete_flash_sale(
+def delete_flash_sale(
     flash_sale_id: int,
     db: Session = Depends(get_db),
     admin=Depends(get_current_admin)
@@ -295,12 +245,13 @@ async def delete_flash_sale(
     # Soft delete
     flash_sale.is_active = False
     db.commit()
+    _refresh_current_sale(db)
 
     return {"message": "Flash sale deleted successfully"}
 
 
 @router.post("/{flash_sale_id}/items", response_model=FlashSaleItemResponse)
-async def add_flash_sale_item(
+def add_flash_sale_item(
     flash_sale_id: int,
     item_data: FlashSaleItemCreate,
     db: Session = Depends(get_db),
@@ -350,6 +301,7 @@ async def add_flash_sale_item(
     )
     db.add(item)
     db.commit()
+    _refresh_current_sale(db)
     db.refresh(item)
 
     return {
@@ -380,7 +332,7 @@ async def add_flash_sale_item(
 
 
 @router.delete("/{flash_sale_id}/items/{item_id}")
-async def remove_flash_sale_item(
+def remove_flash_sale_item(
     flash_sale_id: int,
     item_id: int,
     db: Session = Depends(get_db),
@@ -400,6 +352,7 @@ async def remove_flash_sale_item(
 
     db.delete(item)
     db.commit()
+    _refresh_current_sale(db)
 
     return {"message": "Item removed from flash sale"}
 
@@ -443,6 +396,7 @@ async def upload_flash_sale_banner(
     # Update flash sale with new banner path
     flash_sale.banner_image = f"/uploads/flash-sales/{filename}"
     db.commit()
+    _refresh_current_sale(db)
 
     return {
         "message": "Banner uploaded successfully",
@@ -24,7 +24,7 @@ def generate_gift_card_code() -> str:
 
 
 @router.post("/purchase", response_model=GiftCardResponse)
-async def purchase_gift_card(
+def purchase_gift_card(
     data: GiftCardPurchase,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -71,7 +71,7 @@ async def purchase_gift_card(
 
 
 @router.get("/check/{code}")
-async def check_gift_card_balance(
+def check_gift_card_balance(
     code: str,
     db: Session = Depends(get_db)
 ):
@@ -107,7 +107,7 @@ async def check_gift_card_balance(
 
 
 @router.post("/validate")
-async def validate_gift_card(
+def validate_gift_card(
     code: str,
     amount: Optional[float] = None,
     db: Session = Depends(get_db)
@@ -143,7 +143,7 @@ async def validate_gift_card(
 
 
 @router.get("/my-cards", response_model=List[GiftCardResponse])
-async def get_my_gift_cards(
+def get_my_gift_cards(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
 ):
@@ -156,7 +156,7 @@ async def get_my_gift_cards(
 
 
 @router.get("/my-cards/{card_id}/transactions", response_model=List[GiftCardTransactionResponse])
-async def get_gift_card_transactions(
+def get_gift_card_transactions(
     card_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
@@ -182,7 +182,7 @@ async def get_gift_card_transactions(
 
 # Admin endpoints
 @router.get("/admin", response_model=List[GiftCardResponse])
-async def get_all_gift_cards(
+def get_all_gift_cards(
     page: int = 1,
     limit: int = 50,
     is_active: bool = None,
@@ -208,7 +208,7 @@ async def get_all_gift_cards(
 
 
 @router.put("/admin/{card_id}/deactivate")
-async def deactivate_gift_card(
+def deactivate_gift_card(
     card_id: int,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -229,7 +229,7 @@ async def deactivate_gift_card(
 
 
 @router.get("/admin/stats")
-async def get_gift_card_stats(
+def get_gift_card_stats(
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
 ):
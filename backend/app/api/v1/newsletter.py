@@ -12,7 +12,7 @@ router = APIRouter(prefix="/newsletter", tags=["Newsletter"])
 
 
 @router.post("/subscribe")
-async def subscribe_newsletter(
+def subscribe_newsletter(
     data: NewsletterSubscribe,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -52,7 +52,7 @@ async def subscribe_newsletter(
 
 
 @router.post("/unsubscribe")
-async def unsubscribe_newsletter(
+def unsubscribe_newsletter(
     email: str,
     db: Session = Depends(get_db)
 ):
@@ -79,7 +79,7 @@ async def unsubscribe_newsletter(
 
 # Admin endpoints
 @router.get("/admin/subscribers", response_model=List[NewsletterSubscriberResponse])
-async def get_subscribers(
+def get_subscribers(
     page: int = 1,
     limit: int = 50,
     is_active: bool = True,
@@ -105,7 +105,7 @@ async def get_subscribers(
 
 
 @router.get("/admin/subscribers/export")
-async def export_subscribers(
+def export_subscribers(
     is_active: bool = True,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -1,49 +1,122 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 from datetime import datetime, timezone
-from app.database import get_db
+from app.database import get_async_db
 from app.models import Order, OrderItem, Product, User, PaymentStatus, OrderStatus, OrderTracking, Voucher, VoucherUsage
 from app.schemas import OrderCreate, OrderResponse, OrderStatusUpdate, OrderListResponse
-from app.utils import get_current_user_required, get_current_admin, generate_order_number, calculate_shipping
+from app.utils import get_current_user_required_async, get_current_admin_async, calculate_shipping
+from app.utils.pagination import paginate_keyset_async, cursor_for, cached_count_async, count_rows
+from app.services import flash_stock, idempotency, sales_rollup
+from app.services.order_numbers import next_order_number
+from app.services.product_cards import build_product_cards_async
+from app.services.stock import InsufficientStock, claim_cancellation_async, merge_quantities, reserve_stock
 from math import ceil
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
+# Newest first, id as tie-breaker
+ORDER_SORT_KEY = [(Order.created_at, True), (Order.id, True)]
+
+# Relationships serialized by OrderResponse; lazy loads can't run under asyncio
+ORDER_LOAD_OPTIONS = (
+    selectinload(Order.items).selectinload(OrderItem.product).options(
+        selectinload(Product.images),
+        selectinload(Product.category)
+    ),
+    selectinload(Order.tracking),
+)
+
+# Order columns in OrderResponse; checkout fills in items and tracking itself
+ORDER_RESPONSE_FIELDS = [
+    name for name in OrderResponse.model_fields if name not in ("items", "tracking")
+]
+
+
+def orders_query():
+    """select(Order) with everything OrderResponse needs eagerly loaded"""
+    return select(Order).options(*ORDER_LOAD_OPTIONS)
+
+
+async def get_order_by_number(db: AsyncSession, order_number: str) -> Optional[Order]:
+    return await db.scalar(
+        orders_query()
+        .where(Order.order_number == order_number)
+        .execution_options(populate_existing=True)
+    )
+
+
+def offset_order_page(orders: list, total: int, page: int, page_size: int) -> dict:
+    """Offset page response, with a cursor to continue by keyset"""
+    has_more = (page - 1) * page_size + len(orders) < total
+    return {
+        "items": orders,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": ceil(total / page_size),
+        "next_cursor": cursor_for(orders[-1], ORDER_SORT_KEY) if has_more else None,
+        "has_more": has_more
+    }
+
+
+async def keyset_order_page(
+    db: AsyncSession,
+    query,
+    page_size: int,
+    cursor: str,
+    exact_total: bool,
+    count_key: tuple
+) -> dict:
+    """Keyset page response; the total is cached unless exact_total"""
+    orders, next_cursor = await paginate_keyset_async(db, query, ORDER_SORT_KEY, page_size, cursor)
+    if exact_total:
+        total = await count_rows(db, query)
+    else:
+        total = await cached_count_async(db, query, count_key)
+    return {
+        "items": orders,
+        "total": total,
+        "page_size": page_size,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+        "total_is_estimate": not exact_total
+    }
+
+
 @router.get("", response_model=OrderListResponse)
 async def get_user_orders(
     page: int = 1,
     page_size: int = 10,
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Order).filter(Order.user_id == current_user.id)
+    query = orders_query().where(Order.user_id == current_user.id)
+
+    if cursor:
+        return await keyset_order_page(db, query, page_size, cursor, exact_total, ("user_orders", current_user.id))
     
-    total = query.count()
+    total = await count_rows(db, query)
     
-    orders = query.order_by(Order.created_at.desc())\
-        .offset((page - 1) * page_size)\
-        .limit(page_size)\
-        .all()
+    orders = (await db.scalars(
+        query.order_by(Order.created_at.desc(), Order.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )).all()
     
-    return {
-        "items": orders,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": ceil(total / page_size)
-    }
+    return offset_order_page(orders, total, page, page_size)
 
 @router.get("/{order_number}", response_model=OrderResponse)
 async def get_order(
     order_number: str,
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    order = db.query(Order).filter(
-        Order.order_number == order_number
-    ).first()
+    order = await get_order_by_number(db, order_number)
     
     if not order:
         raise HTTPException(
@@ -63,19 +136,45 @@ async def get_order(
 @router.post("", response_model=OrderResponse)
 async def create_order(
     order_data: OrderCreate,
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER)
 ):
+    """Place an order; retries with the same Idempotency-Key replay the first response"""
+    return await idempotency.run_async(
+        idempotency_key, "orders.create", current_user.id, order_data,
+        lambda: _place_order(order_data, current_user, db),
+        response_model=OrderResponse
+    )
+
+
+async def _place_order(order_data: OrderCreate, current_user: User, db: AsyncSession):
+    """
+    Checkout as one transaction: all reads first, then the stock reservation
+    and every insert, then a single commit, so an order is written whole or
+    not at all.
+    """
+    # Flash sale units taken from the sale counters, returned if checkout fails
+    flash_units = {}
     try:
         # Validate and calculate order
         subtotal = 0
         order_items = []
+        now = datetime.now(timezone.utc)
+
+        # Load every product in one query
+        quantities = merge_quantities(order_data.items)
+        products = {
+            product.id: product
+            for product in (await db.scalars(select(Product).where(
+                Product.id.in_(quantities),
+                Product.is_active == True
+            ))).all()
+        }
+        flash_offers = await flash_stock.active_offers(db, products)
 
         for item in order_data.items:
-            product = db.query(Product).filter(
-                Product.id == item.product_id,
-                Product.is_active == True
-            ).first()
+            product = products.get(item.product_id)
 
             if not product:
                 raise HTTPException(
@@ -83,20 +182,31 @@ async def create_order(
                     detail=f"Product {item.product_id} not found"
                 )
 
-            if product.stock < item.quantity:
+            # Fail fast; the reservation below is the authoritative check
+            if product.stock < quantities[product.id]:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Insufficient stock for {product.name}"
                 )
 
-            item_total = product.price * item.quantity
+            # Flash price while the sale's allocation covers the whole line
+            price = product.price
+            offer = flash_offers.get(product.id)
+            if offer and await flash_stock.take_units_async(offer, item.quantity):
+                price = offer.flash_price
+                flash_units[offer.item_id] = flash_units.get(offer.item_id, 0) + item.quantity
+            else:
+                offer = None
+
+            item_total = price * item.quantity
             subtotal += item_total
 
             order_items.append({
                 "product_id": product.id,
                 "quantity": item.quantity,
-                "price": product.price,
-                "total": item_total
+                "price": price,
+                "total": item_total,
+                "flash_sale_item_id": offer.item_id if offer else None
             })
 
         # Handle voucher if provided
@@ -104,20 +214,24 @@ async def create_order(
         voucher_discount = 0
 
         if order_data.voucher_code:
-            voucher = db.query(Voucher).filter(
+            # The voucher and this customer's uses of it in one query
+            user_usage_count = select(func.count(VoucherUsage.id)).where(
+                VoucherUsage.voucher_id == Voucher.id,
+                VoucherUsage.user_id == current_user.id
+            ).scalar_subquery()
+            row = (await db.execute(select(Voucher, user_usage_count).where(
                 Voucher.code == order_data.voucher_code.upper(),
                 Voucher.is_active == True
-            ).first()
+            ))).first()
 
-            if not voucher:
+            if not row:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid voucher code"
                 )
+            voucher, user_usage_count = row
 
             # Validate voucher
-            now = datetime.now(timezone.utc)
-
             if voucher.start_date and voucher.start_date > now:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -143,11 +257,6 @@ async def create_order(
                 )
 
             # Check per-user limit
-            user_usage_count = db.query(func.count(VoucherUsage.id)).filter(
-                VoucherUsage.voucher_id == voucher.id,
-                VoucherUsage.user_id == current_user.id
-            ).scalar()
-
             if user_usage_count >= voucher.per_user_limit:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -164,6 +273,9 @@ async def create_order(
 
             voucher_discount = min(voucher_discount, subtotal)
 
+        # Product cards for the response, read before any row is locked
+        cards = {card["id"]: card for card in await build_product_cards_async(db, list(products.values()))}
+
         # Calculate shipping
         shipping_cost = calculate_shipping(subtotal, order_data.shipping_city)
         total = subtotal + shipping_cost - voucher_discount
@@ -173,9 +285,9 @@ async def create_order(
         is_cod = order_data.payment_method.value == "cod"
         initial_status = OrderStatus.CONFIRMED if is_cod else OrderStatus.PENDING
 
-        # Create order
+        # Create order (the number is drawn before anything is written)
         order = Order(
-            order_number=generate_order_number(),
+            order_number=await next_order_number(),
             user_id=current_user.id,
             status=initial_status.value,
             payment_status=PaymentStatus.PENDING.value,
@@ -192,65 +304,119 @@ async def create_order(
             shipping_address=order_data.shipping_address,
             shipping_area=order_data.shipping_area,
             shipping_city=order_data.shipping_city,
-            notes=order_data.notes
+            notes=order_data.notes,
+            created_at=now
         )
 
-        db.add(order)
-        db.commit()
-        db.refresh(order)
+        # Reserve stock for every line in one conditional UPDATE; it commits
+        # with the order, or not at all
+        try:
+            await reserve_stock(db, quantities)
+        except InsufficientStock as e:
+            detail = f"Insufficient stock for {products[e.product_ids[0]].name}"
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=detail
+            )
 
-        # Record voucher usage if used
+        # Count the voucher use, re-checking the limit under the row lock
         if voucher:
-            voucher_usage = VoucherUsage(
-                voucher_id=voucher.id,
-                user_id=current_user.id,
-                order_id=order.id
+            used = await db.execute(
+                update(Voucher).where(
+                    Voucher.id == voucher.id,
+                    or_(
+                        Voucher.usage_limit.is_(None),
+                        Voucher.usage_limit == 0,
+                        func.coalesce(Voucher.usage_count, 0) < Voucher.usage_limit
+                    )
+                ).values(usage_count=func.coalesce(Voucher.usage_count, 0) + 1),
+                execution_options={"synchronize_session": False}
             )
-            db.add(voucher_usage)
-
-            # Increment voucher usage count
-            voucher.usage_count += 1
+            if used.rowcount != 1:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="This voucher has reached its usage limit"
+                )
 
-        # Create initial tracking
-        tracking = OrderTracking(
-            order_id=order.id,
-            status="Order Placed",
-            description="Your order has been placed successfully"
-        )
-        db.add(tracking)
+        # The order row (through the ORM, so the sales rollups see it) for its id
+        db.add(order)
+        await db.flush()
 
+        # Lines and tracking rows go in as one multi-row INSERT each. The
+        # order is unpaid, so the rollups' per-item events have nothing to count
+        for item_data in order_items:
+            item_data["order_id"] = order.id
+        item_ids = (await db.execute(
+            insert(OrderItem).returning(OrderItem.id, sort_by_parameter_order=True),
+            order_items
+        )).scalars().all()
+
+        tracking = [{
+            "order_id": order.id,
+            "status": "Order Placed",
+            "description": "Your order has been placed successfully"
+        }]
         # If COD, add confirmation tracking
         if is_cod:
-            confirmation_tracking = OrderTracking(
-                order_id=order.id,
-                status="Confirmed",
-                description="Order auto-confirmed (Cash on Delivery)"
-            )
-            db.add(confirmation_tracking)
-
-        # Create order items and update stock
-        for item_data in order_items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item_data["product_id"],
-                quantity=item_data["quantity"],
-                price=item_data["price"],
-                total=item_data["total"]
-            )
-            db.add(order_item)
-
-            # Update product stock
-            product = db.query(Product).filter(Product.id == item_data["product_id"]).first()
-            product.stock -= item_data["quantity"]
-
-        db.commit()
-        db.refresh(order)
+            tracking.append({
+                "order_id": order.id,
+                "status": "Confirmed",
+                "description": "Order auto-confirmed (Cash on Delivery)"
+            })
+        tracking_rows = (await db.execute(
+            insert(OrderTracking).returning(
+                OrderTracking.id, OrderTracking.created_at, sort_by_parameter_order=True
+            ),
+            tracking
+        )).all()
 
-        return order
+        # Record voucher usage if used
+        if voucher:
+            db.add(VoucherUsage(
+                voucher_id=voucher.id,
+                user_id=current_user.id,
+                order_id=order.id
+            ))
+
+        await db.commit()
+
+        # The flash units are sold; sold_count is updated in the next batch
+        flash_stock.record_sold(flash_units)
+        flash_units = {}
+        await flash_stock.flush_if_due()
+        await sales_rollup.flush_if_due()
+
+        # Respond from what checkout already holds instead of reloading the order
+        return {
+            **{field: getattr(order, field) for field in ORDER_RESPONSE_FIELDS},
+            "items": [
+                {
+                    "id": item_id,
+                    "product_id": item_data["product_id"],
+                    "quantity": item_data["quantity"],
+                    "price": item_data["price"],
+                    "total": item_data["total"],
+                    # Cards were read before this order's reservation
+                    "product": {
+                        **cards[item_data["product_id"]],
+                        "stock": cards[item_data["product_id"]]["stock"] - quantities[item_data["product_id"]]
+                    }
+                }
+                for item_id, item_data in zip(item_ids, order_items)
+            ],
+            "tracking": [
+                {**entry, "id": row.id, "created_at": row.created_at or now}
+                for entry, row in zip(tracking, tracking_rows)
+            ]
+        }
     except HTTPException:
+        await flash_stock.give_back_async(flash_units)
         raise
     except Exception as e:
-        db.rollback()
+        await flash_stock.give_back_async(flash_units)
+        await db.rollback()
         import traceback
         print(f"Error creating order: {str(e)}")
         print(traceback.format_exc())
@@ -263,10 +429,10 @@ async def create_order(
 async def update_order_status(
     order_number: str,
     status_data: OrderStatusUpdate,
-    admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    admin = Depends(get_current_admin_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    order = db.query(Order).filter(Order.order_number == order_number).first()
+    order = await get_order_by_number(db, order_number)
 
     if not order:
         raise HTTPException(
@@ -274,7 +440,12 @@ async def update_order_status(
             detail="Order not found"
         )
 
-    order.status = status_data.status.value
+    if status_data.status == OrderStatus.CANCELLED:
+        # Cancelling before shipment returns the reserved stock
+        if not await claim_cancellation_async(db, order.id):
+            order.status = status_data.status.value
+    else:
+        order.status = status_data.status.value
 
     # Auto-complete payment based on payment method and order status
     # bKash/Card: Payment completes when order is confirmed (payment verified before confirming)
@@ -293,21 +464,20 @@ async def update_order_status(
     )
     db.add(tracking)
 
-    db.commit()
-    db.refresh(order)
+    await db.commit()
 
-    return order
+    return await get_order_by_number(db, order_number)
 
 
 @router.put("/{order_number}/payment-status", response_model=OrderResponse)
 async def update_payment_status(
     order_number: str,
     payment_status: PaymentStatus,
-    admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    admin = Depends(get_current_admin_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update payment status for an order (Admin only)"""
-    order = db.query(Order).filter(Order.order_number == order_number).first()
+    order = await get_order_by_number(db, order_number)
 
     if not order:
         raise HTTPException(
@@ -325,18 +495,17 @@ async def update_payment_status(
     )
     db.add(tracking)
 
-    db.commit()
-    db.refresh(order)
+    await db.commit()
 
-    return order
+    return await get_order_by_number(db, order_number)
 
 @router.post("/{order_number}/cancel", response_model=OrderResponse)
 async def cancel_order(
     order_number: str,
-    current_user: User = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_required_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    order = db.query(Order).filter(Order.order_number == order_number).first()
+    order = await get_order_by_number(db, order_number)
     
     if not order:
         raise HTTPException(
@@ -357,13 +526,15 @@ async def cancel_order(
             detail="Order cannot be cancelled at this stage"
         )
     
-    # Restore stock
-    for item in order.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
-        if product:
-            product.stock += item.quantity
-    
-    order.status = OrderStatus.CANCELLED.value
+    # Cancel and release the stock reservation, exactly once
+    cancelled = await claim_cancellation_async(
+        db, order.id, (OrderStatus.PENDING.value, OrderStatus.CONFIRMED.value)
+    )
+    if not cancelled:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order status changed; please refresh and try again"
+        )
     
     # Add tracking entry
     tracking = OrderTracking(
@@ -373,36 +544,35 @@ async def cancel_order(
     )
     db.add(tracking)
     
-    db.commit()
-    db.refresh(order)
+    await db.commit()
     
-    return order
+    return await get_order_by_number(db, order_number)
 
 # Admin routes
-@router.get("/admin/all", response_model=dict)
+@router.get("/admin/all", response_model=OrderListResponse)
 async def get_all_orders(
     page: int = 1,
     page_size: int = 20,
     status: str = None,
-    admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
+    admin = Depends(get_current_admin_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Order)
+    query = orders_query()
     
     if status:
-        query = query.filter(Order.status == status)
+        query = query.where(Order.status == status)
+
+    if cursor:
+        return await keyset_order_page(db, query, page_size, cursor, exact_total, ("all_orders", status))
     
-    total = query.count()
+    total = await count_rows(db, query)
     
-    orders = query.order_by(Order.created_at.desc())\
-        .offset((page - 1) * page_size)\
-        .limit(page_size)\
-        .all()
+    orders = (await db.scalars(
+        query.order_by(Order.created_at.desc(), Order.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )).all()
     
-    return {
-        "items": orders,
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "total_pages": ceil(total / page_size)
-    }
+    return offset_order_page(orders, total, page, page_size)
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
+from typing import Optional
 import httpx
 import json
 from app.database import get_db
@@ -7,6 +8,7 @@ from app.models import Order, Payment, PaymentStatus
 from app.schemas import PaymentResponse, BkashPaymentCreate
 from app.utils import get_current_user_required
 from app.config import settings
+from app.services import idempotency
 
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
@@ -39,9 +41,16 @@ async def get_bkash_token():
 async def create_bkash_payment(
     payment_data: BkashPaymentCreate,
     current_user = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER)
 ):
     """Create bKash payment."""
+    return await idempotency.run_async(
+        idempotency_key, "payments.bkash", current_user.id, payment_data,
+        lambda: _create_bkash_payment(payment_data, current_user, db)
+    )
+
+async def _create_bkash_payment(payment_data: BkashPaymentCreate, current_user, db: Session):
     order = db.query(Order).filter(
         Order.id == payment_data.order_id,
         Order.user_id == current_user.id
@@ -165,12 +174,19 @@ async def bkash_callback(
     return {"success": False, "message": "Payment failed or cancelled"}
 
 @router.post("/card/create")
-async def create_card_payment(
+def create_card_payment(
     order_id: int,
     current_user = Depends(get_current_user_required),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.HEADER)
 ):
     """Create card payment (Stripe integration placeholder)."""
+    return idempotency.run(
+        idempotency_key, "payments.card", current_user.id, {"order_id": order_id},
+        lambda: _create_card_payment(order_id, current_user, db)
+    )
+
+def _create_card_payment(order_id: int, current_user, db: Session):
     order = db.query(Order).filter(
         Order.id == order_id,
         Order.user_id == current_user.id
@@ -200,7 +216,7 @@ async def create_card_payment(
     }
 
 @router.post("/cod/confirm")
-async def confirm_cod_payment(
+def confirm_cod_payment(
     order_id: int,
     current_user = Depends(get_current_user_required),
     db: Session = Depends(get_db)
@@ -235,7 +251,7 @@ async def confirm_cod_payment(
     }
 
 @router.get("/{order_id}", response_model=PaymentResponse)
-async def get_payment(
+def get_payment(
     order_id: int,
     current_user = Depends(get_current_user_required),
     db: Session = Depends(get_db)
@@ -34,7 +34,7 @@ def get_or_create_settings(db: Session) -> PointsSettings:
 
 
 @router.get("/balance", response_model=PointsBalanceResponse)
-async def get_points_balance(
+def get_points_balance(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
 ):
@@ -66,7 +66,7 @@ async def get_points_balance(
 
 
 @router.get("/history", response_model=List[PointsTransactionResponse])
-async def get_points_history(
+def get_points_history(
     page: int = 1,
     limit: int = 20,
     db: Session = Depends(get_db),
@@ -83,7 +83,7 @@ async def get_points_history(
 
 
 @router.post("/calculate")
-async def calculate_points(
+def calculate_points(
     subtotal: float,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
@@ -104,7 +104,7 @@ async def calculate_points(
 
 
 @router.post("/validate-redemption", response_model=PointsRedeemResponse)
-async def validate_points_redemption(
+def validate_points_redemption(
     data: PointsRedeemRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
@@ -152,7 +152,7 @@ async def validate_points_redemption(
 
 # Admin endpoints
 @router.get("/admin/settings", response_model=PointsSettingsResponse)
-async def get_points_settings(
+def get_points_settings(
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
 ):
@@ -161,7 +161,7 @@ async def get_points_settings(
 
 
 @router.put("/admin/settings", response_model=PointsSettingsResponse)
-async def update_points_settings(
+def update_points_settings(
     data: PointsSettingsUpdate,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -179,7 +179,7 @@ async def update_points_settings(
 
 
 @router.get("/admin/stats")
-async def get_points_stats(
+def get_points_stats(
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
 ):
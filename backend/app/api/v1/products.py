@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import Optional, List
-from app.database import get_db
+from app.database import get_async_db
 from app.models import Product, ProductImage, Category, ProductSpecification, ProductAccessory
 from app.schemas import (
     ProductResponse,
@@ -14,47 +16,92 @@ from app.schemas import (
     ProductAccessoryCreate,
     ProductAccessoryResponse,
 )
-from app.utils import get_current_admin, generate_slug
+from app.utils import get_current_admin_async, generate_slug
+from app.services.product_cards import build_product_cards_async, get_product_cards_async
+from app.services.search import search_matches
+from app.services.autocomplete import autocomplete_index, build_autocomplete_index
+from app.services.response_cache import response_cache, card_tags, PRODUCT_LISTINGS
+from app.utils.pagination import paginate_keyset_async, cursor_for, cached_count_async, count_rows
+from fastapi.concurrency import run_in_threadpool
 from math import ceil
 from collections import defaultdict
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+# Keyset sort orders for product listings; each ends with the id tie-breaker
+PRODUCT_SORT_KEYS = {
+    "newest": [(Product.created_at, True), (Product.id, True)],
+    "price_low": [(Product.price, False), (Product.id, False)],
+    "price_high": [(Product.price, True), (Product.id, True)],
+    "rating": [(Product.rating, True), (Product.id, True)],
+    "popular": [(Product.review_count, True), (Product.id, True)],
+}
+
+# Relationships serialized by ProductResponse; lazy loads can't run under asyncio
+PRODUCT_DETAIL_OPTIONS = (selectinload(Product.images), selectinload(Product.category))
+
+
+async def get_product_detail(db: AsyncSession, product_id: int) -> Optional[Product]:
+    """Load a product with everything ProductResponse serializes"""
+    return await db.scalar(
+        select(Product)
+        .where(Product.id == product_id)
+        .options(*PRODUCT_DETAIL_OPTIONS)
+        .execution_options(populate_existing=True)
+    )
+
 
 @router.get("/search/autocomplete")
 async def search_autocomplete(
     q: str = Query(..., min_length=2, max_length=100),
     limit: int = Query(8, ge=1, le=20),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Search autocomplete for products and categories"""
+    # Served from the in-memory index; the database path below is only
+    # used before the index has been built
+    if autocomplete_index.built:
+        suggestions = autocomplete_index.suggest(q, limit)
+        return {
+            "query": q,
+            "suggestions": suggestions,
+            "total": len(suggestions)
+        }
+
     suggestions = []
 
-    # Search products
-    products = db.query(Product).filter(
+    # Search products, best match first
+    query = select(Product).where(
         Product.is_active == True,
-        Product.images.any(),
-        Product.name.ilike(f"%{q}%")
-    ).order_by(Product.rating.desc()).limit(limit).all()
+        Product.has_image == True
+    )
+    matches = search_matches(db, q)
+    if matches is not None:
+        query = query.join(matches, matches.c.product_id == Product.id) \
+            .order_by(matches.c.rank.desc(), Product.rating.desc())
+    else:
+        query = query.where(Product.name.ilike(f"%{q}%")).order_by(Product.rating.desc())
+    products = (await db.scalars(query.limit(limit))).all()
 
     for product in products:
-        primary_image = next((img for img in product.images if img.is_primary), None)
         suggestions.append({
             "type": "product",
             "id": product.id,
             "name": product.name,
             "slug": product.slug,
             "price": product.price,
-            "image": primary_image.url if primary_image else (product.images[0].url if product.images else None),
+            "image": product.primary_image_url,
             "url": f"/product/{product.slug}"
         })
 
     # Search categories (only if we have room)
     if len(suggestions) < limit:
-        categories = db.query(Category).filter(
-            Category.is_active == True,
-            Category.name.ilike(f"%{q}%")
-        ).limit(limit - len(suggestions)).all()
+        categories = (await db.scalars(
+            select(Category).where(
+                Category.is_active == True,
+                Category.name.ilike(f"%{q}%")
+            ).limit(limit - len(suggestions))
+        )).all()
 
         for category in categories:
             suggestions.append({
@@ -73,119 +120,111 @@ async def search_autocomplete(
     }
 
 
+@router.get("/search/autocomplete/metrics")
+async def get_autocomplete_metrics(admin = Depends(get_current_admin_async)):
+    """Autocomplete index size, rebuild time and query latency (Admin only)"""
+    return autocomplete_index.metrics()
+
+
+@router.post("/search/autocomplete/rebuild")
+async def rebuild_autocomplete_index(admin = Depends(get_current_admin_async)):
+    """Rebuild the autocomplete index from the database (Admin only)"""
+    # A full rebuild reads the whole catalog; keep it off the event loop
+    await run_in_threadpool(build_autocomplete_index)
+    return autocomplete_index.metrics()
+
+
 @router.get("/featured")
 async def get_featured_products(
+    request: Request,
     limit: int = Query(8, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get featured products"""
-    products = db.query(Product).filter(
-        Product.is_active == True,
-        Product.is_featured == True,
-        Product.images.any()
-    ).order_by(Product.created_at.desc()).limit(limit).all()
+    cached = await response_cache.lookup_async(request)
+    if cached:
+        return cached
 
-    items = []
-    for product in products:
-        primary_image = next((img for img in product.images if img.is_primary), None)
-        items.append({
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "price": product.price,
-            "original_price": product.original_price,
-            "discount": product.discount,
-            "stock": product.stock,
-            "category_id": product.category_id,
-            "brand": product.brand,
-            "is_featured": product.is_featured,
-            "is_new": product.is_new,
-            "rating": product.rating,
-            "review_count": product.review_count,
-            "image": primary_image.url if primary_image else (product.images[0].url if product.images else None),
-            "category": product.category.name if product.category else None
-        })
+    products = (await db.scalars(
+        select(Product).where(
+            Product.is_active == True,
+            Product.is_featured == True,
+            Product.has_image == True
+        ).order_by(Product.created_at.desc()).limit(limit)
+    )).all()
 
-    return {"items": items, "total": len(items)}
+    items = await build_product_cards_async(db, products)
+
+    return await response_cache.store_async(
+        request,
+        {"items": items, "total": len(items)},
+        tags=[PRODUCT_LISTINGS, *card_tags(items)]
+    )
 
 
 @router.get("/new-arrivals")
 async def get_new_arrivals(
+    request: Request,
     limit: int = Query(8, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get new arrival products"""
+    cached = await response_cache.lookup_async(request)
+    if cached:
+        return cached
+
     # First try to get products marked as new
-    products = db.query(Product).filter(
-        Product.is_active == True,
-        Product.is_new == True,
-        Product.images.any()
-    ).order_by(Product.created_at.desc()).limit(limit).all()
+    products = (await db.scalars(
+        select(Product).where(
+            Product.is_active == True,
+            Product.is_new == True,
+            Product.has_image == True
+        ).order_by(Product.created_at.desc()).limit(limit)
+    )).all()
 
     # Fallback to latest products if none are marked as new
     if not products:
-        products = db.query(Product).filter(
-            Product.is_active == True,
-            Product.images.any()
-        ).order_by(Product.created_at.desc()).limit(limit).all()
-
-    items = []
-    for product in products:
-        primary_image = next((img for img in product.images if img.is_primary), None)
-        items.append({
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "price": product.price,
-            "original_price": product.original_price,
-            "discount": product.discount,
-            "stock": product.stock,
-            "category_id": product.category_id,
-            "brand": product.brand,
-            "is_featured": product.is_featured,
-            "is_new": product.is_new,
-            "rating": product.rating,
-            "review_count": product.review_count,
-            "image": primary_image.url if primary_image else (product.images[0].url if product.images else None),
-            "category": product.category.name if product.category else None
-        })
-
-    return {"items": items, "total": len(items)}
+        products = (await db.scalars(
+            select(Product).where(
+                Product.is_active == True,
+                Product.has_image == True
+            ).order_by(Product.created_at.desc()).limit(limit)
+        )).all()
+
+    items = await build_product_cards_async(db, products)
+
+    return await response_cache.store_async(
+        request,
+        {"items": items, "total": len(items)},
+        tags=[PRODUCT_LISTINGS, *card_tags(items)]
+    )
 
 
 @router.get("/best-sellers")
 async def get_best_sellers(
+    request: Request,
     limit: int = Query(8, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get best selling products (by rating and review count)"""
-    products = db.query(Product).filter(
-        Product.is_active == True,
-        Product.images.any()
-    ).order_by(Product.rating.desc(), Product.review_count.desc()).limit(limit).all()
+    cached = await response_cache.lookup_async(request)
+    if cached:
+        return cached
 
-    items = []
-    for product in products:
-        primary_image = next((img for img in product.images if img.is_primary), None)
-        items.append({
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "price": product.price,
-            "original_price": product.original_price,
-            "discount": product.discount,
-            "stock": product.stock,
-            "category_id": product.category_id,
-            "brand": product.brand,
-            "is_featured": product.is_featured,
-            "is_new": product.is_new,
-            "rating": product.rating,
-            "review_count": product.review_count,
-            "image": primary_image.url if primary_image else (product.images[0].url if product.images else None),
-            "category": product.category.name if product.category else None
-        })
+    products = (await db.scalars(
+        select(Product).where(
+            Product.is_active == True,
+            Product.has_image == True
+        ).order_by(Product.rating.desc(), Product.review_count.desc()).limit(limit)
+    )).all()
 
-    return {"items": items, "total": len(items)}
+    items = await build_product_cards_async(db, products)
+
+    return await response_cache.store_async(
+        request,
+        {"items": items, "total": len(items)},
+        tags=[PRODUCT_LISTINGS, *card_tags(items)]
+    )
 
 
 @router.get("", response_model=dict)
@@ -196,99 +235,123 @@ async def get_products(
     search: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
-    sort: Optional[str] = "newest",
+    sort: Optional[str] = None,
     is_featured: Optional[bool] = None,
     is_new: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    exact_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Only show products that are active AND have at least one image
-    query = db.query(Product).filter(
+    query = select(Product).where(
         Product.is_active == True,
-        Product.images.any()  # Must have at least one image
+        Product.has_image == True  # Must have at least one image
     )
     
     # Filter by category (including subcategories)
     if category:
-        cat = db.query(Category).filter(Category.slug == category).first()
+        cat = await db.scalar(select(Category).where(Category.slug == category))
         if cat:
             # Get this category and all its subcategories
-            subcategories = db.query(Category).filter(Category.parent_id == cat.id).all()
-            category_ids = [cat.id] + [sub.id for sub in subcategories]
-            query = query.filter(Product.category_id.in_(category_ids))
+            subcategory_ids = (await db.scalars(
+                select(Category.id).where(Category.parent_id == cat.id)
+            )).all()
+            category_ids = [cat.id, *subcategory_ids]
+            query = query.where(Product.category_id.in_(category_ids))
     
     # Search
+    matches = None
     if search:
-        query = query.filter(Product.name.ilike(f"%{search}%"))
+        matches = search_matches(db, search)
+        if matches is not None:
+            query = query.join(matches, matches.c.product_id == Product.id)
+        else:
+            query = query.where(Product.name.ilike(f"%{search}%"))
     
     # Price filter
     if min_price:
-        query = query.filter(Product.price >= min_price)
+        query = query.where(Product.price >= min_price)
     if max_price:
-        query = query.filter(Product.price <= max_price)
+        query = query.where(Product.price <= max_price)
     
     # Featured filter
     if is_featured is not None:
-        query = query.filter(Product.is_featured == is_featured)
+        query = query.where(Product.is_featured == is_featured)
     
     # New filter
     if is_new is not None:
-        query = query.filter(Product.is_new == is_new)
-    
-    # Sorting
-    if sort == "newest":
-        query = query.order_by(Product.created_at.desc())
-    elif sort == "price_low":
-        query = query.order_by(Product.price.asc())
-    elif sort == "price_high":
-        query = query.order_by(Product.price.desc())
-    elif sort == "rating":
-        query = query.order_by(Product.rating.desc())
-    elif sort == "popular":
-        query = query.order_by(Product.review_count.desc())
+        query = query.where(Product.is_new == is_new)
     
+    # Sorting (searches default to relevance, browsing to newest)
+    if sort is None:
+        sort = "relevance" if matches is not None else "newest"
+
+    if sort == "relevance" and matches is not None:
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not available for relevance-ranked search; use page"
+            )
+        sort_key = None
+        query = query.order_by(matches.c.rank.desc(), Product.rating.desc(), Product.id.desc())
+    else:
+        sort_key = PRODUCT_SORT_KEYS.get(sort, PRODUCT_SORT_KEYS["newest"])
+
+    # Cursor pagination: index range scan from the last row seen, with a
+    # cached total unless an exact one is requested
+    if cursor:
+        products, next_cursor = await paginate_keyset_async(db, query, sort_key, page_size, cursor)
+        if exact_total:
+            total = await count_rows(db, query)
+        else:
+            total = await cached_count_async(db, query, (
+                "products", category, search, min_price, max_price, is_featured, is_new
+            ))
+
+        return {
+            "items": await build_product_cards_async(db, products),
+            "total": total,
+            "total_is_estimate": not exact_total,
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
+        }
+
+    if sort_key is not None:
+        query = query.order_by(*[col.desc() if desc else col.asc() for col, desc in sort_key])
+
     # Get total count
-    total = query.count()
+    total = await count_rows(db, query)
     
     # Pagination
     offset = (page - 1) * page_size
-    products = query.offset(offset).limit(page_size).all()
+    products = (await db.scalars(query.offset(offset).limit(page_size))).all()
     
     # Format response
-    items = []
-    for product in products:
-        primary_image = next((img for img in product.images if img.is_primary), None)
-        items.append({
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "price": product.price,
-            "original_price": product.original_price,
-            "discount": product.discount,
-            "stock": product.stock,
-            "category_id": product.category_id,
-            "brand": product.brand,
-            "is_featured": product.is_featured,
-            "is_new": product.is_new,
-            "rating": product.rating,
-            "review_count": product.review_count,
-            "image": primary_image.url if primary_image else (product.images[0].url if product.images else None),
-            "category": product.category.name if product.category else None
-        })
+    items = await build_product_cards_async(db, products)
+
+    # Hand out a cursor so clients can switch to keyset paging from here
+    has_more = offset + len(products) < total
+    next_cursor = cursor_for(products[-1], sort_key) if has_more and sort_key else None
     
     return {
         "items": items,
         "total": total,
         "page": page,
         "page_size": page_size,
-        "total_pages": ceil(total / page_size)
+        "total_pages": ceil(total / page_size),
+        "next_cursor": next_cursor,
+        "has_more": has_more
     }
 
 @router.get("/{slug}", response_model=ProductResponse)
-async def get_product(slug: str, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(
-        Product.slug == slug,
-        Product.is_active == True
-    ).first()
+async def get_product(slug: str, db: AsyncSession = Depends(get_async_db)):
+    product = await db.scalar(
+        select(Product).where(
+            Product.slug == slug,
+            Product.is_active == True
+        ).options(*PRODUCT_DETAIL_OPTIONS)
+    )
 
     if not product:
         raise HTTPException(
@@ -297,7 +360,7 @@ async def get_product(slug: str, db: Session = Depends(get_db)):
         )
 
     # Hide products without images from public view
-    if not product.images:
+    if not product.has_image:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
@@ -308,11 +371,11 @@ async def get_product(slug: str, db: Session = Depends(get_db)):
 @router.post("", response_model=ProductResponse)
 async def create_product(
     product_data: ProductCreate,
-    db: Session = Depends(get_db),
-    admin = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_async)
 ):
     # Check if slug already exists
-    existing = db.query(Product).filter(Product.slug == product_data.slug).first()
+    existing = await db.scalar(select(Product).where(Product.slug == product_data.slug))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -336,8 +399,7 @@ async def create_product(
     )
     
     db.add(product)
-    db.commit()
-    db.refresh(product)
+    await db.flush()
     
     # Add images
     for img_data in product_data.images:
@@ -349,19 +411,18 @@ async def create_product(
         )
         db.add(image)
     
-    db.commit()
-    db.refresh(product)
+    await db.commit()
     
-    return product
+    return await get_product_detail(db, product.id)
 
 @router.put("/{product_id}", response_model=ProductResponse)
 async def update_product(
     product_id: int,
     product_data: ProductUpdate,
-    db: Session = Depends(get_db),
-    admin = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_async)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     
     if not product:
         raise HTTPException(
@@ -373,18 +434,17 @@ async def update_product(
     for field, value in product_data.dict(exclude_unset=True).items():
         setattr(product, field, value)
     
-    db.commit()
-    db.refresh(product)
+    await db.commit()
     
-    return product
+    return await get_product_detail(db, product.id)
 
 @router.delete("/{product_id}")
 async def delete_product(
     product_id: int,
-    db: Session = Depends(get_db),
-    admin = Depends(get_current_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin = Depends(get_current_admin_async)
 ):
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
 
     if not product:
         raise HTTPException(
@@ -394,7 +454,7 @@ async def delete_product(
 
     # Soft delete
     product.is_active = False
-    db.commit()
+    await db.commit()
 
     return {"message": "Product deleted successfully"}
 
@@ -406,7 +466,7 @@ async def delete_product(
 @router.post("/compare")
 async def compare_products(
     request: ProductCompareRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Compare 2-4 products side by side"""
     if len(request.product_ids) < 2 or len(request.product_ids) > 4:
@@ -415,10 +475,10 @@ async def compare_products(
             detail="Please select 2-4 products to compare"
         )
 
-    products = db.query(Product).filter(
+    products = (await db.scalars(select(Product).where(
         Product.id.in_(request.product_ids),
         Product.is_active == True
-    ).all()
+    ))).all()
 
     if len(products) != len(request.product_ids):
         raise HTTPException(
@@ -427,9 +487,11 @@ async def compare_products(
         )
 
     # Get specifications for all products
-    specs = db.query(ProductSpecification).filter(
-        ProductSpecification.product_id.in_(request.product_ids)
-    ).order_by(ProductSpecification.spec_group, ProductSpecification.sort_order).all()
+    specs = (await db.scalars(
+        select(ProductSpecification)
+        .where(ProductSpecification.product_id.in_(request.product_ids))
+        .order_by(ProductSpecification.spec_group, ProductSpecification.sort_order)
+    )).all()
 
     # Group specifications by group and name for comparison
     spec_groups = defaultdict(lambda: defaultdict(dict))
@@ -438,26 +500,9 @@ async def compare_products(
 
     # Format products
     formatted_products = []
-    for product in products:
-        primary_image = next((img for img in product.images if img.is_primary), None)
-        formatted_products.append({
-            "id": product.id,
-            "name": product.name,
-            "slug": product.slug,
-            "price": product.price,
-            "original_price": product.original_price,
-            "discount": product.discount,
-            "stock": product.stock,
-            "category_id": product.category_id,
-            "brand": product.brand,
-            "is_featured": product.is_featured,
-            "is_new": product.is_new,
-            "rating": product.rating,
-            "review_count": product.review_count,
-            "image": primary_image.url if primary_image else (product.images[0].url if product.images else None),
-            "category": product.category.name if product.category else None,
-            "description": product.description,
-        })
+    for product, card in zip(products, await build_product_cards_async(db, products)):
+        card["description"] = product.description
+        formatted_products.append(card)
 
     return {
         "products": formatted_products,
@@ -472,13 +517,13 @@ async def compare_products(
 @router.get("/{product_id}/specifications", response_model=List[ProductSpecificationResponse])
 async def get_product_specifications(
     product_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detailed specifications for a product"""
-    product = db.query(Product).filter(
+    product = await db.scalar(select(Product).where(
         Product.id == product_id,
         Product.is_active == True
-    ).first()
+    ))
 
     if not product:
         raise HTTPException(
@@ -486,9 +531,11 @@ async def get_product_specifications(
             detail="Product not found"
         )
 
-    specs = db.query(ProductSpecification).filter(
-        ProductSpecification.product_id == product_id
-    ).order_by(ProductSpecification.spec_group, ProductSpecification.sort_order).all()
+    specs = (await db.scalars(
+        select(ProductSpecification)
+        .where(ProductSpecification.product_id == product_id)
+        .order_by(ProductSpecification.spec_group, ProductSpecification.sort_order)
+    )).all()
 
     return specs
 
@@ -497,11 +544,11 @@ async def get_product_specifications(
 async def update_product_specifications(
     product_id: int,
     specs_data: ProductSpecificationsUpdate,
-    db: Session = Depends(get_db),
-    admin=Depends(get_current_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin=Depends(get_current_admin_async)
 ):
     """Update product specifications (Admin only)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
 
     if not product:
         raise HTTPException(
@@ -510,9 +557,9 @@ async def update_product_specifications(
         )
 
     # Delete existing specifications
-    db.query(ProductSpecification).filter(
-        ProductSpecification.product_id == product_id
-    ).delete()
+    await db.execute(
+        delete(ProductSpecification).where(ProductSpecification.product_id == product_id)
+    )
 
     # Add new specifications
     for spec in specs_data.specifications:
@@ -525,12 +572,14 @@ async def update_product_specifications(
         )
         db.add(new_spec)
 
-    db.commit()
+    await db.commit()
 
     # Return updated specs
-    specs = db.query(ProductSpecification).filter(
-        ProductSpecification.product_id == product_id
-    ).order_by(ProductSpecification.spec_group, ProductSpecification.sort_order).all()
+    specs = (await db.scalars(
+        select(ProductSpecification)
+        .where(ProductSpecification.product_id == product_id)
+        .order_by(ProductSpecification.spec_group, ProductSpecification.sort_order)
+    )).all()
 
     return specs
 
@@ -542,13 +591,13 @@ async def update_product_specifications(
 @router.get("/{product_id}/accessories")
 async def get_product_accessories(
     product_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get recommended accessories for a product"""
-    product = db.query(Product).filter(
+    product = await db.scalar(select(Product).where(
         Product.id == product_id,
         Product.is_active == True
-    ).first()
+    ))
 
     if not product:
         raise HTTPException(
@@ -556,35 +605,22 @@ async def get_product_accessories(
             detail="Product not found"
         )
 
-    accessories = db.query(ProductAccessory).filter(
-        ProductAccessory.product_id == product_id
-    ).order_by(ProductAccessory.sort_order).all()
+    accessories = (await db.scalars(
+        select(ProductAccessory)
+        .where(ProductAccessory.product_id == product_id)
+        .order_by(ProductAccessory.sort_order)
+    )).all()
+
+    cards = await get_product_cards_async(db, [acc.accessory_id for acc in accessories], active_only=True)
 
     result = []
     for acc in accessories:
-        accessory_product = acc.accessory
-        if accessory_product and accessory_product.is_active:
-            primary_image = next((img for img in accessory_product.images if img.is_primary), None)
+        card = cards.get(acc.accessory_id)
+        if card:
             result.append({
                 "id": acc.id,
                 "sort_order": acc.sort_order,
-                "accessory": {
-                    "id": accessory_product.id,
-                    "name": accessory_product.name,
-                    "slug": accessory_product.slug,
-                    "price": accessory_product.price,
-                    "original_price": accessory_product.original_price,
-                    "discount": accessory_product.discount,
-                    "stock": accessory_product.stock,
-                    "category_id": accessory_product.category_id,
-                    "brand": accessory_product.brand,
-                    "is_featured": accessory_product.is_featured,
-                    "is_new": accessory_product.is_new,
-                    "rating": accessory_product.rating,
-                    "review_count": accessory_product.review_count,
-                    "image": primary_image.url if primary_image else (accessory_product.images[0].url if accessory_product.images else None),
-                    "category": accessory_product.category.name if accessory_product.category else None
-                }
+                "accessory": card
             })
 
     return result
@@ -594,11 +630,11 @@ async def get_product_accessories(
 async def add_product_accessory(
     product_id: int,
     accessory_data: ProductAccessoryCreate,
-    db: Session = Depends(get_db),
-    admin=Depends(get_current_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin=Depends(get_current_admin_async)
 ):
     """Add an accessory to a product (Admin only)"""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
 
     if not product:
         raise HTTPException(
@@ -607,10 +643,10 @@ async def add_product_accessory(
         )
 
     # Verify accessory product exists
-    accessory_product = db.query(Product).filter(
+    accessory_product = await db.scalar(select(Product).where(
         Product.id == accessory_data.accessory_id,
         Product.is_active == True
-    ).first()
+    ))
 
     if not accessory_product:
         raise HTTPException(
@@ -619,10 +655,10 @@ async def add_product_accessory(
         )
 
     # Check if already exists
-    existing = db.query(ProductAccessory).filter(
+    existing = await db.scalar(select(ProductAccessory).where(
         ProductAccessory.product_id == product_id,
         ProductAccessory.accessory_id == accessory_data.accessory_id
-    ).first()
+    ))
 
     if existing:
         raise HTTPException(
@@ -637,8 +673,8 @@ async def add_product_accessory(
     )
 
     db.add(accessory)
-    db.commit()
-    db.refresh(accessory)
+    await db.commit()
+    await db.refresh(accessory)
 
     return {"message": "Accessory added successfully", "id": accessory.id}
 
@@ -647,14 +683,14 @@ async def add_product_accessory(
 async def remove_product_accessory(
     product_id: int,
     accessory_id: int,
-    db: Session = Depends(get_db),
-    admin=Depends(get_current_admin)
+    db: AsyncSession = Depends(get_async_db),
+    admin=Depends(get_current_admin_async)
 ):
     """Remove an accessory from a product (Admin only)"""
-    accessory = db.query(ProductAccessory).filter(
+    accessory = await db.scalar(select(ProductAccessory).where(
         ProductAccessory.product_id == product_id,
         ProductAccessory.accessory_id == accessory_id
-    ).first()
+    ))
 
     if not accessory:
         raise HTTPException(
@@ -662,7 +698,7 @@ async def remove_product_accessory(
             detail="Accessory link not found"
         )
 
-    db.delete(accessory)
-    db.commit()
+    await db.delete(accessory)
+    await db.commit()
 
     return {"message": "Accessory removed successfully"}
@@ -11,7 +11,7 @@ router = APIRouter(prefix="/push", tags=["Push Notifications"])
 
 
 @router.get("/vapid-key")
-async def get_vapid_public_key():
+def get_vapid_public_key():
     """Get the VAPID public key for push subscription"""
     if not settings.vapid_public_key:
         raise HTTPException(
@@ -23,7 +23,7 @@ async def get_vapid_public_key():
 
 
 @router.post("/subscribe")
-async def subscribe_push(
+def subscribe_push(
     data: PushSubscriptionCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -58,7 +58,7 @@ async def subscribe_push(
 
 
 @router.delete("/unsubscribe")
-async def unsubscribe_push(
+def unsubscribe_push(
     endpoint: str,
     db: Session = Depends(get_db)
 ):
@@ -75,7 +75,7 @@ async def unsubscribe_push(
 
 
 @router.get("/status")
-async def get_push_status(
+def get_push_status(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -93,7 +93,7 @@ async def get_push_status(
 
 # Admin endpoints
 @router.get("/admin/subscriptions")
-async def get_all_subscriptions(
+def get_all_subscriptions(
     page: int = 1,
     limit: int = 50,
     db: Session = Depends(get_db),
@@ -129,7 +129,7 @@ async def get_all_subscriptions(
 
 
 @router.post("/admin/send")
-async def send_push_notification(
+def send_push_notification(
     title: str,
     body: str,
     url: str = None,
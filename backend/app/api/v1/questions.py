@@ -15,7 +15,7 @@ router = APIRouter(prefix="/questions", tags=["Product Q&A"])
 
 
 @router.get("/product/{product_id}", response_model=List[ProductQuestionResponse])
-async def get_product_questions(
+def get_product_questions(
     product_id: int,
     page: int = 1,
     limit: int = 10,
@@ -76,7 +76,7 @@ async def get_product_questions(
 
 
 @router.post("/product/{product_id}")
-async def ask_question(
+def ask_question(
     product_id: int,
     data: ProductQuestionCreate,
     db: Session = Depends(get_db),
@@ -109,7 +109,7 @@ async def ask_question(
 
 
 @router.post("/{question_id}/answer")
-async def answer_question(
+def answer_question(
     question_id: int,
     data: ProductAnswerCreate,
     db: Session = Depends(get_db),
@@ -149,7 +149,7 @@ async def answer_question(
 
 
 @router.post("/answers/{answer_id}/helpful")
-async def mark_helpful(
+def mark_helpful(
     answer_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -174,7 +174,7 @@ async def mark_helpful(
 
 # Admin endpoints
 @router.get("/admin/pending")
-async def get_pending_questions(
+def get_pending_questions(
     page: int = 1,
     limit: int = 20,
     db: Session = Depends(get_db),
@@ -212,7 +212,7 @@ async def get_pending_questions(
 
 
 @router.put("/admin/{question_id}/approve")
-async def approve_question(
+def approve_question(
     question_id: int,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -235,7 +235,7 @@ async def approve_question(
 
 
 @router.delete("/admin/{question_id}")
-async def delete_question(
+def delete_question(
     question_id: int,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -258,7 +258,7 @@ async def delete_question(
 
 
 @router.get("/admin/pending-answers")
-async def get_pending_answers(
+def get_pending_answers(
     page: int = 1,
     limit: int = 20,
     db: Session = Depends(get_db),
@@ -297,7 +297,7 @@ async def get_pending_answers(
 
 
 @router.put("/admin/answers/{answer_id}/approve")
-async def approve_answer(
+def approve_answer(
     answer_id: int,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -11,7 +11,7 @@ router = APIRouter(prefix="/recently-viewed", tags=["Recently Viewed"])
 
 
 @router.get("")
-async def get_recently_viewed(
+def get_recently_viewed(
     limit: int = 20,
     session_id: Optional[str] = None,
     db: Session = Depends(get_db),
@@ -64,7 +64,7 @@ async def get_recently_viewed(
 
 
 @router.post("")
-async def track_view(
+def track_view(
     data: RecentlyViewedCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -134,7 +134,7 @@ async def track_view(
 
 
 @router.delete("")
-async def clear_history(
+def clear_history(
     session_id: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -27,7 +27,7 @@ def generate_referral_code(length: int = 8) -> str:
 
 
 @router.get("/my-code", response_model=ReferralCodeResponse)
-async def get_my_referral_code(
+def get_my_referral_code(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
 ):
@@ -50,7 +50,7 @@ async def get_my_referral_code(
 
 
 @router.get("/stats", response_model=ReferralStatsResponse)
-async def get_referral_stats(
+def get_referral_stats(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
 ):
@@ -73,7 +73,7 @@ async def get_referral_stats(
 
 
 @router.get("/history", response_model=List[ReferralResponse])
-async def get_referral_history(
+def get_referral_history(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
 ):
@@ -86,7 +86,7 @@ async def get_referral_history(
 
 
 @router.post("/invite")
-async def send_referral_invite(
+def send_referral_invite(
     data: ReferralInvite,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
@@ -142,7 +142,7 @@ async def send_referral_invite(
 
 
 @router.get("/validate/{code}")
-async def validate_referral_code(
+def validate_referral_code(
     code: str,
     db: Session = Depends(get_db)
 ):
@@ -167,7 +167,7 @@ async def validate_referral_code(
 
 # Admin endpoints
 @router.get("/admin/stats")
-async def get_admin_referral_stats(
+def get_admin_referral_stats(
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
 ):
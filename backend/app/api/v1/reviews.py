@@ -10,7 +10,7 @@ from sqlalchemy import func
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
 @router.get("/product/{product_id}", response_model=List[ReviewResponse])
-async def get_product_reviews(
+def get_product_reviews(
     product_id: int,
     db: Session = Depends(get_db)
 ):
@@ -21,7 +21,7 @@ async def get_product_reviews(
     return reviews
 
 @router.post("", response_model=ReviewResponse)
-async def create_review(
+def create_review(
     review_data: ReviewCreate,
     current_user: User = Depends(get_current_user_required),
     db: Session = Depends(get_db)
@@ -86,7 +86,7 @@ async def create_review(
     return review
 
 @router.delete("/{review_id}")
-async def delete_review(
+def delete_review(
     review_id: int,
     current_user: User = Depends(get_current_user_required),
     db: Session = Depends(get_db)
@@ -10,7 +10,7 @@ router = APIRouter(prefix="/stock-notifications", tags=["Stock Notifications"])
 
 
 @router.post("")
-async def subscribe_stock_notification(
+def subscribe_stock_notification(
     data: StockNotificationCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -69,7 +69,7 @@ async def subscribe_stock_notification(
 
 
 @router.get("", response_model=List[StockNotificationResponse])
-async def get_my_notifications(
+def get_my_notifications(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
 ):
@@ -104,7 +104,7 @@ async def get_my_notifications(
 
 
 @router.delete("/{notification_id}")
-async def unsubscribe_notification(
+def unsubscribe_notification(
     notification_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user_required)
@@ -21,13 +21,13 @@ router = APIRouter(prefix="/variants", tags=["Product Variants"])
 # ============================================
 
 @router.get("/types", response_model=List[ProductVariantTypeResponse])
-async def get_variant_types(db: Session = Depends(get_db)):
+def get_variant_types(db: Session = Depends(get_db)):
     """Get all variant types"""
     return db.query(ProductVariantType).all()
 
 
 @router.post("/types", response_model=ProductVariantTypeResponse)
-async def create_variant_type(
+def create_variant_type(
     data: ProductVariantTypeCreate,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -46,7 +46,7 @@ async def create_variant_type(
 
 
 @router.delete("/types/{type_id}")
-async def delete_variant_type(
+def delete_variant_type(
     type_id: int,
     db: Session = Depends(get_db),
     admin: User = Depends(get_current_admin)
@@ -73,7 +73,7 @@ async def delete_variant_type(
 # ============================================
 
 @router.get("/product/{product_id}", response_model=List[ProductVariantResponse])
-async def get_product_variants(
+def get_product_variants(
     product_id: int,
     db: Session = Depends(get_db)
 ):
@@ -123,7 +123,7 @@ async def get_product_variants(
 
 
 @router.post("/product/{product_id}", response_model=ProductVariantResponse)
-async def create_product_variant(
+def create_product_variant(
     product_id: int,
     data: ProductVariantCreate,
     db: Session = Depends(get_db),
@@ -185,7 +185,7 @@ async def create_product_variant(
 
 
 @router.put("/product/{product_id}/{variant_id}")
-async def update_product_variant(
+def update_product_variant(
     product_id: int,
     variant_id: int,
     price: float = None,
@@ -220,7 +220,7 @@ async def update_product_variant(
 
 
 @router.delete("/product/{product_id}/{variant_id}")
-async def delete_product_variant(
+def delete_product_variant(
     product_id: int,
     variant_id: int,
     db: Session = Depends(get_db),
@@ -246,7 +246,7 @@ async def delete_product_variant(
 
 
 @router.get("/product/{product_id}/available-options")
-async def get_available_options(
+def get_available_options(
     product_id: int,
     db: Session = Depends(get_db)
 ):
@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, distinct
-from datetime import datetime, timedelta
-from typing import Optional
+from sqlalchemy import func, distinct, insert, select
+from datetime import date, datetime, time, timedelta, timezone
+from typing import List, Optional
+import asyncio
 import hashlib
-import re
 
-from app.database import get_db
-from app.models.models import PageView, VisitorSession, User
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.models.models import VisitorSession, User
+from app.services import page_view_buffer, page_view_storage, realtime_visitors, visitor_rollups
+from app.services.traffic_classifier import classify_referrer, classify_user_agent
 from app.utils.auth import get_current_admin
 from app.schemas.schemas import (
     PageViewCreate, VisitorAnalyticsResponse, VisitorAnalyticsSummary,
     TrafficSourceBreakdown, GeographicBreakdown, DeviceBreakdown,
-    BrowserBreakdown, PageBreakdown, VisitorTrendPoint, RealTimeVisitors
+    BrowserBreakdown, PageBreakdown, VisitorTrendPoint, RealTimeVisitors,
+    UniqueVisitorCounts
 )
 
 router = APIRouter(prefix="/visitor-analytics", tags=["Visitor Analytics"])
@@ -26,99 +32,19 @@ def get_visitor_hash(ip: str, user_agent: str, date: str) -> str:
     return hashlib.sha256(raw.encode()).hexdigest()[:32]
 
 
-def parse_user_agent(user_agent: str) -> dict:
-    """Parse user agent string to extract device/browser info"""
-    result = {
-        "device_type": "desktop",
-        "browser": "Unknown",
-        "os": "Unknown"
-    }
-
-    ua = user_agent.lower()
-
-    # Device type
-    if "mobile" in ua or ("android" in ua and "mobile" in ua):
-        result["device_type"] = "mobile"
-    elif "tablet" in ua or "ipad" in ua:
-        result["device_type"] = "tablet"
-
-    # Browser detection
-    if "chrome" in ua and "edg" not in ua and "opr" not in ua:
-        result["browser"] = "Chrome"
-    elif "firefox" in ua:
-        result["browser"] = "Firefox"
-    elif "safari" in ua and "chrome" not in ua:
-        result["browser"] = "Safari"
-    elif "edg" in ua:
-        result["browser"] = "Edge"
-    elif "opera" in ua or "opr" in ua:
-        result["browser"] = "Opera"
-
-    # OS detection
-    if "windows" in ua:
-        result["os"] = "Windows"
-    elif "mac os" in ua or "macos" in ua:
-        result["os"] = "macOS"
-    elif "linux" in ua and "android" not in ua:
-        result["os"] = "Linux"
-    elif "android" in ua:
-        result["os"] = "Android"
-    elif "iphone" in ua or "ipad" in ua:
-        result["os"] = "iOS"
-
-    return result
-
-
-def parse_traffic_source(referrer: str, utm_source: str = None) -> tuple:
-    """Determine traffic source from referrer URL"""
-    if utm_source:
-        return utm_source, "utm"
-
-    if not referrer:
-        return "direct", None
-
-    referrer_lower = referrer.lower()
-
-    # Extract domain
-    domain_match = re.search(r'https?://([^/]+)', referrer_lower)
-    domain = domain_match.group(1) if domain_match else ""
-
-    # Social media
-    social_domains = ['facebook.com', 'fb.com', 'twitter.com', 't.co',
-                      'instagram.com', 'linkedin.com', 'pinterest.com',
-                      'youtube.com', 'tiktok.com', 'reddit.com']
-    for social in social_domains:
-        if social in domain:
-            return "social", domain
-
-    # Search engines
-    search_domains = ['google.', 'bing.com', 'yahoo.', 'duckduckgo.com',
-                      'baidu.com', 'yandex.']
-    for search in search_domains:
-        if search in domain:
-            return "organic_search", domain
-
-    # Email providers (likely email campaign)
-    email_domains = ['mail.google.com', 'outlook.', 'mail.yahoo.']
-    for email in email_domains:
-        if email in domain:
-            return "email", domain
-
-    return "referral", domain
-
-
 # ============ Public Tracking Endpoint ============
 
-@router.post("/track")
+@router.post("/track", status_code=status.HTTP_202_ACCEPTED)
 async def track_page_view(
     data: PageViewCreate,
     request: Request,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """
     Track a page view - called from frontend.
     Privacy-conscious: no personal data, hashed identifiers, minimal data retention.
     Deduplicates page refreshes - only counts actual navigation.
+    The view is queued and written in a batch (see page_view_buffer).
     """
     # Get client IP (check for proxies)
     client_ip = request.headers.get("x-forwarded-for", "").split(",")[0].strip()
@@ -130,160 +56,164 @@ async def track_page_view(
     user_agent = request.headers.get("user-agent", "")
 
     # Create anonymized visitor hash based on IP (rotates daily for privacy)
-    today = datetime.utcnow().strftime("%Y-%m-%d")
-    visitor_hash = get_visitor_hash(client_ip, user_agent, today)
+    now = datetime.utcnow()
+    visitor_hash = get_visitor_hash(client_ip, user_agent, now.strftime("%Y-%m-%d"))
 
     # Get session ID from header
     session_id = request.headers.get("x-session-id")
     if not session_id:
-        session_id = hashlib.sha256(f"{visitor_hash}:{datetime.utcnow().timestamp()}".encode()).hexdigest()[:32]
+        session_id = hashlib.sha256(f"{visitor_hash}:{now.timestamp()}".encode()).hexdigest()[:32]
+    session_id = session_id[:64]
 
     page_path = data.page_path[:500] if data.page_path else "/"
 
-    # DEDUPLICATION: Check if same visitor viewed same page in last 30 seconds
-    thirty_seconds_ago = datetime.utcnow() - timedelta(seconds=30)
-    recent_view = db.query(PageView).filter(
-        and_(
-            PageView.session_id == session_id,
-            PageView.page_path == page_path,
-            PageView.created_at >= thirty_seconds_ago
-        )
-    ).first()
-
-    if recent_view:
-        # Same page viewed recently - this is a refresh, don't count it
+    # DEDUPLICATION: same session viewed the same page in the last 30 seconds
+    if page_view_buffer.is_refresh(session_id, page_path):
+        # This is a refresh, don't count it
         return {"status": "deduplicated", "session_id": session_id}
 
     # Parse user agent
-    device_info = parse_user_agent(user_agent)
+    device_info = classify_user_agent(user_agent)
 
     # Parse traffic source
-    traffic_source, referrer_domain = parse_traffic_source(data.referrer, data.utm_source)
-
-    # Create page view record
-    page_view = PageView(
-        visitor_hash=visitor_hash,
-        session_id=session_id,
-        page_path=page_path,
-        page_title=data.page_title[:255] if data.page_title else None,
-        traffic_source=traffic_source,
-        referrer_url=data.referrer[:500] if data.referrer else None,
-        referrer_domain=referrer_domain,
-        utm_source=data.utm_source,
-        utm_medium=data.utm_medium,
-        utm_campaign=data.utm_campaign,
-        country_code="BD",  # Default - integrate with IP geolocation service for real data
-        country_name="Bangladesh",
-        city="Dhaka",
-        device_type=device_info["device_type"],
-        browser=device_info["browser"],
-        os=device_info["os"],
-        screen_width=data.screen_width,
-        screen_height=data.screen_height
-    )
+    traffic_source, referrer_domain = classify_referrer(data.referrer, data.utm_source)
+
+    page_view_buffer.enqueue({
+        "visitor_hash": visitor_hash,
+        "session_id": session_id,
+        "page_path": page_path,
+        "page_title": data.page_title[:255] if data.page_title else None,
+        "traffic_source": traffic_source[:50],
+        "referrer_url": data.referrer[:500] if data.referrer else None,
+        "referrer_domain": referrer_domain[:255] if referrer_domain else None,
+        "utm_source": data.utm_source[:100] if data.utm_source else None,
+        "utm_medium": data.utm_medium[:100] if data.utm_medium else None,
+        "utm_campaign": data.utm_campaign[:100] if data.utm_campaign else None,
+        "country_code": "BD",  # Default - integrate with IP geolocation service for real data
+        "country_name": "Bangladesh",
+        "city": "Dhaka",
+        "device_type": device_info.device_type,
+        "browser": device_info.browser,
+        "os": device_info.os,
+        "screen_width": data.screen_width,
+        "screen_height": data.screen_height,
+        "created_at": now,
+    })
+    realtime_visitors.record(visitor_hash, session_id, page_path)
+
+    # Write the batch once this response is sent, if it's full or due
+    if page_view_buffer.flush_due():
+        background_tasks.add_task(page_view_buffer.flush_if_due)
+
+    return {"status": "queued", "session_id": session_id}
 
-    db.add(page_view)
-
-    # Update or create session
-    existing_session = db.query(VisitorSession).filter(
-        VisitorSession.session_id == session_id
-    ).first()
-
-    if existing_session:
-        existing_session.page_count += 1
-        existing_session.exit_page = page_path
-        existing_session.last_activity = datetime.utcnow()
-        # Calculate session duration
-        if existing_session.started_at:
-            existing_session.duration_seconds = int(
-                (datetime.utcnow() - existing_session.started_at.replace(tzinfo=None)).total_seconds()
-            )
-    else:
-        new_session = VisitorSession(
-            session_id=session_id,
-            visitor_hash=visitor_hash,
-            entry_page=page_path,
-            exit_page=page_path,
-            traffic_source=traffic_source,
-            referrer_domain=referrer_domain,
-            country_code="BD",
-            city="Dhaka",
-            device_type=device_info["device_type"],
-            browser=device_info["browser"],
-            os=device_info["os"]
-        )
-        db.add(new_session)
 
-    db.commit()
+# ============ Admin Analytics Endpoints ============
 
-    return {"status": "tracked", "session_id": session_id}
+def _percentages(rows: List[dict], key: str) -> List[float]:
+    total = sum(row[key] for row in rows) or 1
+    return [round(row[key] / total * 100, 1) for row in rows]
 
 
-# ============ Admin Analytics Endpoints ============
+def _calc_change(current, previous):
+    if previous == 0:
+        return 100.0 if current > 0 else 0.0
+    return round(((current - previous) / previous) * 100, 1)
+
+
+def _unique_counts(db: Session, start: datetime, end: datetime, exact: bool,
+                   dimension: str = "", value: str = ""):
+    """Distinct visitors and sessions in ``[start, end)``: from sketches, or raw views if ``exact``"""
+    if exact:
+        return visitor_rollups.exact_counts(db.connection(), start, end, dimension, value)
+    return visitor_rollups.unique_counts(db, start, end, dimension, value)
+
+
+def _check_exact_range(start: datetime, end: datetime):
+    if end - start > timedelta(days=settings.analytics_exact_max_days):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Exact counts are limited to {settings.analytics_exact_max_days} days"
+        )
+
+
+def _daily_trend(db: Session, start: date, end: date) -> List[VisitorTrendPoint]:
+    """One point per day from the daily rollups, zeros where there's no data."""
+    rows = {row.day: row for row in visitor_rollups.daily_rows(db, start, end)}
+    trends = []
+    day = start
+    while day <= end:
+        row = rows.get(day)
+        trends.append(VisitorTrendPoint(
+            date=day.strftime("%b %d"),
+            page_views=row.page_views if row else 0,
+            unique_visitors=row.visitors if row else 0,
+            sessions=row.sessions if row else 0
+        ))
+        day += timedelta(days=1)
+    return trends
+
+
+def _hourly_trend(db: Session, hours: int) -> List[VisitorTrendPoint]:
+    """One point per hour from the hourly rollups, ending with the current hour."""
+    end = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    start = end - timedelta(hours=hours)
+    rows = {row.hour: row for row in visitor_rollups.hourly_rows(db, start, end)}
+    trends = []
+    hour = start
+    while hour < end:
+        row = rows.get(hour)
+        trends.append(VisitorTrendPoint(
+            date=hour.strftime("%H:00"),
+            page_views=row.page_views if row else 0,
+            unique_visitors=row.visitors if row else 0,
+            sessions=row.sessions if row else 0
+        ))
+        hour += timedelta(hours=1)
+    return trends
+
 
 @router.get("/stats", response_model=VisitorAnalyticsResponse)
-async def get_visitor_analytics(
+def get_visitor_analytics(
     period: str = "7d",
+    exact: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Get comprehensive visitor analytics for admin dashboard"""
+    """
+    Get comprehensive visitor analytics for admin dashboard (from the daily rollups).
+    Unique visitors and sessions are estimated from sketches unless ``exact``.
+    """
+    visitor_rollups.refresh_if_stale(db)
 
-    # Calculate date range
-    now = datetime.utcnow()
+    # Calculate date range (whole UTC days, today included)
+    today = datetime.utcnow().date()
     days = {"7d": 7, "30d": 30, "90d": 90}.get(period, 7)
-    start_date = now - timedelta(days=days)
+    start_date = today - timedelta(days=days - 1)
     prev_start = start_date - timedelta(days=days)
 
-    # Current period metrics
-    current_views = db.query(func.count(PageView.id)).filter(
-        PageView.created_at >= start_date
-    ).scalar() or 0
-
-    current_visitors = db.query(func.count(distinct(PageView.visitor_hash))).filter(
-        PageView.created_at >= start_date
-    ).scalar() or 0
-
-    current_sessions = db.query(func.count(distinct(PageView.session_id))).filter(
-        PageView.created_at >= start_date
-    ).scalar() or 0
-
-    # Previous period metrics (for comparison)
-    prev_views = db.query(func.count(PageView.id)).filter(
-        and_(PageView.created_at >= prev_start, PageView.created_at < start_date)
-    ).scalar() or 0
-
-    prev_visitors = db.query(func.count(distinct(PageView.visitor_hash))).filter(
-        and_(PageView.created_at >= prev_start, PageView.created_at < start_date)
-    ).scalar() or 0
-
-    prev_sessions = db.query(func.count(distinct(PageView.session_id))).filter(
-        and_(PageView.created_at >= prev_start, PageView.created_at < start_date)
-    ).scalar() or 0
-
-    # Calculate changes
-    def calc_change(current, previous):
-        if previous == 0:
-            return 100.0 if current > 0 else 0.0
-        return round(((current - previous) / previous) * 100, 1)
-
-    # Session metrics
-    sessions = db.query(VisitorSession).filter(
-        VisitorSession.started_at >= start_date
-    ).all()
+    # Sessions spanning midnight would be counted twice by summing days
+    start = datetime.combine(start_date, time.min)
+    end = datetime.combine(today + timedelta(days=1), time.min)
+    prev = datetime.combine(prev_start, time.min)
+    if exact:
+        _check_exact_range(start, end)
+    current_visitors, current_sessions = _unique_counts(db, start, end, exact)
+    previous_visitors, previous_sessions = _unique_counts(db, prev, start, exact)
 
-    avg_duration = 0
-    avg_pages = 0
-    bounce_count = 0
+    current = visitor_rollups.daily_rows(db, start_date, today)
+    previous = visitor_rollups.daily_rows(db, prev_start, start_date - timedelta(days=1))
 
-    if sessions:
-        total_duration = sum(s.duration_seconds or 0 for s in sessions)
-        total_pages = sum(s.page_count for s in sessions)
-        bounce_count = sum(1 for s in sessions if s.page_count == 1)
-        avg_duration = total_duration / len(sessions)
-        avg_pages = total_pages / len(sessions)
+    def total(rows, field):
+        return sum(getattr(row, field) for row in rows)
 
-    bounce_rate = (bounce_count / len(sessions) * 100) if sessions else 0
+    current_views = total(current, "page_views")
+
+    # Session metrics (sessions started in the period)
+    session_count = total(current, "session_count")
+    avg_duration = total(current, "session_duration") / session_count if session_count else 0
+    avg_pages = total(current, "session_pages") / session_count if session_count else 0
+    bounce_rate = total(current, "bounces") / session_count * 100 if session_count else 0
 
     summary = VisitorAnalyticsSummary(
         total_page_views=current_views,
@@ -292,125 +222,48 @@ async def get_visitor_analytics(
         avg_session_duration=round(avg_duration, 1),
         avg_pages_per_session=round(avg_pages, 1),
         bounce_rate=round(bounce_rate, 1),
-        page_views_change=calc_change(current_views, prev_views),
-        visitors_change=calc_change(current_visitors, prev_visitors),
-        sessions_change=calc_change(current_sessions, prev_sessions)
+        page_views_change=_calc_change(current_views, total(previous, "page_views")),
+        visitors_change=_calc_change(current_visitors, previous_visitors),
+        sessions_change=_calc_change(current_sessions, previous_sessions)
     )
 
-    # Traffic sources breakdown
-    traffic_query = db.query(
-        PageView.traffic_source,
-        func.count(PageView.id).label('count')
-    ).filter(PageView.created_at >= start_date)\
-     .group_by(PageView.traffic_source)\
-     .order_by(func.count(PageView.id).desc()).all()
-
-    total_traffic = sum(t.count for t in traffic_query) or 1
+    # Traffic sources breakdown (page views)
+    sources = visitor_rollups.breakdown(db, "source", start_date, today)
     traffic_sources = [
-        TrafficSourceBreakdown(
-            source=t.traffic_source or "direct",
-            count=t.count,
-            percentage=round(t.count / total_traffic * 100, 1)
-        )
-        for t in traffic_query
+        TrafficSourceBreakdown(source=row["value"] or "direct", count=row["page_views"], percentage=percentage)
+        for row, percentage in zip(sources, _percentages(sources, "page_views"))
     ]
 
-    # Geographic breakdown
-    geo_query = db.query(
-        PageView.country_code,
-        PageView.country_name,
-        func.count(distinct(PageView.visitor_hash)).label('count')
-    ).filter(
-        and_(PageView.created_at >= start_date, PageView.country_code.isnot(None))
-    ).group_by(PageView.country_code, PageView.country_name)\
-     .order_by(func.count(distinct(PageView.visitor_hash)).desc())\
-     .limit(10).all()
-
-    total_geo = sum(g.count for g in geo_query) or 1
+    # Geographic breakdown (visitors)
+    countries = visitor_rollups.breakdown(db, "country", start_date, today, limit=10, order_by_visitors=True)
     geographic = [
         GeographicBreakdown(
-            country_code=g.country_code or "XX",
-            country_name=g.country_name or "Unknown",
-            count=g.count,
-            percentage=round(g.count / total_geo * 100, 1)
+            country_code=row["value"] or "XX",
+            country_name=row["label"] or "Unknown",
+            count=row["visitors"],
+            percentage=percentage
         )
-        for g in geo_query
+        for row, percentage in zip(countries, _percentages(countries, "visitors"))
     ]
 
-    # Device breakdown
-    device_query = db.query(
-        PageView.device_type,
-        func.count(distinct(PageView.visitor_hash)).label('count')
-    ).filter(PageView.created_at >= start_date)\
-     .group_by(PageView.device_type)\
-     .order_by(func.count(distinct(PageView.visitor_hash)).desc()).all()
-
-    total_devices = sum(d.count for d in device_query) or 1
+    # Device breakdown (visitors)
+    device_rows = visitor_rollups.breakdown(db, "device", start_date, today, order_by_visitors=True)
     devices = [
-        DeviceBreakdown(
-            device_type=d.device_type or "unknown",
-            count=d.count,
-            percentage=round(d.count / total_devices * 100, 1)
-        )
-        for d in device_query
+        DeviceBreakdown(device_type=row["value"] or "unknown", count=row["visitors"], percentage=percentage)
+        for row, percentage in zip(device_rows, _percentages(device_rows, "visitors"))
     ]
 
-    # Browser breakdown
-    browser_query = db.query(
-        PageView.browser,
-        func.count(distinct(PageView.visitor_hash)).label('count')
-    ).filter(PageView.created_at >= start_date)\
-     .group_by(PageView.browser)\
-     .order_by(func.count(distinct(PageView.visitor_hash)).desc())\
-     .limit(5).all()
-
-    total_browsers = sum(b.count for b in browser_query) or 1
+    # Browser breakdown (visitors)
+    browser_rows = visitor_rollups.breakdown(db, "browser", start_date, today, limit=5, order_by_visitors=True)
     browsers = [
-        BrowserBreakdown(
-            browser=b.browser or "Unknown",
-            count=b.count,
-            percentage=round(b.count / total_browsers * 100, 1)
-        )
-        for b in browser_query
+        BrowserBreakdown(browser=row["value"] or "Unknown", count=row["visitors"], percentage=percentage)
+        for row, percentage in zip(browser_rows, _percentages(browser_rows, "visitors"))
     ]
 
     # Top pages
-    pages_query = db.query(
-        PageView.page_path,
-        func.count(PageView.id).label('views'),
-        func.count(distinct(PageView.visitor_hash)).label('unique_visitors')
-    ).filter(PageView.created_at >= start_date)\
-     .group_by(PageView.page_path)\
-     .order_by(func.count(PageView.id).desc())\
-     .limit(10).all()
-
     top_pages = [
-        PageBreakdown(
-            page_path=p.page_path,
-            views=p.views,
-            unique_visitors=p.unique_visitors
-        )
-        for p in pages_query
-    ]
-
-    # Daily trends
-    trends_query = db.query(
-        func.date(PageView.created_at).label('date'),
-        func.count(PageView.id).label('views'),
-        func.count(distinct(PageView.visitor_hash)).label('visitors'),
-        func.count(distinct(PageView.session_id)).label('sessions')
-    ).filter(PageView.created_at >= start_date)\
-     .group_by(func.date(PageView.created_at))\
-     .order_by(func.date(PageView.created_at)).all()
-
-    trends = [
-        VisitorTrendPoint(
-            date=t.date.strftime("%b %d") if hasattr(t.date, 'strftime') else str(t.date),
-            page_views=t.views,
-            unique_visitors=t.visitors,
-            sessions=t.sessions
-        )
-        for t in trends_query
+        PageBreakdown(page_path=row["value"], views=row["page_views"], unique_visitors=row["visitors"])
+        for row in visitor_rollups.breakdown(db, "page", start_date, today, limit=10)
     ]
 
     return VisitorAnalyticsResponse(
@@ -420,45 +273,156 @@ async def get_visitor_analytics(
         devices=devices,
         browsers=browsers,
         top_pages=top_pages,
-        trends=trends
+        trends=_daily_trend(db, start_date, today)
     )
 
 
-@router.get("/real-time", response_model=RealTimeVisitors)
-async def get_real_time_visitors(
+@router.get("/trends", response_model=List[VisitorTrendPoint])
+def get_visitor_trends(
+    period: str = "7d",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Get real-time active visitors (last 5 minutes)"""
+    """Page views, visitors and sessions over time: hourly for 24h, daily otherwise"""
+    visitor_rollups.refresh_if_stale(db)
 
-    five_minutes_ago = datetime.utcnow() - timedelta(minutes=5)
+    if period == "24h":
+        return _hourly_trend(db, 24)
 
-    active_visitors = db.query(func.count(distinct(PageView.visitor_hash))).filter(
-        PageView.created_at >= five_minutes_ago
-    ).scalar() or 0
+    today = datetime.utcnow().date()
+    days = {"7d": 7, "30d": 30, "90d": 90}.get(period, 7)
+    return _daily_trend(db, today - timedelta(days=days - 1), today)
 
-    active_sessions = db.query(func.count(distinct(PageView.session_id))).filter(
-        PageView.created_at >= five_minutes_ago
-    ).scalar() or 0
+
+@router.get("/uniques", response_model=UniqueVisitorCounts)
+def get_unique_visitors(
+    start: datetime,
+    end: datetime,
+    dimension: Optional[str] = None,
+    value: Optional[str] = None,
+    exact: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Distinct visitors and sessions between any two times (UTC, whole hours),
+    compared with the same length of time before. ``dimension`` and ``value``
+    (e.g. ``page`` and ``/products``) count only views matching them, over
+    whole days. Estimated from sketches unless ``exact``.
+    """
+    def utc_hour(value: datetime) -> datetime:
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(minute=0, second=0, microsecond=0)
+
+    start, end = utc_hour(start), utc_hour(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be at least an hour after start")
+    if dimension:
+        if dimension not in visitor_rollups.DIMENSIONS:
+            raise HTTPException(status_code=400, detail=f"Unknown dimension: {dimension}")
+        # Per-value sketches are kept by day
+        start = datetime.combine(start.date(), time.min)
+        if end.time() != time.min:
+            end = datetime.combine(end.date() + timedelta(days=1), time.min)
+    if exact:
+        _check_exact_range(start, end)
+    visitor_rollups.refresh_if_stale(db)
+
+    dimension, value = dimension or "", value or ""
+    visitors, sessions = _unique_counts(db, start, end, exact, dimension, value)
+    previous_visitors, previous_sessions = _unique_counts(db, start - (end - start), start, exact, dimension, value)
+
+    return UniqueVisitorCounts(
+        start=start,
+        end=end,
+        dimension=dimension or None,
+        value=value if dimension else None,
+        exact=exact,
+        unique_visitors=visitors,
+        sessions=sessions,
+        previous_unique_visitors=previous_visitors,
+        previous_sessions=previous_sessions,
+        visitors_change=_calc_change(visitors, previous_visitors),
+        sessions_change=_calc_change(sessions, previous_sessions)
+    )
+
+
+def _real_time_from_db(db: Session) -> RealTimeVisitors:
+    """Active visitors counted from the raw page views of the window"""
+    since = datetime.utcnow() - timedelta(seconds=realtime_visitors.WINDOW_SECONDS)
+    views = page_view_storage.raw_page_views(db.connection(), since)
+
+    active_visitors, active_sessions = db.execute(select(
+        func.count(distinct(views.c.visitor_hash)),
+        func.count(distinct(views.c.session_id))
+    )).one()
 
     # Top active pages
-    top_pages_query = db.query(
-        PageView.page_path,
-        func.count(PageView.id).label('count')
-    ).filter(PageView.created_at >= five_minutes_ago)\
-     .group_by(PageView.page_path)\
-     .order_by(func.count(PageView.id).desc())\
-     .limit(5).all()
+    top_pages_query = db.execute(
+        select(views.c.page_path, func.count().label('count'))
+        .group_by(views.c.page_path)
+        .order_by(func.count().desc())
+        .limit(realtime_visitors.TOP_PAGES)
+    ).all()
 
     return RealTimeVisitors(
-        active_visitors=active_visitors,
-        active_sessions=active_sessions,
+        active_visitors=active_visitors or 0,
+        active_sessions=active_sessions or 0,
         top_pages=[{"path": p.page_path, "count": p.count} for p in top_pages_query]
     )
 
 
+def _real_time(db: Session) -> RealTimeVisitors:
+    if settings.analytics_realtime_in_memory:
+        return RealTimeVisitors(**realtime_visitors.snapshot())
+    return _real_time_from_db(db)
+
+
+@router.get("/real-time", response_model=RealTimeVisitors)
+def get_real_time_visitors(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Get real-time active visitors (last 5 minutes)"""
+    return _real_time(db)
+
+
+@router.get("/real-time/stream")
+async def stream_real_time_visitors(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Real-time active visitors as Server-Sent Events: each event's data is
+    a RealTimeVisitors object, sent on connect and whenever the counts
+    change (checked every analytics_realtime_push_seconds).
+    """
+    # The stream may stay open for hours; don't hold a pooled connection
+    db.close()
+
+    def current() -> str:
+        with SessionLocal() as session:
+            return _real_time(session).model_dump_json()
+
+    async def events():
+        last = None
+        while True:
+            data = await run_in_threadpool(current)
+            # Comments keep proxies from closing an idle stream
+            yield f"data: {data}\n\n" if data != last else ": keep-alive\n\n"
+            last = data
+            await asyncio.sleep(settings.analytics_realtime_push_seconds)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/generate-sample-data")
-async def generate_sample_data(
+def generate_sample_data(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
@@ -484,6 +448,8 @@ async def generate_sample_data(
 
     now = datetime.utcnow()
     records_created = 0
+    views_by_day = {}
+    added_sessions = set()
 
     # Generate data for the last 30 days
     for day_offset in range(30):
@@ -514,32 +480,44 @@ async def generate_sample_data(
                 duration_seconds=random.randint(30, 600)
             )
 
-            # Check if session exists
-            existing = db.query(VisitorSession).filter(VisitorSession.session_id == session_id).first()
-            if not existing:
-                db.add(session)
+            # Check if session exists (sessions added here aren't flushed yet)
+            if session_id not in added_sessions:
+                existing = db.query(VisitorSession).filter(VisitorSession.session_id == session_id).first()
+                if not existing:
+                    db.add(session)
+                    added_sessions.add(session_id)
 
             # Create page views for this session
             for i in range(pages_viewed):
-                page_view = PageView(
-                    visitor_hash=visitor_hash,
-                    session_id=session_id,
-                    page_path=random.choice(pages),
-                    page_title=f"Page Title {i}",
-                    traffic_source=random.choice(traffic_sources),
-                    country_code=country[0],
-                    country_name=country[1],
-                    city=country[2],
-                    device_type=random.choice(devices),
-                    browser=random.choice(browsers),
-                    os=random.choice(oses),
-                    screen_width=random.choice([1920, 1366, 1440, 375, 414]),
-                    screen_height=random.choice([1080, 768, 900, 812, 896]),
-                    created_at=date + timedelta(minutes=i * random.randint(1, 5))
-                )
-                db.add(page_view)
+                created_at = date + timedelta(minutes=i * random.randint(1, 5))
+                page_path = random.choice(pages)
+                views_by_day.setdefault(created_at.date(), []).append({
+                    "visitor_hash": visitor_hash,
+                    "session_id": session_id,
+                    "page_path": page_path,
+                    "page_title": f"Page Title {i}",
+                    "traffic_source": random.choice(traffic_sources),
+                    "country_code": country[0],
+                    "country_name": country[1],
+                    "city": country[2],
+                    "device_type": random.choice(devices),
+                    "browser": random.choice(browsers),
+                    "os": random.choice(oses),
+                    "screen_width": random.choice([1920, 1366, 1440, 375, 414]),
+                    "screen_height": random.choice([1080, 768, 900, 812, 896]),
+                    "created_at": created_at
+                })
+                realtime_visitors.record(visitor_hash, session_id, page_path, created_at)
                 records_created += 1
 
+    # Page views go to their day's partition
+    page_view_storage.ensure_day_tables(db.connection(), views_by_day)
+    for day, rows in views_by_day.items():
+        db.execute(insert(page_view_storage.write_table(db.get_bind(), day)), rows)
+    db.commit()
+
+    # Roll up the days that now have sample data
+    visitor_rollups.rebuild_days(db.connection(), sorted(views_by_day))
     db.commit()
 
     return {"status": "success", "message": f"Generated {records_created} sample page views"}
@@ -72,7 +72,7 @@ def validate_voucher(
 
 
 @router.post("/validate", response_model=VoucherValidateResponse)
-async def validate_voucher_code(
+def validate_voucher_code(
     request: VoucherValidateRequest,
     current_user: User = Depends(get_current_user_required),
     db: Session = Depends(get_db)
@@ -131,7 +131,7 @@ async def validate_voucher_code(
 # ============================================
 
 @router.get("", response_model=List[VoucherResponse])
-async def get_vouchers(
+def get_vouchers(
     include_inactive: bool = False,
     db: Session = Depends(get_db),
     admin=Depends(get_current_admin)
@@ -147,7 +147,7 @@ async def get_vouchers(
 
 
 @router.get("/{voucher_id}", response_model=VoucherResponse)
-async def get_voucher(
+def get_voucher(
     voucher_id: int,
     db: Session = Depends(get_db),
     admin=Depends(get_current_admin)
@@ -165,7 +165,7 @@ async def get_voucher(
 
 
 @router.post("", response_model=VoucherResponse)
-async def create_voucher(
+def create_voucher(
     voucher_data: VoucherCreate,
     db: Session = Depends(get_db),
     admin=Depends(get_current_admin)
@@ -212,7 +212,7 @@ async def create_voucher(
 
 
 @router.put("/{voucher_id}", response_model=VoucherResponse)
-async def update_voucher(
+def update_voucher(
     voucher_id: int,
     voucher_data: VoucherUpdate,
     db: Session = Depends(get_db),
@@ -244,7 +244,7 @@ async def update_voucher(
 
 
 @router.delete("/{voucher_id}")
-async def delete_voucher(
+def delete_voucher(
     voucher_id: int,
     db: Session = Depends(get_db),
     admin=Depends(get_current_admin)
@@ -266,7 +266,7 @@ async def delete_voucher(
 
 
 @router.get("/{voucher_id}/usage")
-async def get_voucher_usage(
+def get_voucher_usage(
     voucher_id: int,
     db: Session = Depends(get_db),
     admin=Depends(get_current_admin)
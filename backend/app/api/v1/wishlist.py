@@ -9,7 +9,7 @@ from app.utils import get_current_user_required
 router = APIRouter(prefix="/wishlist", tags=["Wishlist"])
 
 @router.get("", response_model=List[WishlistItemResponse])
-async def get_wishlist(
+def get_wishlist(
     current_user: User = Depends(get_current_user_required),
     db: Session = Depends(get_db)
 ):
@@ -50,7 +50,7 @@ async def get_wishlist(
     return result
 
 @router.post("", response_model=WishlistItemResponse)
-async def add_to_wishlist(
+def add_to_wishlist(
     item: WishlistItemCreate,
     current_user: User = Depends(get_current_user_required),
     db: Session = Depends(get_db)
@@ -91,7 +91,7 @@ async def add_to_wishlist(
     return wishlist_item
 
 @router.delete("/{product_id}")
-async def remove_from_wishlist(
+def remove_from_wishlist(
     product_id: int,
     current_user: User = Depends(get_current_user_required),
     db: Session = Depends(get_db)
@@ -113,7 +113,7 @@ async def remove_from_wishlist(
     return {"message": "Removed from wishlist"}
 
 @router.post("/toggle/{product_id}")
-async def toggle_wishlist(
+def toggle_wishlist(
     product_id: int,
     current_user: User = Depends(get_current_user_required),
     db: Session = Depends(get_db)
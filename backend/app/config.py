@@ -40,6 +40,8 @@ class Settings(BaseSettings):
     payment_timeout_hours: int = 24  # Auto-cancel unpaid orders after this time
     status_poll_interval_minutes: int = 30  # Poll courier APIs for status updates
     auto_assign_courier: bool = True  # Auto-assign courier after confirmation
+    sales_rollup_reconcile_days: int = 7  # Days of sales rollups recomputed nightly
+    sales_rollup_flush_seconds: int = 2  # How often committed order changes are added to the sales rollups
 
     # Superadmin (cannot be removed or demoted)
     superadmin_email: str = "bibekhowlader8@gmail.com"
@@ -63,6 +65,44 @@ class Settings(BaseSettings):
     vapid_public_key: str = ""
     vapid_email: str = "admin@authentimart.com"
 
+    # Caching (in-process unless REDIS_URL is set or CACHE_BACKEND says otherwise)
+    redis_url: str = ""
+    cache_backend: str = "auto"  # auto, memory, redis, file
+    cache_file_path: str = "cache.db"  # SQLite file shared by local workers (file backend)
+    response_cache_ttl: int = 300  # Seconds; writes invalidate entries earlier
+    response_cache_max_entries: int = 1000
+    admin_cache_max_entries: int = 500
+
+    # Flash sales
+    flash_sold_flush_seconds: int = 2  # How often counted flash sales are written to sold_count
+
+    # Background exports
+    export_dir: str = "exports"  # Finished export files (not publicly served)
+    export_workers: int = 2  # Exports generated concurrently per process
+    export_dedupe_minutes: int = 10  # Identical exports within this window reuse one job
+    export_retention_hours: int = 24  # Finished exports are deleted after this
+
+    # Idempotency keys (retried checkouts, payments, courier assignments)
+    idempotency_ttl_hours: int = 24  # Retries within this window replay the first response
+
+    # Visitor analytics (page views are queued and written in batches, then rolled up)
+    analytics_flush_interval_ms: int = 1000  # Queued page views are written at least this often
+    analytics_flush_max_events: int = 500  # ...or as soon as this many are waiting
+    analytics_buffer_max_events: int = 50000  # Oldest views are dropped past this if writes fail
+    analytics_dedup_max_entries: int = 100000  # Recent (session, page) views remembered for dedup
+    analytics_rollup_minutes: int = 10  # How often today's visitor rollups are rebuilt
+    analytics_retention_days: int = 90  # Raw page views and sessions older than this are dropped
+    analytics_exact_max_days: int = 7  # Longest range exact (COUNT DISTINCT) unique counts may cover
+    analytics_realtime_in_memory: bool = True  # Real-time counts from this process's views; off with several workers
+    analytics_realtime_push_seconds: int = 2  # How often the real-time stream sends updates
+    analytics_classifier_cache_size: int = 4096  # User agents and referring hosts whose class is memoized
+
+    # Order numbers
+    order_number_block_size: int = 1  # Numbers reserved per round trip; above 1, only ordered per process
+
+    # Search autocomplete (in-memory index)
+    autocomplete_max_entries: int = 50000  # Caps index memory on large catalogs
+
     # Loyalty Points
     default_points_per_taka: float = 0.01  # 1 point per 100 BDT
     default_taka_per_point: float = 1.0  # 1 point = 1 BDT
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -34,3 +36,74 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ============ Async engine ============
+# Routers that are async end to end use this engine so database waits
+# don't block the event loop. It points at the same database as `engine`,
+# through asyncpg (PostgreSQL) or aiosqlite (SQLite).
+
+def _async_database_url(url: str):
+    """Swap the sync driver in DATABASE_URL for its async counterpart."""
+    url = make_url(url)
+    connect_args = {}
+
+    if url.get_backend_name() == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite"), connect_args
+
+    # asyncpg takes `ssl` instead of libpq's `sslmode`
+    query = dict(url.query)
+    sslmode = query.pop("sslmode", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = sslmode
+    # Transaction-mode poolers (pgbouncer, Supabase :6543) can't keep
+    # prepared statements across transactions
+    connect_args["statement_cache_size"] = 0
+
+    return url.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+
+ASYNC_DATABASE_URL, _async_connect_args = _async_database_url(SQLALCHEMY_DATABASE_URL)
+
+if ASYNC_DATABASE_URL.get_backend_name() == "sqlite":
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+else:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args=_async_connect_args,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=300,
+    )
+
+# Sessions run on SessionLocal's class so session event listeners
+# registered on SessionLocal apply to async sessions too. Objects stay
+# loaded after commit: an expired attribute can't lazy-load under asyncio.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    sync_session_class=SessionLocal.class_,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db():
+    """Dependency to get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def run_migrations():
+    """Upgrade the database schema to the latest Alembic revision."""
+    from pathlib import Path
+    from alembic import command
+    from alembic.config import Config
+
+    backend_dir = Path(__file__).resolve().parents[1]
+    config = Config(str(backend_dir / "alembic.ini"))
+    config.set_main_option("script_location", str(backend_dir / "alembic"))
+    # Keep the app's logging configuration
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
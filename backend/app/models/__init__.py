@@ -45,6 +45,21 @@ from app.models.models import (
     ProductVariantType,
     ProductVariant,
     ProductVariantAttribute,
+    # Sales rollups
+    DailySalesRollup,
+    DailyCategorySales,
+    DailyPaymentSales,
+    # Export jobs
+    ExportJob,
+    # Idempotency keys
+    IdempotencyKey,
+    # Order numbers
+    OrderNumberSequence,
+    # Visitor analytics rollups
+    VisitorDailyStats,
+    VisitorHourlyStats,
+    VisitorDailyBreakdown,
+    VisitorSketch,
 )
 
 __all__ = [
@@ -94,4 +109,19 @@ __all__ = [
     "ProductVariantType",
     "ProductVariant",
     "ProductVariantAttribute",
+    # Sales rollups
+    "DailySalesRollup",
+    "DailyCategorySales",
+    "DailyPaymentSales",
+    # Export jobs
+    "ExportJob",
+    # Idempotency keys
+    "IdempotencyKey",
+    # Order numbers
+    "OrderNumberSequence",
+    # Visitor analytics rollups
+    "VisitorDailyStats",
+    "VisitorHourlyStats",
+    "VisitorDailyBreakdown",
+    "VisitorSketch",
 ]
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Text, Enum, Index, LargeBinary, event, select, update
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm.attributes import get_history
 from sqlalchemy.sql import func
 from app.database import Base
 import enum
@@ -101,6 +102,11 @@ class Category(Base):
 # Product Model
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Storefront listings: active + featured/new, newest first
+        Index("ix_products_active_featured_created", "is_active", "is_featured", "created_at"),
+        Index("ix_products_active_new_created", "is_active", "is_new", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -110,7 +116,7 @@ class Product(Base):
     original_price = Column(Float, nullable=True)
     discount = Column(Integer, default=0)
     stock = Column(Integer, default=0)
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False, index=True)
     brand = Column(String(100), nullable=True)
     sku = Column(String(50), unique=True, nullable=True)
     is_featured = Column(Boolean, default=False)
@@ -120,6 +126,11 @@ class Product(Base):
     review_count = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Denormalized from product_images, kept in sync by the ProductImage
+    # mapper events below so listings avoid an EXISTS probe per row
+    primary_image_url = Column(String(255), nullable=True)
+    has_image = Column(Boolean, default=False, nullable=False, index=True)
     
     category = relationship("Category", back_populates="products")
     images = relationship("ProductImage", back_populates="product")
@@ -130,6 +141,8 @@ class Product(Base):
 
     @property
     def image(self):
+        if self.primary_image_url:
+            return self.primary_image_url
         if self.images:
             for img in self.images:
                 if img.is_primary:
@@ -147,16 +160,74 @@ class ProductImage(Base):
     __tablename__ = "product_images"
     
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     url = Column(String(255), nullable=False)
     is_primary = Column(Boolean, default=False)
     sort_order = Column(Integer, default=0)
     
     product = relationship("Product", back_populates="images")
 
+
+def sync_product_image_columns(connection, product_id: int):
+    """Recompute Product.primary_image_url / has_image from product_images."""
+    images = ProductImage.__table__
+    url = connection.execute(
+        select(images.c.url)
+        .where(images.c.product_id == product_id)
+        .order_by(images.c.is_primary.desc(), images.c.id)
+        .limit(1)
+    ).scalar()
+
+    connection.execute(
+        update(Product.__table__)
+        .where(Product.__table__.c.id == product_id)
+        .values(primary_image_url=url, has_image=url is not None)
+    )
+
+
+def resync_all_product_image_columns(connection) -> int:
+    """
+    ``sync_product_image_columns`` for every product in one UPDATE: repairs
+    drift left by bulk writes that skip the mapper events. Returns the rows
+    updated.
+    """
+    images = ProductImage.__table__
+    products = Product.__table__
+    # Primary image first, then the oldest image, matching Product.image
+    url = (
+        select(images.c.url)
+        .where(images.c.product_id == products.c.id)
+        .order_by(images.c.is_primary.desc(), images.c.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    has_image = select(images.c.id).where(images.c.product_id == products.c.id).exists()
+    return connection.execute(update(products).values(primary_image_url=url, has_image=has_image)).rowcount
+
+
+@event.listens_for(ProductImage, "after_insert")
+@event.listens_for(ProductImage, "after_update")
+@event.listens_for(ProductImage, "after_delete")
+def _product_image_changed(mapper, connection, target):
+    # An image moved to another product leaves the old product stale too
+    product_ids = set(get_history(target, "product_id").deleted)
+    product_ids.add(target.product_id)
+
+    for product_id in product_ids:
+        if product_id is not None:
+            sync_product_image_columns(connection, product_id)
+
 # Order Model
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # "My orders" newest first
+        Index("ix_orders_user_created", "user_id", "created_at"),
+        # Admin order lists, dashboards and revenue reports
+        Index("ix_orders_status_payment_created", "status", "payment_status", "created_at"),
+        Index("ix_orders_payment_created", "payment_status", "created_at"),
+        Index("ix_orders_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_number = Column(String(50), unique=True, index=True, nullable=False)
@@ -208,7 +279,7 @@ class OrderTracking(Base):
     __tablename__ = "order_tracking"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     status = Column(String(50), nullable=False)
     description = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -220,11 +291,13 @@ class OrderItem(Base):
     __tablename__ = "order_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
     total = Column(Float, nullable=False)
+    # Set when the line was bought at a flash sale price
+    flash_sale_item_id = Column(Integer, ForeignKey("flash_sale_items.id", ondelete="SET NULL"), nullable=True)
     
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
@@ -234,7 +307,7 @@ class Payment(Base):
     __tablename__ = "payments"
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     payment_method = Column(String(20), nullable=False)
     amount = Column(Float, nullable=False)
     transaction_id = Column(String(100), nullable=True)
@@ -250,7 +323,7 @@ class Review(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     rating = Column(Integer, nullable=False)
     comment = Column(Text, nullable=True)
     is_verified = Column(Boolean, default=False)
@@ -264,7 +337,7 @@ class WishlistItem(Base):
     __tablename__ = "wishlist_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
@@ -276,7 +349,7 @@ class CartItem(Base):
     __tablename__ = "cart_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Integer, default=1, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -310,7 +383,7 @@ class FlashSaleItem(Base):
     __tablename__ = "flash_sale_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    flash_sale_id = Column(Integer, ForeignKey("flash_sales.id"), nullable=False)
+    flash_sale_id = Column(Integer, ForeignKey("flash_sales.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     flash_price = Column(Float, nullable=False)
     flash_stock = Column(Integer, nullable=False)
@@ -354,6 +427,10 @@ class Voucher(Base):
 
 class VoucherUsage(Base):
     __tablename__ = "voucher_usages"
+    __table_args__ = (
+        # Per-user usage limit checks at checkout
+        Index("ix_voucher_usages_voucher_user", "voucher_id", "user_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     voucher_id = Column(Integer, ForeignKey("vouchers.id"), nullable=False)
@@ -437,6 +514,9 @@ class NewsletterSubscriber(Base):
 
 class RecentlyViewed(Base):
     __tablename__ = "recently_viewed"
+    __table_args__ = (
+        Index("ix_recently_viewed_user_viewed", "user_id", "viewed_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -720,6 +800,112 @@ class ProductVariantAttribute(Base):
     variant_type = relationship("ProductVariantType")
 
 
+# ============================================
+# SALES ROLLUPS
+# ============================================
+# Per-day aggregates of orders, kept current by app.services.sales_rollup.
+# Days are UTC calendar days of Order.created_at; revenue and units only
+# count orders whose payment is completed, like the admin reports.
+
+class DailySalesRollup(Base):
+    """Order, revenue and customer totals for one day"""
+    __tablename__ = "daily_sales_rollup"
+
+    day = Column(Date, primary_key=True)
+    orders = Column(Integer, nullable=False, default=0)  # All orders placed
+    paid_orders = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+    new_customers = Column(Integer, nullable=False, default=0)
+
+
+class DailyCategorySales(Base):
+    """Paid revenue and units for one day and product category"""
+    __tablename__ = "daily_category_sales"
+
+    day = Column(Date, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    revenue = Column(Float, nullable=False, default=0)
+    units = Column(Integer, nullable=False, default=0)
+
+
+class DailyPaymentSales(Base):
+    """Paid revenue and orders for one day and payment method"""
+    __tablename__ = "daily_payment_sales"
+
+    day = Column(Date, primary_key=True)
+    payment_method = Column(String(20), primary_key=True)
+    revenue = Column(Float, nullable=False, default=0)
+    orders = Column(Integer, nullable=False, default=0)
+
+
+# ============================================
+# EXPORT JOBS
+# ============================================
+
+class ExportJob(Base):
+    """A background export run and the file it produced"""
+    __tablename__ = "export_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    export = Column(String(30), nullable=False)  # orders, products, customers, inventory, sales-report
+    format = Column(String(10), nullable=False)  # csv, csv.gz, xlsx
+    params = Column(Text, nullable=False, default="{}")  # JSON filter parameters
+    # Hash of export + format + params; identical recent requests share a job
+    fingerprint = Column(String(64), nullable=False)
+
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed
+    rows_written = Column(Integer, nullable=False, default=0)
+    total_rows = Column(Integer, nullable=True)
+    file_path = Column(String(500), nullable=True)
+    file_size = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+
+    requested_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())  # Progress heartbeat
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_export_jobs_fingerprint_created", "fingerprint", "created_at"),
+    )
+
+
+# ============================================
+# IDEMPOTENCY KEYS
+# ============================================
+
+class IdempotencyKey(Base):
+    """The stored outcome of a request sent with an Idempotency-Key header"""
+    __tablename__ = "idempotency_keys"
+
+    # Keys are scoped to the endpoint and the user who sent them
+    scope = Column(String(40), primary_key=True)  # e.g. orders.create
+    user_id = Column(Integer, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # Hash of the request payload
+
+    status_code = Column(Integer, nullable=True)  # Null while the first request runs
+    response_body = Column(Text, nullable=True)  # JSON replayed to retries
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+# ============================================
+# ORDER NUMBER SEQUENCES
+# ============================================
+
+class OrderNumberSequence(Base):
+    """The last order number handed out for one day"""
+    __tablename__ = "order_number_sequences"
+
+    day = Column(String(8), primary_key=True)  # YYYYMMDD, as in the order number
+    last_value = Column(Integer, nullable=False, default=0)
+
+
 # ============================================
 # VISITOR ANALYTICS
 # ============================================
@@ -801,3 +987,55 @@ class VisitorSession(Base):
 
     # Duration in seconds (calculated on session end)
     duration_seconds = Column(Integer, nullable=True)
+
+
+class VisitorDailyStats(Base):
+    """Page view and session totals for one day (rolled up from raw page views)"""
+    __tablename__ = "visitor_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    page_views = Column(Integer, nullable=False, default=0)
+    visitors = Column(Integer, nullable=False, default=0)  # Distinct visitor hashes (they rotate daily)
+    sessions = Column(Integer, nullable=False, default=0)  # Distinct session IDs seen that day
+
+    # Sessions started that day
+    session_count = Column(Integer, nullable=False, default=0)
+    session_duration = Column(Integer, nullable=False, default=0)  # Sum of durations in seconds
+    session_pages = Column(Integer, nullable=False, default=0)  # Sum of page counts
+    bounces = Column(Integer, nullable=False, default=0)  # Single-page sessions
+
+    updated_at = Column(DateTime(timezone=True), nullable=False)  # When the day was last rebuilt
+
+
+class VisitorHourlyStats(Base):
+    """Page view totals for one UTC hour"""
+    __tablename__ = "visitor_hourly_stats"
+
+    hour = Column(DateTime, primary_key=True)  # Start of the hour, UTC
+    page_views = Column(Integer, nullable=False, default=0)
+    visitors = Column(Integer, nullable=False, default=0)
+    sessions = Column(Integer, nullable=False, default=0)
+
+
+class VisitorDailyBreakdown(Base):
+    """Views and visitors per traffic source, device, browser, country or page for one day"""
+    __tablename__ = "visitor_daily_breakdown"
+
+    day = Column(Date, primary_key=True)
+    dimension = Column(String(20), primary_key=True)  # source, device, browser, country, page
+    value = Column(String(500), primary_key=True)
+    label = Column(String(255), nullable=True)  # e.g. the country name
+    page_views = Column(Integer, nullable=False, default=0)
+    visitors = Column(Integer, nullable=False, default=0)
+
+
+class VisitorSketch(Base):
+    """HyperLogLog sketches of the visitors and sessions of one hour or day (see app.services.hyperloglog)"""
+    __tablename__ = "visitor_sketches"
+
+    period = Column(String(4), primary_key=True)  # hour or day
+    start = Column(DateTime, primary_key=True)  # Start of the hour or day, UTC
+    dimension = Column(String(20), primary_key=True, default="")  # "" for all views, else source, device, browser, country, page
+    value = Column(String(500), primary_key=True, default="")
+    visitors = Column(LargeBinary, nullable=False)
+    sessions = Column(LargeBinary, nullable=False)
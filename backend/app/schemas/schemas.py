@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -348,6 +348,7 @@ class FlashSaleItemCreate(FlashSaleItemBase):
 class FlashSaleItemResponse(FlashSaleItemBase):
     id: int
     sold_count: int = 0
+    remaining: Optional[int] = None
     product: Optional[ProductListResponse] = None
 
     model_config = ConfigDict(from_attributes=True)
@@ -501,9 +502,13 @@ class ProductCompareResponse(BaseModel):
 class PaginatedResponse(BaseModel):
     items: List
     total: int
-    page: int
+    page: Optional[int] = None  # Offset pages only
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None  # Offset pages only
+    # Keyset pagination: pass next_cursor back as ?cursor= for the next page
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+    total_is_estimate: bool = False
 
 class OrderListResponse(PaginatedResponse):
     items: List[OrderResponse]
@@ -870,6 +875,30 @@ class ExportRequest(BaseModel):
     end_date: Optional[datetime] = None
 
 
+class ExportJobCreate(BaseModel):
+    export: str  # orders, products, customers, inventory, sales-report
+    format: str = "csv"  # csv, csv.gz or xlsx
+    params: Dict[str, Any] = {}  # Same filters as the matching GET /admin/exports endpoint
+
+
+class ExportJobResponse(BaseModel):
+    id: str
+    export: str
+    format: str
+    params: Dict[str, Any]
+    status: str  # queued, running, completed, failed
+    rows_written: int
+    total_rows: Optional[int] = None
+    progress: Optional[float] = None  # Percent, when the row count is known
+    file_size: Optional[int] = None
+    error: Optional[str] = None
+    download_url: Optional[str] = None
+    deduplicated: bool = False  # True when an identical recent job was returned
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
 # ============================================
 # CUSTOMER INSIGHTS SCHEMAS
 # ============================================
@@ -972,6 +1001,21 @@ class VisitorAnalyticsResponse(BaseModel):
     trends: List[VisitorTrendPoint]
 
 
+class UniqueVisitorCounts(BaseModel):
+    """Distinct visitors and sessions over a range, and over the range just before it"""
+    start: datetime
+    end: datetime
+    dimension: Optional[str] = None
+    value: Optional[str] = None
+    exact: bool  # False: estimated from sketches (about 1% error)
+    unique_visitors: int
+    sessions: int
+    previous_unique_visitors: int
+    previous_sessions: int
+    visitors_change: float
+    sessions_change: float
+
+
 class RealTimeVisitors(BaseModel):
     """Real-time active visitors count"""
     active_visitors: int
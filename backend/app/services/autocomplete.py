@@ -0,0 +1,349 @@
+"""
+In-process autocomplete index for product and category names.
+
+``/products/search/autocomplete`` fires on every keystroke, so it is served
+from memory instead of the database:
+
+- A sorted vocabulary of name words answers prefix lookups with bisect.
+- A trigram index over the same vocabulary answers typo-tolerant lookups
+  ("lipstik" -> "lipstick") when a token has no prefix match.
+
+The index is built at startup and refreshed incrementally: session events
+collect the ids of products, images and categories touched by a flush, and
+after commit only those entries are reloaded. Memory is bounded by
+``settings.autocomplete_max_entries``; the lowest rated products are dropped
+first when the catalog is larger than that.
+"""
+
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Category, Product, ProductImage
+
+
+MAX_WORD_LENGTH = 32
+MAX_PREFIX_WORDS = 500  # vocabulary words scanned per prefix token
+FUZZY_THRESHOLD = 0.4  # trigram Jaccard similarity needed for a typo match
+LATENCY_SAMPLES = 1000
+
+# Product fields that appear in (or decide visibility of) a suggestion
+SUGGESTION_FIELDS = ("name", "slug", "price", "rating", "is_active")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip diacritics so "Crème" matches "creme"."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def split_words(text: str) -> List[str]:
+    words = []
+    for word in "".join(ch if ch.isalnum() else " " for ch in normalize(text)).split():
+        words.append(word[:MAX_WORD_LENGTH])
+    return words
+
+
+def trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AutocompleteIndex:
+    """Prefix + trigram index over active product and category names."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._reset()
+
+        self.built = False
+        self.last_rebuild_at: Optional[datetime] = None
+        self.last_rebuild_ms = 0.0
+        self.incremental_updates = 0
+        self.queries = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def _reset(self):
+        # key ("product:1") -> (suggestion dict, rating)
+        self._entries: Dict[str, Tuple[dict, float]] = {}
+        self._entry_words: Dict[str, Tuple[str, ...]] = {}
+        self._word_keys: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+
+    # ============ Building ============
+
+    def rebuild(self, db: Session):
+        """Rebuild the whole index from the database and swap it in."""
+        started = time.perf_counter()
+
+        products = self._visible_products(db).order_by(
+            Product.rating.desc(), Product.id
+        ).limit(self.max_entries).all()
+        categories = db.query(Category).filter(Category.is_active == True).all()
+
+        # Build off to the side so queries keep being served meanwhile
+        fresh = AutocompleteIndex(self.max_entries)
+        for product in products:
+            fresh._add(*self._product_entry(product))
+        for category in categories:
+            fresh._add(*self._category_entry(category))
+
+        with self._lock:
+            self._entries = fresh._entries
+            self._entry_words = fresh._entry_words
+            self._word_keys = fresh._word_keys
+            self._vocabulary = fresh._vocabulary
+            self._trigrams = fresh._trigrams
+
+            self.built = True
+            self.last_rebuild_at = datetime.utcnow()
+            self.last_rebuild_ms = (time.perf_counter() - started) * 1000
+
+    def refresh(self, db: Session, product_ids: Iterable[int] = (), category_ids: Iterable[int] = ()):
+        """Reload only the given products and categories."""
+        product_ids = set(product_ids)
+        category_ids = set(category_ids)
+
+        products = {}
+        if product_ids:
+            products = {
+                p.id: p for p in self._visible_products(db).filter(Product.id.in_(product_ids))
+            }
+        categories = {}
+        if category_ids:
+            categories = {
+                c.id: c for c in db.query(Category).filter(
+                    Category.id.in_(category_ids),
+                    Category.is_active == True
+                )
+            }
+
+        with self._lock:
+            for product_id in product_ids:
+                self._remove(f"product:{product_id}")
+                if product_id in products and len(self._entries) < self.max_entries:
+                    self._add(*self._product_entry(products[product_id]))
+            for category_id in category_ids:
+                self._remove(f"category:{category_id}")
+                if category_id in categories:
+                    self._add(*self._category_entry(categories[category_id]))
+            self.incremental_updates += 1
+
+    @staticmethod
+    def _visible_products(db: Session):
+        # Same visibility rule as the public listings
+        return db.query(Product).filter(
+            Product.is_active == True,
+            Product.has_image == True
+        )
+
+    @staticmethod
+    def _product_entry(product: Product) -> Tuple[str, dict, float, str]:
+        suggestion = {
+            "type": "product",
+            "id": product.id,
+            "name": product.name,
+            "slug": product.slug,
+            "price": product.price,
+            "image": product.primary_image_url,
+            "url": f"/product/{product.slug}"
+        }
+        return f"product:{product.id}", suggestion, product.rating or 0.0, product.name
+
+    @staticmethod
+    def _category_entry(category: Category) -> Tuple[str, dict, float, str]:
+        suggestion = {
+            "type": "category",
+            "id": category.id,
+            "name": category.name,
+            "slug": category.slug,
+            "image": category.image,
+            "url": f"/products/{category.slug}"
+        }
+        return f"category:{category.id}", suggestion, 0.0, category.name
+
+    def _add(self, key: str, suggestion: dict, rating: float, name: str):
+        words = tuple(dict.fromkeys(split_words(name)))
+        self._entries[key] = (suggestion, rating)
+        self._entry_words[key] = words
+
+        for word in words:
+            keys = self._word_keys.get(word)
+            if keys is None:
+                self._word_keys[word] = {key}
+                insort(self._vocabulary, word)
+                for gram in trigrams(word):
+                    self._trigrams.setdefault(gram, set()).add(word)
+            else:
+                keys.add(key)
+
+    def _remove(self, key: str):
+        if key not in self._entries:
+            return
+        del self._entries[key]
+
+        for word in self._entry_words.pop(key):
+            keys = self._word_keys[word]
+            keys.discard(key)
+            if keys:
+                continue
+
+            # Last entry using this word: drop it from the vocabulary
+            del self._word_keys[word]
+            del self._vocabulary[bisect_left(self._vocabulary, word)]
+            for gram in trigrams(word):
+                words = self._trigrams[gram]
+                words.discard(word)
+                if not words:
+                    del self._trigrams[gram]
+
+    # ============ Querying ============
+
+    def _prefix_keys(self, token: str) -> Set[str]:
+        keys = set()
+        start = bisect_left(self._vocabulary, token)
+        for word in self._vocabulary[start:start + MAX_PREFIX_WORDS]:
+            if not word.startswith(token):
+                break
+            keys |= self._word_keys[word]
+        return keys
+
+    def _fuzzy_keys(self, token: str) -> Set[str]:
+        query_grams = trigrams(token)
+        hits = Counter()
+        for gram in query_grams:
+            hits.update(self._trigrams.get(gram, ()))
+
+        keys = set()
+        for word, shared in hits.items():
+            similarity = shared / (len(query_grams) + len(trigrams(word)) - shared)
+            if similarity >= FUZZY_THRESHOLD:
+                keys |= self._word_keys[word]
+        return keys
+
+    def suggest(self, query: str, limit: int) -> List[dict]:
+        """Products first (best rated, exact before fuzzy), then categories."""
+        started = time.perf_counter()
+        tokens = split_words(query)
+
+        with self._lock:
+            matched: Optional[Set[str]] = None
+            fuzzy: Set[str] = set()
+            for token in tokens:
+                keys = self._prefix_keys(token)
+                if not keys:
+                    keys = self._fuzzy_keys(token)
+                    fuzzy |= keys
+                matched = keys if matched is None else matched & keys
+                if not matched:
+                    break
+
+            ranked = sorted(
+                matched or (),
+                key=lambda k: (
+                    not k.startswith("product:"),
+                    k in fuzzy,
+                    -self._entries[k][1],
+                    self._entries[k][0]["name"]
+                )
+            )
+            suggestions = [self._entries[k][0] for k in ranked[:limit]]
+
+        self.queries += 1
+        self._latencies.append((time.perf_counter() - started) * 1000)
+        return suggestions
+
+    def metrics(self) -> dict:
+        with self._lock:
+            product_count = sum(1 for k in self._entries if k.startswith("product:"))
+            latencies = sorted(self._latencies)
+
+            def percentile(p: float) -> float:
+                if not latencies:
+                    return 0.0
+                return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 4)
+
+            return {
+                "built": self.built,
+                "entries": len(self._entries),
+                "products": product_count,
+                "categories": len(self._entries) - product_count,
+                "max_entries": self.max_entries,
+                "vocabulary_size": len(self._vocabulary),
+                "trigram_count": len(self._trigrams),
+                "last_rebuild_at": self.last_rebuild_at,
+                "last_rebuild_ms": round(self.last_rebuild_ms, 2),
+                "incremental_updates": self.incremental_updates,
+                "queries": self.queries,
+                "latency_p50_ms": percentile(0.50),
+                "latency_p99_ms": percentile(0.99),
+            }
+
+
+# Global index instance
+autocomplete_index = AutocompleteIndex(max_entries=settings.autocomplete_max_entries)
+
+
+def build_autocomplete_index():
+    """Build the index at startup."""
+    db = SessionLocal()
+    try:
+        autocomplete_index.rebuild(db)
+    finally:
+        db.close()
+
+
+# ============ Incremental refresh ============
+
+_PENDING_KEY = "autocomplete_pending"
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_changes(session, flush_context):
+    if not autocomplete_index.built:
+        return
+
+    product_ids, category_ids = session.info.setdefault(_PENDING_KEY, (set(), set()))
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Product):
+            # Stock changes on every order; skip updates the index can't see
+            if obj in session.dirty and not any(
+                get_history(obj, field).has_changes() for field in SUGGESTION_FIELDS
+            ):
+                continue
+            product_ids.add(obj.id)
+        elif isinstance(obj, ProductImage):
+            product_ids.add(obj.product_id)
+        elif isinstance(obj, Category):
+            category_ids.add(obj.id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not any(pending):
+        return
+
+    # The committing session cannot emit SQL here; reload in a fresh one
+    db = SessionLocal()
+    try:
+        autocomplete_index.refresh(db, product_ids=pending[0], category_ids=pending[1])
+    finally:
+        db.close()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING_KEY, None)
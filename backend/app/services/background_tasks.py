@@ -5,19 +5,33 @@ This module handles:
 - Polling courier APIs for status updates
 - Auto-cancelling unpaid orders after timeout
 - Auto-assigning couriers to confirmed orders
+- Reconciling the daily sales rollups nightly
+- Removing expired background exports and idempotency keys
+- Writing flash sale sold counts in batches
+- Building the current flash sale snapshot as sales start and end
+- Writing queued visitor page views in batches
+- Rebuilding visitor rollups and dropping expired raw page views
 """
 
 import asyncio
 from datetime import datetime, timedelta
 from typing import List
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.database import AsyncSessionLocal, SessionLocal, engine
 from app.models import Order, OrderStatus, PaymentStatus, OrderTracking, Product
 from app.config import settings
+from app.services import (
+    export_jobs, flash_snapshot, flash_stock, idempotency,
+    page_view_buffer, page_view_storage, sales_rollup, visitor_rollups
+)
 from app.services.courier import get_courier_service, get_default_courier
+from app.services.sales_rollup import reconcile_recent
+from app.services.stock import claim_cancellation
 
 
 scheduler = AsyncIOScheduler()
@@ -32,6 +46,15 @@ def get_db():
         pass  # Don't close here, caller will close
 
 
+def _with_session(work):
+    """Run ``work(db)`` in its own session (for calling through asyncio.to_thread)."""
+    db = SessionLocal()
+    try:
+        return work(db)
+    finally:
+        db.close()
+
+
 async def poll_courier_statuses():
     """
     Poll courier APIs for status updates on shipped orders.
@@ -111,50 +134,52 @@ async def poll_courier_statuses():
         db.close()
 
 
+def _cancel_unpaid_orders(db) -> int:
+    """Cancel the unpaid orders past the timeout; returns how many."""
+    timeout_threshold = datetime.utcnow() - timedelta(hours=settings.payment_timeout_hours)
+
+    # Find unpaid, non-COD orders past the timeout
+    orders = db.query(Order).filter(
+        Order.status == OrderStatus.PENDING.value,
+        Order.payment_status == PaymentStatus.PENDING.value,
+        Order.payment_method != "cod",  # COD orders don't need upfront payment
+        Order.created_at < timeout_threshold
+    ).all()
+
+    cancelled = 0
+    for order in orders:
+        # Cancel and release the stock reservation, unless the customer
+        # cancelled or the order moved on in the meantime
+        if not claim_cancellation(db, order.id, (OrderStatus.PENDING.value,)):
+            continue
+
+        # Add tracking entry
+        tracking = OrderTracking(
+            order_id=order.id,
+            status="Cancelled",
+            description=f"Auto-cancelled: Payment not received within {settings.payment_timeout_hours} hours"
+        )
+        db.add(tracking)
+        cancelled += 1
+
+        print(f"[Background] Auto-cancelled unpaid order: {order.order_number}")
+
+    if orders:
+        db.commit()
+    return cancelled
+
+
 async def cancel_unpaid_orders():
     """
     Auto-cancel orders that haven't been paid within the timeout period.
     Only applies to non-COD orders that are still pending.
     """
-    db = SessionLocal()
     try:
-        timeout_threshold = datetime.utcnow() - timedelta(hours=settings.payment_timeout_hours)
-
-        # Find unpaid, non-COD orders past the timeout
-        orders = db.query(Order).filter(
-            Order.status == OrderStatus.PENDING.value,
-            Order.payment_status == PaymentStatus.PENDING.value,
-            Order.payment_method != "cod",  # COD orders don't need upfront payment
-            Order.created_at < timeout_threshold
-        ).all()
-
-        for order in orders:
-            # Restore stock
-            for item in order.items:
-                product = db.query(Product).filter(Product.id == item.product_id).first()
-                if product:
-                    product.stock += item.quantity
-
-            # Cancel the order
-            order.status = OrderStatus.CANCELLED.value
-
-            # Add tracking entry
-            tracking = OrderTracking(
-                order_id=order.id,
-                status="Cancelled",
-                description=f"Auto-cancelled: Payment not received within {settings.payment_timeout_hours} hours"
-            )
-            db.add(tracking)
-
-            print(f"[Background] Auto-cancelled unpaid order: {order.order_number}")
-
-        if orders:
-            db.commit()
-
+        # An UPDATE per order plus its stock restore, so in a thread rather
+        # than on the event loop
+        await asyncio.to_thread(_with_session, _cancel_unpaid_orders)
     except Exception as e:
         print(f"[Background] Error in cancel_unpaid_orders: {e}")
-    finally:
-        db.close()
 
 
 async def auto_assign_courier_to_confirmed():
@@ -225,6 +250,123 @@ async def auto_assign_courier_to_confirmed():
         db.close()
 
 
+async def reconcile_sales_rollups():
+    """
+    Recompute recent days of the sales rollups from the orders table.
+    Incremental updates keep them current; this corrects any drift.
+    """
+    try:
+        # Increments pending here would otherwise be added on top of the
+        # recomputed days
+        await sales_rollup.flush_rollups()
+        # Synchronous engine work, so in a thread rather than on the event loop
+        days = await asyncio.to_thread(reconcile_recent, engine, settings.sales_rollup_reconcile_days)
+        print(f"[Background] Reconciled sales rollups ({days} days with activity)")
+    except Exception as e:
+        print(f"[Background] Error in reconcile_sales_rollups: {e}")
+
+
+async def cleanup_export_jobs():
+    """Delete expired export files and fail exports whose worker died."""
+    try:
+        # Synchronous deletes, so in a thread rather than on the event loop
+        deleted = await asyncio.to_thread(_with_session, export_jobs.cleanup_export_jobs)
+        if deleted:
+            print(f"[Background] Removed {deleted} expired export(s)")
+    except Exception as e:
+        print(f"[Background] Error in cleanup_export_jobs: {e}")
+
+
+async def cleanup_idempotency_keys():
+    """Delete idempotency keys past their retention."""
+    try:
+        deleted = await asyncio.to_thread(_with_session, idempotency.cleanup_idempotency_keys)
+        if deleted:
+            print(f"[Background] Removed {deleted} expired idempotency key(s)")
+    except Exception as e:
+        print(f"[Background] Error in cleanup_idempotency_keys: {e}")
+
+
+async def flush_flash_sold_counts():
+    """Write the flash sale units sold since the last run to sold_count."""
+    try:
+        await flash_stock.flush_sold_counts()
+    except Exception as e:
+        print(f"[Background] Error in flush_flash_sold_counts: {e}")
+
+
+async def flush_sales_rollups():
+    """Add the order changes committed since the last run to the sales rollups."""
+    try:
+        await sales_rollup.flush_rollups()
+    except Exception as e:
+        print(f"[Background] Error in flush_sales_rollups: {e}")
+
+
+async def flush_page_views():
+    """Write the page views queued by the tracking endpoint."""
+    try:
+        await page_view_buffer.flush_page_views()
+    except Exception as e:
+        print(f"[Background] Error in flush_page_views: {e}")
+
+
+async def refresh_visitor_rollups():
+    """Rebuild today's (and until it settles, yesterday's) visitor rollups."""
+    try:
+        # Rebuilding a day hashes and sketches every raw view in Python,
+        # seconds for a busy day, so in a thread rather than on the event loop
+        await asyncio.to_thread(visitor_rollups.refresh_recent_days, engine)
+    except Exception as e:
+        print(f"[Background] Error in refresh_visitor_rollups: {e}")
+
+
+async def expire_page_views():
+    """Create upcoming page view partitions and drop expired raw analytics."""
+    try:
+        # DDL and catalog queries on the sync engine; keep them off the loop
+        await asyncio.to_thread(page_view_storage.ensure_partitions, engine)
+        async with AsyncSessionLocal() as db:
+            dropped = await db.run_sync(lambda session: visitor_rollups.expire_raw_data(
+                session.connection(), settings.analytics_retention_days
+            ))
+            await db.commit()
+        if dropped:
+            print(f"[Background] Dropped {dropped} days of raw page views")
+    except Exception as e:
+        print(f"[Background] Error in expire_page_views: {e}")
+
+
+async def refresh_flash_sale_snapshot():
+    """Rebuild the current flash sale snapshot (a sale just started or ended)."""
+    try:
+        # Queries and the cache write block, and this runs as a sale starts:
+        # keep them off the event loop serving the sale
+        snapshot = await asyncio.to_thread(_with_session, flash_snapshot.refresh)
+        print(f"[Background] Flash sale snapshot rebuilt (sale {snapshot.sale_id})")
+    except Exception as e:
+        print(f"[Background] Error in refresh_flash_sale_snapshot: {e}")
+
+
+async def schedule_flash_sale_snapshots():
+    """
+    Schedule a snapshot rebuild at every upcoming sale start and end, so the
+    first buyers of a sale don't pay for building it.
+    """
+    try:
+        transitions = await asyncio.to_thread(_with_session, flash_snapshot.transition_times)
+        for when in transitions:
+            scheduler.add_job(
+                refresh_flash_sale_snapshot,
+                DateTrigger(run_date=when),
+                id=f"flash_sale_snapshot_{int(when.timestamp())}",
+                name="Rebuild flash sale snapshot",
+                replace_existing=True
+            )
+    except Exception as e:
+        print(f"[Background] Error in schedule_flash_sale_snapshots: {e}")
+
+
 def start_scheduler():
     """Start the background task scheduler."""
     # Poll courier statuses every X minutes
@@ -236,10 +378,10 @@ def start_scheduler():
         replace_existing=True
     )
 
-    # Check for unpaid orders every hour
+    # Release stock held by expired unpaid orders every 10 minutes
     scheduler.add_job(
         cancel_unpaid_orders,
-        IntervalTrigger(hours=1),
+        IntervalTrigger(minutes=10),
         id="cancel_unpaid_orders",
         name="Cancel unpaid orders after timeout",
         replace_existing=True
@@ -254,6 +396,96 @@ def start_scheduler():
         replace_existing=True
     )
 
+    # Reconcile sales rollups nightly
+    scheduler.add_job(
+        reconcile_sales_rollups,
+        CronTrigger(hour=3, minute=30),
+        id="reconcile_sales_rollups",
+        name="Reconcile daily sales rollups",
+        replace_existing=True
+    )
+
+    # Clean up export jobs hourly
+    scheduler.add_job(
+        cleanup_export_jobs,
+        IntervalTrigger(hours=1),
+        id="cleanup_export_jobs",
+        name="Remove expired export files",
+        replace_existing=True
+    )
+
+    # Expire idempotency keys hourly
+    scheduler.add_job(
+        cleanup_idempotency_keys,
+        IntervalTrigger(hours=1),
+        id="cleanup_idempotency_keys",
+        name="Remove expired idempotency keys",
+        replace_existing=True
+    )
+
+    # Batch flash sale sold_count updates every few seconds
+    scheduler.add_job(
+        flush_flash_sold_counts,
+        IntervalTrigger(seconds=settings.flash_sold_flush_seconds),
+        id="flush_flash_sold_counts",
+        name="Write flash sale sold counts",
+        replace_existing=True
+    )
+
+    # Batch sales rollup increments every few seconds
+    scheduler.add_job(
+        flush_sales_rollups,
+        IntervalTrigger(seconds=settings.sales_rollup_flush_seconds),
+        id="flush_sales_rollups",
+        name="Write sales rollup increments",
+        replace_existing=True
+    )
+
+    # Write queued visitor page views in batches
+    scheduler.add_job(
+        flush_page_views,
+        IntervalTrigger(seconds=settings.analytics_flush_interval_ms / 1000),
+        id="flush_page_views",
+        name="Write queued page views",
+        replace_existing=True
+    )
+
+    # Keep today's visitor rollups current
+    scheduler.add_job(
+        refresh_visitor_rollups,
+        IntervalTrigger(minutes=settings.analytics_rollup_minutes),
+        id="refresh_visitor_rollups",
+        name="Rebuild recent visitor rollups",
+        replace_existing=True
+    )
+
+    # Page view partitions and retention nightly
+    scheduler.add_job(
+        expire_page_views,
+        CronTrigger(hour=3, minute=45),
+        id="expire_page_views",
+        name="Maintain page view partitions",
+        replace_existing=True
+    )
+
+    # Build the snapshot of a sale already running at startup
+    scheduler.add_job(
+        refresh_flash_sale_snapshot,
+        id="refresh_flash_sale_snapshot",
+        name="Build flash sale snapshot",
+        replace_existing=True
+    )
+
+    # Pick up new or rescheduled flash sales every 5 minutes (and at startup)
+    scheduler.add_job(
+        schedule_flash_sale_snapshots,
+        IntervalTrigger(minutes=5),
+        id="schedule_flash_sale_snapshots",
+        name="Schedule flash sale snapshot rebuilds",
+        next_run_time=datetime.now(),
+        replace_existing=True
+    )
+
     scheduler.start()
     print("[Scheduler] Background task scheduler started")
 
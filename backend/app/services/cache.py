@@ -0,0 +1,651 @@
+"""
+Cache backends shared by the API's caching layers.
+
+- ``MemoryBackend``: per-process LRU with per-entry TTL. Fast, but each
+  uvicorn worker has its own copy and invalidation only reaches the worker
+  that performed the write.
+- ``RedisBackend``: shared by every worker and every instance, used when
+  ``REDIS_URL`` is set (requires ``pip install redis``).
+- ``FileBackend``: a SQLite file shared by the workers of one host, for
+  multi-worker deployments without Redis (``CACHE_BACKEND=file``).
+
+Entries can carry tags ("product:12", "categories") and be dropped by tag,
+so writers don't need to know which cache keys their data ended up in.
+
+``Cache`` wraps a backend for expensive computed values: it counts hits and
+misses and coalesces concurrent misses for the same key so the value is
+computed once, across threads and, on shared backends, across workers.
+
+Backends also hold atomic integer counters (kept apart from cached
+entries and never evicted before their TTL) for hot inventory such as
+flash-sale allocations.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.config import settings
+
+
+class CacheBackend:
+    """Key/value store with TTLs and tag-based invalidation."""
+
+    # True when calls do network I/O and should stay off the event loop
+    blocking = False
+    # True when other workers see the same entries
+    shared = False
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of ``tags``; returns how many."""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def acquire_lock(self, key: str, ttl: int) -> bool:
+        """Take a fill lock on ``key`` for up to ``ttl`` seconds; False if held."""
+        return True
+
+    def release_lock(self, key: str):
+        pass
+
+    # Counters
+
+    def counter_seed(self, key: str, value: int, ttl: int) -> bool:
+        """Create counter ``key`` at ``value`` unless it exists; True if created."""
+        raise NotImplementedError
+
+    def counter_take(self, key: str, amount: int) -> Optional[int]:
+        """
+        Subtract ``amount`` if the counter has at least that much and return
+        what is left; -1 if it hasn't (nothing is taken), None if it doesn't
+        exist.
+        """
+        raise NotImplementedError
+
+    def counter_add(self, key: str, amount: int):
+        """Add ``amount`` to the counter if it exists."""
+        raise NotImplementedError
+
+    def counter_get(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def counter_delete(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Bounded in-process LRU; expired entries are dropped when touched."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (value, expires_at, tags), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Any, float, Tuple[str, ...]]]" = OrderedDict()
+        self._tag_keys: Dict[str, Set[str]] = {}
+        # key -> [value, expires_at]
+        self._counters: Dict[str, list] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()):
+        tags = tuple(tags)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic() + ttl, tags)
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys |= self._tag_keys.get(tag, set())
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tag_keys.clear()
+
+    def _counter(self, key: str) -> Optional[list]:
+        counter = self._counters.get(key)
+        if counter is not None and counter[1] <= time.monotonic():
+            del self._counters[key]
+            return None
+        return counter
+
+    def counter_seed(self, key: str, value: int, ttl: int) -> bool:
+        with self._lock:
+            if self._counter(key) is not None:
+                return False
+            self._counters[key] = [value, time.monotonic() + ttl]
+            return True
+
+    def counter_take(self, key: str, amount: int) -> Optional[int]:
+        with self._lock:
+            counter = self._counter(key)
+            if counter is None:
+                return None
+            if counter[0] < amount:
+                return -1
+            counter[0] -= amount
+            return counter[0]
+
+    def counter_add(self, key: str, amount: int):
+        with self._lock:
+            counter = self._counter(key)
+            if counter is not None:
+                counter[0] += amount
+
+    def counter_get(self, key: str) -> Optional[int]:
+        with self._lock:
+            counter = self._counter(key)
+            return counter[0] if counter is not None else None
+
+    def counter_delete(self, key: str):
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis-backed cache shared across workers.
+
+    Values are pickled. Each tag is a Redis set of the keys carrying it;
+    invalidating a tag deletes those keys and the set.
+    """
+
+    blocking = True
+    shared = True
+
+    def __init__(self, url: str, namespace: str):
+        import redis  # Optional dependency, only needed when REDIS_URL is set
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self._prefix = f"{settings.app_name.lower()}:{namespace}:"
+        # Check-and-decrement and add-if-present must each be one atomic step
+        self._take_script = self._redis.register_script(
+            "local v = redis.call('GET', KEYS[1]) "
+            "if not v then return -2 end "
+            "if tonumber(v) < tonumber(ARGV[1]) then return -1 end "
+            "return redis.call('DECRBY', KEYS[1], ARGV[1])"
+        )
+        self._add_script = self._redis.register_script(
+            "if redis.call('EXISTS', KEYS[1]) == 1 then "
+            "return redis.call('INCRBY', KEYS[1], ARGV[1]) end "
+            "return nil"
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self._prefix}tag:{tag}"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._redis.get(self._key(key))
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()):
+        pipe = self._redis.pipeline()
+        pipe.set(self._key(key), pickle.dumps(value), ex=ttl)
+        for tag in tags:
+            pipe.sadd(self._tag(tag), self._key(key))
+            # Tag sets must outlive every entry they point at: extend the
+            # TTL, never shorten it (EXPIRE GT/NX needs Redis 7+)
+            pipe.expire(self._tag(tag), ttl, gt=True)
+            pipe.expire(self._tag(tag), ttl, nx=True)
+        pipe.execute()
+
+    def delete(self, key: str):
+        self._redis.delete(self._key(key))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tag_keys = [self._tag(tag) for tag in tags]
+        if not tag_keys:
+            return 0
+        keys = self._redis.sunion(tag_keys)
+        pipe = self._redis.pipeline()
+        if keys:
+            pipe.delete(*keys)
+        pipe.delete(*tag_keys)
+        pipe.execute()
+        return len(keys)
+
+    def clear(self):
+        for key in self._redis.scan_iter(match=f"{self._prefix}*"):
+            self._redis.delete(key)
+
+    def acquire_lock(self, key: str, ttl: int) -> bool:
+        return bool(self._redis.set(f"{self._prefix}lock:{key}", b"1", nx=True, ex=ttl))
+
+    def release_lock(self, key: str):
+        self._redis.delete(f"{self._prefix}lock:{key}")
+
+    def _counter_key(self, key: str) -> str:
+        return f"{self._prefix}counter:{key}"
+
+    def counter_seed(self, key: str, value: int, ttl: int) -> bool:
+        return bool(self._redis.set(self._counter_key(key), value, nx=True, ex=ttl))
+
+    def counter_take(self, key: str, amount: int) -> Optional[int]:
+        remaining = self._take_script(keys=[self._counter_key(key)], args=[amount])
+        return None if remaining == -2 else int(remaining)
+
+    def counter_add(self, key: str, amount: int):
+        self._add_script(keys=[self._counter_key(key)], args=[amount])
+
+    def counter_get(self, key: str) -> Optional[int]:
+        value = self._redis.get(self._counter_key(key))
+        return int(value) if value is not None else None
+
+    def counter_delete(self, key: str):
+        self._redis.delete(self._counter_key(key))
+
+
+class FileBackend(CacheBackend):
+    """
+    SQLite-file cache shared by the worker processes of one host.
+
+    Every namespace gets its own tables in the same file. Reads bump the
+    entry's access time so eviction past ``max_entries`` is LRU; expired
+    entries are dropped when read and swept on writes. WAL mode lets
+    readers proceed while another worker writes.
+    """
+
+    blocking = True
+    shared = True
+
+    def __init__(self, path: str, namespace: str, max_entries: int = 1000):
+        self.path = os.path.abspath(path)
+        self.max_entries = max_entries
+        self._table = f"cache_{namespace}"
+        self._local = threading.local()
+
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table} ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{self._table}_accessed_at "
+                f"ON {self._table} (accessed_at)"
+            )
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table}_tags ("
+                "tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))"
+            )
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table}_locks ("
+                "key TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._table}_counters ("
+                "key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._conn()
+        row = conn.execute(
+            f"SELECT value, expires_at FROM {self._table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[1] <= now:
+            self.delete(key)
+            return None
+        conn.execute(f"UPDATE {self._table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()):
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DELETE FROM {self._table}_tags WHERE key = ?", (key,))
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self._table} (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value), now + ttl, now)
+            )
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {self._table}_tags (tag, key) VALUES (?, ?)",
+                [(tag, key) for tag in set(tags)]
+            )
+
+            # Sweep expired entries, then evict least recently used ones
+            stale = f"SELECT key FROM {self._table} WHERE expires_at <= ?"
+            conn.execute(f"DELETE FROM {self._table}_tags WHERE key IN ({stale})", (now,))
+            conn.execute(f"DELETE FROM {self._table} WHERE expires_at <= ?", (now,))
+            overflow = (
+                f"SELECT key FROM {self._table} ORDER BY accessed_at DESC "
+                "LIMIT -1 OFFSET ?"
+            )
+            conn.execute(
+                f"DELETE FROM {self._table}_tags WHERE key IN ({overflow})", (self.max_entries,)
+            )
+            conn.execute(f"DELETE FROM {self._table} WHERE key IN ({overflow})", (self.max_entries,))
+
+    def delete(self, key: str):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DELETE FROM {self._table}_tags WHERE key = ?", (key,))
+            conn.execute(f"DELETE FROM {self._table} WHERE key = ?", (key,))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tags = list(set(tags))
+        if not tags:
+            return 0
+        marks = ", ".join("?" * len(tags))
+        tagged = f"SELECT key FROM {self._table}_tags WHERE tag IN ({marks})"
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            removed = conn.execute(f"DELETE FROM {self._table} WHERE key IN ({tagged})", tags).rowcount
+            conn.execute(f"DELETE FROM {self._table}_tags WHERE key IN ({tagged})", tags)
+        return removed
+
+    def clear(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DELETE FROM {self._table}")
+            conn.execute(f"DELETE FROM {self._table}_tags")
+
+    def acquire_lock(self, key: str, ttl: int) -> bool:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"DELETE FROM {self._table}_locks WHERE key = ? AND expires_at <= ?", (key, now)
+            )
+            taken = conn.execute(
+                f"INSERT OR IGNORE INTO {self._table}_locks (key, expires_at) VALUES (?, ?)",
+                (key, now + ttl)
+            ).rowcount
+        return taken == 1
+
+    def release_lock(self, key: str):
+        conn = self._conn()
+        conn.execute(f"DELETE FROM {self._table}_locks WHERE key = ?", (key,))
+
+    def counter_seed(self, key: str, value: int, ttl: int) -> bool:
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"DELETE FROM {self._table}_counters WHERE key = ? AND expires_at <= ?", (key, now)
+            )
+            created = conn.execute(
+                f"INSERT OR IGNORE INTO {self._table}_counters (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + ttl)
+            ).rowcount
+        return created == 1
+
+    def counter_take(self, key: str, amount: int) -> Optional[int]:
+        conn = self._conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"UPDATE {self._table}_counters SET value = value - ? "
+                "WHERE key = ? AND expires_at > ? AND value >= ? RETURNING value",
+                (amount, key, time.time(), amount)
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            exists = conn.execute(
+                f"SELECT 1 FROM {self._table}_counters WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return -1 if exists else None
+
+    def counter_add(self, key: str, amount: int):
+        conn = self._conn()
+        conn.execute(
+            f"UPDATE {self._table}_counters SET value = value + ? WHERE key = ? AND expires_at > ?",
+            (amount, key, time.time())
+        )
+
+    def counter_get(self, key: str) -> Optional[int]:
+        row = self._conn().execute(
+            f"SELECT value FROM {self._table}_counters WHERE key = ? AND expires_at > ?",
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def counter_delete(self, key: str):
+        self._conn().execute(f"DELETE FROM {self._table}_counters WHERE key = ?", (key,))
+
+
+def create_backend(namespace: str, max_entries: int) -> CacheBackend:
+    """
+    Backend selected by ``CACHE_BACKEND``: "memory", "redis", "file", or
+    "auto" (Redis when REDIS_URL is configured, otherwise in-process).
+    """
+    kind = settings.cache_backend.lower()
+    if kind == "auto":
+        kind = "redis" if settings.redis_url else "memory"
+
+    if kind == "file":
+        return FileBackend(settings.cache_file_path, namespace, max_entries=max_entries)
+    if kind == "redis":
+        if not settings.redis_url:
+            print(f"[Cache] CACHE_BACKEND=redis but REDIS_URL is empty; "
+                  f"using in-process cache for '{namespace}'")
+        else:
+            try:
+                return RedisBackend(settings.redis_url, namespace)
+            except ImportError:
+                print(f"[Cache] REDIS_URL is set but the redis package is missing; "
+                      f"using in-process cache for '{namespace}'")
+    return MemoryBackend(max_entries=max_entries)
+
+
+# ============ Computed values ============
+
+class Cache:
+    """
+    Cache for values that are expensive to compute, with hit/miss counters.
+
+    ``get_or_compute`` is single-flight: while one caller computes a key,
+    other threads of this worker wait for it, and on a shared backend other
+    workers wait on a fill lock and then read the stored value. A waiter
+    whose lock holder takes longer than ``lock_timeout`` computes itself.
+    ``None`` results are not cached.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int, lock_timeout: int = 30):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0  # misses served by another caller's computation
+        self.errors = 0  # backend failures that fell through to computing
+
+        self._counter_lock = threading.Lock()
+        # key -> [lock, callers using it]
+        self._key_locks: Dict[str, list] = {}
+
+    def _count(self, counter: str):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            self._count("errors")
+            print(f"[Cache] Read failed for '{key}': {e}")
+            return None
+
+    def _store(self, key: str, value: Any, ttl: int, tags: Iterable[str]):
+        try:
+            self.backend.set(key, value, ttl, tags)
+        except Exception as e:
+            self._count("errors")
+            print(f"[Cache] Write failed for '{key}': {e}")
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._counter_lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _release_key_lock(self, key: str):
+        with self._counter_lock:
+            entry = self._key_locks[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._key_locks[key]
+
+    def _wait_for_fill(self, key: str) -> Tuple[bool, Optional[Any]]:
+        """Take the cross-worker fill lock, or return the value another worker stored."""
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.02
+        while True:
+            try:
+                if self.backend.acquire_lock(key, self.lock_timeout):
+                    return True, None
+            except Exception as e:
+                self._count("errors")
+                print(f"[Cache] Lock failed for '{key}': {e}")
+                return False, None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+            value = self._lookup(key)
+            if value is not None or time.monotonic() >= deadline:
+                return False, value
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = ()
+    ) -> Any:
+        """The cached value for ``key``, computing and storing it on a miss."""
+        value = self._lookup(key)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        lock = self._key_lock(key)
+        try:
+            with lock:
+                # Another thread may have filled it while we waited
+                value = self._lookup(key)
+                if value is not None:
+                    self._count("coalesced")
+                    return value
+
+                locked = False
+                if self.backend.shared:
+                    locked, value = self._wait_for_fill(key)
+                    if value is not None:
+                        self._count("coalesced")
+                        return value
+
+                self._count("misses")
+                try:
+                    value = compute()
+                    if value is not None:
+                        self._store(key, value, ttl or self.ttl, tags)
+                    return value
+                finally:
+                    if locked:
+                        try:
+                            self.backend.release_lock(key)
+                        except Exception as e:
+                            print(f"[Cache] Unlock failed for '{key}': {e}")
+        finally:
+            self._release_key_lock(key)
+
+    def delete(self, key: str):
+        self.backend.delete(key)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        return self.backend.invalidate_tags(tags)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            lookups = self.hits + self.misses + self.coalesced
+            stats = {
+                "backend": type(self.backend).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+        if isinstance(self.backend, MemoryBackend):
+            stats["entries"] = len(self.backend)
+            stats["max_entries"] = self.backend.max_entries
+        return stats
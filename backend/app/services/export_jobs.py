@@ -0,0 +1,253 @@
+"""
+Background export jobs.
+
+Streaming a year of orders still holds a request worker (and the admin's
+browser tab) for as long as the query runs. Jobs move that work to a small
+per-process thread pool instead: the admin submits an export, polls its
+progress, and downloads the finished file from disk, resuming with HTTP
+Range requests if the connection drops.
+
+Jobs are rows in ``export_jobs``, so status is visible to every worker.
+A submission identical to one made within ``export_dedupe_minutes``
+(same export, format and parameters) returns the existing job instead of
+generating the file again. Finished files are removed after
+``export_retention_hours`` by ``cleanup_export_jobs``.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import ExportJob
+from app.services import export_engine
+
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+PROGRESS_INTERVAL = 1.0  # Seconds between progress writes
+STALE_RUNNING_MINUTES = 15  # Running jobs without a heartbeat for this long died with their worker
+STALE_QUEUED_HOURS = 1  # Queued jobs never picked up (worker restarted)
+
+_executor = ThreadPoolExecutor(max_workers=settings.export_workers, thread_name_prefix="export")
+
+
+# ============ Submission ============
+
+def parse_params(export: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate ``params`` against the export's filter arguments."""
+    if export not in export_engine.EXPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown export. Use one of: {', '.join(export_engine.EXPORTS)}"
+        )
+
+    signature = inspect.signature(export_engine.EXPORTS[export])
+    unknown = set(params) - set(signature.parameters)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown parameters for {export} export: {', '.join(sorted(unknown))}"
+        )
+
+    parsed = {}
+    for name, value in params.items():
+        try:
+            parsed[name] = TypeAdapter(signature.parameters[name].annotation).validate_python(value)
+        except ValidationError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid value for {name}"
+            )
+    return parsed
+
+
+def fingerprint(export: str, format: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {"export": export, "format": format, "params": jsonable_encoder(params)},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _reusable(job: ExportJob) -> bool:
+    if job.status in (QUEUED, RUNNING):
+        return True
+    return job.status == COMPLETED and bool(job.file_path) and os.path.exists(job.file_path)
+
+
+def submit_export(
+    db: Session,
+    export: str,
+    format: str,
+    params: Dict[str, Any],
+    requested_by: Optional[int] = None
+) -> Tuple[ExportJob, bool]:
+    """
+    Queue an export, or return a recent identical one.
+    Returns ``(job, deduplicated)``.
+    """
+    export_engine.check_format(format)
+    params = parse_params(export, params)
+    key = fingerprint(export, format, params)
+
+    recent = db.query(ExportJob).filter(
+        ExportJob.fingerprint == key,
+        ExportJob.created_at >= datetime.utcnow() - timedelta(minutes=settings.export_dedupe_minutes)
+    ).order_by(ExportJob.created_at.desc()).all()
+    for job in recent:
+        if _reusable(job):
+            return job, True
+
+    job = ExportJob(
+        id=uuid.uuid4().hex,
+        export=export,
+        format=format,
+        params=json.dumps(jsonable_encoder(params)),
+        fingerprint=key,
+        status=QUEUED,
+        requested_by=requested_by,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    _executor.submit(run_export_job, job.id)
+    return job, False
+
+
+# ============ Running ============
+
+def artifact_path(job: ExportJob) -> str:
+    _, _, extension = export_engine.FORMATS[job.format]
+    return os.path.join(settings.export_dir, f"{job.id}.{extension}")
+
+
+def download_filename(job: ExportJob) -> str:
+    _, _, extension = export_engine.FORMATS[job.format]
+    created = job.created_at or datetime.utcnow()
+    return f"{job.export.replace('-', '_')}_{created.strftime('%Y%m%d_%H%M')}.{extension}"
+
+
+def run_export_job(job_id: str):
+    """Generate the file for one job (runs on the export pool)."""
+    db = SessionLocal()
+    part_path = None
+    try:
+        job = db.get(ExportJob, job_id)
+        if job is None or job.status != QUEUED:
+            return
+
+        job.status = RUNNING
+        job.started_at = job.updated_at = datetime.utcnow()
+        db.commit()
+
+        spec = export_engine.EXPORTS[job.export](**parse_params(job.export, json.loads(job.params)))
+        job.total_rows = export_engine.count_rows(spec)
+        db.commit()
+
+        os.makedirs(settings.export_dir, exist_ok=True)
+        path = artifact_path(job)
+        part_path = path + ".part"
+        rows_written = 0
+        last_report = time.monotonic()
+
+        def report(rows: int):
+            nonlocal rows_written, last_report
+            rows_written = rows
+            if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                job.rows_written = rows
+                job.updated_at = datetime.utcnow()
+                db.commit()
+                last_report = time.monotonic()
+
+        with open(part_path, "wb") as f:
+            for chunk in export_engine.export_chunks(spec, job.format, on_progress=report):
+                f.write(chunk)
+        # Only complete files ever appear under the final name
+        os.replace(part_path, path)
+        part_path = None
+
+        job.status = COMPLETED
+        job.rows_written = rows_written
+        job.file_path = path
+        job.file_size = os.path.getsize(path)
+        job.completed_at = job.updated_at = datetime.utcnow()
+        db.commit()
+        print(f"[Exports] Job {job.id} finished: {job.export} ({rows_written} rows, {job.file_size} bytes)")
+    except Exception as e:
+        db.rollback()
+        print(f"[Exports] Job {job_id} failed: {e}")
+        job = db.get(ExportJob, job_id)
+        if job is not None:
+            job.status = FAILED
+            job.error = str(e)[:1000]
+            job.updated_at = datetime.utcnow()
+            db.commit()
+    finally:
+        if part_path and os.path.exists(part_path):
+            os.remove(part_path)
+        db.close()
+
+
+def job_progress(job: ExportJob) -> Optional[float]:
+    """Percent complete, when the row count is known."""
+    if job.status == COMPLETED:
+        return 100.0
+    if not job.total_rows:
+        return None
+    return round(min(job.rows_written / job.total_rows, 1.0) * 100, 1)
+
+
+# ============ Cleanup ============
+
+def _remove_file(path: Optional[str]):
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"[Exports] Could not remove {path}: {e}")
+
+
+def cleanup_export_jobs(db: Session) -> int:
+    """
+    Delete jobs (and files) past retention and fail jobs whose worker
+    went away. Returns the number of jobs deleted.
+    """
+    now = datetime.utcnow()
+
+    expired = db.query(ExportJob).filter(
+        ExportJob.created_at < now - timedelta(hours=settings.export_retention_hours),
+        ExportJob.status.in_([COMPLETED, FAILED])
+    ).all()
+    for job in expired:
+        _remove_file(job.file_path)
+        db.delete(job)
+
+    stale = db.query(ExportJob).filter(
+        ((ExportJob.status == RUNNING) & (ExportJob.updated_at < now - timedelta(minutes=STALE_RUNNING_MINUTES)))
+        | ((ExportJob.status == QUEUED) & (ExportJob.created_at < now - timedelta(hours=STALE_QUEUED_HOURS)))
+    ).all()
+    for job in stale:
+        _remove_file(artifact_path(job) + ".part")
+        job.status = FAILED
+        job.error = "Export was interrupted; please submit it again"
+        job.updated_at = now
+
+    db.commit()
+    return len(expired)
@@ -0,0 +1,208 @@
+"""
+Precomputed snapshot of the current flash sale.
+
+``/flash-sales/current`` is the most requested endpoint while a sale runs,
+and its cached body used to be dropped by every checkout (each one changes
+a product's stock and, once flushed, an item's ``sold_count``). The sale
+is now rendered once into a snapshot: the encoded JSON body, split around
+each item's ``sold_count`` and ``remaining`` values. Serving it joins the
+pre-encoded pieces with the live counts from the flash-sale counters, so a
+request costs one cache read and no query or JSON encoding.
+
+The snapshot lives in the response cache backend, tagged with the sale,
+its products and categories (but not their stock), so admin edits to the
+sale or its products drop it. Admin endpoints rebuild it right after their
+change, and the scheduler builds it as each sale starts and ends, so
+buyers arriving at ``start_time`` find it ready. A missing snapshot is
+rebuilt on the next request (where no scheduler runs, always).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import FlashSale, FlashSaleItem
+from app.schemas import FlashSaleResponse
+from app.services import flash_stock
+from app.services.product_cards import build_product_cards
+from app.services.response_cache import (
+    response_cache,
+    card_tags,
+    flash_sale_tag,
+    FLASH_SALE_LISTINGS,
+)
+
+
+SNAPSHOT_KEY = "snapshot:flash_sale:current"
+
+# Stands in for each item's live counts in the encoded body
+_PLACEHOLDER = "\x00live\x00"
+_PLACEHOLDER_BYTES = JSONResponse(content=_PLACEHOLDER).body
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def get_flash_sale_with_items(db: Session, flash_sale: FlashSale) -> dict:
+    """Convert flash sale to response with product details"""
+    sale_items = [item for item in flash_sale.items if item.product]
+    cards = build_product_cards(db, [item.product for item in sale_items])
+
+    items = []
+    for item, card in zip(sale_items, cards):
+        # Only include products that have images
+        if card["image"]:
+            items.append({
+                "id": item.id,
+                "product_id": item.product_id,
+                "flash_price": item.flash_price,
+                "flash_stock": item.flash_stock,
+                "sold_count": item.sold_count,
+                "remaining": max(0, item.flash_stock - (item.sold_count or 0)),
+                "sort_order": item.sort_order,
+                "product": card
+            })
+
+    return {
+        "id": flash_sale.id,
+        "name": flash_sale.name,
+        "slug": flash_sale.slug,
+        "description": flash_sale.description,
+        "start_time": flash_sale.start_time,
+        "end_time": flash_sale.end_time,
+        "banner_image": flash_sale.banner_image,
+        "is_active": flash_sale.is_active,
+        "created_at": flash_sale.created_at,
+        "items": items
+    }
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """The rendered current sale, or ``sale_id=None`` when none is running."""
+    sale_id: Optional[int]
+    # Encoded body pieces; each item's sold_count and remaining go between them
+    segments: Tuple[bytes, ...] = ()
+    # (item id, flash_stock, sold_count when rendered) per item, in body order
+    items: Tuple[Tuple[int, int, int], ...] = ()
+
+
+# ============ Building ============
+
+def _current_sale(db: Session, now: datetime) -> Optional[FlashSale]:
+    return db.query(FlashSale).options(
+        joinedload(FlashSale.items).joinedload(FlashSaleItem.product)
+    ).filter(
+        FlashSale.is_active == True,
+        FlashSale.start_time <= now,
+        FlashSale.end_time > now
+    ).first()
+
+
+def _next_start(db: Session, now: datetime) -> Optional[datetime]:
+    start = db.query(FlashSale.start_time).filter(
+        FlashSale.is_active == True,
+        FlashSale.start_time > now
+    ).order_by(FlashSale.start_time).limit(1).scalar()
+    return _utc(start) if start else None
+
+
+def _render(data: dict) -> Snapshot:
+    content = FlashSaleResponse.model_validate(data).model_dump(mode="json")
+    items = []
+    for item in content["items"]:
+        items.append((item["id"], item["flash_stock"], item["sold_count"] or 0))
+        item["sold_count"] = item["remaining"] = _PLACEHOLDER
+    body = JSONResponse(content=jsonable_encoder(content)).body
+    return Snapshot(
+        sale_id=data["id"],
+        segments=tuple(body.split(_PLACEHOLDER_BYTES)),
+        items=tuple(items),
+    )
+
+
+def refresh(db: Session) -> Snapshot:
+    """Render the sale running now (if any) and store it as the snapshot."""
+    now = datetime.now(timezone.utc)
+    flash_sale = _current_sale(db, now)
+
+    if flash_sale is None:
+        # Remember there's no sale until the next one starts or any sale changes
+        snapshot = Snapshot(sale_id=None)
+        next_start = _next_start(db, now)
+        ttl = response_cache.ttl
+        if next_start:
+            ttl = min(ttl, int((next_start - now).total_seconds()))
+        tags = [FLASH_SALE_LISTINGS]
+    else:
+        data = get_flash_sale_with_items(db, flash_sale)
+        snapshot = _render(data)
+        # Expires with the sale; product stock changes don't affect it
+        ttl = int((_utc(flash_sale.end_time) - now).total_seconds())
+        tags = [
+            FLASH_SALE_LISTINGS,
+            flash_sale_tag(flash_sale.id),
+            *card_tags((item["product"] for item in data["items"]), stock=False)
+        ]
+
+    response_cache.backend.set(SNAPSHOT_KEY, snapshot, max(ttl, 1), tags)
+    return snapshot
+
+
+def transition_times(db: Session) -> List[datetime]:
+    """Upcoming start and end times of active sales, when the snapshot changes."""
+    now = datetime.now(timezone.utc)
+    rows = db.query(FlashSale.start_time, FlashSale.end_time).filter(
+        FlashSale.is_active == True,
+        FlashSale.end_time > now
+    ).all()
+    times = {_utc(when) for row in rows for when in row if _utc(when) > now}
+    return sorted(times)
+
+
+# ============ Serving ============
+
+def _live_counts(item_id: int, flash_stock_units: int, sold_count: int) -> Tuple[int, int]:
+    remaining = flash_stock.remaining_units(item_id)
+    if remaining is None:
+        # No checkout has touched the item since the counter was last seeded
+        remaining = flash_stock_units - sold_count
+    remaining = min(max(remaining, 0), flash_stock_units)
+    return flash_stock_units - remaining, remaining
+
+
+def render_body(snapshot: Snapshot) -> bytes:
+    """The snapshot's body with live sold/remaining counts filled in."""
+    values = []
+    for item in snapshot.items:
+        sold, remaining = _live_counts(*item)
+        values.append(str(sold).encode())
+        values.append(str(remaining).encode())
+
+    parts = [snapshot.segments[0]]
+    for value, segment in zip(values, snapshot.segments[1:]):
+        parts.append(value)
+        parts.append(segment)
+    return b"".join(parts)
+
+
+def serve_current(request: Request, db: Session) -> Response:
+    """Response for ``/flash-sales/current``."""
+    snapshot = response_cache.backend.get(SNAPSHOT_KEY)
+    cache_status = "HIT"
+    if snapshot is None:
+        snapshot = refresh(db)
+        cache_status = "MISS"
+
+    if snapshot.sale_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No active flash sale at this time"
+        )
+    return response_cache.respond(request, render_body(snapshot), cache_status)
@@ -0,0 +1,249 @@
+"""
+Flash-sale allocations at checkout.
+
+A flash sale item offers ``flash_stock`` units at ``flash_price``. When a
+sale opens, thousands of buyers hit the same few items within seconds; if
+each checkout incremented ``flash_sale_items.sold_count`` in its own
+transaction they would queue on those rows' locks. Instead each item's
+remaining allocation lives in an atomic counter in the cache backend
+(Redis, the shared SQLite file, or process memory with a single worker):
+
+- Checkout takes a line's units from the counter. If the allocation can't
+  cover the whole line, the line is charged the regular price.
+- Units taken by a checkout that fails are given back.
+- Committed sales are tallied per process and written to ``sold_count``
+  in one UPDATE every ``flash_sold_flush_seconds`` (by the scheduler, or
+  by the next checkout where no scheduler runs).
+- Cancelled orders return their flash units after the cancel commits,
+  from a worker thread when the counter backend blocks.
+
+Counters are seeded lazily from ``flash_stock - sold_count`` and expire an
+hour after the sale ends. The database stock reservation still runs for
+every line, so a flash sale can never sell units the product doesn't have.
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models import FlashSale, FlashSaleItem
+from app.services.cache import create_backend
+
+
+COUNTER_GRACE = 3600  # Seconds a counter outlives its sale
+
+counters = create_backend("flash", max_entries=1000)
+
+
+@dataclass
+class FlashOffer:
+    """A flash sale item that is on sale right now."""
+    item_id: int
+    flash_sale_id: int
+    product_id: int
+    flash_price: float
+    flash_stock: int
+    sold_count: int
+    end_time: datetime
+
+
+def _counter_key(item_id: int) -> str:
+    return f"item:{item_id}"
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+async def active_offers(db: AsyncSession, product_ids: Iterable[int]) -> Dict[int, FlashOffer]:
+    """Current flash offers for ``product_ids``, keyed by product id."""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    now = datetime.now(timezone.utc)
+    rows = (await db.execute(
+        select(
+            FlashSaleItem.id, FlashSaleItem.flash_sale_id, FlashSaleItem.product_id,
+            FlashSaleItem.flash_price, FlashSaleItem.flash_stock, FlashSaleItem.sold_count,
+            FlashSale.end_time
+        ).join(FlashSale, FlashSale.id == FlashSaleItem.flash_sale_id).where(
+            FlashSaleItem.product_id.in_(product_ids),
+            FlashSale.is_active == True,
+            FlashSale.start_time <= now,
+            FlashSale.end_time > now
+        ).order_by(FlashSaleItem.flash_price.desc())
+    )).all()
+    # A product in several running sales gets its lowest flash price
+    return {
+        row.product_id: FlashOffer(
+            item_id=row.id,
+            flash_sale_id=row.flash_sale_id,
+            product_id=row.product_id,
+            flash_price=row.flash_price,
+            flash_stock=row.flash_stock,
+            sold_count=row.sold_count or 0,
+            end_time=_utc(row.end_time),
+        )
+        for row in rows
+    }
+
+
+# ============ Counters ============
+
+def _take(offer: FlashOffer, quantity: int) -> bool:
+    key = _counter_key(offer.item_id)
+    remaining = counters.counter_take(key, quantity)
+    if remaining is None:
+        # First buyer since the counter expired or the cache restarted.
+        # Sales counted here but not flushed yet are still in sold_count's future
+        available = offer.flash_stock - offer.sold_count - _pending.get(offer.item_id, 0)
+        ttl = int((offer.end_time - datetime.now(timezone.utc)).total_seconds()) + COUNTER_GRACE
+        counters.counter_seed(key, max(0, available), max(ttl, 1))
+        remaining = counters.counter_take(key, quantity)
+    return remaining is not None and remaining >= 0
+
+
+def take_units(offer: FlashOffer, quantity: int) -> bool:
+    """Take ``quantity`` units of the offer's allocation; False if it can't cover them."""
+    try:
+        return _take(offer, quantity)
+    except Exception as e:
+        # Without the counter there's no safe way to enforce the allocation
+        print(f"[FlashSale] Counter unavailable for item {offer.item_id}: {e}")
+        return False
+
+
+async def take_units_async(offer: FlashOffer, quantity: int) -> bool:
+    if counters.blocking:
+        return await run_in_threadpool(take_units, offer, quantity)
+    return take_units(offer, quantity)
+
+
+def give_back(units: Dict[int, int]):
+    """Return units ({flash sale item id: units}) to their counters."""
+    for item_id, quantity in units.items():
+        try:
+            counters.counter_add(_counter_key(item_id), quantity)
+        except Exception as e:
+            print(f"[FlashSale] Could not return {quantity} units to item {item_id}: {e}")
+
+
+async def give_back_async(units: Dict[int, int]):
+    if not units:
+        return
+    if counters.blocking:
+        await run_in_threadpool(give_back, units)
+    else:
+        give_back(units)
+
+
+def remaining_units(item_id: int) -> Optional[int]:
+    """Units left according to the counter, or None if it isn't seeded."""
+    try:
+        return counters.counter_get(_counter_key(item_id))
+    except Exception:
+        return None
+
+
+# ============ sold_count write-back ============
+
+# flash sale item id -> units sold (negative for returns) not yet in sold_count
+_pending: Dict[int, int] = {}
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record_sold(units: Dict[int, int]):
+    """Count committed flash sales (or returns, as negative units)."""
+    with _pending_lock:
+        for item_id, quantity in units.items():
+            _pending[item_id] = _pending.get(item_id, 0) + quantity
+
+
+def flush_due() -> bool:
+    """True if sales are pending and the last flush is older than the interval."""
+    return bool(_pending) and time.monotonic() - _last_flush >= settings.flash_sold_flush_seconds
+
+
+async def flush_sold_counts() -> int:
+    """Write pending sales to ``sold_count`` in one UPDATE; returns items updated."""
+    # Runs on the async engine beside checkout, so SQLite sees a single writer
+    global _last_flush
+    with _pending_lock:
+        _last_flush = time.monotonic()
+        deltas = {item_id: delta for item_id, delta in _pending.items() if delta}
+        _pending.clear()
+    if not deltas:
+        return 0
+
+    # The current sale snapshot reads live counts from the counters, so
+    # nothing cached needs invalidating here
+    async with AsyncSessionLocal() as db:
+        try:
+            result = await db.execute(
+                update(FlashSaleItem).where(FlashSaleItem.id.in_(list(deltas))).values(
+                    sold_count=FlashSaleItem.sold_count + case(deltas, value=FlashSaleItem.id)
+                ),
+                execution_options={"synchronize_session": False}
+            )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            # Keep the counts for the next flush
+            record_sold(deltas)
+            raise
+    return result.rowcount
+
+
+async def flush_if_due():
+    """Flush from a request when the interval has passed (e.g. no scheduler)."""
+    if not flush_due():
+        return
+    try:
+        await flush_sold_counts()
+    except Exception as e:
+        print(f"[FlashSale] Could not write sold counts: {e}")
+
+
+# ============ Returns on cancellation ============
+
+_RETURN_KEY = "flash_units_returned"
+
+
+def return_on_commit(session, units: Dict[int, int]):
+    """Give ``units`` back to their sales once ``session`` commits."""
+    pending = session.info.setdefault(_RETURN_KEY, {})
+    for item_id, quantity in units.items():
+        pending[item_id] = pending.get(item_id, 0) + quantity
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _return_units(session):
+    units = session.info.pop(_RETURN_KEY, None)
+    if not units:
+        return
+    record_sold({item_id: -quantity for item_id, quantity in units.items()})
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not None and counters.blocking:
+        # Committed on the event loop (an async session or an async job):
+        # the Redis or file counter would block it, so return from a thread
+        loop.run_in_executor(None, give_back, units)
+    else:
+        give_back(units)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_returns(session):
+    session.info.pop(_RETURN_KEY, None)
@@ -0,0 +1,142 @@
+"""
+HyperLogLog sketches for approximate distinct counts.
+
+A sketch estimates how many distinct values were added to it in a fixed
+2**PRECISION bytes (8 KB), whatever the count. Sketches merge by taking
+the larger of each register, so the sketch of a union is the merge of its
+parts: per-hour or per-day sketches answer "unique visitors between any
+two dates" without touching the raw rows. At PRECISION 13 the standard
+error is 1.04 / sqrt(2**13), about 1.15%.
+
+Counts use Ertl's improved estimator ("New cardinality estimation
+algorithms for HyperLogLog sketches", 2017) rather than the original
+raw estimate with a switch to linear counting: that switch sits around
+20k distinct values at this precision, right where weekly visitor counts
+fall, and was off by up to 5% there.
+
+Sketches with few values are stored sparse (only the registers in use),
+larger ones as compressed registers, so a quiet day costs a few bytes.
+"""
+
+import hashlib
+import struct
+import zlib
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+PRECISION = 13
+REGISTERS = 1 << PRECISION
+_VALUE_BITS = 64 - PRECISION
+
+# Largest register value: every remaining bit of the hash was zero
+_MAX_RANK = _VALUE_BITS + 1
+_ALPHA_INF = 1 / (2 * np.log(2))
+
+_SPARSE = b"S"
+_DENSE = b"D"
+
+
+def hash_value(value: str) -> int:
+    """The 64-bit hash sketches are built from (see ``add_hashes``)."""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """A mergeable distinct-count sketch."""
+
+    __slots__ = ("registers",)
+
+    def __init__(self, registers: Optional[np.ndarray] = None):
+        self.registers = registers if registers is not None else np.zeros(REGISTERS, dtype=np.uint8)
+
+    def add_all(self, values: Iterable[str]) -> "HyperLogLog":
+        """Add ``values`` (duplicates are harmless)."""
+        return self.add_hashes(hash_value(value) for value in set(values) if value)
+
+    def add_hashes(self, hashes: Iterable[int]) -> "HyperLogLog":
+        """Add values already hashed with ``hash_value``."""
+        hashes = np.fromiter(hashes, dtype=np.uint64)
+        if not hashes.size:
+            return self
+        index = (hashes >> np.uint64(_VALUE_BITS)).astype(np.int64)
+        rest = hashes & np.uint64((1 << _VALUE_BITS) - 1)
+        # Rank = leading zeros in the remaining bits + 1; values under 2**53
+        # convert to float exactly, and frexp's exponent is their bit length
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (_VALUE_BITS - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """Estimated number of distinct values added."""
+        histogram = np.bincount(self.registers, minlength=_MAX_RANK + 1)
+        if histogram[0] == REGISTERS:
+            return 0
+        z = REGISTERS * _tau(1 - histogram[_MAX_RANK] / REGISTERS)
+        for rank in range(_MAX_RANK - 1, 0, -1):
+            z = 0.5 * (z + histogram[rank])
+        z += REGISTERS * _sigma(histogram[0] / REGISTERS)
+        return int(round(_ALPHA_INF * REGISTERS * REGISTERS / z))
+
+    # ============ Storage ============
+
+    def to_bytes(self) -> bytes:
+        used = np.flatnonzero(self.registers)
+        if len(used) * 3 < REGISTERS // 2:
+            pairs = b"".join(struct.pack(">HB", index, self.registers[index]) for index in used)
+            return _SPARSE + pairs
+        return _DENSE + zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data: Optional[bytes]) -> "HyperLogLog":
+        sketch = cls()
+        if not data:
+            return sketch
+        kind, body = data[:1], data[1:]
+        if kind == _DENSE:
+            sketch.registers = np.frombuffer(zlib.decompress(body), dtype=np.uint8).copy()
+        else:
+            for index, rank in struct.iter_unpack(">HB", body):
+                sketch.registers[index] = rank
+        return sketch
+
+
+def _sigma(x: float) -> float:
+    """Correction for empty registers (x: their share)"""
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous = z
+        z += x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x: float) -> float:
+    """Correction for saturated registers (x: share of the others)"""
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = np.sqrt(x)
+        previous = z
+        y *= 0.5
+        z -= (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+def merged(blobs: Iterable[Optional[bytes]]) -> HyperLogLog:
+    """The merge of stored sketches."""
+    sketch = HyperLogLog()
+    for blob in blobs:
+        if blob:
+            sketch.merge(HyperLogLog.from_bytes(blob))
+    return sketch
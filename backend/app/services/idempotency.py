@@ -0,0 +1,328 @@
+"""
+Idempotency keys for endpoints that must not run twice.
+
+Double-clicks and mobile retries resend ``POST /orders`` (and payment or
+courier requests), and every duplicate used to place another order and
+reserve stock again. Clients can now send an ``Idempotency-Key`` header, a
+random value per logical attempt:
+
+- The first request with a key claims it in ``idempotency_keys`` and runs.
+  Its response is stored on the claim.
+- A retry with the same key (same user, same endpoint) gets the stored
+  response back, with an ``Idempotent-Replayed: true`` header. The handler
+  doesn't run, so products, vouchers and payment providers aren't touched.
+- A retry that arrives while the first request is still running gets 409.
+  One that reuses the key with a different request body gets 422.
+- If the handler fails, the claim is released so the retry runs for real.
+  If it succeeded but its response can't be stored, the claim is marked
+  completed without a body, and retries keep getting 409 instead of
+  running the handler again.
+
+Keys expire after ``idempotency_ttl_hours`` and are deleted by the
+scheduler. Requests without the header behave as before.
+
+Claims are written in their own short transactions, so a concurrent
+duplicate sees them at once. Each helper has an ``_async`` twin that uses
+the async engine.
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional, Type
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models import IdempotencyKey
+
+
+HEADER = "Idempotency-Key"
+REPLAY_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+STALE_SECONDS = 300  # A claim without a response after this long died with its worker
+
+
+@dataclass(frozen=True)
+class Claim:
+    """A key claimed by the request now running."""
+    scope: str
+    user_id: int
+    key: str
+
+
+def fingerprint(*parts: Any) -> str:
+    """Hash of the request payload, so a reused key can be told apart."""
+    payload = json.dumps(jsonable_encoder(parts), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _check_key(key: str):
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"
+        )
+
+
+def _where(claim: Claim):
+    return (
+        IdempotencyKey.scope == claim.scope,
+        IdempotencyKey.user_id == claim.user_id,
+        IdempotencyKey.key == claim.key,
+    )
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; PostgreSQL aware ones
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _claim_statement(claim: Claim, request_hash: str):
+    now = datetime.now(timezone.utc)
+    return insert(IdempotencyKey).values(
+        scope=claim.scope,
+        user_id=claim.user_id,
+        key=claim.key,
+        fingerprint=request_hash,
+        created_at=now,
+        expires_at=now + timedelta(hours=settings.idempotency_ttl_hours),
+    )
+
+
+def _abandoned(row: IdempotencyKey) -> bool:
+    now = datetime.now(timezone.utc)
+    if _utc(row.expires_at) <= now:
+        return True
+    stale = now - timedelta(seconds=STALE_SECONDS)
+    return row.status_code is None and _utc(row.created_at) <= stale
+
+
+def _drop_statement(claim: Claim, row: IdempotencyKey):
+    # Only the row we judged abandoned, not one a concurrent request just made
+    return delete(IdempotencyKey).where(*_where(claim), IdempotencyKey.created_at == row.created_at)
+
+
+def _in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still being processed"
+    )
+
+
+def _completed_without_body() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key was already processed"
+    )
+
+
+def _replay(row: IdempotencyKey, request_hash: str) -> Response:
+    if row.fingerprint != request_hash:
+        raise HTTPException(
+            # Literal: the constant's name differs across Starlette versions
+            status_code=422,
+            detail=f"This {HEADER} was already used for a different request"
+        )
+    if row.status_code is None:
+        raise _in_progress()
+    if row.response_body is None:
+        raise _completed_without_body()
+    return Response(
+        content=row.response_body,
+        status_code=row.status_code,
+        media_type="application/json",
+        headers={REPLAY_HEADER: "true"}
+    )
+
+
+# ============ Claims ============
+
+def begin(claim: Claim, request_hash: str) -> Optional[Response]:
+    """Claim the key (returns None) or return the stored response to replay."""
+    db: Session = SessionLocal()
+    try:
+        for _ in range(2):
+            try:
+                db.execute(_claim_statement(claim, request_hash))
+                db.commit()
+                return None
+            except IntegrityError:
+                db.rollback()
+
+            row = db.scalar(select(IdempotencyKey).where(*_where(claim)))
+            if row is None:
+                continue  # Removed since our insert; claim again
+            if not _abandoned(row):
+                return _replay(row, request_hash)
+            db.execute(_drop_statement(claim, row))
+            db.commit()
+        raise _in_progress()
+    finally:
+        db.close()
+
+
+async def begin_async(claim: Claim, request_hash: str) -> Optional[Response]:
+    """``begin`` on the async engine."""
+    async with AsyncSessionLocal() as db:
+        for _ in range(2):
+            try:
+                await db.execute(_claim_statement(claim, request_hash))
+                await db.commit()
+                return None
+            except IntegrityError:
+                await db.rollback()
+
+            row = await db.scalar(select(IdempotencyKey).where(*_where(claim)))
+            if row is None:
+                continue
+            if not _abandoned(row):
+                return _replay(row, request_hash)
+            await db.execute(_drop_statement(claim, row))
+            await db.commit()
+        raise _in_progress()
+
+
+def _complete_statement(claim: Claim, status_code: int, body: Optional[bytes]):
+    return update(IdempotencyKey).where(*_where(claim)).values(
+        status_code=status_code,
+        response_body=body.decode() if body is not None else None
+    )
+
+
+def _release_statement(claim: Claim):
+    return delete(IdempotencyKey).where(*_where(claim), IdempotencyKey.status_code.is_(None))
+
+
+def _finish_attempts(claim: Claim, status_code: Optional[int], body: bytes):
+    """Statements to try in turn: store the response, else mark the claim done without it."""
+    if status_code is None:
+        return [lambda: _release_statement(claim)]
+    return [
+        lambda: _complete_statement(claim, status_code, body),
+        lambda: _complete_statement(claim, status_code, None),
+    ]
+
+
+def _finish_failed(claim: Claim, status_code: Optional[int], error: Exception):
+    if status_code is None:
+        # The handler's work was rolled back; a stale claim may run again
+        print(f"[Idempotency] Could not release key for {claim.scope}: {error}")
+    else:
+        # Still unfinished: after STALE_SECONDS a retry would run the handler again
+        print(f"[Idempotency] Could not complete key for {claim.scope}, a retry may run twice: {error}")
+
+
+def finish(claim: Claim, status_code: Optional[int] = None, body: bytes = b""):
+    """Store the response on the claim, or release it (no ``status_code``)."""
+    db: Session = SessionLocal()
+    try:
+        for attempt in _finish_attempts(claim, status_code, body):
+            try:
+                db.execute(attempt())
+                db.commit()
+                return
+            except Exception as e:
+                db.rollback()
+                error = e
+        _finish_failed(claim, status_code, error)
+    finally:
+        db.close()
+
+
+async def finish_async(claim: Claim, status_code: Optional[int] = None, body: bytes = b""):
+    """``finish`` on the async engine."""
+    async with AsyncSessionLocal() as db:
+        for attempt in _finish_attempts(claim, status_code, body):
+            try:
+                await db.execute(attempt())
+                await db.commit()
+                return
+            except Exception as e:
+                await db.rollback()
+                error = e
+        _finish_failed(claim, status_code, error)
+
+
+# ============ Running handlers ============
+
+def _encode(result: Any, response_model: Optional[Type[BaseModel]]) -> bytes:
+    if response_model is not None:
+        result = response_model.model_validate(result).model_dump(mode="json")
+    return JSONResponse(content=jsonable_encoder(result)).body
+
+
+def run(
+    key: Optional[str],
+    scope: str,
+    user_id: int,
+    payload: Any,
+    handler: Callable[[], Any],
+    response_model: Optional[Type[BaseModel]] = None,
+    status_code: int = status.HTTP_200_OK
+) -> Any:
+    """
+    Run ``handler`` once per ``key``. ``payload`` identifies the request;
+    ``response_model`` is the route's, used to store the rendered body.
+    """
+    if key is None:
+        return handler()
+    _check_key(key)
+    claim = Claim(scope, user_id, key)
+    request_hash = fingerprint(payload)
+    replay = begin(claim, request_hash)
+    if replay is not None:
+        return replay
+
+    try:
+        body = _encode(handler(), response_model)
+    except Exception:
+        finish(claim)
+        raise
+    finish(claim, status_code, body)
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+async def run_async(
+    key: Optional[str],
+    scope: str,
+    user_id: int,
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]],
+    response_model: Optional[Type[BaseModel]] = None,
+    status_code: int = status.HTTP_200_OK
+) -> Any:
+    """``run`` for async handlers."""
+    if key is None:
+        return await handler()
+    _check_key(key)
+    claim = Claim(scope, user_id, key)
+    request_hash = fingerprint(payload)
+    replay = await begin_async(claim, request_hash)
+    if replay is not None:
+        return replay
+
+    try:
+        body = _encode(await handler(), response_model)
+    except Exception:
+        await finish_async(claim)
+        raise
+    await finish_async(claim, status_code, body)
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+# ============ Cleanup ============
+
+def cleanup_idempotency_keys(db: Session) -> int:
+    """Delete expired keys; returns how many were removed."""
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.now(timezone.utc)))
+    db.commit()
+    return result.rowcount
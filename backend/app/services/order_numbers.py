@@ -0,0 +1,89 @@
+"""
+Order numbers.
+
+Order numbers used to end in six random characters. Nothing checked them
+for uniqueness, so at high volume two orders could draw the same number
+and the second checkout failed on the unique constraint after all its
+work. Random suffixes also scattered inserts across the order number index.
+
+Numbers are now ``ORD-YYYYMMDD-NNNNNNN``: the UTC day, then that day's
+sequence from ``order_number_sequences``, drawn with one atomic increment.
+By default each checkout draws one number, so numbers are unique across
+workers and hosts and increase through the day in the order they were
+drawn. ``order_number_block_size`` above 1 reserves that many per round
+trip instead: still unique, but only ordered per process, since workers
+hand out their blocks side by side. Numbers left in a block when a
+process exits are skipped.
+
+The increment runs in its own short transaction, not the checkout's, so
+the day's row is never held until a checkout commits. The seven-digit
+sequence can't match the older six-character suffixes.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import OrderNumberSequence
+
+
+PREFIX = "ORD"
+SEQUENCE_DIGITS = 7
+
+# The block this process is handing out: (day, next value, last value)
+_block = (None, 1, 0)
+_refill_lock = asyncio.Lock()
+
+
+def format_order_number(day: str, value: int) -> str:
+    return f"{PREFIX}-{day}-{value:0{SEQUENCE_DIGITS}d}"
+
+
+async def _reserve(day: str, size: int) -> int:
+    """Reserve ``size`` numbers of ``day``; returns the last one."""
+    table = OrderNumberSequence.__table__
+    async with AsyncSessionLocal() as db:
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else pg_insert
+            stmt = insert(table).values(day=day, last_value=size)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["day"],
+                set_={"last_value": table.c.last_value + size}
+            ).returning(table.c.last_value)
+            last = (await db.execute(stmt)).scalar_one()
+        else:
+            # No upsert: create the day's row if needed, then increment it
+            exists = await db.scalar(select(table.c.day).where(table.c.day == day))
+            if exists is None:
+                db.add(OrderNumberSequence(day=day, last_value=0))
+                await db.flush()
+            await db.execute(
+                update(table).where(table.c.day == day).values(last_value=table.c.last_value + size)
+            )
+            last = await db.scalar(select(table.c.last_value).where(table.c.day == day))
+        await db.commit()
+    return last
+
+
+async def next_order_number() -> str:
+    """The next order number. Call it before the checkout writes anything."""
+    global _block
+    day = datetime.now(timezone.utc).strftime("%Y%m%d")
+
+    if _block[0] != day or _block[1] > _block[2]:
+        async with _refill_lock:
+            # Another checkout may have refilled while we waited
+            if _block[0] != day or _block[1] > _block[2]:
+                size = max(1, settings.order_number_block_size)
+                last = await _reserve(day, size)
+                _block = (day, last - size + 1, last)
+
+    day, value, last = _block
+    _block = (day, value + 1, last)
+    return format_order_number(day, value)
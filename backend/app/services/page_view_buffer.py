@@ -0,0 +1,249 @@
+"""
+Buffered page view ingestion.
+
+``/visitor-analytics/track`` runs on every navigation of every visitor and
+used to cost a dedup SELECT, a page view INSERT and a session SELECT plus
+UPDATE or INSERT, all before responding. It now only validates the event
+and queues it here, then answers 202:
+
+- Refreshes are recognised by a bounded in-memory LRU of recent
+  ``(session_id, page_path)`` views instead of a query. The LRU is per
+  process, so with several workers a refresh that lands on another worker
+  is counted.
+- Queued views are written by a flusher every
+  ``analytics_flush_interval_ms`` (by the scheduler), or as soon as
+  ``analytics_flush_max_events`` are waiting (after the tracking response
+  is sent, which is also how they're flushed where no scheduler runs).
+- A flush inserts its page views with one multi-row INSERT per chunk (and
+  day, see ``page_view_storage``) and merges each session's views into
+  one session update or insert.
+
+Views still queued when a process is killed are lost; shutdown flushes
+them. If the database is unreachable, views are kept for the next flush,
+up to ``analytics_buffer_max_events``.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import Integer, bindparam, cast, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models.models import VisitorSession
+from app.services import page_view_storage
+
+
+DEDUP_SECONDS = 30  # A repeat view of the same page within this is a refresh
+
+# Columns every queued view carries, so a chunk inserts as one statement
+PAGE_VIEW_FIELDS = (
+    "visitor_hash", "session_id", "page_path", "page_title",
+    "traffic_source", "referrer_url", "referrer_domain",
+    "utm_source", "utm_medium", "utm_campaign",
+    "country_code", "country_name", "city",
+    "device_type", "browser", "os",
+    "screen_width", "screen_height", "created_at",
+)
+
+_lock = threading.Lock()
+_recent: "OrderedDict[tuple, float]" = OrderedDict()
+_queue: List[dict] = []
+_last_flush = time.monotonic()
+_flush_lock = asyncio.Lock()
+
+
+# ============ Tracking ============
+
+def is_refresh(session_id: str, page_path: str) -> bool:
+    """True if this session viewed this page moments ago; otherwise remember it."""
+    key = (session_id, page_path)
+    now = time.monotonic()
+    with _lock:
+        seen = _recent.get(key)
+        if seen is not None and now - seen < DEDUP_SECONDS:
+            return True
+        _recent[key] = now
+        _recent.move_to_end(key)
+        while len(_recent) > settings.analytics_dedup_max_entries:
+            _recent.popitem(last=False)
+    return False
+
+
+def enqueue(view: dict):
+    """Queue a page view (keyed by ``PAGE_VIEW_FIELDS``) for the next flush."""
+    row = {field: view.get(field) for field in PAGE_VIEW_FIELDS}
+    if row["created_at"] is None:
+        row["created_at"] = datetime.utcnow()
+    with _lock:
+        _queue.append(row)
+
+
+def flush_due() -> bool:
+    """True if enough views are queued, or views are waiting and the interval passed."""
+    if not _queue:
+        return False
+    if len(_queue) >= settings.analytics_flush_max_events:
+        return True
+    return (time.monotonic() - _last_flush) * 1000 >= settings.analytics_flush_interval_ms
+
+
+def _requeue(rows: List[dict]):
+    with _lock:
+        _queue[:0] = rows
+        overflow = len(_queue) - settings.analytics_buffer_max_events
+        if overflow > 0:
+            del _queue[:overflow]
+            print(f"[Analytics] Buffer full, dropped {overflow} page views")
+
+
+# ============ Flushing ============
+
+def _merge_sessions(rows: List[dict]) -> Dict[str, dict]:
+    """One entry per session: its first and last view and how many it had."""
+    sessions: Dict[str, dict] = {}
+    for row in rows:
+        session = sessions.get(row["session_id"])
+        if session is None:
+            sessions[row["session_id"]] = {"first": row, "last": row, "views": 1}
+        else:
+            session["last"] = row
+            session["views"] += 1
+    return sessions
+
+
+async def _write_page_views(db, rows: List[dict]):
+    by_day: Dict[object, List[dict]] = {}
+    for row in rows:
+        by_day.setdefault(row["created_at"].date(), []).append(row)
+    await db.run_sync(lambda session: page_view_storage.ensure_day_tables(session.connection(), by_day))
+    bind = db.get_bind()
+    for day, day_rows in by_day.items():
+        await db.execute(insert(page_view_storage.write_table(bind, day)), day_rows)
+
+
+def _seconds_between(dialect: str, start, end):
+    """SQL for the whole seconds from ``start`` to ``end``."""
+    if dialect == "postgresql":
+        return cast(func.extract("epoch", end - start), Integer)
+    return cast(func.round((func.julianday(end) - func.julianday(start)) * 86400), Integer)
+
+
+async def _write_sessions(db, sessions: Dict[str, dict]):
+    table = VisitorSession.__table__
+    started = dict((await db.execute(
+        select(table.c.session_id, table.c.started_at).where(table.c.session_id.in_(list(sessions)))
+    )).all())
+
+    updates, inserts = [], []
+    for session_id, session in sessions.items():
+        first, last = session["first"], session["last"]
+        if session_id in started:
+            started_at = started[session_id]
+            duration = None
+            if started_at:
+                duration = int((last["created_at"] - started_at.replace(tzinfo=None)).total_seconds())
+            updates.append({
+                "b_session_id": session_id,
+                "b_views": session["views"],
+                "b_exit_page": last["page_path"],
+                "b_last_activity": last["created_at"],
+                "b_duration": duration,
+            })
+        else:
+            inserts.append({
+                "session_id": session_id,
+                "visitor_hash": first["visitor_hash"],
+                "page_count": session["views"],
+                "entry_page": first["page_path"],
+                "exit_page": last["page_path"],
+                "traffic_source": first["traffic_source"],
+                "referrer_domain": first["referrer_domain"],
+                "country_code": first["country_code"],
+                "city": first["city"],
+                "device_type": first["device_type"],
+                "browser": first["browser"],
+                "os": first["os"],
+                "started_at": first["created_at"],
+                "last_activity": last["created_at"],
+                "duration_seconds": int((last["created_at"] - first["created_at"]).total_seconds()),
+            })
+
+    if updates:
+        await db.execute(
+            update(table).where(table.c.session_id == bindparam("b_session_id")).values(
+                page_count=table.c.page_count + bindparam("b_views"),
+                exit_page=bindparam("b_exit_page"),
+                last_activity=bindparam("b_last_activity"),
+                duration_seconds=func.coalesce(bindparam("b_duration"), table.c.duration_seconds),
+            ),
+            updates
+        )
+
+    if inserts:
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            # Another worker may have started the same session since our SELECT
+            upsert = sqlite_insert if dialect == "sqlite" else pg_insert
+            stmt = upsert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["session_id"],
+                set_={
+                    "page_count": table.c.page_count + stmt.excluded.page_count,
+                    "exit_page": stmt.excluded.exit_page,
+                    "last_activity": stmt.excluded.last_activity,
+                    "duration_seconds": _seconds_between(
+                        dialect, table.c.started_at, stmt.excluded.last_activity
+                    ),
+                }
+            )
+        else:
+            stmt = insert(table)
+        await db.execute(stmt, inserts)
+
+
+async def flush_page_views() -> int:
+    """Write queued page views and their sessions; returns views written."""
+    global _last_flush
+    async with _flush_lock:
+        with _lock:
+            _last_flush = time.monotonic()
+            rows = _queue[:]
+            _queue.clear()
+        if not rows:
+            return 0
+
+        chunk_size = max(1, settings.analytics_flush_max_events)
+        written = 0
+        # Async engine, so SQLite sees a single writer beside checkout
+        async with AsyncSessionLocal() as db:
+            for start in range(0, len(rows), chunk_size):
+                chunk = rows[start:start + chunk_size]
+                try:
+                    await _write_page_views(db, chunk)
+                    await _write_sessions(db, _merge_sessions(chunk))
+                    await db.commit()
+                except BaseException:
+                    # Includes cancellation at shutdown, whose final flush
+                    # then writes them
+                    _requeue(rows[start:])
+                    await db.rollback()
+                    raise
+                written += len(chunk)
+        return written
+
+
+async def flush_if_due():
+    """Flush from a request when the buffer is full or the interval passed."""
+    if not flush_due() or _flush_lock.locked():
+        return
+    try:
+        await flush_page_views()
+    except Exception as e:
+        print(f"[Analytics] Could not write page views: {e}")
@@ -0,0 +1,235 @@
+"""
+Day-partitioned page view storage.
+
+``page_views`` grew without bound: every page view of every visitor, kept
+forever. Raw views are now stored per UTC day, so expired days are
+dropped as a whole after ``analytics_retention_days``. The analytics
+endpoints read the rollups in ``app.services.visitor_rollups`` instead.
+
+- PostgreSQL: ``page_views`` is range-partitioned on ``created_at``
+  (migration 0009). Views are inserted into the parent and land in that
+  day's partition, ``page_views_YYYYMMDD``. ``ensure_partitions`` creates
+  partitions a few days ahead. Rows from before partitioning, or written
+  on a day that had no partition yet, sit in ``page_views_default``; the
+  latter move to their day's partition when it's created.
+- SQLite: views go to per-day tables ``page_views_YYYYMMDD`` with
+  ``page_views``' columns, created on first write. ``page_views`` itself
+  keeps the views recorded before this change. ``raw_page_views`` reads
+  them all together.
+
+The ``PageView`` model still describes a row; write with ``write_table``
+and read with ``raw_page_views`` rather than querying it directly.
+"""
+
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Column, Index, MetaData, Table, func, select, text, union_all
+
+from app.models.models import PageView
+
+
+PARENT = "page_views"
+PARTITIONS_AHEAD = 3  # Days of PostgreSQL partitions created in advance
+
+_DAY_TABLE = re.compile(r"^page_views_(\d{8})$")
+
+page_view_table = PageView.__table__
+COLUMNS = [column.name for column in page_view_table.columns]
+
+_day_metadata = MetaData()
+_created: set = set()  # SQLite day tables known to exist in this process
+
+
+def day_table_name(day: date) -> str:
+    return f"{PARENT}_{day:%Y%m%d}"
+
+
+def _day_bounds(day: date):
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _is_partitioned(connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": PARENT}
+    ).scalar()
+    return relkind == "p"
+
+
+def _day_tables(connection) -> Dict[date, str]:
+    """Existing per-day tables (SQLite) or partitions (PostgreSQL) by day."""
+    if connection.dialect.name == "postgresql":
+        names = connection.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:name)"
+        ), {"name": PARENT}).scalars()
+    elif connection.dialect.name == "sqlite":
+        names = connection.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'page\\_views\\_%' ESCAPE '\\'"
+        )).scalars()
+    else:
+        return {}
+
+    tables = {}
+    for name in names:
+        match = _DAY_TABLE.match(name)
+        if match:
+            tables[datetime.strptime(match.group(1), "%Y%m%d").date()] = name
+    return tables
+
+
+def _sqlite_day_table(day: date) -> Table:
+    name = day_table_name(day)
+    table = _day_metadata.tables.get(name)
+    if table is None:
+        columns = [
+            Column(column.name, column.type, primary_key=column.primary_key, nullable=column.nullable)
+            for column in page_view_table.columns
+        ]
+        table = Table(
+            name, _day_metadata, *columns,
+            Index(f"ix_{name}_created_at", "created_at"),
+            Index(f"ix_{name}_session_id", "session_id"),
+        )
+    return table
+
+
+# ============ Writing ============
+
+def ensure_day_tables(connection, days: Iterable[date]):
+    """Create the per-day tables for ``days`` where they don't exist (SQLite)."""
+    if connection.dialect.name != "sqlite":
+        return
+    for day in days:
+        table = _sqlite_day_table(day)
+        if table.name not in _created:
+            table.create(connection, checkfirst=True)
+            _created.add(table.name)
+
+
+def write_table(bind, day: date) -> Table:
+    """The table that ``day``'s page views are inserted into."""
+    if bind.dialect.name == "sqlite":
+        return _sqlite_day_table(day)
+    return page_view_table
+
+
+def _create_partition(connection, day: date):
+    """
+    Create ``day``'s partition. Rows of that day already in the default
+    partition (nothing covered the day when they were written) would make
+    ``PARTITION OF`` fail, so the default is detached while they move over.
+    """
+    name = day_table_name(day)
+    start, end = _day_bounds(day)
+    bounds = f"FROM ('{start.isoformat()}+00') TO ('{end.isoformat()}+00')"
+    default = f"{PARENT}_default"
+    in_day = f"created_at >= '{start.isoformat()}+00' AND created_at < '{end.isoformat()}+00'"
+
+    stranded = connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_day})")).scalar()
+    if not stranded:
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT} FOR VALUES {bounds}"))
+        return
+
+    columns = ", ".join(COLUMNS)
+    connection.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {default}"))
+    connection.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES {bounds}"))
+    connection.execute(text(f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {default} WHERE {in_day}"))
+    connection.execute(text(f"DELETE FROM {default} WHERE {in_day}"))
+    connection.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {default} DEFAULT"))
+    print(f"[PageViews] Moved {day} page views out of the default partition")
+
+
+def ensure_partitions(engine, days_ahead: int = PARTITIONS_AHEAD) -> int:
+    """Create PostgreSQL partitions from today to ``days_ahead``; returns how many."""
+    with engine.connect() as connection:
+        if not _is_partitioned(connection):
+            return 0
+        existing = set(_day_tables(connection))
+
+    created = 0
+    today = datetime.utcnow().date()
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        if day in existing:
+            continue
+        try:
+            # One transaction per day: a failure must not undo the others,
+            # and a detached default partition is reattached in the same one
+            with engine.begin() as connection:
+                _create_partition(connection, day)
+            created += 1
+        except Exception as e:
+            print(f"[PageViews] Could not create partition for {day}: {e}")
+    return created
+
+
+# ============ Reading ============
+
+def raw_page_views(connection, start: datetime, end: Optional[datetime] = None):
+    """
+    Raw page views created in ``[start, end)``, as a subquery with
+    ``page_views``' columns.
+    """
+    def rows(table):
+        query = select(*[table.c[name] for name in COLUMNS]).where(table.c.created_at >= start)
+        if end is not None:
+            query = query.where(table.c.created_at < end)
+        return query
+
+    if connection.dialect.name != "sqlite":
+        # PostgreSQL prunes partitions outside the range itself
+        return rows(page_view_table).subquery("raw_page_views")
+
+    first = start.date()
+    last = (end - timedelta(microseconds=1)).date() if end is not None else datetime.utcnow().date()
+    parts = [rows(page_view_table)]
+    for day in sorted(_day_tables(connection)):
+        if first <= day <= last:
+            parts.append(rows(_sqlite_day_table(day)))
+    query = parts[0] if len(parts) == 1 else union_all(*parts)
+    return query.subquery("raw_page_views")
+
+
+def _base_table(connection) -> Table:
+    """Where views recorded before partitioning live."""
+    if _is_partitioned(connection):
+        return Table(f"{PARENT}_default", MetaData(), *[Column(name) for name in COLUMNS])
+    return page_view_table
+
+
+def raw_days(connection) -> List[date]:
+    """Days that have raw page views, oldest first."""
+    days = set(_day_tables(connection))
+    base = _base_table(connection)
+    created_at = base.c.created_at
+    if connection.dialect.name == "postgresql":
+        created_at = func.timezone("UTC", created_at)
+    for (day,) in connection.execute(select(func.date(created_at)).distinct()):
+        if day is not None:
+            days.add(date.fromisoformat(day) if isinstance(day, str) else day)
+    return sorted(days)
+
+
+# ============ Retention ============
+
+def drop_expired(connection, retention_days: int) -> int:
+    """Drop the days older than ``retention_days``; returns day tables dropped."""
+    cutoff = datetime.utcnow().date() - timedelta(days=retention_days)
+    dropped = 0
+    for day, name in sorted(_day_tables(connection).items()):
+        if day < cutoff:
+            connection.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            _created.discard(name)
+            dropped += 1
+    # Views recorded before partitioning (on PostgreSQL only the default
+    # partition still holds any)
+    connection.execute(
+        page_view_table.delete().where(page_view_table.c.created_at < datetime.combine(cutoff, time.min))
+    )
+    return dropped
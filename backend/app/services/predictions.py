@@ -0,0 +1,305 @@
+"""
+Demand prediction engine for ``/admin/predictions``.
+
+Predictions used to run one SUM query per product per day (30 per product)
+plus an image lookup per product. This engine loads the last 30 days of
+paid sales as a single (product, day) GROUP BY, lays them out as a NumPy
+matrix with one row per product, and computes weighted averages, trends,
+category fallbacks and reorder points for all products at once.
+
+Per product:
+- Weighted moving average of daily sales, the most recent week weighted 4x,
+  then 3x, 2x and 1x for older weeks.
+- Trend: the last week's daily average against the 23 days before it.
+- Seasonal factor for Bangladesh (weekends, festivals, Eid months),
+  averaged over the next 30 days.
+- Category average as a fallback for products without recent sales.
+
+Results are cached until the next order write (or an hour at most) and
+recomputed once for all concurrent requests.
+"""
+
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import DateTime, Integer, and_, cast, event, func, literal
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.database import SessionLocal
+from app.models import Order, OrderItem, PaymentStatus, Product, ProductImage
+from app.services.cache import Cache, create_backend
+
+
+HISTORY_DAYS = 30
+FORECAST_DAYS = 30
+SAFETY_BUFFER = 1.2  # Predicted demand is padded by 20%
+
+# Daily sales weight by age: week 1 x4, week 2 x3, week 3 x2, the rest x1
+DAY_WEIGHTS = np.array([4] * 7 + [3] * 7 + [2] * 7 + [1] * (HISTORY_DAYS - 21), dtype=float)
+
+# Month-based seasonality for Bangladesh (index = month)
+MONTH_FACTORS = np.array([
+    1.0,
+    0.9,   # January - post-holiday slowdown
+    0.95,  # February - normal
+    1.1,   # March - Pohela Boishakh prep starts
+    1.25,  # April - Pohela Boishakh (Bengali New Year)
+    1.0,   # May - normal
+    1.0,   # June - normal
+    1.15,  # July - Eid-ul-Adha typical month (varies)
+    1.0,   # August - normal
+    1.0,   # September - normal
+    1.2,   # October - Durga Puja
+    1.1,   # November - pre-winter shopping
+    1.15,  # December - winter season, year-end sales
+])
+WEEKEND_DAYS = (4, 5)  # Friday-Saturday in Bangladesh
+# Eid seasons (approximate - Eid dates vary each year). In production,
+# integrate with a proper Islamic calendar API.
+EID_MONTHS = (3, 4, 5, 6, 7, 8)
+
+URGENCY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+
+def seasonal_multipliers(dates: Sequence[datetime]) -> np.ndarray:
+    """Seasonal demand multiplier for each date, capped at 1.5x."""
+    weekdays = np.array([d.weekday() for d in dates])
+    months = np.array([d.month for d in dates])
+
+    multipliers = np.ones(len(dates))
+    multipliers[np.isin(weekdays, WEEKEND_DAYS)] *= 1.15
+    multipliers *= MONTH_FACTORS[months]
+    multipliers[np.isin(months, EID_MONTHS)] *= 1.1
+    return np.minimum(multipliers, 1.5)  # Avoid over-prediction
+
+
+def get_seasonal_multiplier(target_date: datetime) -> float:
+    """Seasonal multiplier for a single date."""
+    return float(seasonal_multipliers([target_date])[0])
+
+
+# ============ Loading ============
+
+def _age_in_days(db: Session, now: datetime):
+    """SQL expression: whole days between ``Order.created_at`` and ``now``."""
+    reference = literal(now, DateTime)
+    if db.get_bind().dialect.name == "postgresql":
+        return func.floor(func.extract("epoch", reference - Order.created_at) / 86400)
+    return cast(func.julianday(reference) - func.julianday(Order.created_at), Integer)
+
+
+def load_sales_matrix(db: Session, product_ids: Sequence[int], now: datetime) -> np.ndarray:
+    """
+    Paid units sold per product (rows, in ``product_ids`` order) and day
+    (columns, 0 = the 24 hours before ``now``) over the history window.
+    """
+    age = _age_in_days(db, now).label("age")
+    rows = db.query(
+        OrderItem.product_id,
+        age,
+        func.sum(OrderItem.quantity)
+    ).join(Order, Order.id == OrderItem.order_id).filter(
+        and_(
+            Order.payment_status == PaymentStatus.COMPLETED,
+            Order.created_at >= now - timedelta(days=HISTORY_DAYS),
+            Order.created_at < now
+        )
+    ).group_by(OrderItem.product_id, age).all()
+
+    row_of = {product_id: i for i, product_id in enumerate(product_ids)}
+    matrix = np.zeros((len(product_ids), HISTORY_DAYS))
+    for product_id, day, quantity in rows:
+        i = row_of.get(product_id)
+        if i is not None and day is not None and 0 <= int(day) < HISTORY_DAYS:
+            matrix[i, int(day)] += quantity or 0
+    return matrix
+
+
+# ============ Predicting ============
+
+def build_demand_predictions(db: Session) -> List[dict]:
+    """Predictions for every active product, most urgent first."""
+    now = datetime.utcnow()
+
+    products = db.query(
+        Product.id, Product.name, Product.stock, Product.category_id
+    ).filter(Product.is_active == True).order_by(Product.id).all()
+    if not products:
+        return []
+
+    # Category fallback averages count every product in the category,
+    # active or not, so those products' sales are loaded too
+    category_ids = {p.category_id for p in products if p.category_id is not None}
+    category_products = db.query(Product.id, Product.category_id).filter(
+        Product.category_id.in_(category_ids)
+    ).all()
+
+    active_ids = [p.id for p in products]
+    active_set = set(active_ids)
+    all_ids = active_ids + [p.id for p in category_products if p.id not in active_set]
+    sales = load_sales_matrix(db, all_ids, now)
+
+    category_of = {p.id: p.category_id for p in category_products}
+    category_index = {c: i for i, c in enumerate(sorted(category_ids))}
+    member_rows = np.array([i for i, pid in enumerate(all_ids) if pid in category_of], dtype=int)
+    member_category = np.array(
+        [category_index[category_of[all_ids[i]]] for i in member_rows], dtype=int
+    )
+
+    # Category average = units sold / (products in category x days)
+    category_units = np.bincount(
+        member_category, weights=sales[member_rows].sum(axis=1), minlength=len(category_index)
+    )
+    category_sizes = np.bincount(member_category, minlength=len(category_index))
+    category_avg = np.divide(
+        category_units, category_sizes * HISTORY_DAYS,
+        out=np.zeros(len(category_index)), where=category_sizes > 0
+    )
+
+    sales = sales[:len(products)]
+    stock = np.array([p.stock or 0 for p in products], dtype=float)
+    product_category = np.array([
+        category_index.get(p.category_id, -1) for p in products
+    ], dtype=int)
+
+    # Weighted moving average and days with sales
+    totals = sales.sum(axis=1)
+    has_sales = totals > 0
+    data_points = np.where(has_sales, (sales > 0).sum(axis=1), 0)
+    weighted_avg = np.where(has_sales, sales @ DAY_WEIGHTS / DAY_WEIGHTS.sum(), 0.0)
+
+    # Trend: last week vs the older weeks
+    recent_week = sales[:, :7].sum(axis=1) / 7
+    older_weeks = sales[:, 7:].sum(axis=1) / (HISTORY_DAYS - 7)
+    trend_pct = np.where(
+        older_weeks > 0,
+        (recent_week - older_weeks) / np.where(older_weeks > 0, older_weeks, 1) * 100,
+        np.where(recent_week > 0, 100.0, 0.0)
+    )
+    trend_pct = np.where(has_sales, np.round(trend_pct, 1), 0.0)
+    rising = trend_pct > 15
+    declining = trend_pct < -15
+
+    # Category average for products without recent sales (0 without a category)
+    used_fallback = weighted_avg == 0
+    fallback = np.append(category_avg, 0.0)[product_category]  # -1 picks the 0
+    weighted_avg = np.where(used_fallback, fallback, weighted_avg)
+
+    # Seasonal factor, averaged over the forecast window
+    horizon = [now + timedelta(days=i) for i in range(FORECAST_DAYS)]
+    avg_seasonal_factor = float(seasonal_multipliers(horizon).mean())
+
+    # Trend adjustment: up to 1.5x when rising, down to 0.7x when declining
+    trend_multiplier = np.ones(len(products))
+    trend_multiplier = np.where(rising, 1.0 + np.minimum(np.abs(trend_pct), 50) / 100, trend_multiplier)
+    trend_multiplier = np.where(declining, 1.0 - np.minimum(np.abs(trend_pct), 30) / 100, trend_multiplier)
+
+    base_demand = weighted_avg * FORECAST_DAYS
+    adjusted_demand = base_demand * trend_multiplier * avg_seasonal_factor
+    predicted_demand = np.ceil(adjusted_demand * SAFETY_BUFFER).astype(int)
+
+    days_until_stockout = np.full(len(products), 999, dtype=int)
+    selling = weighted_avg > 0
+    days_until_stockout[selling] = np.floor(stock[selling] / weighted_avg[selling]).astype(int)
+
+    # Dynamic safety stock: more for rising trends and seasonal peaks
+    safety_stock = np.where(rising, 15, 10)
+    if avg_seasonal_factor > 1.1:
+        safety_stock = (safety_stock * 1.2).astype(int)
+    recommended_reorder = np.maximum(0, predicted_demand - stock.astype(int) + safety_stock)
+
+    urgency = np.select(
+        [days_until_stockout <= 3, days_until_stockout <= 7, days_until_stockout <= 14],
+        ["critical", "high", "medium"], default="low"
+    )
+    confidence = np.select(
+        [data_points >= 15, (data_points >= 7) | used_fallback],
+        ["high", "medium"], default="low"
+    )
+    trend = np.select([rising, declining], ["rising", "declining"], default="stable")
+
+    # One lookup for every primary image
+    images: Dict[int, str] = {}
+    for product_id, url in db.query(ProductImage.product_id, ProductImage.url).filter(
+        and_(ProductImage.product_id.in_(active_ids), ProductImage.is_primary == True)
+    ).order_by(ProductImage.id):
+        images.setdefault(product_id, url)
+
+    predictions = [
+        {
+            "id": product.id,
+            "name": product.name,
+            "image": images.get(product.id),
+            "current_stock": product.stock,
+            "predicted_demand": int(predicted_demand[i]),
+            "days_until_stockout": int(min(days_until_stockout[i], 999)),
+            "recommended_reorder": int(recommended_reorder[i]),
+            "urgency": str(urgency[i]),
+            "avg_daily_sales": round(float(weighted_avg[i]), 2),
+            "trend": str(trend[i]),
+            "trend_percentage": float(trend_pct[i]),
+            "seasonal_factor": round(avg_seasonal_factor, 2),
+            "confidence": str(confidence[i]),
+            "data_points": int(data_points[i]),
+        }
+        for i, product in enumerate(products)
+    ]
+
+    # Sort by urgency (critical first), then by days until stockout
+    predictions.sort(key=lambda p: (URGENCY_ORDER.get(p["urgency"], 4), p["days_until_stockout"]))
+    return predictions
+
+
+# ============ Caching ============
+
+PREDICTIONS_KEY = "all"
+PREDICTIONS_TTL = 3600  # Upper bound; order writes invalidate sooner
+
+prediction_cache = Cache(create_backend("predictions", max_entries=1), ttl=PREDICTIONS_TTL)
+
+
+def get_demand_predictions(db: Session) -> List[dict]:
+    """Cached predictions, computed once for concurrent callers."""
+    return prediction_cache.get_or_compute(PREDICTIONS_KEY, lambda: build_demand_predictions(db))
+
+
+# Product fields predictions read
+PRODUCT_FIELDS = ("stock", "is_active", "category_id", "name")
+
+_PENDING_KEY = "predictions_stale"
+
+
+def mark_stale_on_commit(session):
+    """Drop cached predictions when ``session`` commits (for bulk stock updates)."""
+    session.info[_PENDING_KEY] = True
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_order_writes(session, flush_context):
+    if session.info.get(_PENDING_KEY):
+        return
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (Order, OrderItem)) or (
+            isinstance(obj, Product) and any(
+                get_history(obj, field).has_changes() for field in PRODUCT_FIELDS
+            )
+        ):
+            session.info[_PENDING_KEY] = True
+            return
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_predictions(session):
+    if session.info.pop(_PENDING_KEY, None):
+        try:
+            prediction_cache.delete(PREDICTIONS_KEY)
+        except Exception as e:
+            print(f"[Predictions] Cache invalidation failed: {e}")
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_order_writes(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,119 @@
+"""
+Product card projection shared by every product listing.
+
+Listing endpoints used to build card dicts by touching ``product.images``
+and ``product.category`` on each row, which costs two lazy-load queries per
+card. The card image comes from the denormalized
+``Product.primary_image_url`` and category names are resolved for a whole
+page in bulk, so a page costs a fixed number of queries no matter how many
+cards it holds.
+
+Each helper has an ``_async`` twin for routers on the AsyncSession.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Category, Product
+
+
+def product_card(product: Product, image: Optional[str], category: Optional[str]) -> dict:
+    """Build a ProductListResponse-compatible dict from pre-resolved values."""
+    return {
+        "id": product.id,
+        "name": product.name,
+        "slug": product.slug,
+        "price": product.price,
+        "original_price": product.original_price,
+        "discount": product.discount,
+        "stock": product.stock,
+        "category_id": product.category_id,
+        "brand": product.brand,
+        "is_featured": product.is_featured,
+        "is_new": product.is_new,
+        "rating": product.rating,
+        "review_count": product.review_count,
+        "image": image,
+        "category": category,
+    }
+
+
+def _cards(products: List[Product], categories: Dict[int, str]) -> List[dict]:
+    return [
+        product_card(p, p.primary_image_url, categories.get(p.category_id))
+        for p in products
+    ]
+
+
+def get_category_names(db: Session, category_ids: Iterable[int]) -> Dict[int, str]:
+    """Map category id -> category name in one query."""
+    ids = {cid for cid in category_ids if cid is not None}
+    if not ids:
+        return {}
+
+    rows = db.query(Category.id, Category.name).filter(Category.id.in_(ids)).all()
+    return dict(rows)
+
+
+def build_product_cards(db: Session, products: List[Product]) -> List[dict]:
+    """Build card dicts for already-loaded products with one bulk query."""
+    if not products:
+        return []
+
+    categories = get_category_names(db, [p.category_id for p in products])
+    return _cards(products, categories)
+
+
+def get_product_cards(
+    db: Session,
+    product_ids: Iterable[int],
+    active_only: bool = False
+) -> Dict[int, dict]:
+    """Load products by id and return a mapping of product id -> card dict."""
+    ids = set(product_ids)
+    if not ids:
+        return {}
+
+    query = db.query(Product).filter(Product.id.in_(ids))
+    if active_only:
+        query = query.filter(Product.is_active == True)
+    products = query.all()
+    return {card["id"]: card for card in build_product_cards(db, products)}
+
+
+# ============ AsyncSession variants ============
+
+async def get_category_names_async(db: AsyncSession, category_ids: Iterable[int]) -> Dict[int, str]:
+    ids = {cid for cid in category_ids if cid is not None}
+    if not ids:
+        return {}
+
+    rows = await db.execute(select(Category.id, Category.name).where(Category.id.in_(ids)))
+    return dict(rows.all())
+
+
+async def build_product_cards_async(db: AsyncSession, products: List[Product]) -> List[dict]:
+    if not products:
+        return []
+
+    categories = await get_category_names_async(db, [p.category_id for p in products])
+    return _cards(products, categories)
+
+
+async def get_product_cards_async(
+    db: AsyncSession,
+    product_ids: Iterable[int],
+    active_only: bool = False
+) -> Dict[int, dict]:
+    ids = set(product_ids)
+    if not ids:
+        return {}
+
+    stmt = select(Product).where(Product.id.in_(ids))
+    if active_only:
+        stmt = stmt.where(Product.is_active == True)
+    products = (await db.scalars(stmt)).all()
+    return {card["id"]: card for card in await build_product_cards_async(db, list(products))}
@@ -0,0 +1,131 @@
+"""
+In-memory real-time visitor window.
+
+``/visitor-analytics/real-time`` used to count distinct visitors and
+sessions and group the last five minutes of raw page views by page on
+every dashboard poll. The tracking endpoint now also records each view
+here: a ring of per-second buckets covering ``WINDOW_SECONDS``, plus
+running per-visitor, per-session and per-page view counts for the whole
+window. A view is added to its second's bucket and the counts; a bucket
+leaving the window subtracts its views again. Active visitors and sessions
+are the number of keys in the counts and top pages come from the page
+counts, so reading never touches the database however busy the site is.
+
+The window is per process and starts with the views already written in
+the last five minutes (``load_recent``). With several workers each sees
+only its own views; set ``analytics_realtime_in_memory`` off there to
+count them from the database instead.
+"""
+
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from operator import itemgetter
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.services import page_view_storage
+
+
+WINDOW_SECONDS = 300  # Views in the last five minutes are "active"
+TOP_PAGES = 5
+
+
+def _increment(counts: Dict[str, int], key: str):
+    counts[key] = counts.get(key, 0) + 1
+
+
+def _decrement(counts: Dict[str, int], key: str):
+    remaining = counts[key] - 1
+    if remaining:
+        counts[key] = remaining
+    else:
+        del counts[key]
+
+
+class SlidingWindow:
+    """Views of the last ``seconds`` seconds, in one bucket per second."""
+
+    def __init__(self, seconds: int = WINDOW_SECONDS):
+        self.seconds = seconds
+        self._lock = threading.Lock()
+        self._clear(int(time.time()))
+
+    def _clear(self, now: int):
+        # Slot ``second % seconds`` holds that second's (visitor, session, page) views
+        self._slots: List[list] = [[] for _ in range(self.seconds)]
+        self._head = now
+        self.visitors: Dict[str, int] = {}
+        self.sessions: Dict[str, int] = {}
+        self.pages: Dict[str, int] = {}
+
+    def _advance(self, now: int):
+        """Expire the seconds that have left the window by ``now``."""
+        if now <= self._head:
+            return
+        if now - self._head >= self.seconds:
+            self._clear(now)
+            return
+        for second in range(self._head + 1, now + 1):
+            slot = second % self.seconds
+            for visitor, session, page in self._slots[slot]:
+                _decrement(self.visitors, visitor)
+                _decrement(self.sessions, session)
+                _decrement(self.pages, page)
+            self._slots[slot] = []
+        self._head = now
+
+    def record(self, visitor_hash: str, session_id: str, page_path: str, at: Optional[float] = None):
+        """Count a view made at ``at`` (a timestamp, default now) if it's inside the window."""
+        now = int(time.time())
+        second = min(int(at), now) if at is not None else now
+        with self._lock:
+            self._advance(now)
+            if second <= now - self.seconds:
+                return
+            slot = second % self.seconds
+            self._slots[slot].append((visitor_hash, session_id, page_path))
+            _increment(self.visitors, visitor_hash)
+            _increment(self.sessions, session_id)
+            _increment(self.pages, page_path)
+
+    def snapshot(self, top_pages: int = TOP_PAGES) -> dict:
+        """Active visitors and sessions, and the most viewed pages, right now."""
+        with self._lock:
+            self._advance(int(time.time()))
+            top = heapq.nlargest(top_pages, self.pages.items(), key=itemgetter(1))
+            return {
+                "active_visitors": len(self.visitors),
+                "active_sessions": len(self.sessions),
+                "top_pages": [{"path": path, "count": count} for path, count in top],
+            }
+
+
+window = SlidingWindow()
+
+
+def record(visitor_hash: str, session_id: str, page_path: str, created_at: Optional[datetime] = None):
+    """Count a tracked view (``created_at`` is naive UTC)."""
+    at = (created_at - datetime(1970, 1, 1)).total_seconds() if created_at is not None else None
+    window.record(visitor_hash, session_id, page_path, at)
+
+
+def snapshot() -> dict:
+    return window.snapshot()
+
+
+def load_recent(engine) -> int:
+    """Fill the window with the views written in the last ``WINDOW_SECONDS``; returns how many."""
+    since = datetime.utcnow() - timedelta(seconds=WINDOW_SECONDS)
+    with engine.connect() as connection:
+        views = page_view_storage.raw_page_views(connection, since)
+        rows = connection.execute(
+            select(views.c.visitor_hash, views.c.session_id, views.c.page_path, views.c.created_at)
+        ).all()
+    for visitor_hash, session_id, page_path, created_at in rows:
+        if created_at.tzinfo is not None:
+            created_at = created_at.replace(tzinfo=None) - created_at.utcoffset()
+        record(visitor_hash, session_id, page_path, created_at)
+    return len(rows)
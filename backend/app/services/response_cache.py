@@ -0,0 +1,209 @@
+"""
+Response cache for public catalog endpoints.
+
+Home page endpoints (featured products, new arrivals, best sellers, homepage
+categories, current flash sale) only change when the catalog changes, so
+their JSON bodies are cached per route + query string and served with an
+ETag; clients revalidating with ``If-None-Match`` get a bodyless 304.
+
+Entries are tagged with what they contain ("product:12", "category:3",
+"stock:12") and with the listings they belong to ("products"). Session events collect the
+tags touched by each flush and invalidate them after commit, so any write
+through the ORM, from any router, drops the affected entries.
+"""
+
+import hashlib
+from itertools import chain
+from typing import Any, Iterable, List, Optional, Set
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.orm.attributes import get_history
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Category, FlashSale, FlashSaleItem, Product, ProductImage
+from app.services.cache import CacheBackend, create_backend
+
+
+# Listing tags: invalidated when membership or order of a listing may change
+PRODUCT_LISTINGS = "products"
+CATEGORY_LISTINGS = "categories"
+FLASH_SALE_LISTINGS = "flash_sales"
+
+# Product fields that decide which listings a product appears in, and where
+LISTING_FIELDS = (
+    "is_active", "is_featured", "is_new", "has_image",
+    "category_id", "rating", "review_count", "created_at",
+)
+
+# Clients may keep the body but must revalidate it before reuse
+CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+def product_tag(product_id: int) -> str:
+    return f"product:{product_id}"
+
+
+def stock_tag(product_id: int) -> str:
+    """Changes with a product's stock only (checkouts, cancellations)."""
+    return f"stock:{product_id}"
+
+
+def category_tag(category_id: int) -> str:
+    return f"category:{category_id}"
+
+
+def flash_sale_tag(flash_sale_id: int) -> str:
+    return f"flash_sale:{flash_sale_id}"
+
+
+def card_tags(cards: Iterable[dict], stock: bool = True) -> Set[str]:
+    """Tags for a list of product card dicts; ``stock=False`` ignores stock changes."""
+    tags = set()
+    for card in cards:
+        tags.add(product_tag(card["id"]))
+        if stock:
+            tags.add(stock_tag(card["id"]))
+        if card.get("category_id") is not None:
+            tags.add(category_tag(card["category_id"]))
+    return tags
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class ResponseCache:
+    """Caches rendered JSON bodies with an ETag, keyed by route and query."""
+
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def key_for(request: Request) -> str:
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        return f"{request.url.path}?{query}"
+
+    @staticmethod
+    def _respond(request: Request, body: bytes, etag: str, cache_status: str) -> Response:
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "X-Cache": cache_status}
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @classmethod
+    def respond(cls, request: Request, body: bytes, cache_status: str) -> Response:
+        """Serve a pre-rendered JSON ``body`` with its ETag."""
+        return cls._respond(request, body, f'"{hashlib.sha1(body).hexdigest()}"', cache_status)
+
+    def lookup(self, request: Request) -> Optional[Response]:
+        """The cached response for this request, or None on a miss."""
+        entry = self.backend.get(self.key_for(request))
+        if entry is None:
+            return None
+        body, etag = entry
+        return self._respond(request, body, etag, "HIT")
+
+    def store(
+        self,
+        request: Request,
+        content: Any,
+        tags: Iterable[str],
+        ttl: Optional[int] = None
+    ) -> Response:
+        """Render ``content``, cache it under ``tags`` and return the response."""
+        body = JSONResponse(content=jsonable_encoder(content)).body
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self.backend.set(self.key_for(request), (body, etag), ttl or self.ttl, tags)
+        return self._respond(request, body, etag, "MISS")
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        return self.backend.invalidate_tags(tags)
+
+    # Async handlers: keep network backends off the event loop
+
+    async def lookup_async(self, request: Request) -> Optional[Response]:
+        if self.backend.blocking:
+            return await run_in_threadpool(self.lookup, request)
+        return self.lookup(request)
+
+    async def store_async(
+        self,
+        request: Request,
+        content: Any,
+        tags: Iterable[str],
+        ttl: Optional[int] = None
+    ) -> Response:
+        if self.backend.blocking:
+            return await run_in_threadpool(self.store, request, content, tags, ttl)
+        return self.store(request, content, tags, ttl)
+
+
+# Global response cache
+response_cache = ResponseCache(
+    create_backend("responses", max_entries=settings.response_cache_max_entries),
+    ttl=settings.response_cache_ttl,
+)
+
+
+# ============ Invalidation on writes ============
+
+_PENDING_KEY = "response_cache_tags"
+
+
+def _changed_tags(session, obj) -> List[str]:
+    if isinstance(obj, Product):
+        tags = [product_tag(obj.id)]
+        if obj not in session.dirty or any(
+            get_history(obj, field).has_changes() for field in LISTING_FIELDS
+        ):
+            tags.append(PRODUCT_LISTINGS)
+        return tags
+    if isinstance(obj, ProductImage):
+        # Can change the card image and whether the product is listed at all
+        return [product_tag(obj.product_id), PRODUCT_LISTINGS]
+    if isinstance(obj, Category):
+        return [category_tag(obj.id), CATEGORY_LISTINGS]
+    if isinstance(obj, FlashSale):
+        return [flash_sale_tag(obj.id), FLASH_SALE_LISTINGS]
+    if isinstance(obj, FlashSaleItem):
+        return [flash_sale_tag(obj.flash_sale_id)]
+    return []
+
+
+def invalidate_on_commit(session, tags: Iterable[str]):
+    """
+    Invalidate ``tags`` when ``session`` commits. For writes flush events
+    don't see, such as bulk ``UPDATE`` statements.
+    """
+    session.info.setdefault(_PENDING_KEY, set()).update(tags)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_tags(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        pending.update(_changed_tags(session, obj))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_tags(session):
+    tags = session.info.pop(_PENDING_KEY, None)
+    if tags:
+        response_cache.invalidate(tags)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_tags(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,561 @@
+"""
+Daily sales rollups for the admin dashboard.
+
+The dashboard and analytics endpoints used to aggregate ``orders`` on every
+load, with one SUM per day for the revenue trend and one COUNT per month for
+customer growth. They now read ``daily_sales_rollup`` and its per-category
+and per-payment-method breakdowns: one row per day, whatever the order volume.
+
+Mapper events on Order, OrderItem and User turn every insert, update and
+delete into increments on the affected day, so an order that is paid,
+refunded or re-priced moves the numbers. The increments are collected on
+the session and, once it commits, added to a per-process tally that is
+written in one batch every ``sales_rollup_flush_seconds`` (by the
+scheduler, or by the next checkout where no scheduler runs). Checkout
+never touches the rollup rows itself: with every order of the day landing
+on the same ``daily_sales_rollup`` row, upserting it in the order's
+transaction queued concurrent checkouts on that row's lock. Increments of
+a rolled-back transaction are dropped; ones still pending when a process
+is killed are lost until the next reconcile.
+
+``reconcile`` recomputes days from the source tables. The scheduler runs it
+nightly over recent days, after flushing this process's increments, to
+correct drift (e.g. a sold product moving to another category, or
+increments lost with a process), and ``migrate.py`` rebuilds everything
+when the rollups are empty but orders exist.
+"""
+
+import threading
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from time import monotonic
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import and_, event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm.attributes import get_history
+from sqlalchemy.orm.util import identity_key
+
+from app.config import settings
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models import (
+    DailyCategorySales, DailyPaymentSales, DailySalesRollup,
+    Order, OrderItem, PaymentStatus, Product, User, UserRole
+)
+
+
+COMPLETED = PaymentStatus.COMPLETED.value
+UNKNOWN_METHOD = "unknown"
+
+# Order fields the rollups depend on
+ORDER_FIELDS = ("payment_status", "total", "payment_method", "created_at")
+ITEM_FIELDS = ("order_id", "product_id", "quantity", "total")
+
+rollup_table = DailySalesRollup.__table__
+category_table = DailyCategorySales.__table__
+payment_table = DailyPaymentSales.__table__
+_tables = {table.name: table for table in (rollup_table, category_table, payment_table)}
+
+
+def utc_day(value) -> Optional[date]:
+    """The UTC calendar day of a timestamp (naive values are taken as UTC)."""
+    if value is None:
+        return None
+    if isinstance(value, str):  # SQLite date()/datetime() results
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    return value
+
+
+def method_key(method: Optional[str]) -> str:
+    return (method or UNKNOWN_METHOD).lower()
+
+
+# ============ Increments ============
+
+# (table name, key) -> {column: delta}, with ``key`` a sorted tuple of
+# (column, value) pairs identifying the row
+Increments = Dict[tuple, Dict[str, float]]
+
+_PENDING_KEY = "sales_rollup_increments"
+
+
+def _increments(target) -> Increments:
+    """The increments collected by the transaction flushing ``target``."""
+    return inspect(target).session.info.setdefault(_PENDING_KEY, {})
+
+
+def _count(increments: Increments, table, key: dict, deltas: dict):
+    """Add ``deltas`` to the row identified by ``key`` once the transaction commits."""
+    if not any(deltas.values()):
+        return
+    totals = increments.setdefault((table.name, tuple(sorted(key.items()))), {})
+    for name, delta in deltas.items():
+        totals[name] = totals.get(name, 0) + delta
+
+
+def _bump(connection, table, key: dict, deltas: dict):
+    """Add ``deltas`` to the row identified by ``key``, creating it if missing."""
+    if not any(deltas.values()):
+        return
+    values = {c.name: 0 for c in table.c}
+    values.update(key)
+    values.update(deltas)
+
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else pg_insert
+        stmt = insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + stmt.excluded[name] for name in deltas}
+        )
+        connection.execute(stmt)
+        return
+
+    # No upsert: update, then insert when the row doesn't exist yet
+    where = and_(*[table.c[name] == value for name, value in key.items()])
+    updated = connection.execute(
+        table.update().where(where).values({
+            table.c[name]: table.c[name] + delta for name, delta in deltas.items()
+        })
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values(values))
+
+
+def _apply_items(increments: Increments, day: date, items: Iterable[Tuple[int, float, Optional[int]]], sign: int):
+    """Add (sign=1) or remove (sign=-1) ``(quantity, total, category_id)`` items."""
+    units = 0
+    by_category: Dict[int, list] = defaultdict(lambda: [0.0, 0])
+    for quantity, total, category_id in items:
+        units += quantity or 0
+        if category_id is not None:
+            by_category[category_id][0] += total or 0
+            by_category[category_id][1] += quantity or 0
+
+    _count(increments, rollup_table, {"day": day}, {"units": sign * units})
+    for category_id, (revenue, quantity) in by_category.items():
+        _count(
+            increments, category_table,
+            {"day": day, "category_id": category_id},
+            {"revenue": sign * revenue, "units": sign * quantity}
+        )
+
+
+def _order_items(connection, order_id: int):
+    return connection.execute(
+        select(OrderItem.quantity, OrderItem.total, Product.category_id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.order_id == order_id)
+    ).all()
+
+
+def _apply_payment(connection, increments: Increments, order_id: int, state: dict, sign: int):
+    """Add or remove a paid order's revenue, payment method and items."""
+    day = state["day"]
+    total = state["total"] or 0
+    _count(increments, rollup_table, {"day": day}, {"paid_orders": sign, "revenue": sign * total})
+    _count(
+        increments, payment_table,
+        {"day": day, "payment_method": method_key(state["payment_method"])},
+        {"orders": sign, "revenue": sign * total}
+    )
+    _apply_items(increments, day, _order_items(connection, order_id), sign)
+
+
+# ============ Reading current state ============
+
+def _state(payment_status, total, payment_method, created_at) -> dict:
+    return {
+        "paid": payment_status == COMPLETED,
+        "total": total,
+        "payment_method": payment_method,
+        "day": utc_day(created_at),
+    }
+
+
+def _stored_order_row(connection, order_id: int):
+    return connection.execute(
+        select(Order.payment_status, Order.total, Order.payment_method, Order.created_at)
+        .where(Order.id == order_id)
+    ).first()
+
+
+def _stored_order(connection, order_id: int) -> Optional[dict]:
+    """The order's rollup fields as currently stored in the database."""
+    row = _stored_order_row(connection, order_id)
+    return _state(*row) if row is not None else None
+
+
+def _order_state(connection, order) -> Optional[dict]:
+    """Rollup fields of an order object, read from the database if unloaded."""
+    values = inspect(order).dict
+    if all(field in values for field in ORDER_FIELDS) and values["created_at"] is not None:
+        return _state(*(values[field] for field in ORDER_FIELDS))
+    return _stored_order(connection, order.id)
+
+
+def _item_order_state(connection, item) -> Optional[dict]:
+    """State of the order an item belongs to, from the session if possible."""
+    session = inspect(item).session
+    order = None
+    if session is not None:
+        order = session.identity_map.get(identity_key(Order, item.order_id))
+    if order is not None:
+        return _order_state(connection, order)
+    return _stored_order(connection, item.order_id)
+
+
+def _product_category(connection, product_id: int) -> Optional[int]:
+    return connection.execute(
+        select(Product.category_id).where(Product.id == product_id)
+    ).scalar()
+
+
+def _changed(target, fields) -> bool:
+    return any(get_history(target, field).has_changes() for field in fields)
+
+
+def _new_value(target, field: str, stored):
+    added = get_history(target, field).added
+    return added[0] if added else stored
+
+
+# ============ Maintenance on writes ============
+
+@event.listens_for(Order, "after_insert")
+def _order_inserted(mapper, connection, target):
+    increments = _increments(target)
+    state = _order_state(connection, target)
+    _count(increments, rollup_table, {"day": state["day"]}, {"orders": 1})
+    if state["paid"]:
+        # Items are inserted after their order, so this only sees items
+        # that already existed; later ones are counted as they arrive
+        _apply_payment(connection, increments, target.id, state, 1)
+
+
+@event.listens_for(Order, "before_update")
+def _order_updating(mapper, connection, target):
+    if not _changed(target, ORDER_FIELDS):
+        return
+    increments = _increments(target)
+
+    # Read the stored row: attributes may have been expired before being
+    # set, in which case their history doesn't hold the old value
+    row = _stored_order_row(connection, target.id)
+    if row is None:
+        return
+    old = _state(*row)
+    new = _state(*(_new_value(target, field, stored) for field, stored in zip(ORDER_FIELDS, row)))
+
+    if new["day"] != old["day"]:
+        _count(increments, rollup_table, {"day": old["day"]}, {"orders": -1})
+        _count(increments, rollup_table, {"day": new["day"]}, {"orders": 1})
+    if old["paid"]:
+        _apply_payment(connection, increments, target.id, old, -1)
+    if new["paid"]:
+        _apply_payment(connection, increments, target.id, new, 1)
+
+
+@event.listens_for(Order, "before_delete")
+def _order_deleting(mapper, connection, target):
+    increments = _increments(target)
+    old = _stored_order(connection, target.id)
+    if old is None:
+        return
+    _count(increments, rollup_table, {"day": old["day"]}, {"orders": -1})
+    if old["paid"]:
+        _apply_payment(connection, increments, target.id, old, -1)
+
+
+@event.listens_for(OrderItem, "after_insert")
+def _item_inserted(mapper, connection, target):
+    increments = _increments(target)
+    order = _item_order_state(connection, target)
+    if order and order["paid"]:
+        category_id = _product_category(connection, target.product_id)
+        _apply_items(increments, order["day"], [(target.quantity, target.total, category_id)], 1)
+
+
+def _stored_item(connection, item_id: int):
+    return connection.execute(
+        select(OrderItem.order_id, OrderItem.quantity, OrderItem.total, Product.category_id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.id == item_id)
+    ).first()
+
+
+@event.listens_for(OrderItem, "before_update")
+def _item_updating(mapper, connection, target):
+    if not _changed(target, ITEM_FIELDS):
+        return
+    increments = _increments(target)
+    old = _stored_item(connection, target.id)
+    if old is None:
+        return
+
+    old_order = _stored_order(connection, old.order_id)
+    if old_order and old_order["paid"]:
+        _apply_items(increments, old_order["day"], [(old.quantity, old.total, old.category_id)], -1)
+
+    order = _item_order_state(connection, target)
+    if order and order["paid"]:
+        category_id = _product_category(connection, target.product_id)
+        _apply_items(increments, order["day"], [(target.quantity, target.total, category_id)], 1)
+
+
+@event.listens_for(OrderItem, "before_delete")
+def _item_deleting(mapper, connection, target):
+    increments = _increments(target)
+    old = _stored_item(connection, target.id)
+    if old is None:
+        return
+    order = _stored_order(connection, old.order_id)
+    if order and order["paid"]:
+        _apply_items(increments, order["day"], [(old.quantity, old.total, old.category_id)], -1)
+
+
+def _customer_day(role, created_at) -> Optional[date]:
+    return utc_day(created_at) if role == UserRole.USER.value else None
+
+
+def _stored_user_row(connection, user_id: int):
+    return connection.execute(
+        select(User.role, User.created_at).where(User.id == user_id)
+    ).first()
+
+
+@event.listens_for(User, "after_insert")
+def _user_inserted(mapper, connection, target):
+    increments = _increments(target)
+    row = _stored_user_row(connection, target.id)
+    day = _customer_day(*row) if row is not None else None
+    if day:
+        _count(increments, rollup_table, {"day": day}, {"new_customers": 1})
+
+
+@event.listens_for(User, "before_update")
+def _user_updating(mapper, connection, target):
+    if not _changed(target, ("role", "created_at")):
+        return
+    increments = _increments(target)
+    row = _stored_user_row(connection, target.id)
+    if row is None:
+        return
+    old_day = _customer_day(*row)
+    new_day = _customer_day(
+        _new_value(target, "role", row.role),
+        _new_value(target, "created_at", row.created_at)
+    )
+    if old_day != new_day:
+        if old_day:
+            _count(increments, rollup_table, {"day": old_day}, {"new_customers": -1})
+        if new_day:
+            _count(increments, rollup_table, {"day": new_day}, {"new_customers": 1})
+
+
+@event.listens_for(User, "before_delete")
+def _user_deleting(mapper, connection, target):
+    increments = _increments(target)
+    row = _stored_user_row(connection, target.id)
+    day = _customer_day(*row) if row is not None else None
+    if day:
+        _count(increments, rollup_table, {"day": day}, {"new_customers": -1})
+
+
+# ============ Batched writes ============
+
+# Committed increments not yet written to the rollup tables
+_pending: Increments = {}
+_pending_lock = threading.Lock()
+_last_flush = monotonic()
+
+
+def _merge(into: Increments, increments: Increments):
+    for key, deltas in increments.items():
+        totals = into.setdefault(key, {})
+        for name, delta in deltas.items():
+            totals[name] = totals.get(name, 0) + delta
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _committed(session):
+    increments = session.info.pop(_PENDING_KEY, None)
+    if increments:
+        with _pending_lock:
+            _merge(_pending, increments)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _write(connection, increments: Increments):
+    # In key order, so concurrent writers lock the rows in the same order
+    for (table_name, key), deltas in sorted(increments.items(), key=lambda item: repr(item[0])):
+        _bump(connection, _tables[table_name], dict(key), deltas)
+
+
+def flush_due() -> bool:
+    """True if increments are pending and the last flush is older than the interval."""
+    return bool(_pending) and monotonic() - _last_flush >= settings.sales_rollup_flush_seconds
+
+
+async def flush_rollups() -> int:
+    """Write pending increments to the rollup tables; returns rows updated."""
+    # On the async engine beside checkout, so SQLite sees a single writer
+    global _last_flush
+    with _pending_lock:
+        _last_flush = monotonic()
+        increments = dict(_pending)
+        _pending.clear()
+    if not increments:
+        return 0
+
+    async with AsyncSessionLocal() as db:
+        try:
+            await db.run_sync(lambda session: _write(session.connection(), increments))
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            # Keep the increments for the next flush
+            with _pending_lock:
+                _merge(_pending, increments)
+            raise
+    return len(increments)
+
+
+async def flush_if_due():
+    """Flush from a request when the interval has passed (e.g. no scheduler)."""
+    if not flush_due():
+        return
+    try:
+        await flush_rollups()
+    except Exception as e:
+        print(f"[Rollup] Could not write sales rollups: {e}")
+
+
+# ============ Reconcile ============
+
+def _day_expression(connection, column):
+    if connection.dialect.name == "postgresql":
+        return func.date(func.timezone("UTC", column))
+    return func.date(column)
+
+
+def _in_range(column, start: Optional[date], end: Optional[date]) -> list:
+    clauses = []
+    if start is not None:
+        clauses.append(column >= datetime.combine(start, time.min))
+    if end is not None:
+        clauses.append(column < datetime.combine(end + timedelta(days=1), time.min))
+    return clauses
+
+
+def reconcile(connection, start: Optional[date] = None, end: Optional[date] = None) -> int:
+    """
+    Recompute the rollups for days ``start``..``end`` (inclusive) from the
+    orders and users tables; both None rebuilds everything. Returns the
+    number of days written.
+    """
+    order_day = _day_expression(connection, Order.created_at)
+    paid = Order.payment_status == COMPLETED
+    in_range = _in_range(Order.created_at, start, end)
+
+    days: Dict[date, dict] = defaultdict(lambda: {
+        "orders": 0, "paid_orders": 0, "revenue": 0.0, "units": 0, "new_customers": 0
+    })
+
+    for day, orders in connection.execute(
+        select(order_day, func.count(Order.id)).where(*in_range).group_by(order_day)
+    ):
+        days[utc_day(day)]["orders"] = orders
+
+    payments = []
+    for day, method, orders, revenue in connection.execute(
+        select(order_day, Order.payment_method, func.count(Order.id), func.sum(Order.total))
+        .where(paid, *in_range)
+        .group_by(order_day, Order.payment_method)
+    ):
+        day = utc_day(day)
+        days[day]["paid_orders"] += orders
+        days[day]["revenue"] += revenue or 0
+        payments.append((day, method_key(method), orders, revenue or 0))
+
+    categories = []
+    for day, category_id, units, revenue in connection.execute(
+        select(order_day, Product.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.total))
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(paid, *in_range)
+        .group_by(order_day, Product.category_id)
+    ):
+        day = utc_day(day)
+        days[day]["units"] += units or 0
+        if category_id is not None:
+            categories.append((day, category_id, units or 0, revenue or 0))
+
+    user_day = _day_expression(connection, User.created_at)
+    for day, customers in connection.execute(
+        select(user_day, func.count(User.id))
+        .where(User.role == UserRole.USER.value, *_in_range(User.created_at, start, end))
+        .group_by(user_day)
+    ):
+        days[utc_day(day)]["new_customers"] = customers
+
+    days.pop(None, None)
+
+    # Payment methods are stored lowercased; merge ones that only differ in case
+    merged: Dict[tuple, list] = defaultdict(lambda: [0, 0.0])
+    for day, method, orders, revenue in payments:
+        merged[(day, method)][0] += orders
+        merged[(day, method)][1] += revenue
+
+    for table in (rollup_table, category_table, payment_table):
+        connection.execute(table.delete().where(*_in_range_days(table, start, end)))
+    if days:
+        connection.execute(rollup_table.insert(), [{"day": day, **totals} for day, totals in days.items()])
+    if categories:
+        connection.execute(category_table.insert(), [
+            {"day": day, "category_id": category_id, "units": units, "revenue": revenue}
+            for day, category_id, units, revenue in categories
+        ])
+    if merged:
+        connection.execute(payment_table.insert(), [
+            {"day": day, "payment_method": method, "orders": orders, "revenue": revenue}
+            for (day, method), (orders, revenue) in merged.items()
+        ])
+    return len(days)
+
+
+def _in_range_days(table, start: Optional[date], end: Optional[date]) -> list:
+    clauses = []
+    if start is not None:
+        clauses.append(table.c.day >= start)
+    if end is not None:
+        clauses.append(table.c.day <= end)
+    return clauses
+
+
+def reconcile_recent(engine, days: int) -> int:
+    """Recompute the last ``days`` days, today included."""
+    today = datetime.utcnow().date()
+    with engine.begin() as conn:
+        return reconcile(conn, today - timedelta(days=days - 1), today)
+
+
+def ensure_sales_rollups(engine):
+    """Build the rollups from full history if they are empty but orders exist."""
+    with engine.begin() as conn:
+        has_rollups = conn.execute(select(rollup_table.c.day).limit(1)).first()
+        has_orders = conn.execute(select(Order.id).limit(1)).first()
+        if has_orders and not has_rollups:
+            written = reconcile(conn)
+            print(f"[Rollup] Built daily sales rollups for {written} days")
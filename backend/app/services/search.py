@@ -0,0 +1,182 @@
+"""
+Full-text product search.
+
+Product search used ``Product.name.ilike('%q%')``, which no index can serve.
+This module keeps a dedicated search index next to the products table:
+
+- PostgreSQL: a ``product_search`` table holding a weighted ``tsvector``
+  per product with a GIN index.
+- SQLite (dev): a ``product_search`` FTS5 virtual table keyed by product id.
+
+Both index name, brand, category name and description, support prefix
+matching for autocomplete and expose a relevance rank (higher is better).
+The index is built by ``migrate.py`` when empty and kept in sync by mapper events
+on Product and Category writes.
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Float, Integer, bindparam, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
+
+from app.models import Category, Product
+
+
+# Product fields that feed the search document
+INDEXED_PRODUCT_FIELDS = ("name", "brand", "description", "category_id")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokenize(query: str) -> List[str]:
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _is_postgres(connection) -> bool:
+    return connection.dialect.name == "postgresql"
+
+
+# ============ Index DDL ============
+
+def create_search_index(engine):
+    """Create the search index if missing and build it on first run."""
+    with engine.begin() as conn:
+        if _is_postgres(conn):
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS product_search (
+                    product_id INTEGER PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+                    document TSVECTOR NOT NULL
+                )
+            """))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_product_search_document "
+                "ON product_search USING GIN (document)"
+            ))
+        else:
+            conn.execute(text("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5(
+                    name, brand, category, description,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """))
+
+        indexed = conn.execute(text("SELECT COUNT(*) FROM product_search")).scalar()
+        if not indexed:
+            reindex_products(conn)
+
+
+def reindex_products(connection, product_ids: Optional[Iterable[int]] = None):
+    """
+    Rebuild search documents for the given products, or all when None.
+
+    Documents are built set-based from products joined to categories, so a
+    bulk reindex is a single statement per backend.
+    """
+    where = ""
+    bind_ids = []
+    if product_ids is not None:
+        ids = sorted({pid for pid in product_ids if pid is not None})
+        if not ids:
+            return
+        where = "WHERE p.id IN :ids"
+        bind_ids = [bindparam("ids", value=ids, expanding=True)]
+
+    if _is_postgres(connection):
+        connection.execute(text(f"""
+            INSERT INTO product_search (product_id, document)
+            SELECT p.id,
+                   setweight(to_tsvector('simple', coalesce(p.name, '')), 'A') ||
+                   setweight(to_tsvector('simple', coalesce(p.brand, '')), 'B') ||
+                   setweight(to_tsvector('simple', coalesce(c.name, '')), 'C') ||
+                   setweight(to_tsvector('simple', coalesce(p.description, '')), 'D')
+            FROM products p
+            LEFT JOIN categories c ON c.id = p.category_id
+            {where}
+            ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document
+        """).bindparams(*bind_ids))
+    else:
+        delete_where = where.replace("p.id", "rowid")
+        connection.execute(text(f"DELETE FROM product_search {delete_where}").bindparams(*bind_ids))
+        connection.execute(text(f"""
+            INSERT INTO product_search (rowid, name, brand, category, description)
+            SELECT p.id, coalesce(p.name, ''), coalesce(p.brand, ''),
+                   coalesce(c.name, ''), coalesce(p.description, '')
+            FROM products p
+            LEFT JOIN categories c ON c.id = p.category_id
+            {where}
+        """).bindparams(*bind_ids))
+
+
+def reindex_category(connection, category_id: int):
+    """Rebuild documents for every product in a category (e.g. after a rename)."""
+    product_ids = connection.execute(
+        text("SELECT id FROM products WHERE category_id = :category_id"),
+        {"category_id": category_id}
+    ).scalars().all()
+    reindex_products(connection, product_ids)
+
+
+# ============ Querying ============
+
+def search_matches(db: Session, query: str, prefix: bool = True):
+    """
+    Build a ``(product_id, rank)`` subquery for products matching ``query``.
+
+    Every token must match; with ``prefix`` each token also matches longer
+    words ("lipst" -> "lipstick"). Returns None when the query has no
+    searchable tokens so callers can fall back to a plain filter.
+    """
+    tokens = _tokenize(query)
+    if not tokens:
+        return None
+
+    if _is_postgres(db.get_bind()):
+        suffix = ":*" if prefix else ""
+        tsquery = " & ".join(f"{token}{suffix}" for token in tokens)
+        stmt = text("""
+            SELECT product_id, ts_rank(document, to_tsquery('simple', :tsquery)) AS rank
+            FROM product_search
+            WHERE document @@ to_tsquery('simple', :tsquery)
+        """).bindparams(tsquery=tsquery)
+    else:
+        suffix = "*" if prefix else ""
+        match = " ".join(f'"{token}"{suffix}' for token in tokens)
+        # bm25() is lower-is-better; negate it so rank sorts like ts_rank.
+        # Column weights: name, brand, category, description
+        stmt = text("""
+            SELECT rowid AS product_id, -bm25(product_search, 10.0, 5.0, 3.0, 1.0) AS rank
+            FROM product_search
+            WHERE product_search MATCH :match
+        """).bindparams(match=match)
+
+    return stmt.columns(product_id=Integer, rank=Float).subquery("search_matches")
+
+
+# ============ Sync on writes ============
+
+@event.listens_for(Product, "after_insert")
+def _product_inserted(mapper, connection, target):
+    reindex_products(connection, [target.id])
+
+
+@event.listens_for(Product, "after_update")
+def _product_updated(mapper, connection, target):
+    # Stock and rating change on every order/review; only reindex on
+    # changes to fields that are part of the search document
+    if any(get_history(target, field).has_changes() for field in INDEXED_PRODUCT_FIELDS):
+        reindex_products(connection, [target.id])
+
+
+@event.listens_for(Product, "after_delete")
+def _product_deleted(mapper, connection, target):
+    if _is_postgres(connection):
+        return  # ON DELETE CASCADE removes the document
+    connection.execute(text("DELETE FROM product_search WHERE rowid = :id"), {"id": target.id})
+
+
+@event.listens_for(Category, "after_update")
+def _category_updated(mapper, connection, target):
+    if get_history(target, "name").has_changes():
+        reindex_category(connection, target.id)
@@ -0,0 +1,190 @@
+"""
+Stock reservation for checkout.
+
+Checkout used to read ``product.stock``, compare it in Python and later
+write ``stock -= quantity``, so two concurrent buyers could both pass the
+check and oversell the last units. Stock is now reserved for every line of
+an order with one conditional statement:
+
+    UPDATE products SET stock = stock - <qty for id>
+    WHERE id IN (SELECT id ... ORDER BY id FOR UPDATE)
+      AND is_active AND stock >= <qty for id>
+    RETURNING id
+
+The database re-checks ``stock >= qty`` under the row lock, so a SKU can
+never go negative. On PostgreSQL the locking subquery takes the row locks
+in id order, so multi-item checkouts can't deadlock each other. SQLite
+serializes writers and ignores ``FOR UPDATE``. If any line can't be
+reserved the statement's changes must be rolled back with the rest of
+the checkout, which ``InsufficientStock`` signals.
+
+A reservation lasts as long as its order: it is released when the order
+is cancelled (flash-sale lines also return their flash allocation), and
+unpaid orders are cancelled (and released) by the scheduler after
+``payment_timeout_hours``. ``claim_cancellation`` flips the order status
+with a conditional UPDATE, so a customer cancel and the automatic expiry
+can't both release the same stock.
+
+These bulk statements bypass flush events, so the response cache and
+demand predictions are told about the stock change explicitly.
+"""
+
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy import case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from app.models import Order, OrderItem, OrderStatus, Product
+from app.services.flash_stock import return_on_commit
+from app.services.predictions import mark_stale_on_commit
+from app.services.response_cache import invalidate_on_commit, stock_tag
+
+
+# Orders in these states still hold unshipped stock that a cancellation returns
+RELEASABLE_STATUSES = (
+    OrderStatus.PENDING.value,
+    OrderStatus.CONFIRMED.value,
+    OrderStatus.PROCESSING.value,
+)
+
+
+class InsufficientStock(Exception):
+    """Some lines could not be reserved; the transaction must be rolled back."""
+
+    def __init__(self, product_ids: List[int]):
+        super().__init__(f"Insufficient stock for products {product_ids}")
+        self.product_ids = product_ids
+
+
+def merge_quantities(lines: Iterable) -> Dict[int, int]:
+    """Total quantity per product for lines with ``product_id`` and ``quantity``."""
+    quantities: Dict[int, int] = {}
+    for line in lines:
+        quantities[line.product_id] = quantities.get(line.product_id, 0) + line.quantity
+    return quantities
+
+
+def _quantity_for(quantities: Dict[int, int]):
+    return case(quantities, value=Product.id)
+
+
+def _reserve_statement(quantities: Dict[int, int]):
+    # Aliased so the subquery isn't correlated to the UPDATE target
+    locked = aliased(Product, name="locked")
+    lock_rows = select(locked.id).where(
+        locked.id.in_(sorted(quantities))
+    ).order_by(locked.id).with_for_update()
+
+    wanted = _quantity_for(quantities)
+    return update(Product).where(
+        Product.id.in_(lock_rows),
+        Product.is_active == True,
+        Product.stock >= wanted
+    ).values(stock=Product.stock - wanted).returning(Product.id)
+
+
+def _release_statement(quantities: Dict[int, int]):
+    return update(Product).where(
+        Product.id.in_(sorted(quantities))
+    ).values(stock=Product.stock + _quantity_for(quantities))
+
+
+def _stock_changed(session, product_ids: Iterable[int]):
+    invalidate_on_commit(session, [stock_tag(product_id) for product_id in product_ids])
+    mark_stale_on_commit(session)
+
+
+async def reserve_stock(db: AsyncSession, quantities: Dict[int, int]):
+    """
+    Take ``quantities`` ({product_id: units}) out of stock in one statement.
+    Raises ``InsufficientStock`` (the caller must roll back) unless every
+    product is active and has enough stock.
+    """
+    if not quantities:
+        return
+    result = await db.execute(
+        _reserve_statement(quantities),
+        execution_options={"synchronize_session": "fetch"}
+    )
+    reserved: Set[int] = set(result.scalars().all())
+    missing = sorted(set(quantities) - reserved)
+    if missing:
+        raise InsufficientStock(missing)
+    _stock_changed(db, quantities)
+
+
+def release_stock(db: Session, quantities: Dict[int, int]):
+    """Return ``quantities`` to stock."""
+    if not quantities:
+        return
+    db.execute(_release_statement(quantities), execution_options={"synchronize_session": "fetch"})
+    _stock_changed(db, quantities)
+
+
+async def release_stock_async(db: AsyncSession, quantities: Dict[int, int]):
+    """``release_stock`` for an AsyncSession."""
+    if not quantities:
+        return
+    await db.execute(_release_statement(quantities), execution_options={"synchronize_session": "fetch"})
+    _stock_changed(db, quantities)
+
+
+# ============ Cancellation ============
+
+def _claim_statement(order_id: int, from_statuses: Iterable[str]):
+    return update(Order).where(
+        Order.id == order_id,
+        Order.status.in_(list(from_statuses))
+    ).values(status=OrderStatus.CANCELLED.value)
+
+
+def _order_lines_query(order_id: int):
+    return select(OrderItem.product_id, OrderItem.quantity, OrderItem.flash_sale_item_id).where(
+        OrderItem.order_id == order_id,
+        OrderItem.product_id.isnot(None)
+    )
+
+
+def _flash_units(lines) -> Dict[int, int]:
+    units: Dict[int, int] = {}
+    for line in lines:
+        if line.flash_sale_item_id is not None:
+            units[line.flash_sale_item_id] = units.get(line.flash_sale_item_id, 0) + line.quantity
+    return units
+
+
+def claim_cancellation(db: Session, order_id: int, from_statuses: Iterable[str] = RELEASABLE_STATUSES) -> bool:
+    """
+    Cancel the order if it is still in ``from_statuses`` and release its
+    stock. Returns False (and changes nothing) if another request got there
+    first or the order has moved on.
+    """
+    claimed = db.execute(
+        _claim_statement(order_id, from_statuses),
+        execution_options={"synchronize_session": "fetch"}
+    )
+    if claimed.rowcount != 1:
+        return False
+    lines = db.execute(_order_lines_query(order_id)).all()
+    release_stock(db, merge_quantities(lines))
+    return_on_commit(db, _flash_units(lines))
+    return True
+
+
+async def claim_cancellation_async(
+    db: AsyncSession,
+    order_id: int,
+    from_statuses: Iterable[str] = RELEASABLE_STATUSES
+) -> bool:
+    """``claim_cancellation`` for an AsyncSession."""
+    claimed = await db.execute(
+        _claim_statement(order_id, from_statuses),
+        execution_options={"synchronize_session": "fetch"}
+    )
+    if claimed.rowcount != 1:
+        return False
+    lines = (await db.execute(_order_lines_query(order_id))).all()
+    await release_stock_async(db, merge_quantities(lines))
+    return_on_commit(db, _flash_units(lines))
+    return True
@@ -0,0 +1,136 @@
+"""
+User agent and referrer classification for tracked page views.
+
+Every tracked view used to lower-case its user agent and scan it for a
+dozen substrings, then search its referrer's domain for each of about
+twenty known social, search and email domains in turn. A handful of
+user agents and referrers account for almost all traffic, so results are
+memoized in bounded LRUs:
+
+- user agents, keyed on the raw string. The substring rules are kept for
+  misses; one compiled pattern of all their tokens measured slower.
+- referrers, keyed on the raw URL, and behind that per host, since URLs
+  with search queries rarely repeat but their hosts do. Each domain list
+  is one compiled pattern.
+
+Known domains match whole labels: ``t.co`` is twitter's shortener, not
+every host ending in ``t.com``. The email providers are checked before
+the search engines, so ``mail.google.com`` counts as email.
+``benchmark_classifier.py`` measures the cost per view.
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+from app.config import settings
+
+
+# ============ User agents ============
+
+class UserAgentInfo(NamedTuple):
+    device_type: str
+    browser: str
+    os: str
+
+
+@lru_cache(maxsize=settings.analytics_classifier_cache_size)
+def classify_user_agent(user_agent: str) -> UserAgentInfo:
+    """Device type, browser and OS of a user agent string"""
+    ua = user_agent.lower()
+
+    # Device type
+    if "mobile" in ua:
+        device_type = "mobile"
+    elif "tablet" in ua or "ipad" in ua:
+        device_type = "tablet"
+    else:
+        device_type = "desktop"
+
+    # Browser (Chromium-based browsers also claim Chrome and Safari)
+    if "chrome" in ua and "edg" not in ua and "opr" not in ua:
+        browser = "Chrome"
+    elif "firefox" in ua:
+        browser = "Firefox"
+    elif "safari" in ua and "chrome" not in ua:
+        browser = "Safari"
+    elif "edg" in ua:
+        browser = "Edge"
+    elif "opera" in ua or "opr" in ua:
+        browser = "Opera"
+    else:
+        browser = "Unknown"
+
+    # OS
+    if "windows" in ua:
+        os = "Windows"
+    elif "mac os" in ua or "macos" in ua:
+        os = "macOS"
+    elif "linux" in ua and "android" not in ua:
+        os = "Linux"
+    elif "android" in ua:
+        os = "Android"
+    elif "iphone" in ua or "ipad" in ua:
+        os = "iOS"
+    else:
+        os = "Unknown"
+
+    return UserAgentInfo(device_type, browser, os)
+
+
+# ============ Referrers ============
+
+SOCIAL_DOMAINS = ("facebook.com", "fb.com", "twitter.com", "t.co", "instagram.com", "linkedin.com",
+                  "pinterest.com", "youtube.com", "tiktok.com", "reddit.com")
+SEARCH_DOMAINS = ("google.", "bing.com", "yahoo.", "duckduckgo.com", "baidu.com", "yandex.")
+EMAIL_DOMAINS = ("mail.google.com", "outlook.", "mail.yahoo.")
+
+_HOST = re.compile(r"https?://([^/]+)", re.IGNORECASE)
+
+
+def _domain_pattern(domains) -> re.Pattern:
+    """
+    Matches a host that is, or is under, one of ``domains``. Entries ending
+    in a dot (``google.``) match any suffix after it.
+    """
+    alternatives = []
+    for domain in domains:
+        if domain.endswith("."):
+            alternatives.append(re.escape(domain))
+        else:
+            alternatives.append(re.escape(domain) + r"(?::|$)")
+    return re.compile(r"(?:^|\.)(?:" + "|".join(alternatives) + ")")
+
+
+# Checked in order; the first list whose pattern matches decides
+_SOURCES = (
+    ("social", _domain_pattern(SOCIAL_DOMAINS)),
+    ("email", _domain_pattern(EMAIL_DOMAINS)),
+    ("organic_search", _domain_pattern(SEARCH_DOMAINS)),
+)
+
+
+@lru_cache(maxsize=settings.analytics_classifier_cache_size)
+def _classify_host(host: str) -> str:
+    for source, pattern in _SOURCES:
+        if pattern.search(host):
+            return source
+    return "referral"
+
+
+@lru_cache(maxsize=settings.analytics_classifier_cache_size)
+def _classify_url(referrer: str) -> Tuple[str, str]:
+    match = _HOST.search(referrer)
+    host = match.group(1).lower() if match else ""
+    return _classify_host(host), host
+
+
+def classify_referrer(referrer: Optional[str], utm_source: Optional[str] = None) -> Tuple[str, Optional[str]]:
+    """Traffic source and referring domain (``"utm"`` when tagged with utm_source)"""
+    if utm_source:
+        return utm_source, "utm"
+
+    if not referrer:
+        return "direct", None
+
+    return _classify_url(referrer)
@@ -0,0 +1,352 @@
+"""
+Visitor analytics rollups.
+
+``/visitor-analytics/stats`` used to run about fifteen ``COUNT(DISTINCT)``
+queries over raw page views for the current and previous period, and
+loaded every session of the period to average them. It now reads:
+
+- ``visitor_daily_stats``: per day, views, visitors and sessions, plus
+  duration, page and bounce totals of the sessions started that day;
+- ``visitor_daily_breakdown``: per day, views and visitors by traffic
+  source, device, browser, country and page;
+- ``visitor_hourly_stats``: per UTC hour, views, visitors and sessions;
+- ``visitor_sketches``: HyperLogLog sketches of the visitors and sessions
+  of each hour, and of each day overall and per breakdown value.
+
+Visitor hashes rotate daily, so summing daily visitor counts over a range
+is exact; sessions that span midnight would be counted on both days, and
+hourly counts can't be summed at all. ``unique_counts`` merges the sketches
+instead, which answers any range of whole hours with about 1% error.
+``exact_counts`` counts the raw views, for small ranges.
+
+A day is rebuilt from its raw views as a whole, so rebuilding is
+idempotent. The scheduler rebuilds today every ``analytics_rollup_minutes``
+(where no scheduler runs, the stats endpoint does when they're stale).
+Yesterday is rebuilt until it has been closed for ``SETTLE``, by which time
+late views and sessions are in. ``migrate.py`` builds every day that has raw
+views when the rollups are empty, which is also how they're first filled.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import and_, case, distinct, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import VisitorDailyBreakdown, VisitorDailyStats, VisitorHourlyStats, VisitorSketch
+from app.models.models import VisitorSession
+from app.services import page_view_storage
+from app.services.hyperloglog import HyperLogLog, hash_value, merged
+
+
+SETTLE = timedelta(hours=1)  # A day is final once rebuilt this long after it ended
+
+daily_table = VisitorDailyStats.__table__
+hourly_table = VisitorHourlyStats.__table__
+breakdown_table = VisitorDailyBreakdown.__table__
+sketch_table = VisitorSketch.__table__
+session_table = VisitorSession.__table__
+
+# Breakdown dimension -> (value column, label column or None)
+DIMENSIONS = {
+    "source": ("traffic_source", None),
+    "device": ("device_type", None),
+    "browser": ("browser", None),
+    "country": ("country_code", "country_name"),
+    "page": ("page_path", None),
+}
+
+
+def _bounds(day: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, str):  # SQLite strftime() results
+        return datetime.fromisoformat(value)
+    return value.replace(tzinfo=None)
+
+
+# ============ Building ============
+
+class _Tally:
+    """Views, distinct visitors and distinct sessions (by hash) of one group of views."""
+
+    __slots__ = ("page_views", "visitors", "sessions", "label")
+
+    def __init__(self):
+        self.page_views = 0
+        self.visitors = set()
+        self.sessions = set()
+        self.label = None
+
+    def add(self, visitor, session, label=None):
+        self.page_views += 1
+        if visitor is not None:
+            self.visitors.add(visitor)
+        if session is not None:
+            self.sessions.add(session)
+        if label is not None and (self.label is None or label > self.label):
+            self.label = label
+
+    def sketch_row(self, period: str, start: datetime, dimension: str = "", value: str = "") -> Dict:
+        return {
+            "period": period,
+            "start": start,
+            "dimension": dimension,
+            "value": value,
+            "visitors": HyperLogLog().add_hashes(self.visitors).to_bytes(),
+            "sessions": HyperLogLog().add_hashes(self.sessions).to_bytes(),
+        }
+
+
+def _utc(value) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.replace(tzinfo=None)
+
+
+def rebuild_day(connection, day: date):
+    """Recompute ``day``'s rollups and sketches from its raw page views and sessions."""
+    start, end = _bounds(day)
+    views = page_view_storage.raw_page_views(connection, start, end)
+
+    # One pass over the day's views groups them every way at once. Visitors
+    # and sessions are hashed once, and tallied by hash (64-bit, so distinct
+    # counts stay exact)
+    hashes: Dict[str, int] = {}
+
+    def hashed(value):
+        if value is None:
+            return None
+        found = hashes.get(value)
+        if found is None:
+            found = hashes[value] = hash_value(value)
+        return found
+
+    total = _Tally()
+    hours: Dict[datetime, _Tally] = {}
+    groups: Dict[Tuple[str, str], _Tally] = {}
+    value_columns = [views.c[value_column] for value_column, _ in DIMENSIONS.values()]
+    query = select(
+        views.c.created_at, views.c.visitor_hash, views.c.session_id, views.c.country_name, *value_columns
+    ).execution_options(yield_per=5000)
+    for created_at, visitor_hash, session_id, country_name, *values in connection.execute(query):
+        visitor_hash, session_id = hashed(visitor_hash), hashed(session_id)
+        total.add(visitor_hash, session_id)
+        hour = _utc(created_at).replace(minute=0, second=0, microsecond=0)
+        hours.setdefault(hour, _Tally()).add(visitor_hash, session_id)
+        for dimension, value in zip(DIMENSIONS, values):
+            if dimension == "country" and value is None:
+                continue
+            label = country_name if dimension == "country" else None
+            groups.setdefault((dimension, value or ""), _Tally()).add(visitor_hash, session_id, label)
+
+    session_count, session_duration, session_pages, bounces = connection.execute(select(
+        func.count(),
+        func.coalesce(func.sum(session_table.c.duration_seconds), 0),
+        func.coalesce(func.sum(session_table.c.page_count), 0),
+        func.coalesce(func.sum(case((session_table.c.page_count == 1, 1), else_=0)), 0),
+    ).where(session_table.c.started_at >= start, session_table.c.started_at < end)).one()
+
+    hourly = [
+        {"hour": hour, "page_views": tally.page_views,
+         "visitors": len(tally.visitors), "sessions": len(tally.sessions)}
+        for hour, tally in hours.items()
+    ]
+    breakdowns = [
+        {"day": day, "dimension": dimension, "value": value, "label": tally.label,
+         "page_views": tally.page_views, "visitors": len(tally.visitors)}
+        for (dimension, value), tally in groups.items()
+    ]
+    sketches = [total.sketch_row("day", start)]
+    sketches += [tally.sketch_row("hour", hour) for hour, tally in hours.items()]
+    sketches += [tally.sketch_row("day", start, dimension, value) for (dimension, value), tally in groups.items()]
+
+    connection.execute(daily_table.delete().where(daily_table.c.day == day))
+    connection.execute(breakdown_table.delete().where(breakdown_table.c.day == day))
+    connection.execute(hourly_table.delete().where(hourly_table.c.hour >= start, hourly_table.c.hour < end))
+    connection.execute(sketch_table.delete().where(sketch_table.c.start >= start, sketch_table.c.start < end))
+
+    connection.execute(daily_table.insert().values(
+        day=day,
+        page_views=total.page_views,
+        visitors=len(total.visitors),
+        sessions=len(total.sessions),
+        session_count=session_count,
+        session_duration=session_duration,
+        session_pages=session_pages,
+        bounces=bounces,
+        updated_at=datetime.utcnow(),
+    ))
+    if hourly:
+        connection.execute(hourly_table.insert(), hourly)
+    if breakdowns:
+        connection.execute(breakdown_table.insert(), breakdowns)
+    connection.execute(sketch_table.insert(), sketches)
+
+
+def rebuild_days(connection, days: Iterable[date]) -> int:
+    count = 0
+    for day in days:
+        rebuild_day(connection, day)
+        count += 1
+    return count
+
+
+def _unsettled_days(connection) -> List[date]:
+    """Today, and yesterday until it has been rebuilt after settling."""
+    now = datetime.utcnow()
+    today = now.date()
+    yesterday = today - timedelta(days=1)
+    updated_at = connection.execute(
+        select(daily_table.c.updated_at).where(daily_table.c.day == yesterday)
+    ).scalar()
+    settled_after = datetime.combine(today, time.min) + SETTLE
+    if updated_at is not None and _as_datetime(updated_at) >= settled_after:
+        return [today]
+    return [yesterday, today]
+
+
+def refresh_recent(connection) -> int:
+    """Rebuild the days still receiving views; returns days rebuilt."""
+    return rebuild_days(connection, _unsettled_days(connection))
+
+
+def refresh_recent_days(engine) -> int:
+    """``refresh_recent`` in its own transaction on ``engine``."""
+    with engine.begin() as conn:
+        return refresh_recent(conn)
+
+
+def refresh_if_stale(db: Session):
+    """Rebuild recent days from a request if the scheduler hasn't lately."""
+    updated_at = db.execute(
+        select(daily_table.c.updated_at).where(daily_table.c.day == datetime.utcnow().date())
+    ).scalar()
+    stale_before = datetime.utcnow() - timedelta(minutes=settings.analytics_rollup_minutes)
+    if updated_at is not None and _as_datetime(updated_at) >= stale_before:
+        return
+    try:
+        refresh_recent(db.connection())
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"[Analytics] Could not refresh visitor rollups: {e}")
+
+
+def ensure_visitor_rollups(engine):
+    """Build the rollups for every day with raw views if they are empty."""
+    with engine.begin() as conn:
+        # Every rebuilt day has a sketch, so this also backfills sketches
+        # for rollups built before they existed
+        if conn.execute(select(sketch_table.c.start).limit(1)).first():
+            return
+        days = page_view_storage.raw_days(conn)
+        if days:
+            rebuild_days(conn, days)
+            print(f"[Analytics] Built visitor rollups for {len(days)} days")
+
+
+# ============ Retention ============
+
+def expire_raw_data(connection, retention_days: int) -> int:
+    """Drop raw page views and sessions older than ``retention_days``."""
+    cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=retention_days), time.min)
+    dropped = page_view_storage.drop_expired(connection, retention_days)
+    connection.execute(session_table.delete().where(session_table.c.last_activity < cutoff))
+    return dropped
+
+
+# ============ Reading ============
+
+def daily_rows(db: Session, start: date, end: date) -> List[VisitorDailyStats]:
+    return db.query(VisitorDailyStats).filter(
+        VisitorDailyStats.day >= start,
+        VisitorDailyStats.day <= end
+    ).order_by(VisitorDailyStats.day).all()
+
+
+def breakdown(db: Session, dimension: str, start: date, end: date, limit: int = None,
+              order_by_visitors: bool = False) -> List[Dict]:
+    """Views and visitors per value of ``dimension`` over ``start``..``end``."""
+    views = func.sum(VisitorDailyBreakdown.page_views)
+    visitors = func.sum(VisitorDailyBreakdown.visitors)
+    query = db.query(
+        VisitorDailyBreakdown.value,
+        func.max(VisitorDailyBreakdown.label).label("label"),
+        views.label("page_views"),
+        visitors.label("visitors"),
+    ).filter(
+        VisitorDailyBreakdown.dimension == dimension,
+        VisitorDailyBreakdown.day >= start,
+        VisitorDailyBreakdown.day <= end
+    ).group_by(VisitorDailyBreakdown.value).order_by((visitors if order_by_visitors else views).desc())
+    if limit:
+        query = query.limit(limit)
+    return [row._asdict() for row in query.all()]
+
+
+def hourly_rows(db: Session, start: datetime, end: datetime) -> List[VisitorHourlyStats]:
+    return db.query(VisitorHourlyStats).filter(
+        VisitorHourlyStats.hour >= start,
+        VisitorHourlyStats.hour < end
+    ).order_by(VisitorHourlyStats.hour).all()
+
+
+def _hour(value: datetime, up: bool = False) -> datetime:
+    hour = value.replace(minute=0, second=0, microsecond=0)
+    return hour + timedelta(hours=1) if up and hour != value else hour
+
+
+def unique_counts(db: Session, start: datetime, end: datetime,
+                  dimension: str = "", value: str = "") -> Tuple[int, int]:
+    """
+    Estimated distinct visitors and sessions with views in ``[start, end)``,
+    widened to whole hours (whole days for a ``dimension`` ``value``).
+    """
+    start, end = _hour(start), _hour(end, up=True)
+    first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    end_day = end.date()
+    if dimension:
+        first_day, end_day = start.date(), (end - timedelta(microseconds=1)).date() + timedelta(days=1)
+
+    # Whole days from the daily sketches, the hours either side from the hourly ones
+    ranges = []
+    if first_day < end_day:
+        ranges.append(and_(
+            sketch_table.c.period == "day",
+            sketch_table.c.start >= datetime.combine(first_day, time.min),
+            sketch_table.c.start < datetime.combine(end_day, time.min),
+        ))
+        hour_ranges = [(start, datetime.combine(first_day, time.min)), (datetime.combine(end_day, time.min), end)]
+    else:
+        hour_ranges = [(start, end)]
+    if not dimension:
+        ranges += [
+            and_(sketch_table.c.period == "hour", sketch_table.c.start >= low, sketch_table.c.start < high)
+            for low, high in hour_ranges if low < high
+        ]
+    if not ranges:
+        return 0, 0
+
+    rows = db.execute(select(sketch_table.c.visitors, sketch_table.c.sessions).where(
+        sketch_table.c.dimension == dimension,
+        sketch_table.c.value == value,
+        or_(*ranges),
+    )).all()
+    return merged(row[0] for row in rows).count(), merged(row[1] for row in rows).count()
+
+
+def exact_counts(connection, start: datetime, end: datetime,
+                 dimension: str = "", value: str = "") -> Tuple[int, int]:
+    """Distinct visitors and sessions with views in ``[start, end)``, counted from raw views."""
+    views = page_view_storage.raw_page_views(connection, start, end)
+    query = select(func.count(distinct(views.c.visitor_hash)), func.count(distinct(views.c.session_id)))
+    if dimension:
+        column = views.c[DIMENSIONS[dimension][0]]
+        query = query.where(or_(column == value, column.is_(None)) if value == "" else column == value)
+    visitors, sessions = connection.execute(query).one()
+    return visitors or 0, sessions or 0
@@ -7,11 +7,13 @@ from app.utils.auth import (
     get_current_user_required,
     get_current_admin,
     get_current_delivery_man,
+    get_current_user_async,
+    get_current_user_required_async,
+    get_current_admin_async,
     oauth2_scheme
 )
 from app.utils.helpers import (
     generate_slug,
-    generate_order_number,
     calculate_shipping,
     validate_phone_bd,
     format_price
@@ -26,9 +28,11 @@ __all__ = [
     "get_current_user_required",
     "get_current_admin",
     "get_current_delivery_man",
+    "get_current_user_async",
+    "get_current_user_required_async",
+    "get_current_admin_async",
     "oauth2_scheme",
     "generate_slug",
-    "generate_order_number",
     "calculate_shipping",
     "validate_phone_bd",
     "format_price"
@@ -4,9 +4,11 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.config import settings
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -35,79 +37,83 @@ def decode_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
-async def get_current_user(
-    token: Optional[str] = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> Optional[User]:
+def _token_user_id(token: Optional[str]) -> Optional[int]:
     if not token:
         return None
-    
     payload = decode_token(token)
-    if payload is None:
-        return None
-    
-    user_id = payload.get("sub")
-    if user_id is None:
-        return None
-    
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None or not user.is_active:
+    if payload is None or payload.get("sub") is None:
         return None
-    
-    return user
+    return int(payload["sub"])
 
-async def get_current_user_required(
-    token: Optional[str] = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+def _required_token_user_id(token: Optional[str]) -> int:
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    payload = decode_token(token)
-    if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    user_id = payload.get("sub")
+
+    user_id = _token_user_id(token)
     if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    return user_id
+
+def _check_required_user(user: Optional[User]) -> User:
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User is deactivated",
         )
-    
     return user
 
-async def get_current_admin(
-    current_user: User = Depends(get_current_user_required)
-) -> User:
-    if current_user.role != "admin":
+def _check_admin(user: User) -> User:
+    if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access required",
         )
-    return current_user
+    return user
+
+# Sync dependencies are plain functions so FastAPI runs them in its
+# threadpool instead of blocking the event loop on the user lookup
+
+def get_current_user(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> Optional[User]:
+    user_id = _token_user_id(token)
+    if user_id is None:
+        return None
+    
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None or not user.is_active:
+        return None
+    
+    return user
+
+def get_current_user_required(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    user_id = _required_token_user_id(token)
+    user = db.query(User).filter(User.id == user_id).first()
+    return _check_required_user(user)
+
+async def get_current_admin(
+    current_user: User = Depends(get_current_user_required)
+) -> User:
+    return _check_admin(current_user)
 
 async def get_current_delivery_man(
     current_user: User = Depends(get_current_user_required)
@@ -118,3 +124,34 @@ async def get_current_delivery_man(
             detail="Delivery access required",
         )
     return current_user
+
+# ============ Async dependencies ============
+# For routers using get_async_db; the user is loaded into the request's
+# async session so handlers can modify and commit it.
+
+async def get_current_user_async(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[User]:
+    user_id = _token_user_id(token)
+    if user_id is None:
+        return None
+
+    user = await db.get(User, user_id)
+    if user is None or not user.is_active:
+        return None
+
+    return user
+
+async def get_current_user_required_async(
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    user_id = _required_token_user_id(token)
+    user = await db.get(User, user_id)
+    return _check_required_user(user)
+
+async def get_current_admin_async(
+    current_user: User = Depends(get_current_user_required_async)
+) -> User:
+    return _check_admin(current_user)
@@ -15,16 +15,6 @@ def generate_slug(text: str) -> str:
     slug = slug.strip('-')
     return slug
 
-def generate_order_number() -> str:
-    """Generate a unique order number."""
-    import random
-    import string
-    from datetime import datetime
-    
-    date_part = datetime.now().strftime("%Y%m%d")
-    random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    return f"ORD-{date_part}-{random_part}"
-
 def calculate_shipping(subtotal: float, city: str = None) -> float:
     """Calculate shipping cost based on subtotal and city."""
     if subtotal >= 5000:
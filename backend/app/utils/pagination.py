@@ -0,0 +1,218 @@
+"""
+Keyset (cursor) pagination helpers.
+
+``offset((page - 1) * size)`` makes the database walk and discard every
+earlier row, so deep pages get linearly slower. Keyset pagination instead
+remembers the sort key of the last row returned and asks for rows strictly
+after it, which is an index range scan at any depth.
+
+Cursors are opaque, URL-safe tokens encoding the last row's sort values
+(always ending with its id as a tie-breaker). Totals for cursor pages come
+from a short-lived count cache, since re-running the count for every page
+is most of the cost of paginating a large filtered table.
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import date, datetime
+from typing import Any, Hashable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Date, DateTime, Select, and_, func, literal, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+
+# (column, descending) pairs, most significant first
+SortKey = Sequence[Tuple[Any, bool]]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode a row's sort values as an opaque cursor token."""
+    payload = [v.isoformat() if isinstance(v, (datetime, date)) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_key: SortKey) -> List[Any]:
+    """Decode a cursor token back into typed sort values."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(sort_key):
+            raise ValueError("cursor does not match sort order")
+
+        typed = []
+        for value, (column, _) in zip(values, sort_key):
+            if value is not None and isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            elif value is not None and isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+            typed.append(value)
+        return typed
+    except (ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def _comparable(sqlite: bool, sort_key: SortKey, values: Sequence[Any]):
+    """
+    Sort expressions and typed bound values to compare them against.
+
+    SQLite stores datetimes as text in more than one format (server_default
+    rows have no fractional seconds, ORM-written rows do), so there both
+    sides are normalized to the same millisecond-precision text.
+    """
+    expressions, bound = [], []
+    for (column, _), value in zip(sort_key, values):
+        if sqlite and isinstance(column.type, DateTime):
+            expressions.append(func.strftime("%Y-%m-%d %H:%M:%f", column))
+            bound.append(literal(value.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] if value else None))
+        else:
+            expressions.append(column)
+            bound.append(literal(value, type_=column.type))
+    return expressions, bound
+
+
+def _after(expressions: list, values: list, directions: List[bool]):
+    """Predicate selecting rows strictly after ``values`` in sort order."""
+    # Uniform direction: a row-value comparison the planner turns into a
+    # single index range scan
+    if len(set(directions)) == 1:
+        if directions[0]:
+            return tuple_(*expressions) < tuple_(*values)
+        return tuple_(*expressions) > tuple_(*values)
+
+    # Mixed directions: (a > x) OR (a = x AND b < y) OR ...
+    clauses = []
+    for i, descending in enumerate(directions):
+        equal = [expressions[j] == values[j] for j in range(i)]
+        step = expressions[i] < values[i] if descending else expressions[i] > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def _keyset_page(query, sqlite: bool, sort_key: SortKey, limit: int, cursor: Optional[str]):
+    """Apply the keyset filter, order and limit to a Query or Select."""
+    directions = [descending for _, descending in sort_key]
+    expressions, _ = _comparable(sqlite, sort_key, [None] * len(sort_key))
+
+    if cursor:
+        _, values = _comparable(sqlite, sort_key, decode_cursor(cursor, sort_key))
+        query = query.filter(_after(expressions, values, directions))
+
+    query = query.order_by(*[
+        expr.desc() if descending else expr.asc()
+        for expr, descending in zip(expressions, directions)
+    ])
+    # One extra row tells whether there is a next page
+    return query.limit(limit + 1)
+
+
+def _split_page(rows: list, sort_key: SortKey, limit: int) -> Tuple[list, Optional[str]]:
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, cursor_for(rows[-1], sort_key)
+    return rows, None
+
+
+def _is_sqlite(session) -> bool:
+    return session.get_bind().dialect.name == "sqlite"
+
+
+def paginate_keyset(
+    query: Query,
+    sort_key: SortKey,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one keyset page of ``query``.
+
+    ``sort_key`` must end with a unique column (normally the primary key)
+    and its columns must be non-null. Returns ``(rows, next_cursor)``;
+    ``next_cursor`` is None on the last page.
+    """
+    page = _keyset_page(query, _is_sqlite(query.session), sort_key, limit, cursor)
+    return _split_page(page.all(), sort_key, limit)
+
+
+async def paginate_keyset_async(
+    db: AsyncSession,
+    stmt: Select,
+    sort_key: SortKey,
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[list, Optional[str]]:
+    """``paginate_keyset`` for a ``select(Model)`` run on an AsyncSession."""
+    page = _keyset_page(stmt, _is_sqlite(db), sort_key, limit, cursor)
+    rows = (await db.scalars(page)).all()
+    return _split_page(list(rows), sort_key, limit)
+
+
+def cursor_for(row: Any, sort_key: SortKey) -> str:
+    """Build the cursor pointing just after ``row``."""
+    return encode_cursor([getattr(row, column.key) for column, _ in sort_key])
+
+
+# ============ Cached totals ============
+
+class _CountCache:
+    """Small TTL cache of filtered row counts, shared per process."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, ttl: int) -> Optional[int]:
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry and time.time() - entry[1] < ttl:
+                return entry[0]
+        return None
+
+    def set(self, key: Hashable, count: int):
+        with self._lock:
+            if len(self._counts) >= self.max_entries:
+                # Drop the oldest entry
+                oldest = min(self._counts, key=lambda k: self._counts[k][1])
+                del self._counts[oldest]
+            self._counts[key] = (count, time.time())
+
+
+count_cache = _CountCache()
+
+
+def cached_count(query: Query, key: Hashable, ttl: int = 60) -> int:
+    """
+    Row count for ``query``, reused for ``ttl`` seconds per ``key``.
+
+    The key should capture every filter applied to the query. The result
+    may lag recent writes by up to ``ttl``, so responses should flag it
+    as an estimate.
+    """
+    count = count_cache.get(key, ttl)
+    if count is None:
+        count = query.order_by(None).count()
+        count_cache.set(key, count)
+    return count
+
+
+async def count_rows(db: AsyncSession, stmt: Select) -> int:
+    """Row count of a ``select()``, the async counterpart of ``Query.count()``."""
+    counted = select(func.count()).select_from(stmt.order_by(None).subquery())
+    return (await db.execute(counted)).scalar_one()
+
+
+async def cached_count_async(db: AsyncSession, stmt: Select, key: Hashable, ttl: int = 60) -> int:
+    """``cached_count`` for a ``select()`` run on an AsyncSession."""
+    count = count_cache.get(key, ttl)
+    if count is None:
+        count = await count_rows(db, stmt)
+        count_cache.set(key, count)
+    return count
@@ -0,0 +1,43 @@
+"""
+Idempotent schema helpers for Alembic migrations.
+
+The baseline migration only creates the tables that are missing, and
+databases created before migrations existed may already carry columns
+added by hand. Migrations therefore check before adding, so ``upgrade head``
+is safe on a fresh database, an old create_all database and a migrated one.
+"""
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+def has_column(table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(op.get_bind()).get_columns(table)}
+
+
+def has_index(table: str, name: str) -> bool:
+    return name in {i["name"] for i in inspect(op.get_bind()).get_indexes(table)}
+
+
+def add_column_if_missing(table: str, column):
+    if not has_column(table, column.name):
+        op.add_column(table, column)
+
+
+def create_index_if_missing(name: str, table: str, columns: list, **kwargs):
+    if not has_index(table, name):
+        op.create_index(name, table, columns, **kwargs)
+
+
+def drop_index_if_exists(name: str, table: str):
+    if has_index(table, name):
+        op.drop_index(name, table_name=table)
+
+
+def has_table(table: str) -> bool:
+    return inspect(op.get_bind()).has_table(table)
+
+
+def has_foreign_key(table: str, column: str) -> bool:
+    foreign_keys = inspect(op.get_bind()).get_foreign_keys(table)
+    return any(fk["constrained_columns"] == [column] for fk in foreign_keys)
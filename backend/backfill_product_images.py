@@ -0,0 +1,24 @@
+"""
+Recompute products.primary_image_url and products.has_image from
+product_images for every product.
+
+The mapper events on ProductImage keep both columns current, but bulk
+writes (``query(...).delete()``, raw SQL, restores) skip them. Re-running
+this is safe and repairs any drift. The columns themselves come from
+migration 0002 (``python migrate.py``).
+
+Usage: python backfill_product_images.py
+"""
+
+from app.database import engine
+from app.models.models import resync_all_product_image_columns
+
+
+def main():
+    with engine.begin() as conn:
+        updated = resync_all_product_image_columns(conn)
+    print(f"Backfilled image columns for {updated} products.")
+
+
+if __name__ == "__main__":
+    main()
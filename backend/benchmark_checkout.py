@@ -0,0 +1,105 @@
+"""
+Checkout latency benchmark.
+
+Places orders against a running server, with a fixed number in flight at
+a time, and reports p50/p95/p99 latency of ``POST /orders``. Each order
+buys one unit of each of ``--items`` in-stock products (optionally with a
+voucher), so the run exercises product loading, stock reservation and the
+order, item and tracking inserts. Run it against a test database; it
+places real orders and uses up stock.
+
+Usage:
+    python benchmark_checkout.py --url http://localhost:8000 --token <customer JWT> --orders 300
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+
+def summarize(label: str, latencies: list):
+    latencies = sorted(latencies)
+    if not latencies:
+        print(f"{label:<18} n=0")
+        return
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    print(f"{label:<18} n={len(latencies):<5} p50={statistics.median(latencies):8.1f}ms "
+          f"p95={percentile(0.95):8.1f}ms p99={percentile(0.99):8.1f}ms max={latencies[-1]:8.1f}ms")
+
+
+async def pick_products(client: httpx.AsyncClient, count: int, orders: int) -> list:
+    response = await client.get("/api/v1/products", params={"page_size": 50})
+    response.raise_for_status()
+    products = sorted(response.json()["items"], key=lambda p: p["stock"], reverse=True)[:count]
+    if len(products) < count:
+        raise SystemExit(f"Need {count} products, found {len(products)}")
+    short = [p["name"] for p in products if p["stock"] < orders]
+    if short:
+        print(f"Warning: not enough stock for {orders} orders of: {', '.join(short)}")
+    return products
+
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+        products = await pick_products(client, args.items, args.orders)
+        body = {
+            "items": [{"product_id": p["id"], "quantity": 1} for p in products],
+            "payment_method": "cod",
+            "shipping_name": "Benchmark",
+            "shipping_phone": "01700000000",
+            "shipping_address": "Benchmark address",
+            "shipping_city": "Dhaka",
+            "voucher_code": args.voucher,
+        }
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies, statuses = [], Counter()
+
+        async def place_order():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/orders", json=body,
+                    headers={**headers, "Idempotency-Key": uuid.uuid4().hex}
+                )
+                elapsed = (time.perf_counter() - started) * 1000
+                statuses[response.status_code] += 1
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+
+        # Warm up connections and caches
+        for _ in range(min(5, args.orders)):
+            await place_order()
+        latencies.clear()
+        statuses.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(place_order() for _ in range(args.orders)))
+        elapsed = time.perf_counter() - started
+
+    print(f"{args.orders} orders of {args.items} items, {args.concurrency} in flight: "
+          f"{elapsed:.1f}s ({args.orders / elapsed:.1f} orders/s)")
+    print(f"status codes: {dict(statuses)}")
+    summarize("checkout", latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="JWT of the buying account")
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--items", type=int, default=3, help="Line items per order")
+    parser.add_argument("--voucher", help="Voucher code to apply to every order")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,248 @@
+"""
+User agent and referrer classification microbenchmark.
+
+Classifies a stream of tracked views drawn from a corpus of real user
+agent strings and referrers, skewed the way real traffic is (a few
+browsers make most views), and reports the cost per view of:
+
+- before: the substring-scanning parsers the tracking endpoint used until
+  ``app.services.traffic_classifier`` replaced them (copied below);
+- uncached: the classifier with memoization bypassed;
+- cold / warm: the classifier from an empty LRU, then with it filled.
+
+It also lists the corpus entries whose class changed. User agents should
+classify identically. Referrers differ where the old substring match was
+wrong, e.g. hosts ending in ``t.com`` counted as social. No database or
+server is needed.
+
+Usage:
+    python benchmark_classifier.py --events 200000
+"""
+
+import argparse
+import random
+import re
+import time
+
+from app.services.traffic_classifier import _classify_host, _classify_url, classify_referrer, classify_user_agent
+
+
+USER_AGENTS = [
+    # Chrome
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.6367.82 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.6312.99 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 12; SM-X700) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/124.0.6367.88 Mobile/15E148 Safari/604.1",
+    # Safari
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPad; CPU OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4.1 Safari/605.1.15",
+    # Firefox
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.4; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (Android 14; Mobile; rv:125.0) Gecko/125.0 Firefox/125.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) FxiOS/125.0 Mobile/15E148 Safari/605.1.15",
+    # Edge, Opera, Samsung Internet, in-app browsers
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 Edg/124.0.2478.51",
+    "Mozilla/5.0 (Linux; Android 10; HD1913) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.6367.82 Mobile Safari/537.36 EdgA/124.0.2478.49",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36 OPR/109.0.0.0",
+    "Mozilla/5.0 (Linux; Android 10; VOG-L29) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36 OPR/81.1.4292.78446",
+    "Opera/9.80 (Windows NT 6.1; U; en) Presto/2.10.289 Version/12.02",
+    "Mozilla/5.0 (Linux; Android 14; SAMSUNG SM-S921B) AppleWebKit/537.36 (KHTML, like Gecko) SamsungBrowser/24.0 Chrome/117.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; M2101K6G Build/TKQ1.221013.002; wv) AppleWebKit/537.36 (KHTML, like Gecko) Version/4.0 Chrome/124.0.6367.82 Mobile Safari/537.36 [FB_IAB/FB4A;FBAV/460.0.0.48.109;]",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148 Instagram 327.0.0.31.114 (iPhone14,5; iOS 17_4; en_US; en; scale=3.00; 1170x2532; 597212457)",
+    # Crawlers and tools
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "Mozilla/5.0 (Linux; Android 6.0.1; Nexus 5X Build/MMB29P) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.6367.91 Mobile Safari/537.36 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+    "curl/8.5.0",
+    "python-requests/2.31.0",
+    "",
+]
+
+REFERRERS = [
+    None,
+    "https://www.google.com/",
+    "https://www.google.com/search?q=authentimart+iphone+15&oq=authentimart",
+    "https://www.google.com.bd/",
+    "https://www.bing.com/search?q=samsung+tv+dhaka",
+    "https://duckduckgo.com/",
+    "https://search.yahoo.com/search?p=authentimart",
+    "https://yandex.ru/search/?text=authentimart",
+    "https://www.baidu.com/link?url=abc",
+    "https://l.facebook.com/l.php?u=https%3A%2F%2Fauthentimart.com%2F",
+    "https://m.facebook.com/",
+    "https://lm.facebook.com/",
+    "https://t.co/AbCdEf123",
+    "https://www.instagram.com/",
+    "https://www.linkedin.com/feed/",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://www.reddit.com/r/bangladesh/comments/abc/",
+    "https://www.pinterest.com/pin/123/",
+    "https://www.tiktok.com/@authentimart",
+    "https://mail.google.com/",
+    "https://outlook.live.com/",
+    "https://mail.yahoo.com/d/folders/1",
+    "https://www.microsoft.com/en-us/",
+    "https://www.target.com/",
+    "https://news.ycombinator.com/item?id=1",
+    "https://www.daraz.com.bd/products/abc",
+    "https://shop.example.org:8443/compare",
+    "http://localhost:5173/",
+    "android-app://com.google.android.gm/",
+]
+
+
+# ============ Before ============
+
+def legacy_parse_user_agent(user_agent: str) -> dict:
+    result = {"device_type": "desktop", "browser": "Unknown", "os": "Unknown"}
+    ua = user_agent.lower()
+    if "mobile" in ua or ("android" in ua and "mobile" in ua):
+        result["device_type"] = "mobile"
+    elif "tablet" in ua or "ipad" in ua:
+        result["device_type"] = "tablet"
+    if "chrome" in ua and "edg" not in ua and "opr" not in ua:
+        result["browser"] = "Chrome"
+    elif "firefox" in ua:
+        result["browser"] = "Firefox"
+    elif "safari" in ua and "chrome" not in ua:
+        result["browser"] = "Safari"
+    elif "edg" in ua:
+        result["browser"] = "Edge"
+    elif "opera" in ua or "opr" in ua:
+        result["browser"] = "Opera"
+    if "windows" in ua:
+        result["os"] = "Windows"
+    elif "mac os" in ua or "macos" in ua:
+        result["os"] = "macOS"
+    elif "linux" in ua and "android" not in ua:
+        result["os"] = "Linux"
+    elif "android" in ua:
+        result["os"] = "Android"
+    elif "iphone" in ua or "ipad" in ua:
+        result["os"] = "iOS"
+    return result
+
+
+def legacy_parse_traffic_source(referrer: str, utm_source: str = None) -> tuple:
+    if utm_source:
+        return utm_source, "utm"
+    if not referrer:
+        return "direct", None
+    referrer_lower = referrer.lower()
+    domain_match = re.search(r'https?://([^/]+)', referrer_lower)
+    domain = domain_match.group(1) if domain_match else ""
+    social_domains = ['facebook.com', 'fb.com', 'twitter.com', 't.co',
+                      'instagram.com', 'linkedin.com', 'pinterest.com',
+                      'youtube.com', 'tiktok.com', 'reddit.com']
+    for social in social_domains:
+        if social in domain:
+            return "social", domain
+    search_domains = ['google.', 'bing.com', 'yahoo.', 'duckduckgo.com',
+                      'baidu.com', 'yandex.']
+    for search in search_domains:
+        if search in domain:
+            return "organic_search", domain
+    email_domains = ['mail.google.com', 'outlook.', 'mail.yahoo.']
+    for email in email_domains:
+        if email in domain:
+            return "email", domain
+    return "referral", domain
+
+
+# ============ After ============
+
+def classify(user_agent: str, referrer: str):
+    return classify_user_agent(user_agent), classify_referrer(referrer)
+
+
+def classify_uncached(user_agent: str, referrer: str):
+    host_class = _classify_url.__wrapped__(referrer) if referrer else ("direct", None)
+    return classify_user_agent.__wrapped__(user_agent), host_class
+
+
+def legacy(user_agent: str, referrer: str):
+    return legacy_parse_user_agent(user_agent), legacy_parse_traffic_source(referrer)
+
+
+def clear_caches():
+    classify_user_agent.cache_clear()
+    _classify_url.cache_clear()
+    _classify_host.cache_clear()
+
+
+# ============ Running ============
+
+def views(count: int, seed: int) -> list:
+    """(user agent, referrer) pairs, Zipf-skewed towards the first entries"""
+    rng = random.Random(seed)
+    ua_weights = [1 / (rank + 1) for rank in range(len(USER_AGENTS))]
+    ref_weights = [1 / (rank + 1) for rank in range(len(REFERRERS))]
+    agents = rng.choices(USER_AGENTS, ua_weights, k=count)
+    referrers = rng.choices(REFERRERS, ref_weights, k=count)
+    return list(zip(agents, referrers))
+
+
+def measure(label: str, function, events: list, repeat: int, before_each=None) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if before_each:
+            before_each()
+        start = time.perf_counter()
+        for user_agent, referrer in events:
+            function(user_agent, referrer)
+        best = min(best, time.perf_counter() - start)
+    per_event = best / len(events) * 1e9
+    print(f"{label:<10} {per_event:8.0f} ns/view")
+    return per_event
+
+
+def report_differences():
+    changed = False
+    for user_agent in USER_AGENTS:
+        before = legacy_parse_user_agent(user_agent)
+        after = classify_user_agent(user_agent)._asdict()
+        if before != after:
+            changed = True
+            print(f"  UA changed: {user_agent[:70]!r}: {before} -> {after}")
+    for referrer in REFERRERS:
+        before = legacy_parse_traffic_source(referrer)
+        after = classify_referrer(referrer)
+        if before != after:
+            changed = True
+            print(f"  referrer changed: {referrer!r}: {before[0]} -> {after[0]}")
+    if not changed:
+        print("  none")
+
+
+def main(args):
+    events = views(args.events, args.seed)
+    print(f"{args.events} views, {len(USER_AGENTS)} user agents, {len(REFERRERS)} referrers\n")
+
+    before = measure("before", legacy, events, args.repeat)
+    measure("uncached", classify_uncached, events, args.repeat)
+    measure("cold", classify, events, args.repeat, before_each=clear_caches)
+    warm = measure("warm", classify, events, args.repeat)
+    print(f"\nwarm is {before / warm:.1f}x faster than before")
+
+    print("\nClassification changes:")
+    report_differences()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200000, help="tracked views to classify")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per variant (the fastest is reported)")
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
@@ -5,12 +5,12 @@ import sys
 import os
 sys.path.append(os.getcwd())
 
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal, run_migrations
 from app.models import User, UserRole
 from app.utils import get_password_hash
 
 def create_admin_user():
-    Base.metadata.create_all(bind=engine)
+    run_migrations()
     db = SessionLocal()
     
     try:
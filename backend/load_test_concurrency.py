@@ -0,0 +1,81 @@
+"""
+Concurrency check for the storefront while a slow request is in flight.
+
+Fires bursts of storefront requests against a running server, first on
+their own and then while slow requests (an admin report by default) run
+alongside. When handlers block the event loop, the second run's latency
+jumps to the slow request's duration; with the async/threadpool handlers
+it should stay close to the baseline.
+
+Usage:
+    python load_test_concurrency.py --url http://localhost:8000 --token <admin JWT>
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+STOREFRONT_PATHS = [
+    "/api/v1/products",
+    "/api/v1/products/featured",
+    "/api/v1/products/new-arrivals",
+    "/api/v1/categories",
+    "/api/v1/products?search=lipstick",
+]
+
+
+async def timed_get(client: httpx.AsyncClient, path: str, headers: dict = None) -> float:
+    started = time.perf_counter()
+    response = await client.get(path, headers=headers)
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+async def storefront_burst(client: httpx.AsyncClient, requests: int) -> list:
+    paths = [STOREFRONT_PATHS[i % len(STOREFRONT_PATHS)] for i in range(requests)]
+    return await asyncio.gather(*(timed_get(client, path) for path in paths))
+
+
+def summarize(label: str, latencies: list):
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<28} n={len(latencies):<4} p50={statistics.median(latencies):8.1f}ms "
+          f"p99={p99:8.1f}ms max={latencies[-1]:8.1f}ms")
+    return p99
+
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else None
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+        await storefront_burst(client, len(STOREFRONT_PATHS))  # warm up
+
+        baseline = await storefront_burst(client, args.requests)
+        baseline_p99 = summarize("storefront only", baseline)
+
+        slow_tasks = [
+            asyncio.create_task(timed_get(client, args.slow_path, headers))
+            for _ in range(args.slow_requests)
+        ]
+        await asyncio.sleep(0.05)  # let the slow requests reach the server first
+        contended = await storefront_burst(client, args.requests)
+        slow = await asyncio.gather(*slow_tasks)
+
+        contended_p99 = summarize("storefront + slow requests", contended)
+        summarize(f"slow: {args.slow_path}", slow)
+
+    print(f"\np99 slowdown under contention: {contended_p99 / baseline_p99:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", help="Admin JWT for the slow path")
+    parser.add_argument("--slow-path", default="/api/v1/admin/exports/sales-report")
+    parser.add_argument("--slow-requests", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
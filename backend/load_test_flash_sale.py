@@ -0,0 +1,113 @@
+"""
+Flash sale opening: many buyers checking out the same item at once.
+
+Reads the current flash sale, then fires every buyer's checkout for one of
+its items at the same moment. Reports checkout latency, how many orders got
+the flash price versus the regular price, and checks that neither the
+flash allocation nor the product's stock was oversold. Run it against a
+test database; it places real orders.
+
+Usage:
+    python load_test_flash_sale.py --url http://localhost:8000 --token <customer JWT> --buyers 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+def summarize(label: str, latencies: list):
+    if not latencies:
+        print(f"{label:<28} n=0")
+        return
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<28} n={len(latencies):<4} p50={statistics.median(latencies):8.1f}ms "
+          f"p99={p99:8.1f}ms max={latencies[-1]:8.1f}ms")
+
+
+async def current_item(client: httpx.AsyncClient, product_id: int = None) -> dict:
+    response = await client.get("/api/v1/flash-sales/current")
+    response.raise_for_status()
+    items = response.json()["items"]
+    for item in items:
+        if product_id is None or item["product_id"] == product_id:
+            return item
+    raise SystemExit(f"Product {product_id} is not in the current flash sale")
+
+
+async def product_stock(client: httpx.AsyncClient, product: dict) -> int:
+    response = await client.get(f"/api/v1/products/{product['slug']}")
+    response.raise_for_status()
+    return response.json()["stock"]
+
+
+async def checkout(client: httpx.AsyncClient, headers: dict, product_id: int, quantity: int):
+    body = {
+        "items": [{"product_id": product_id, "quantity": quantity}],
+        "payment_method": "cod",
+        "shipping_name": "Load Test",
+        "shipping_phone": "01700000000",
+        "shipping_address": "Load test address",
+        "shipping_city": "Dhaka",
+    }
+    started = time.perf_counter()
+    response = await client.post("/api/v1/orders", json=body, headers=headers)
+    elapsed = (time.perf_counter() - started) * 1000
+    price = response.json()["items"][0]["price"] if response.status_code == 200 else None
+    return response.status_code, price, elapsed
+
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=args.buyers)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=120, limits=limits) as client:
+        item = await current_item(client, args.product_id)
+        allocation = item["flash_stock"] - (item["sold_count"] or 0)
+        stock_before = await product_stock(client, item["product"])
+        print(f"Item {item['id']} (product {item['product_id']}): flash price {item['flash_price']}, "
+              f"{allocation} flash units left, {stock_before} in stock\n")
+
+        results = await asyncio.gather(*(
+            checkout(client, headers, item["product_id"], args.quantity)
+            for _ in range(args.buyers)
+        ))
+
+        stock_after = await product_stock(client, item["product"])
+
+    statuses = Counter(status_code for status_code, _, _ in results)
+    flash = [ms for status_code, price, ms in results if status_code == 200 and price == item["flash_price"]]
+    regular = [ms for status_code, price, ms in results if status_code == 200 and price != item["flash_price"]]
+    summarize("flash price checkouts", flash)
+    summarize("regular price checkouts", regular)
+    summarize("all checkouts", [ms for _, _, ms in results])
+    print(f"\nstatus codes: {dict(statuses)}")
+
+    flash_units = len(flash) * args.quantity
+    sold_units = (len(flash) + len(regular)) * args.quantity
+    print(f"flash units sold: {flash_units} of {allocation}")
+    print(f"stock: {stock_before} -> {stock_after} ({sold_units} units ordered)")
+
+    problems = []
+    if flash_units > allocation:
+        problems.append("flash allocation oversold")
+    if stock_after < 0 or stock_before - stock_after != sold_units:
+        problems.append("product stock does not match the orders placed")
+    if any(status_code >= 500 for status_code in statuses):
+        problems.append("server errors")
+    print("\n" + ("FAILED: " + ", ".join(problems) if problems else "OK: no oversell"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="JWT of the buying account")
+    parser.add_argument("--product-id", type=int, help="Flash sale product (default: the first item)")
+    parser.add_argument("--buyers", type=int, default=200)
+    parser.add_argument("--quantity", type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -5,9 +5,14 @@ from contextlib import asynccontextmanager
 import os
 
 from app.config import settings
-from app.database import engine, Base
+from app.database import engine
 from app.api.v1 import api_router
-from app.models import *  # Import all models for table creation
+from app.services.autocomplete import build_autocomplete_index
+from app.services.flash_stock import flush_sold_counts
+from app.services.page_view_buffer import flush_page_views
+from app.services.sales_rollup import flush_rollups
+from app.services.realtime_visitors import load_recent
+from app.models import *  # Register all models and their mapper events
 
 # Check if running in serverless environment (Vercel)
 IS_SERVERLESS = os.environ.get("VERCEL") or os.environ.get("AWS_LAMBDA_FUNCTION_NAME")
@@ -16,15 +21,21 @@ IS_SERVERLESS = os.environ.get("VERCEL") or os.environ.get("AWS_LAMBDA_FUNCTION_
 if not IS_SERVERLESS:
     from app.services.background_tasks import start_scheduler, stop_scheduler
 
-# Create database tables
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Create tables
-    Base.metadata.create_all(bind=engine)
+    # The schema, search index and rollups are brought up to date by
+    # migrate.py before the app starts; startup runs no DDL
+
+    # Real-time visitors window, picking up the views of the last minutes
+    if settings.analytics_realtime_in_memory:
+        load_recent(engine)
 
     # Seed initial data if needed
     await seed_initial_data()
 
+    # In-memory autocomplete index, refreshed incrementally on catalog writes
+    build_autocomplete_index()
+
     # Start background task scheduler only in non-serverless environments
     if not IS_SERVERLESS:
         start_scheduler()
@@ -35,6 +46,15 @@ async def lifespan(app: FastAPI):
     if not IS_SERVERLESS:
         stop_scheduler()
 
+    # Flash sale units sold since the last batch
+    await flush_sold_counts()
+
+    # Sales rollup increments since the last batch
+    await flush_rollups()
+
+    # Page views still queued
+    await flush_page_views()
+
 async def seed_initial_data():
     """Seed initial categories and sample products."""
     from app.database import SessionLocal
@@ -0,0 +1,37 @@
+"""
+Bring the database up to date before the app starts.
+
+Runs once per deploy (the Procfile's release step, or ahead of uvicorn in
+the start command), not in the app's startup: every worker used to upgrade
+the schema and build the indexes as it booted, racing the others on
+``alembic_version`` and the same DDL.
+
+- ``alembic upgrade head``
+- the full-text search index (tsvector on PostgreSQL, FTS5 on SQLite)
+- the daily sales rollups, built once from order history
+- upcoming page view partitions (PostgreSQL) and the visitor rollups,
+  built once from raw page views
+
+Every step is idempotent, so running it again is harmless.
+
+Usage: python migrate.py
+"""
+
+from app.database import engine, run_migrations
+from app.services.page_view_storage import ensure_partitions
+from app.services.sales_rollup import ensure_sales_rollups
+from app.services.search import create_search_index
+from app.services.visitor_rollups import ensure_visitor_rollups
+
+
+def main():
+    run_migrations()
+    create_search_index(engine)
+    ensure_sales_rollups(engine)
+    ensure_partitions(engine)
+    ensure_visitor_rollups(engine)
+    print("✅ Database is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,12 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
+from app.database import SessionLocal, run_migrations
 from app.models.models import Category, Product, ProductSpecification, Base
 import re
 
-# Create tables if they don't exist
-Base.metadata.create_all(bind=engine)
+# Bring the schema up to date
+run_migrations()
 
 import random
 import string
@@ -6,12 +6,12 @@ import random
 # Add the current directory to sys.path to allow imports from app
 sys.path.append(os.getcwd())
 
-from app.database import SessionLocal, engine
+from app.database import SessionLocal, run_migrations
 from app.models.models import Base, Category, Product, ProductImage, User, UserRole, Order, OrderItem, OrderStatus, PaymentStatus, Address
 from passlib.context import CryptContext
 
-# Create tables if they don't exist
-Base.metadata.create_all(bind=engine)
+# Bring the schema up to date
+run_migrations()
 
 db = SessionLocal()
 
@@ -9,11 +9,11 @@ import random
 
 sys.path.append(os.getcwd())
 
-from app.database import SessionLocal, engine
-from app.models.models import Base, Category, Product, ProductImage, User, UserRole, Order, OrderItem, OrderStatus, PaymentStatus, OrderTracking, Payment
+from app.database import SessionLocal, run_migrations
+from app.models.models import Base, Category, Product, ProductImage, User, UserRole, Order, OrderItem, OrderStatus, PaymentStatus, OrderTracking, Payment, resync_all_product_image_columns
 from passlib.context import CryptContext
 
-Base.metadata.create_all(bind=engine)
+run_migrations()
 db = SessionLocal()
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -148,6 +148,8 @@ def clear_existing_data():
     """Clear existing products and categories"""
     print("Clearing existing data...")
     db.query(ProductImage).delete()
+    # The bulk delete skips the ProductImage events that keep these current
+    resync_all_product_image_columns(db.connection())
     db.query(OrderTracking).delete()
     db.query(Payment).delete()
     db.query(OrderItem).delete()
@@ -0,0 +1,83 @@
+"""
+Test setup: a throwaway SQLite database brought up to date by migrate.py,
+and the API mounted without the app's lifespan (no seed data, scheduler or
+autocomplete index).
+
+DATABASE_URL is set before anything imports ``app``, since the engines are
+created at import time.
+
+Usage (from backend/): python -m pytest
+"""
+
+import os
+import tempfile
+import uuid
+
+_db_dir = tempfile.mkdtemp(prefix="authentimart-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["CACHE_BACKEND"] = "memory"
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import migrate
+from app.api.v1 import api_router
+from app.database import SessionLocal
+from app.models import Category, Product, ProductImage, User
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    migrate.main()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="session")
+def client():
+    app = FastAPI()
+    app.include_router(api_router, prefix="/api/v1")
+    with TestClient(app) as client:
+        yield client
+
+
+def unique_slug(prefix: str) -> str:
+    return f"{prefix}-{uuid.uuid4().hex[:8]}"
+
+
+def add_category(db, parent: Category = None) -> Category:
+    slug = unique_slug("category")
+    category = Category(name=slug, slug=slug, parent_id=parent.id if parent else None)
+    db.add(category)
+    db.commit()
+    return category
+
+
+def add_products(db, category: Category, count: int, **fields) -> list:
+    """``count`` active products with an image in ``category``."""
+    products = []
+    for _ in range(count):
+        slug = unique_slug("product")
+        product = Product(**{"name": slug, "slug": slug, "price": 100, "stock": 10,
+                             "category_id": category.id, **fields})
+        product.images.append(ProductImage(url=f"/uploads/{slug}.jpg", is_primary=True))
+        products.append(product)
+    db.add_all(products)
+    db.commit()
+    return products
+
+
+def add_customer(db) -> User:
+    email = f"{unique_slug('customer')}@example.com"
+    user = User(name="Customer", email=email, password_hash="x")
+    db.add(user)
+    db.commit()
+    return user
@@ -0,0 +1,41 @@
+"""
+Export downloads resume: a Range request gets the rest of the file as a
+206, not the whole file again.
+"""
+
+import uuid
+
+from app.models import ExportJob
+from app.services import export_jobs
+from app.utils import get_current_admin
+
+from conftest import add_customer
+
+
+def test_export_download_resumes_with_range(client, db, monkeypatch, tmp_path):
+    admin = add_customer(db)
+    monkeypatch.setitem(client.app.dependency_overrides, get_current_admin, lambda: admin)
+
+    content = b"id,total\n" + b"".join(f"{n},{n * 10}\n".encode() for n in range(1000))
+    path = tmp_path / "orders.csv"
+    path.write_bytes(content)
+    job = ExportJob(id=uuid.uuid4().hex, export="orders", format="csv", fingerprint="test",
+                    status=export_jobs.COMPLETED, file_path=str(path), file_size=len(content))
+    db.add(job)
+    db.commit()
+    url = f"/api/v1/admin/exports/jobs/{job.id}/download"
+
+    full = client.get(url)
+    assert full.status_code == 200
+    assert full.content == content
+    assert full.headers["accept-ranges"] == "bytes"
+
+    resumed = client.get(url, headers={"Range": "bytes=100-", "If-Range": full.headers["etag"]})
+    assert resumed.status_code == 206
+    assert resumed.headers["content-range"] == f"bytes 100-{len(content) - 1}/{len(content)}"
+    assert resumed.content == content[100:]
+
+    # The file changed since the first part was fetched: start over
+    stale = client.get(url, headers={"Range": "bytes=100-", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == content
@@ -0,0 +1,47 @@
+"""
+Sketch accuracy, in particular around 2.5 * REGISTERS (about 20k distinct
+values) where the original estimator switched to linear counting and
+overshot by up to 5%.
+"""
+
+import numpy as np
+import pytest
+
+from app.services.hyperloglog import REGISTERS, HyperLogLog, hash_value, merged
+
+SEEDS = 16
+
+
+def relative_errors(distinct: int) -> np.ndarray:
+    errors = []
+    for seed in range(SEEDS):
+        hashes = np.random.default_rng(seed).integers(0, 2**64 - 1, size=distinct, dtype=np.uint64, endpoint=True)
+        errors.append(HyperLogLog().add_hashes(hashes).count() / distinct - 1)
+    return np.array(errors)
+
+
+@pytest.mark.parametrize("distinct", [100, 1_000, 10_000, 15_000, 20_000, 25_000, 30_000, 100_000])
+def test_count_is_within_two_percent(distinct):
+    errors = relative_errors(distinct)
+    assert np.sqrt(np.mean(errors ** 2)) < 0.02
+    # Unbiased through the former linear counting switch
+    assert abs(errors.mean()) < 0.005
+
+
+def test_transition_region_is_covered():
+    assert 10_000 < 2.5 * REGISTERS < 30_000
+
+
+def test_small_counts_are_exact():
+    assert HyperLogLog().count() == 0
+    assert HyperLogLog().add_all(["a", "b", "a", ""]).count() == 2
+    assert HyperLogLog().add_all(str(n) for n in range(50)).count() == 50
+
+
+def test_merge_and_storage_round_trip():
+    first = HyperLogLog().add_all(f"visitor-{n}" for n in range(15_000))
+    second = HyperLogLog().add_all(f"visitor-{n}" for n in range(10_000, 25_000))
+    union = merged([first.to_bytes(), second.to_bytes(), None])
+
+    assert union.count() == HyperLogLog().add_hashes(hash_value(f"visitor-{n}") for n in range(25_000)).count()
+    assert abs(union.count() / 25_000 - 1) < 0.03
@@ -0,0 +1,27 @@
+"""
+The migrations and the models must agree, and autogenerate must leave the
+tables created outside the models (search index, page view day tables)
+alone, or the next revision would drop them.
+"""
+
+from datetime import date
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+from app.database import engine
+from app.services import page_view_storage
+
+
+def test_models_match_migrations():
+    with engine.begin() as conn:
+        page_view_storage.ensure_day_tables(conn, [date.today()])
+
+    backend_dir = Path(__file__).resolve().parents[1]
+    config = Config(str(backend_dir / "alembic.ini"))
+    config.set_main_option("script_location", str(backend_dir / "alembic"))
+    config.attributes["configure_logger"] = False
+
+    # Raises when autogenerate would emit any operation
+    command.check(config)
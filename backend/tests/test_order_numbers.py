@@ -0,0 +1,24 @@
+"""
+Order numbers increase across workers: each draw is one increment of the
+day's sequence unless a larger block is configured.
+"""
+
+import asyncio
+
+from app.services import order_numbers
+
+
+def test_numbers_increase_across_workers(monkeypatch):
+    # Each worker's reserved block, swapped in while it draws
+    blocks = {"a": (None, 1, 0), "b": (None, 1, 0)}
+
+    def draw(worker):
+        monkeypatch.setattr(order_numbers, "_block", blocks[worker])
+        number = asyncio.run(order_numbers.next_order_number())
+        blocks[worker] = order_numbers._block
+        return number
+
+    drawn = [draw(worker) for worker in "abab"]
+
+    assert drawn == sorted(drawn)
+    assert len(set(drawn)) == len(drawn)
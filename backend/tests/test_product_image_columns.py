@@ -0,0 +1,46 @@
+"""
+Product.primary_image_url / has_image follow product_images through the
+mapper events, and the backfill repairs what bulk writes leave stale.
+"""
+
+from sqlalchemy import delete
+
+import backfill_product_images
+from app.models import ProductImage
+
+from conftest import add_category, add_products
+
+
+def test_image_events_keep_columns_current(db):
+    product = add_products(db, add_category(db), 1)[0]
+    db.refresh(product)
+    assert product.has_image
+    assert product.primary_image_url == f"/uploads/{product.slug}.jpg"
+
+    primary = ProductImage(url="/uploads/primary.jpg", is_primary=True)
+    product.images[0].is_primary = False
+    product.images.append(primary)
+    db.commit()
+    db.refresh(product)
+    assert product.primary_image_url == "/uploads/primary.jpg"
+
+    for image in list(product.images):
+        db.delete(image)
+    db.commit()
+    db.refresh(product)
+    assert not product.has_image
+    assert product.primary_image_url is None
+
+
+def test_backfill_repairs_bulk_deletes(db):
+    product = add_products(db, add_category(db), 1)[0]
+    db.execute(delete(ProductImage).where(ProductImage.product_id == product.id))
+    db.commit()
+    db.refresh(product)
+    assert product.has_image  # stale: the bulk delete skipped the events
+
+    backfill_product_images.main()
+
+    db.refresh(product)
+    assert not product.has_image
+    assert product.primary_image_url is None
@@ -0,0 +1,214 @@
+"""
+Storefront endpoints must run a fixed number of queries however many items
+they return: one more per product, category, cart line, sale item or
+bundle item is an N+1.
+"""
+
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.api.v1.cart import get_cart, get_product_list_response
+from app.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.models import CartItem, FlashSale, FlashSaleItem, Product, ProductBundle, ProductBundleItem, ProductImage
+from app.services.autocomplete import autocomplete_index
+from app.services.response_cache import response_cache
+from app.services.cache import MemoryBackend
+from app.utils import pagination
+
+from conftest import add_category, add_customer, add_products, unique_slug
+
+
+# (path, size parameter, key of the item list in the response)
+LISTINGS = [
+    ("/api/v1/products", "page_size", "items"),
+    ("/api/v1/products/featured", "limit", "items"),
+    ("/api/v1/products/new-arrivals", "limit", "items"),
+    ("/api/v1/products/best-sellers", "limit", "items"),
+    ("/api/v1/categories/homepage", "limit", None),
+]
+
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements run on either engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    targets = (engine, async_engine.sync_engine)
+    for target in targets:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+
+def clear_caches(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend())
+    monkeypatch.setattr(pagination, "count_cache", pagination._CountCache())
+
+
+def fetch(client, monkeypatch, path: str, key):
+    """(queries run, items returned) for an uncached request to ``path``."""
+    clear_caches(monkeypatch)
+    with count_queries() as statements:
+        response = client.get(path)
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return len(statements), len(body[key] if key else body)
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    """Enough parent categories, subcategories and products to fill a page of 50"""
+    db = SessionLocal()
+    try:
+        for _ in range(12):
+            parent = add_category(db)
+            child = add_category(db, parent)
+            add_products(db, parent, 3, is_featured=True, is_new=True)
+            add_products(db, child, 3, is_featured=True, is_new=True)
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("path, size, key", LISTINGS)
+def test_listing_query_count_is_constant(client, catalog, monkeypatch, path, size, key):
+    small_queries, small_items = fetch(client, monkeypatch, f"{path}?{size}=2", key)
+    large_queries, large_items = fetch(client, monkeypatch, f"{path}?{size}=50", key)
+
+    assert small_items == 2
+    assert large_items > 10
+    assert large_queries == small_queries
+
+
+# ============ Search autocomplete ============
+
+def test_autocomplete_query_count_is_constant(client, catalog, monkeypatch):
+    # The database path, taken until the in-memory index is built
+    monkeypatch.setattr(autocomplete_index, "built", False)
+    small_queries, small_items = fetch(client, monkeypatch, "/api/v1/products/search/autocomplete?q=product&limit=2",
+                                       "suggestions")
+    large_queries, large_items = fetch(client, monkeypatch, "/api/v1/products/search/autocomplete?q=product&limit=20",
+                                       "suggestions")
+
+    assert small_items < large_items
+    assert large_queries == small_queries
+
+
+# ============ Cart ============
+
+def count_async(work):
+    """(queries run, result) of ``await work(db)`` in a fresh async session."""
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await work(db)
+
+    with count_queries() as statements:
+        result = asyncio.run(run())
+    return len(statements), result
+
+
+def fill_cart(db, lines: int):
+    customer = add_customer(db)
+    for product in add_products(db, add_category(db), lines):
+        db.add(CartItem(user_id=customer.id, product_id=product.id, quantity=2))
+    db.commit()
+    return customer
+
+
+def test_cart_query_count_is_constant(db):
+    small, large = fill_cart(db, 2), fill_cart(db, 20)
+
+    small_queries, small_cart = count_async(lambda session: get_cart(current_user=small, db=session))
+    large_queries, large_cart = count_async(lambda session: get_cart(current_user=large, db=session))
+
+    assert len(small_cart["items"]) == 2
+    assert len(large_cart["items"]) == 20
+    assert large_queries == small_queries
+
+
+def test_cart_product_card_query_count_is_constant(db):
+    plain, gallery = add_products(db, add_category(db), 2)
+    for position in range(8):
+        gallery.images.append(ProductImage(url=f"/uploads/{gallery.slug}-{position}.jpg"))
+    db.commit()
+
+    async def card(session, product_id):
+        return await get_product_list_response(session, await session.get(Product, product_id))
+
+    plain_queries, _ = count_async(lambda session: card(session, plain.id))
+    gallery_queries, gallery_card = count_async(lambda session: card(session, gallery.id))
+
+    assert gallery_card["id"] == gallery.id
+    assert gallery_queries == plain_queries
+
+
+# ============ Flash sales ============
+
+def add_flash_sale(db, items: int, active: bool = True) -> FlashSale:
+    now = datetime.now(timezone.utc)
+    slug = unique_slug("sale")
+    sale = FlashSale(name=slug, slug=slug, start_time=now - timedelta(hours=1),
+                     end_time=now + timedelta(hours=1), is_active=active)
+    for position, product in enumerate(add_products(db, add_category(db), items)):
+        sale.items.append(FlashSaleItem(product_id=product.id, flash_price=50, flash_stock=10,
+                                        sold_count=0, sort_order=position))
+    db.add(sale)
+    db.commit()
+    return sale
+
+
+def test_flash_sale_items_query_count_is_constant(client, db, monkeypatch):
+    # get_flash_sale_with_items through the admin lookup, which includes inactive sales
+    small, large = add_flash_sale(db, 2, active=False), add_flash_sale(db, 20, active=False)
+
+    small_queries, small_items = fetch(client, monkeypatch, f"/api/v1/flash-sales/by-id/{small.id}", "items")
+    large_queries, large_items = fetch(client, monkeypatch, f"/api/v1/flash-sales/by-id/{large.id}", "items")
+
+    assert (small_items, large_items) == (2, 20)
+    assert large_queries == small_queries
+
+
+def test_current_flash_sale_query_count_is_constant(client, db, monkeypatch):
+    sale = add_flash_sale(db, 2)
+    small_queries, small_items = fetch(client, monkeypatch, "/api/v1/flash-sales/current", "items")
+    sale.is_active = False
+    db.commit()
+
+    sale = add_flash_sale(db, 20)
+    large_queries, large_items = fetch(client, monkeypatch, "/api/v1/flash-sales/current", "items")
+    sale.is_active = False
+    db.commit()
+
+    assert (small_items, large_items) == (2, 20)
+    assert large_queries == small_queries
+
+
+# ============ Bundles ============
+
+def add_bundle(db, items: int) -> ProductBundle:
+    slug = unique_slug("bundle")
+    bundle = ProductBundle(name=slug, slug=slug, bundle_price=100)
+    for product in add_products(db, add_category(db), items):
+        bundle.items.append(ProductBundleItem(product_id=product.id, quantity=1))
+    db.add(bundle)
+    db.commit()
+    return bundle
+
+
+def test_bundle_query_count_is_constant(client, db, monkeypatch):
+    small, large = add_bundle(db, 2), add_bundle(db, 20)
+
+    small_queries, small_items = fetch(client, monkeypatch, f"/api/v1/bundles/{small.slug}", "items")
+    large_queries, large_items = fetch(client, monkeypatch, f"/api/v1/bundles/{large.slug}", "items")
+
+    assert (small_items, large_items) == (2, 20)
+    assert large_queries == small_queries
@@ -0,0 +1,57 @@
+"""
+The hot listing queries must be served by the indexes the migrations add:
+each plan has to name its index, on the database migrate.py built.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.database import engine
+
+
+# (SQL, index expected in the plan)
+HOT_QUERIES = [
+    # Featured products, newest first
+    ("SELECT id FROM products WHERE is_active = :yes AND is_featured = :yes "
+     "ORDER BY created_at DESC LIMIT 20", "ix_products_active_featured_created"),
+    # New arrivals, newest first
+    ("SELECT id FROM products WHERE is_active = :yes AND is_new = :yes "
+     "ORDER BY created_at DESC LIMIT 20", "ix_products_active_new_created"),
+    # Products in a category
+    ("SELECT id FROM products WHERE category_id = 1", "ix_products_category_id"),
+    # Images of a product
+    ("SELECT url FROM product_images WHERE product_id = 1", "ix_product_images_product_id"),
+    # A customer's order history
+    ("SELECT id FROM orders WHERE user_id = 1 ORDER BY created_at DESC LIMIT 20",
+     "ix_orders_user_created"),
+    # Admin orders by status
+    ("SELECT id FROM orders WHERE status = 'PENDING' AND payment_status = 'PAID' "
+     "ORDER BY created_at DESC LIMIT 20", "ix_orders_status_payment_created"),
+    # Paid revenue in a date range
+    ("SELECT SUM(total) FROM orders WHERE payment_status = 'PAID' "
+     "AND created_at >= '2026-01-01' AND created_at < '2026-02-01'", "ix_orders_payment_created"),
+    # Items of an order
+    ("SELECT product_id FROM order_items WHERE order_id = 1", "ix_order_items_order_id"),
+    # A user's cart
+    ("SELECT product_id FROM cart_items WHERE user_id = 1", "ix_cart_items_user_id"),
+    # A product's reviews
+    ("SELECT id FROM reviews WHERE product_id = 1", "ix_reviews_product_id"),
+]
+
+
+def explain(conn, sql: str) -> str:
+    if conn.dialect.name == "postgresql":
+        # Small test tables are cheaper to scan; ask the planner for the index plan
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = conn.execute(text(f"EXPLAIN {sql}"), {"yes": True}).all()
+        return "\n".join(row[0] for row in rows)
+
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), {"yes": True}).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("sql, index", HOT_QUERIES, ids=[index for _, index in HOT_QUERIES])
+def test_hot_query_uses_its_index(sql, index):
+    with engine.begin() as conn:
+        plan = explain(conn, sql)
+    assert index in plan, plan
@@ -0,0 +1,61 @@
+"""
+Hundreds of checkouts racing for the last few units of one product: the
+conditional stock reservation must never oversell, whatever order the
+transactions land in.
+"""
+
+import asyncio
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+
+from app.api.v1.orders import _place_order
+from app.database import AsyncSessionLocal
+from app.models import OrderItem, Product, User
+from app.schemas import OrderCreate
+
+from conftest import add_category, add_customer, add_products
+
+
+INITIAL_STOCK = 5
+CHECKOUTS = 300
+
+
+async def checkout(order: OrderCreate, customer: User) -> bool:
+    """Place ``order`` in its own session; False when checkout refused it"""
+    async with AsyncSessionLocal() as db:
+        try:
+            await _place_order(order, customer, db)
+        except HTTPException:
+            return False
+    return True
+
+
+def test_concurrent_checkouts_never_oversell(db):
+    product = add_products(db, add_category(db), 1, stock=INITIAL_STOCK)[0]
+    customer = add_customer(db)
+    order = OrderCreate(
+        items=[{"product_id": product.id, "quantity": 1}],
+        payment_method="cod",
+        shipping_name="Customer",
+        shipping_phone="01700000000",
+        shipping_address="House 1, Road 1",
+        shipping_city="Dhaka",
+    )
+
+    async def run():
+        return await asyncio.gather(*(checkout(order, customer) for _ in range(CHECKOUTS)))
+
+    placed = sum(asyncio.run(run()))
+
+    db.expire_all()
+    stock = db.scalar(select(Product.stock).where(Product.id == product.id))
+    sold = db.scalar(
+        select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.product_id == product.id)
+    )
+
+    assert placed > 0
+    assert stock >= 0
+    assert sold <= INITIAL_STOCK
+    assert sold == placed
+    assert stock + sold == INITIAL_STOCK
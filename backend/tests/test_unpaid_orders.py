@@ -0,0 +1,58 @@
+"""
+Unpaid orders past the payment timeout are cancelled and their stock
+reservation released, off the event loop.
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+from app.api.v1.orders import _place_order
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.models import Order, OrderTracking
+from app.schemas import OrderCreate
+from app.services import background_tasks
+
+from conftest import add_category, add_customer, add_products
+
+
+def place(product, customer, payment_method: str) -> int:
+    order = OrderCreate(
+        items=[{"product_id": product.id, "quantity": 2}],
+        payment_method=payment_method,
+        shipping_name="Customer",
+        shipping_phone="01700000000",
+        shipping_address="House 1, Road 1",
+        shipping_city="Dhaka",
+    )
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return (await _place_order(order, customer, db))["id"]
+
+    return asyncio.run(run())
+
+
+def test_unpaid_orders_are_cancelled_and_restocked(db, monkeypatch):
+    product = add_products(db, add_category(db), 1, stock=5)[0]
+    customer = add_customer(db)
+    unpaid, cod = place(product, customer, "bkash"), place(product, customer, "cod")
+    expired = datetime.utcnow() - timedelta(hours=settings.payment_timeout_hours + 1)
+    db.query(Order).filter(Order.id.in_([unpaid, cod])).update({"created_at": expired})
+    db.commit()
+
+    # The thread the cancellations ran on; asyncio.run keeps the loop on this one
+    threads = []
+    work = background_tasks._cancel_unpaid_orders
+    monkeypatch.setattr(background_tasks, "_cancel_unpaid_orders",
+                        lambda session: threads.append(threading.get_ident()) or work(session))
+
+    asyncio.run(background_tasks.cancel_unpaid_orders())
+
+    db.expire_all()
+    assert threads and threads[0] != threading.get_ident()
+    assert db.get(Order, unpaid).status == "cancelled"
+    assert db.get(Order, cod).status != "cancelled"
+    assert product.stock == 3
+    assert db.query(OrderTracking).filter_by(order_id=unpaid, status="Cancelled").count() == 1
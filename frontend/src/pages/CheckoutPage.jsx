@@ -15,7 +15,7 @@ import {
 import { useCart } from '../context/CartContext'
 import { useAuth } from '../context/AuthContext'
 import { useToast } from '../context/ToastContext'
-import { addressAPI, ordersAPI } from '../utils/api'
+import { addressAPI, ordersAPI, newIdempotencyKey } from '../utils/api'
 import VoucherInput from '../components/VoucherInput'
 import './CheckoutPage.css'
 
@@ -28,6 +28,8 @@ const CheckoutPage = () => {
     const [step, setStep] = useState(1)
     const [paymentMethod, setPaymentMethod] = useState('bkash')
     const [loading, setLoading] = useState(false)
+    // Double submits and retries of this checkout share one key
+    const [idempotencyKey] = useState(newIdempotencyKey)
 
     // Saved addresses
     const [savedAddresses, setSavedAddresses] = useState([])
@@ -183,7 +185,7 @@ const CheckoutPage = () => {
 
         try {
             // Create order via API
-            const response = await ordersAPI.create(orderData)
+            const response = await ordersAPI.create(orderData, idempotencyKey)
 
             if (response.data) {
                 clearCart()
@@ -11,45 +11,35 @@ const AdminInventory = () => {
     const [searchParams, setSearchParams] = useSearchParams()
 
     const [inventory, setInventory] = useState([])
-    const [allInventory, setAllInventory] = useState([])
+    const [counts, setCounts] = useState({})
+    const [nextCursor, setNextCursor] = useState(null)
     const [loading, setLoading] = useState(true)
+    const [loadingMore, setLoadingMore] = useState(false)
     const [filter, setFilter] = useState(searchParams.get('filter') || 'all')
     const [editingStock, setEditingStock] = useState(null)
     const [newStock, setNewStock] = useState('')
 
-    useEffect(() => {
-        fetchAllInventory()
-    }, [])
-
     useEffect(() => {
         fetchInventory()
     }, [filter])
 
-    const fetchAllInventory = async () => {
-        try {
-            const response = await fetch(`${API_URL}/admin/inventory?filter=all`, {
-                headers: { 'Authorization': `Bearer ${adminToken}` }
-            })
-            if (response.ok) {
-                setAllInventory(await response.json())
-            }
-        } catch (error) {
-            console.error('Error fetching all inventory:', error)
-        }
+    const fetchPage = async (cursor) => {
+        const params = new URLSearchParams({ filter })
+        if (cursor) params.set('cursor', cursor)
+        const response = await fetch(`${API_URL}/admin/inventory?${params}`, {
+            headers: { 'Authorization': `Bearer ${adminToken}` }
+        })
+        return response.ok ? response.json() : null
     }
 
     const fetchInventory = async () => {
         try {
             setLoading(true)
-            const response = await fetch(`${API_URL}/admin/inventory?filter=${filter}`, {
-                headers: { 'Authorization': `Bearer ${adminToken}` }
-            })
-            if (response.ok) {
-                const data = await response.json()
-                setInventory(data)
-                if (filter === 'all') {
-                    setAllInventory(data)
-                }
+            const data = await fetchPage(null)
+            if (data) {
+                setInventory(data.items)
+                setCounts(data.counts)
+                setNextCursor(data.next_cursor)
             }
         } catch (error) {
             console.error('Error fetching inventory:', error)
@@ -58,6 +48,23 @@ const AdminInventory = () => {
         }
     }
 
+    const loadMore = async () => {
+        if (!nextCursor) return
+        try {
+            setLoadingMore(true)
+            const data = await fetchPage(nextCursor)
+            if (data) {
+                setInventory(prev => [...prev, ...data.items])
+                setCounts(data.counts)
+                setNextCursor(data.next_cursor)
+            }
+        } catch (error) {
+            console.error('Error loading more inventory:', error)
+        } finally {
+            setLoadingMore(false)
+        }
+    }
+
     const updateStock = async (productId) => {
         try {
             const response = await fetch(`${API_URL}/admin/inventory/${productId}/stock?stock=${newStock}`, {
@@ -68,7 +75,6 @@ const AdminInventory = () => {
                 setEditingStock(null)
                 setNewStock('')
                 fetchInventory()
-                fetchAllInventory()
             }
         } catch (error) {
             console.error('Error updating stock:', error)
@@ -93,12 +99,18 @@ const AdminInventory = () => {
         return statusMap[status] || statusMap.healthy
     }
 
+    const formatCover = (days) => {
+        if (days === null || days === undefined) return 'No recent sales'
+        if (days < 1) return '< 1 day'
+        return `${Math.round(days)} days`
+    }
+
     const stats = {
-        total: allInventory.length,
-        healthy: allInventory.filter(i => i.status === 'healthy').length,
-        low: allInventory.filter(i => i.status === 'low').length,
-        critical: allInventory.filter(i => i.status === 'critical').length,
-        outOfStock: allInventory.filter(i => i.status === 'out_of_stock').length
+        total: Object.values(counts).reduce((sum, n) => sum + n, 0),
+        healthy: counts.healthy || 0,
+        low: counts.low || 0,
+        critical: counts.critical || 0,
+        outOfStock: counts.out_of_stock || 0
     }
 
     return (
@@ -175,6 +187,7 @@ const AdminInventory = () => {
                                 <th>Price</th>
                                 <th>Current Stock</th>
                                 <th>Total Sold</th>
+                                <th>Cover</th>
                                 <th>Status</th>
                                 <th>Actions</th>
                             </tr>
@@ -233,6 +246,7 @@ const AdminInventory = () => {
                                         <td>
                                             <span className="sold-count">{item.sold} sold</span>
                                         </td>
+                                        <td>{formatCover(item.days_of_cover)}</td>
                                         <td>
                                             <span className={`status-badge ${statusInfo.class}`}>
                                                 {statusInfo.icon} {statusInfo.label}
@@ -254,6 +268,17 @@ const AdminInventory = () => {
                             })}
                         </tbody>
                     </table>
+                    {nextCursor && (
+                        <div className="load-more-container">
+                            <button
+                                className="btn btn-primary load-more-btn"
+                                onClick={loadMore}
+                                disabled={loadingMore}
+                            >
+                                {loadingMore ? 'Loading...' : 'Load More'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             )}
         </div>
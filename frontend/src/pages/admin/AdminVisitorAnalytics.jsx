@@ -22,9 +22,19 @@ const AdminVisitorAnalytics = () => {
 
     useEffect(() => {
         if (adminToken) {
-            fetchRealTime()
-            const interval = setInterval(fetchRealTime, 30000)
-            return () => clearInterval(interval)
+            // Live updates over Server-Sent Events; fall back to polling if the stream fails
+            const controller = new AbortController()
+            let interval = null
+            streamRealTime(controller.signal).catch(err => {
+                if (controller.signal.aborted) return
+                console.error('Real-time stream unavailable, polling instead:', err)
+                fetchRealTime()
+                interval = setInterval(fetchRealTime, 30000)
+            })
+            return () => {
+                controller.abort()
+                if (interval) clearInterval(interval)
+            }
         }
     }, [adminToken])
 
@@ -71,6 +81,30 @@ const AdminVisitorAnalytics = () => {
         }
     }
 
+    // EventSource can't send the Authorization header, so read the stream with fetch
+    const streamRealTime = async (signal) => {
+        const res = await fetch(`${API_URL}/visitor-analytics/real-time/stream`, {
+            headers: { 'Authorization': `Bearer ${adminToken}` },
+            signal
+        })
+        if (!res.ok || !res.body) {
+            throw new Error(`status ${res.status}`)
+        }
+        const reader = res.body.pipeThrough(new TextDecoderStream()).getReader()
+        let buffer = ''
+        while (true) {
+            const { value, done } = await reader.read()
+            if (done) throw new Error('stream closed')
+            buffer += value
+            const events = buffer.split('\n\n')
+            buffer = events.pop()
+            for (const event of events) {
+                const data = event.split('\n').find(line => line.startsWith('data: '))
+                if (data) setRealTime(JSON.parse(data.slice(6)))
+            }
+        }
+    }
+
     const generateSampleData = async () => {
         try {
             setGenerating(true)
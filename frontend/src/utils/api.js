@@ -112,9 +112,18 @@ export const wishlistAPI = {
     remove: (productId) => api.delete(`/wishlist/${productId}`),
 }
 
+// One key per checkout attempt; retries with the same key replay the first
+// response instead of placing a second order
+export const newIdempotencyKey = () =>
+    window.crypto?.randomUUID
+        ? window.crypto.randomUUID()
+        : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`
+
 // Orders API
 export const ordersAPI = {
-    create: (data) => api.post('/orders', data),
+    create: (data, idempotencyKey) => api.post('/orders', data, {
+        headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
+    }),
     getAll: () => api.get('/orders'),
     getById: (id) => api.get(`/orders/${id}`),
     cancel: (id) => api.post(`/orders/${id}/cancel`),